@@ -0,0 +1,39 @@
+"""
+Changes Router
+Cursor-based feed of document mutations for incremental client sync.
+"""
+
+import sqlite3
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from backend.db.session import get_db
+from backend.services.change_log import change_log_stats, maybe_compact_change_log, read_changes
+
+router = APIRouter()
+
+
+@router.get("")
+def list_changes(
+    since: int = Query(0, ge=0, description="Cursor: seq of the last change already applied"),
+    limit: int = Query(500, ge=1, le=5000),
+    entity: Optional[List[Literal["po", "dc", "invoice", "srv", "po_note"]]] = Query(
+        None, description="Entity types (default: all)"
+    ),
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """
+    Changes after `since`, oldest first: {seq, entity, entity_id, scope, op, version, created_at}.
+    Continue with `cursor` while `has_more`; `reset` means changes were compacted away and the
+    client should reload its lists (then resume from `head`).
+    """
+    result = read_changes(db, since, limit, entity)
+    maybe_compact_change_log(db, result["head"])
+    return result
+
+
+@router.get("/stats")
+def get_change_log_stats(db: sqlite3.Connection = Depends(get_db)):
+    """Row counts, head cursor and compaction state of the change log"""
+    return change_log_stats(db)
@@ -4,13 +4,12 @@ Provides shared functionality across modules
 """
 
 import logging
-import sqlite3
 from typing import Literal
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Query
 
 from backend.core.utils import get_financial_year
-from backend.db.session import get_db
+from backend.services.number_index import number_index
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +21,6 @@ def check_duplicate_number(
     type: Literal["DC", "Invoice"] = Query(..., description="Type of document to check"),
     number: str = Query(..., description="Document number to check for duplicates"),
     date: str = Query(..., description="Document date (ISO format YYYY-MM-DD)"),
-    db: sqlite3.Connection = Depends(get_db),
 ):
     """
     Check if a DC or Invoice number already exists within the same financial year.
@@ -50,76 +48,15 @@ def check_duplicate_number(
         # Get financial year from date
         fy = get_financial_year(date)
 
-        # Calculate FY boundaries
-        year_start = fy.split("-")[0]
-        full_year_start = f"{year_start}-04-01"
-        year_end = f"20{fy.split('-')[1]}"
-        full_year_end = f"{year_end}-03-31"
-
         exists = False
         conflict_type = None
 
-        if type == "DC":
-            # Check delivery_challans table (same type)
-            dc_result = db.execute(
-                """
-                SELECT 1 FROM delivery_challans 
-                WHERE dc_number = ? 
-                AND dc_date >= ? AND dc_date <= ?
-                LIMIT 1
-                """,
-                (number, full_year_start, full_year_end),
-            ).fetchone()
-
-            if dc_result:
-                exists = True
-                conflict_type = "DC"
-            else:
-                # Check gst_invoices table (cross-document conflict)
-                invoice_result = db.execute(
-                    """
-                    SELECT 1 FROM gst_invoices 
-                    WHERE invoice_number = ? 
-                    AND invoice_date >= ? AND invoice_date <= ?
-                    LIMIT 1
-                    """,
-                    (number, full_year_start, full_year_end),
-                ).fetchone()
-
-                if invoice_result:
-                    exists = True
-                    conflict_type = "Invoice"
-
-        elif type == "Invoice":
-            # Check gst_invoices table (same type)
-            invoice_result = db.execute(
-                """
-                SELECT 1 FROM gst_invoices 
-                WHERE invoice_number = ? 
-                AND invoice_date >= ? AND invoice_date <= ?
-                LIMIT 1
-                """,
-                (number, full_year_start, full_year_end),
-            ).fetchone()
-
-            if invoice_result:
+        # Same type first, then the cross-document conflict (in-memory number index, see number_index.py)
+        for kind in (type, "Invoice" if type == "DC" else "DC"):
+            if number_index.contains(kind, fy, number):
                 exists = True
-                conflict_type = "Invoice"
-            else:
-                # Check delivery_challans table (cross-document conflict)
-                dc_result = db.execute(
-                    """
-                    SELECT 1 FROM delivery_challans 
-                    WHERE dc_number = ? 
-                    AND dc_date >= ? AND dc_date <= ?
-                    LIMIT 1
-                    """,
-                    (number, full_year_start, full_year_end),
-                ).fetchone()
-
-                if dc_result:
-                    exists = True
-                    conflict_type = "DC"
+                conflict_type = kind
+                break
 
         logger.debug(
             f"Duplicate check for {type} #{number} in FY {fy}: "
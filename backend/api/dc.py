@@ -18,6 +18,7 @@ from backend.core.exceptions import (
 )
 from backend.db.models import DCCreate, DCListItem, DCStats
 from backend.db.session import get_db
+from backend.db.streaming import StreamFormat, stream_query, streaming_json_response
 from backend.services import report_service
 from backend.services.dc import (
     check_dc_has_invoice,
@@ -81,10 +82,8 @@ def get_dc_stats(db: sqlite3.Connection = Depends(get_db)):
         raise internal_error("Failed to fetch DC statistics", e) from e
 
 
-@router.get("/", response_model=List[DCListItem])
-def list_dcs(po: Optional[str] = None, db: sqlite3.Connection = Depends(get_db)):
-    """List all Delivery Challans, optionally filtered by PO"""
-
+def _dc_list_query(po: Optional[str] = None):
+    """Build the DC list query (shared by buffered and streamed responses)"""
     # Optimized query with lot-level aggregation for accurate quantity contexts
     query = """
         SELECT 
@@ -127,41 +126,56 @@ def list_dcs(po: Optional[str] = None, db: sqlite3.Connection = Depends(get_db))
 
     query += " GROUP BY dc.dc_number, dc.dc_date, dc.po_number, dc.consignee_name, dc.created_at"
     query += " ORDER BY dc.created_at DESC"
+    return query, params
+
+
+def _to_dc_list_item(row: sqlite3.Row) -> DCListItem:
+    """Map a DC list row to DCListItem with live status and balance"""
+    total_ordered = row["total_ordered_quantity"] or 0
+    total_dispatched_this_dc = row["total_dispatched_quantity"] or 0
+    total_received_this_dc = row["total_received_quantity"] or 0
+    global_dispatched = row["global_dispatched_quantity"] or 0
+
+    # Balance = Total Ordered - Total Dispatched Globally
+    total_pending = max(0, total_ordered - global_dispatched)
+
+    # Status logic: For a DC, 'Ordered' target for its own lifecycle is its dispatched qty
+    status = calculate_entity_status(
+        total_dispatched_this_dc, total_dispatched_this_dc, total_received_this_dc
+    )
+
+    return DCListItem(
+        dc_number=row["dc_number"],
+        dc_date=row["dc_date"],
+        po_number=row["po_number"],
+        consignee_name=row["consignee_name"],
+        status=status,
+        total_value=row["total_value"],
+        created_at=row["created_at"],
+        total_ordered_quantity=total_ordered,
+        total_dispatched_quantity=total_dispatched_this_dc,
+        total_pending_quantity=total_pending,
+        total_received_quantity=total_received_this_dc,
+    )
 
-    rows = db.execute(query, params).fetchall()
 
-    results = []
-    for row in rows:
-        total_ordered = row["total_ordered_quantity"] or 0
-        total_dispatched_this_dc = row["total_dispatched_quantity"] or 0
-        total_received_this_dc = row["total_received_quantity"] or 0
-        global_dispatched = row["global_dispatched_quantity"] or 0
-
-        # Balance = Total Ordered - Total Dispatched Globally
-        total_pending = max(0, total_ordered - global_dispatched)
-
-        # Status logic: For a DC, 'Ordered' target for its own lifecycle is its dispatched qty
-        status = calculate_entity_status(
-            total_dispatched_this_dc, total_dispatched_this_dc, total_received_this_dc
-        )
-
-        results.append(
-            DCListItem(
-                dc_number=row["dc_number"],
-                dc_date=row["dc_date"],
-                po_number=row["po_number"],
-                consignee_name=row["consignee_name"],
-                status=status,
-                total_value=row["total_value"],
-                created_at=row["created_at"],
-                total_ordered_quantity=total_ordered,
-                total_dispatched_quantity=total_dispatched_this_dc,
-                total_pending_quantity=total_pending,
-                total_received_quantity=total_received_this_dc,
-            )
-        )
+@router.get("/", response_model=List[DCListItem])
+def list_dcs(
+    po: Optional[str] = None,
+    stream: Optional[StreamFormat] = None,
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """
+    List all Delivery Challans, optionally filtered by PO.
+    `?stream=ndjson` (or `json`) streams rows straight from the cursor instead of buffering.
+    """
+    query, params = _dc_list_query(po)
 
-    return results
+    if stream:
+        return streaming_json_response(stream_query(query, params, _to_dc_list_item), stream)
+
+    rows = db.execute(query, params).fetchall()
+    return [_to_dc_list_item(row) for row in rows]
 
 
 @router.get("/{dc_number}/invoice")
@@ -0,0 +1,31 @@
+"""
+Events Router
+Server-Sent Events feed of data changes: clients refetch what changed instead of polling.
+"""
+
+from fastapi import APIRouter, Request
+
+from backend.core.errors import service_unavailable
+from backend.core.sse import EventStreamResponse
+from backend.services.change_feed import change_feed
+
+router = APIRouter()
+
+
+@router.get("")
+async def stream_events(request: Request):
+    """
+    text/event-stream of entity changes ('po', 'dc', 'invoice', 'srv').
+
+    Events: `versions` (all version counters, on connect) and `change` (the entities a commit
+    touched, with their new versions); a keep-alive comment is sent while idle.
+    """
+    if not change_feed.accepting():
+        raise service_unavailable("Too many open event streams, retry later", retry_after=5)
+    return EventStreamResponse(change_feed.stream(request.is_disconnected))
+
+
+@router.get("/stats")
+def event_stats():
+    """Open streams, connection cap and watcher counters of this worker"""
+    return change_feed.stats()
@@ -0,0 +1,92 @@
+"""
+Ingestion Jobs Router
+Background PO/SRV upload jobs: enqueue returns a job id immediately, workers ingest the files.
+Files picked up from the watch folder are queued as jobs too (/watch shows what was taken).
+"""
+
+import sqlite3
+from typing import List, Literal
+
+from fastapi import APIRouter, Depends, File, UploadFile
+
+from backend.core.errors import bad_request, conflict, not_found
+from backend.db.session import get_db
+from backend.services.ingest_jobs import (
+    cancel_ingest_job,
+    create_ingest_job,
+    get_ingest_job,
+    get_ingest_job_files,
+    list_ingest_jobs,
+    resume_ingest_job,
+)
+from backend.services.watch_folder import get_watch_status
+
+router = APIRouter()
+
+
+def _require_job(db: sqlite3.Connection, job_id: str) -> dict:
+    job = get_ingest_job(db, job_id)
+    if not job:
+        raise not_found(f"Ingest job {job_id} not found", "IngestJob")
+    return job
+
+
+@router.post("/jobs/{kind}", status_code=202)
+async def enqueue_ingest_job(
+    kind: Literal["po", "srv"],
+    files: List[UploadFile] = File(...),
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """Queue PO or SRV HTML files for background ingestion; poll /jobs/{job_id} for progress"""
+    if not files:
+        raise bad_request("No files uploaded")
+
+    payloads = []
+    for file in files:
+        payloads.append((file.filename, await file.read()))
+        await file.close()
+
+    job_id = create_ingest_job(db, kind, payloads)
+    return get_ingest_job(db, job_id)
+
+
+@router.get("/jobs")
+def list_jobs(limit: int = 50, db: sqlite3.Connection = Depends(get_db)):
+    """Most recent ingest jobs (summary only)"""
+    return list_ingest_jobs(db, limit)
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str, db: sqlite3.Connection = Depends(get_db)):
+    """Job summary plus per-file state, attempts, errors and timing"""
+    job = _require_job(db, job_id)
+    job["files"] = get_ingest_job_files(db, job_id)
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str, db: sqlite3.Connection = Depends(get_db)):
+    """Cancel files that have not started yet (a file already being ingested completes)"""
+    job = _require_job(db, job_id)
+    if job["status"] in ("completed", "failed", "cancelled"):
+        raise conflict(f"Ingest job {job_id} is already {job['status']}")
+
+    cancelled = cancel_ingest_job(db, job_id)
+    return {**get_ingest_job(db, job_id), "cancelled": cancelled}
+
+
+@router.post("/jobs/{job_id}/resume")
+def resume_job(job_id: str, db: sqlite3.Connection = Depends(get_db)):
+    """Re-queue the job's cancelled and failed files"""
+    _require_job(db, job_id)
+    requeued = resume_ingest_job(db, job_id)
+    if not requeued:
+        raise conflict(f"Ingest job {job_id} has no cancelled or failed files to resume")
+
+    return {**get_ingest_job(db, job_id), "requeued": requeued}
+
+
+@router.get("/watch")
+def watch_status(limit: int = 50, db: sqlite3.Connection = Depends(get_db)):
+    """Watch-folder state and the latest files it recorded (queued, duplicate, unrecognized) with their ingest outcome"""
+    return get_watch_status(db, limit)
@@ -5,19 +5,32 @@ CRUD operations and HTML upload/scraping
 
 import logging
 import sqlite3
-from typing import List
+import time
+from typing import List, Optional
 
-from bs4 import BeautifulSoup
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
 
+from backend.core.config import settings
 from backend.core.errors import bad_request, internal_error
 from backend.core.exceptions import ResourceNotFoundError
+from backend.core.sse import EventStreamResponse
 from backend.db.models import PODetail, POListItem, POStats
 from backend.db.session import get_db
+from backend.db.streaming import StreamFormat, streaming_json_response
+from backend.services.change_log import record_change
 from backend.services.ingest_po import POIngestionService
-from backend.services.po_scraper import extract_items, extract_po_header
+from backend.services.parse_cache import (
+    bump_counter,
+    parse_cached,
+    parse_in_order_cached,
+    po_ingest_unchanged,
+    record_po_ingest,
+    result_hash,
+)
+from backend.services.parse_pool import parse_worker_count, po_parser
 from backend.services.po_service import po_service
 from backend.services.reconciliation_service import ReconciliationService
+from backend.services.upload_batches import POCommitGroup, create_upload_batch, ingest_po_upload, stream_upload_batch
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -89,8 +102,13 @@ def get_po_stats(db: sqlite3.Connection = Depends(get_db)):
 
 
 @router.get("/", response_model=List[POListItem])
-def list_pos(db: sqlite3.Connection = Depends(get_db)):
-    """List all Purchase Orders with quantity details"""
+def list_pos(stream: Optional[StreamFormat] = None, db: sqlite3.Connection = Depends(get_db)):
+    """
+    List all Purchase Orders with quantity details.
+    `?stream=ndjson` (or `json`) streams rows straight from the cursor instead of buffering.
+    """
+    if stream:
+        return streaming_json_response(po_service.iter_pos(), stream)
     return po_service.list_pos(db)
 
 
@@ -120,6 +138,17 @@ def get_po_context(po_number: str, db: sqlite3.Connection = Depends(get_db)):
     return dict(po)
 
 
+@router.get("/{po_number}/amendments")
+def get_po_amendments(po_number: str, db: sqlite3.Connection = Depends(get_db)):
+    """Change summaries of re-uploads that amended this PO (newest first)"""
+    from backend.services.po_amendment import list_amendments
+
+    if not db.execute("SELECT 1 FROM purchase_orders WHERE po_number = ?", (po_number,)).fetchone():
+        raise ResourceNotFoundError("PO", po_number)
+
+    return {"po_number": po_number, "amendments": list_amendments(db, po_number)}
+
+
 @router.get("/{po_number}/dc")
 def check_po_has_dc(po_number: str, db: sqlite3.Connection = Depends(get_db)):
     """Check if PO has an associated Delivery Challan"""
@@ -277,11 +306,9 @@ async def upload_po_html(file: UploadFile = File(...), db: sqlite3.Connection =
 
     # Read and parse HTML
     content = await file.read()
-    soup = BeautifulSoup(content, "lxml")
 
-    # Extract data using existing scraper logic
-    po_header = extract_po_header(soup)
-    po_items = extract_items(soup)
+    # Extract data using the configured scraper engine (parsed off the event loop, cached by content hash)
+    po_header, po_items = await parse_cached(db, content, "po", po_parser())
 
     if not po_header.get("PURCHASE ORDER"):
         raise bad_request("Could not extract PO number from HTML")
@@ -296,6 +323,19 @@ async def upload_po_html(file: UploadFile = File(...), db: sqlite3.Connection =
     else:
         print("⚠️ WARNING: No items extracted from HTML!", flush=True)
 
+    # Identical to the last ingest of this PO and nothing changed since: nothing to do
+    po_number = str(po_header.get("PURCHASE ORDER")).strip()
+    parsed_hash = result_hash([po_header, po_items])
+    if po_ingest_unchanged(db, po_number, parsed_hash):
+        bump_counter(db, "ingest_skipped")
+        return {
+            "success": True,
+            "po_number": po_number,
+            "warnings": [f"PO {po_number} unchanged since last upload, skipped"],
+            "linked_srvs": 0,
+            "skipped": True,
+        }
+
     # Ingest into database
     ingestion_service = POIngestionService()
     linked_srvs_count = 0  # Initialize before transaction block
@@ -322,10 +362,12 @@ async def upload_po_html(file: UploadFile = File(...), db: sqlite3.Connection =
 
             # Ingestion service call
             # Note: ingestion_service should NOT commit internally
-            success, warnings = ingestion_service.ingest_po(db, po_header, po_items)
+            success, warnings, changes = ingestion_service.ingest_po_detailed(db, po_header, po_items)
 
             if success:
                 po_number = str(po_header.get("PURCHASE ORDER"))
+                record_po_ingest(db, po_number, parsed_hash)
+                bump_counter(db, "ingested")
                 # TOT Sync removed - reconciliation happens at DC/SRV level, not PO upload
 
                 if linked_srvs_count > 0:
@@ -343,6 +385,7 @@ async def upload_po_html(file: UploadFile = File(...), db: sqlite3.Connection =
             "po_number": po_header.get("PURCHASE ORDER"),
             "warnings": warnings,
             "linked_srvs": linked_srvs_count,
+            "changes": changes,
         }
     except Exception as e:
         # Rethrow as HTTP 500/400 properly
@@ -353,18 +396,27 @@ async def upload_po_html(file: UploadFile = File(...), db: sqlite3.Connection =
 
 @router.post("/upload/batch")
 async def upload_po_batch(
-    files: List[UploadFile] = File(...), db: sqlite3.Connection = Depends(get_db)
+    files: List[UploadFile] = File(...),
+    commit_size: Optional[int] = None,
+    db: sqlite3.Connection = Depends(get_db),
 ):
-    """Upload and parse multiple PO HTML files with atomic processing per file."""
+    """
+    Upload and parse multiple PO HTML files with atomic processing per file.
+    Files are committed in groups of `commit_size` (default UPLOAD_BATCH_COMMIT_SIZE) with a
+    savepoint per file; commit_size=1 commits every file on its own.
+    """
 
     results = []
-    successful = 0
-    failed = 0
     total_linked_srvs = 0
+    started = time.perf_counter()
 
     ingestion_service = POIngestionService()
-    from backend.db.session import db_transaction
+    commit_size = settings.UPLOAD_BATCH_COMMIT_SIZE if commit_size is None else commit_size
+    commit_group = POCommitGroup(db, ingestion_service, commit_size) if commit_size > 1 else None
+    per_file_transactions = 0
 
+    # Stage 1: read + validate uploads (parse jobs keep their position in the batch)
+    parse_jobs = []  # (result, content)
     for file in files:
         result = {
             "filename": file.filename,
@@ -373,92 +425,73 @@ async def upload_po_batch(
             "message": "",
             "linked_srvs": 0,
         }
+        results.append(result)
 
-        try:
-            # Validate file type
-            if not file.filename.endswith(".html"):
-                result["message"] = "Only HTML files are supported"
-                failed += 1
-                results.append(result)
-                continue
-
-            # Read and parse HTML
-            content = await file.read()
-            print(f"📄 Read {len(content)} bytes from {file.filename}", flush=True)
-            soup = BeautifulSoup(content, "lxml")
-            print("✅ Parsed HTML into BeautifulSoup", flush=True)
-
-            # Extract data
-            print(f"🔍 Extracting PO header from {file.filename}...", flush=True)
-            po_header = extract_po_header(soup)
-            print(f"📋 Header extracted: {po_header.get('PURCHASE ORDER')}", flush=True)
-
-            print(f"🔍 Extracting PO items from {file.filename}...", flush=True)
-            po_items = extract_items(soup)
-            print(f"📦 Items extracted: {len(po_items)}", flush=True)
-
-            if not po_header.get("PURCHASE ORDER"):
-                print(f"🔥🔥🔥 PARSING FAILED for {file.filename}: PO Number missing", flush=True)
-                result["message"] = "Could not extract PO number from HTML"
-                failed += 1
-                results.append(result)
-                continue
-
-            print(
-                f"🔥🔥🔥 EXTRACTED PO: {po_header.get('PURCHASE ORDER')} from {file.filename}",
-                flush=True,
-            )
-
-            # Atomic transaction per file
-            # If one file fails, only that one is rolled back. Others can succeed.
-            # (Assuming user wants batch to be "best effort" per file, but "all-or-nothing" WITHIN a file)
-            with db_transaction(db):
-                success, warnings = ingestion_service.ingest_po(db, po_header, po_items)
-
-                if success:
-                    # Reconciliation is now handled inside ingestion service
-                    # (skipped for new POs, run for existing POs with deliveries)
-                    # po_number = str(po_header.get("PURCHASE ORDER"))
-
-                    linked_srvs_count = 0  # Placeholder
-                    total_linked_srvs += linked_srvs_count
-
-                    result["success"] = True
-                    result["po_number"] = po_header.get("PURCHASE ORDER")
-                    result["linked_srvs"] = linked_srvs_count
-
-                    message = (
-                        warnings[0]
-                        if warnings
-                        else f"Successfully ingested PO {po_header.get('PURCHASE ORDER')}"
-                    )
-                    if linked_srvs_count > 0:
-                        message += f" (Linked {linked_srvs_count} SRV(s))"
-                    result["message"] = message
-                    successful += 1
-                else:
-                    raise ValueError(f"Ingestion Error: {warnings}")
-
-        except Exception as e:
-            import traceback
-
-            print(f"🔥🔥🔥 UPLOAD ERROR for {file.filename}:", flush=True)
-            print(traceback.format_exc(), flush=True)
-            result["message"] = f"Error: {str(e)}"
-            failed += 1
-            # Transaction already rolled back by context manager
+        # Validate file type
+        if not file.filename.endswith(".html"):
+            result["message"] = "Only HTML files are supported"
+            continue
+
+        content = await file.read()
+        print(f"📄 Read {len(content)} bytes from {file.filename}", flush=True)
+        parse_jobs.append((result, content))
+
+    # Stage 2: parse on the worker pool, results arrive in upload order
+    # Stage 3: this handler is the single DB writer, one transaction per group of files
+    print(f"🔍 Parsing {len(parse_jobs)} PO file(s) on {parse_worker_count()} worker(s)...", flush=True)
+    contents = [content for _, content in parse_jobs]
+    async for idx, parsed, parse_error in parse_in_order_cached(db, contents, "po", po_parser(), commit=commit_group is None):
+        result = parse_jobs[idx][0]
+
+        if parse_error:
+            print(f"🔥🔥🔥 PARSE ERROR for {result['filename']}: {parse_error}", flush=True)
+            result["message"] = f"Error: {str(parse_error)}"
+            continue
+
+        po_header, po_items = parsed
+        print(f"📋 Header extracted: {po_header.get('PURCHASE ORDER')}", flush=True)
+        print(f"📦 Items extracted: {len(po_items)}", flush=True)
+
+        if commit_group:
+            commit_group.add(result, po_header, po_items)
+        else:
+            result.update(ingest_po_upload(db, result["filename"], po_header, po_items, ingestion_service))
+            per_file_transactions += 1 if po_header.get("PURCHASE ORDER") else 0
 
-        results.append(result)
+    if commit_group:
+        commit_group.commit()
 
+    elapsed = time.perf_counter() - started
+    successful = sum(1 for result in results if result["success"])
     return {
         "total": len(files),
         "successful": successful,
-        "failed": failed,
+        "failed": len(results) - successful,
         "total_linked_srvs": total_linked_srvs,
         "results": results,
+        "throughput": {
+            "commit_size": max(1, commit_size),
+            "transactions": commit_group.transactions if commit_group else per_file_transactions,
+            "deferred_po_syncs": commit_group.synced_pos if commit_group else 0,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "files_per_second": round(len(files) / elapsed, 2) if elapsed > 0 else None,
+        },
     }
 
 
+@router.post("/upload/stream")
+async def upload_po_stream(request: Request, db: sqlite3.Connection = Depends(get_db)):
+    """
+    Streaming batch upload (multipart/form-data, any number of `files` parts).
+    Each file is ingested as soon as its part arrives and reported as an SSE `file` event;
+    the final `summary` is persisted, see /api/uploads/{batch_id}.
+    """
+    batch_id = create_upload_batch(db, "po")
+    return EventStreamResponse(
+        stream_upload_batch(request, "po", batch_id), headers={"X-Upload-Batch-Id": batch_id}
+    )
+
+
 @router.get("/{po_number}/excel")
 def download_po_excel(po_number: str, db: sqlite3.Connection = Depends(get_db)):
     """Download PO as Excel"""
@@ -528,10 +561,9 @@ async def update_delivered_qty(
             (delivered_qty, po_number, item_no),
         )
 
-        db.commit()
-
-        # TOT-5: Trigger reconciliation sync
+        # TOT-5: Trigger reconciliation sync (same transaction as the update and its change log entry)
         ReconciliationService.sync_po(db, po_number)
+        record_change(db, "po", po_number, "update")
         db.commit()
 
         return {
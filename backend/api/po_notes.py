@@ -12,6 +12,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
 from backend.db.session import get_db
+from backend.services.change_log import record_change
 
 
 class PONoteCreate(BaseModel):
@@ -69,9 +70,10 @@ def create_po_note(note: PONoteCreate, db: sqlite3.Connection = Depends(get_db))
         """,
         (note.title, note.content, 1 if note.is_active else 0),
     )
+    new_id = cursor.lastrowid
+    record_change(db, "po_note", new_id, "create")
     db.commit()
 
-    new_id = cursor.lastrowid
     return get_po_note(new_id, db)
 
 
@@ -104,6 +106,7 @@ def update_po_note(note_id: str, note: PONoteUpdate, db: sqlite3.Connection = De
 
     query = f"UPDATE po_notes_templates SET {', '.join(fields)} WHERE id = ?"
     db.execute(query, tuple(values))
+    record_change(db, "po_note", note_id, "update")
     db.commit()
 
     return get_po_note(note_id, db)
@@ -117,6 +120,7 @@ def delete_po_note(note_id: str, db: sqlite3.Connection = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Note not found")
 
     db.execute("UPDATE po_notes_templates SET is_active = 0 WHERE id = ?", (note_id,))
+    record_change(db, "po_note", note_id, "delete")
     db.commit()
 
     return {"message": "Note deleted successfully"}
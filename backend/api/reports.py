@@ -3,42 +3,34 @@ Reports Router - Unified Deterministic Reporting
 Routes requests to report_service and handles file exports.
 """
 
-import io
 import logging
 import sqlite3
-from typing import Optional
+import time
+from typing import BinaryIO, Callable, List, Literal, Optional
 
 import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
 
-from backend.core.errors import internal_error
+from backend.core.errors import bad_request, internal_error
 from backend.db.session import get_db
-from backend.services import report_service
+from backend.db.streaming import StreamFormat, streaming_json_response
+from backend.services import fact_tables, report_service
+from backend.services.excel_export import write_query_xlsx, write_xlsx
+from backend.services.report_cache import report_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-def export_df_to_excel(df: pd.DataFrame, filename: str) -> StreamingResponse:
-    """Helper to stream DataFrame as Excel"""
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Report")
-        # Auto-adjust columns
-        worksheet = writer.sheets["Report"]
-        for i, col in enumerate(df.columns):
-            width = max(df[col].astype(str).map(len).max(), len(col)) + 4
-            worksheet.set_column(i, i, width)
-
-    output.seek(0)
-    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers=headers,
-    )
+def df_excel_writer(load: Callable[[], pd.DataFrame]) -> Callable[[BinaryIO], int]:
+    """Excel build step for report_cache.xlsx: loads the DataFrame only when the file is not cached"""
+
+    def build(output: BinaryIO) -> int:
+        df = load()
+        return write_xlsx(output, list(df.columns), df.itertuples(index=False, name=None))
+
+    return build
 
 
 @router.get("/reconciliation")
@@ -52,11 +44,18 @@ def get_reconciliation_report(
     """PO vs Delivered vs Received vs Rejected"""
     if po:
         # If specific PO requested, get its lots reconciliation
-        data = report_service.get_reconciliation_lots(po, db)
+        params = {"po": po}
         if export:
-            df = pd.DataFrame(data)
-            return export_df_to_excel(df, f"PO_Reconciliation_{po}.xlsx")
-        return data
+            return report_cache.xlsx(
+                db,
+                "reconciliation",
+                params,
+                f"PO_Reconciliation_{po}.xlsx",
+                df_excel_writer(lambda: pd.DataFrame(report_service.get_reconciliation_lots(po, db))),
+            )
+        return report_cache.result(
+            db, "reconciliation", params, lambda: report_service.get_reconciliation_lots(po, db)
+        )
 
     # Default to last 30 days if not provided
     if not start_date or not end_date:
@@ -67,10 +66,23 @@ def get_reconciliation_report(
         start_date = start.strftime("%Y-%m-%d")
         end_date = end.strftime("%Y-%m-%d")
 
-    df = report_service.get_po_reconciliation_by_date(start_date, end_date, db)
+    params = {"start_date": start_date, "end_date": end_date}
     if export:
-        return export_df_to_excel(df, f"PO_Reconciliation_{start_date}_{end_date}.xlsx")
-    return df.fillna(0).to_dict(orient="records")
+        return report_cache.xlsx(
+            db,
+            "reconciliation",
+            params,
+            f"PO_Reconciliation_{start_date}_{end_date}.xlsx",
+            df_excel_writer(lambda: report_service.get_po_reconciliation_by_date(start_date, end_date, db)),
+        )
+    return report_cache.result(
+        db,
+        "reconciliation",
+        params,
+        lambda: report_service.get_po_reconciliation_by_date(start_date, end_date, db)
+        .fillna(0)
+        .to_dict(orient="records"),
+    )
 
 
 @router.get("/sales")
@@ -89,10 +101,23 @@ def get_sales_report(
         start_date = start.strftime("%Y-%m-%d")
         end_date = end.strftime("%Y-%m-%d")
 
-    df = report_service.get_monthly_sales_summary(start_date, end_date, db)
+    params = {"start_date": start_date, "end_date": end_date}
     if export:
-        return export_df_to_excel(df, f"Monthly_Sales_{start_date}_{end_date}.xlsx")
-    return df.fillna(0).to_dict(orient="records")
+        return report_cache.xlsx(
+            db,
+            "sales",
+            params,
+            f"Monthly_Sales_{start_date}_{end_date}.xlsx",
+            df_excel_writer(lambda: report_service.get_monthly_sales_summary(start_date, end_date, db)),
+        )
+    return report_cache.result(
+        db,
+        "sales",
+        params,
+        lambda: report_service.get_monthly_sales_summary(start_date, end_date, db)
+        .fillna(0)
+        .to_dict(orient="records"),
+    )
 
 
 @router.get("/register/dc")
@@ -100,6 +125,7 @@ def get_dc_register(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     export: bool = False,
+    stream: Optional[StreamFormat] = None,
     db: sqlite3.Connection = Depends(get_db),
 ):
     """DC Register"""
@@ -111,12 +137,26 @@ def get_dc_register(
         start_date = start.strftime("%Y-%m-%d")
         end_date = end.strftime("%Y-%m-%d")
 
-    df = report_service.get_dc_register(start_date, end_date, db)
+    if stream and not export:
+        return streaming_json_response(report_service.iter_dc_register(start_date, end_date), stream)
+
+    params = {"start_date": start_date, "end_date": end_date}
     if export:
-        return export_df_to_excel(df, f"DC_Register_{start_date}_{end_date}.xlsx")
-    # Drop rows where dc_number is null to prevent phantom rows
-    df_clean = df.dropna(subset=["dc_number"])
-    return df_clean.fillna("").to_dict(orient="records")
+        return report_cache.xlsx(
+            db,
+            "register/dc",
+            params,
+            f"DC_Register_{start_date}_{end_date}.xlsx",
+            lambda output: write_query_xlsx(db, report_service.DC_REGISTER_QUERY, (start_date, end_date), output),
+        )
+
+    def compute():
+        df = report_service.get_dc_register(start_date, end_date, db)
+        # Drop rows where dc_number is null to prevent phantom rows
+        df_clean = df.dropna(subset=["dc_number"])
+        return df_clean.fillna("").to_dict(orient="records")
+
+    return report_cache.result(db, "register/dc", params, compute)
 
 
 @router.get("/register/invoice")
@@ -124,6 +164,7 @@ def get_invoice_register(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     export: bool = False,
+    stream: Optional[StreamFormat] = None,
     db: sqlite3.Connection = Depends(get_db),
 ):
     """Invoice Register"""
@@ -135,12 +176,28 @@ def get_invoice_register(
         start_date = start.strftime("%Y-%m-%d")
         end_date = end.strftime("%Y-%m-%d")
 
-    df = report_service.get_invoice_register(start_date, end_date, db)
+    if stream and not export:
+        return streaming_json_response(report_service.iter_invoice_register(start_date, end_date), stream)
+
+    params = {"start_date": start_date, "end_date": end_date}
     if export:
-        return export_df_to_excel(df, f"Invoice_Register_{start_date}_{end_date}.xlsx")
-    # Drop rows where invoice_number is null to prevent phantom rows
-    df_clean = df.dropna(subset=["invoice_number"])
-    return df_clean.fillna("").to_dict(orient="records")
+        return report_cache.xlsx(
+            db,
+            "register/invoice",
+            params,
+            f"Invoice_Register_{start_date}_{end_date}.xlsx",
+            lambda output: write_query_xlsx(
+                db, report_service.INVOICE_REGISTER_QUERY, (start_date, end_date), output
+            ),
+        )
+
+    def compute():
+        df = report_service.get_invoice_register(start_date, end_date, db)
+        # Drop rows where invoice_number is null to prevent phantom rows
+        df_clean = df.dropna(subset=["invoice_number"])
+        return df_clean.fillna("").to_dict(orient="records")
+
+    return report_cache.result(db, "register/invoice", params, compute)
 
 
 @router.get("/register/po")
@@ -160,13 +217,19 @@ def download_po_summary(
             start_date = start.strftime("%Y-%m-%d")
             end_date = end.strftime("%Y-%m-%d")
 
-        data = report_service.get_po_register(start_date, end_date, db)
+        # Register rows come from the report cache; the template layout is rendered per download
+        data = report_cache.result(
+            db,
+            "register/po",
+            {"start_date": start_date, "end_date": end_date},
+            lambda: report_service.get_po_register(start_date, end_date, db).to_dict(orient="records"),
+        )
 
         date_str = f"{start_date or 'ALL'}_to_{end_date or 'ALL'}"
         from backend.services.excel_service import ExcelService
 
         return ExcelService.generate_dispatch_summary(
-            date_str, data.to_dict(orient="records"), db
+            date_str, data, db
         )  # Assuming generate_dispatch_summary can handle this data
     except Exception as e:
         logger.error(f"Failed to generate PO Register: {e}")
@@ -174,8 +237,15 @@ def download_po_summary(
 
 
 @router.get("/pending")
-def get_pending_items(export: bool = False, db: sqlite3.Connection = Depends(get_db)):
-    """Pending PO Items"""
+def get_pending_items(
+    export: bool = False,
+    stream: Optional[StreamFormat] = None,
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """Pending PO Items (`?stream=ndjson|json` streams rows instead of buffering a DataFrame)"""
+    if stream and not export:
+        return streaming_json_response(report_service.iter_pending_po_items(), stream)
+
     df = report_service.get_pending_po_items(db)
     if export:
         try:
@@ -214,6 +284,40 @@ def get_dashboard_kpis(db: sqlite3.Connection = Depends(get_db)):
         return {"error": str(e)}
 
 
+@router.get("/cube")
+def get_report_cube(
+    group_by: List[Literal["day", "month", "fy", "buyer", "category"]] = Query(
+        ["month"], description="Dimensions to group by (repeatable)"
+    ),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    buyer_id: Optional[int] = None,
+    category: Optional[str] = Query(None, description="Material category (mtrl_cat)"),
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """Ordered / dispatched / invoiced / received totals and document counts from the fact tables"""
+    if start_date and end_date and start_date > end_date:
+        raise bad_request("start_date must not be after end_date")
+    started = time.perf_counter()
+    try:
+        refreshed = fact_tables.refresh_facts(db)
+        result = fact_tables.cube_query(db, group_by, start_date, end_date, buyer_id, category)
+    except sqlite3.Error as e:
+        raise internal_error("Cube query failed", e) from e
+    result["refreshed_days"] = refreshed
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+@router.post("/cube/rebuild")
+def rebuild_report_cube(db: sqlite3.Connection = Depends(get_db)):
+    """Recompute all fact tables from the document tables"""
+    try:
+        return fact_tables.rebuild_facts(db)
+    except sqlite3.Error as e:
+        raise internal_error("Fact table rebuild failed", e) from e
+
+
 @router.get("/daily-dispatch")
 def get_daily_dispatch_report(
     date: Optional[str] = None,
@@ -246,14 +350,15 @@ def get_daily_dispatch_report(
         WHERE date(dc.dc_date) = date(?)
         ORDER BY dc.created_at
     """
-    rows = db.execute(query, (date,)).fetchall()
-    results = [dict(row) for row in rows]
+    results = report_cache.result(
+        db, "daily-dispatch", {"date": date}, lambda: [dict(row) for row in db.execute(query, (date,))]
+    )
 
     if export:
         try:
             from backend.services.excel_service import ExcelService
 
-            return ExcelService.generate_dispatch_summary(date, results)
+            return ExcelService.generate_dispatch_summary(date, results, db)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}") from e
 
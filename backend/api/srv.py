@@ -3,14 +3,22 @@ SRV API Router
 Handles SRV upload, listing, and detail retrieval.
 """
 
-import re
 import sqlite3
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
 
+from backend.core.sse import EventStreamResponse
 from backend.db.models import SRVDetail, SRVHeader, SRVItem, SRVListItem, SRVStats
 from backend.db.session import get_db
+from backend.db.streaming import StreamFormat, stream_query, streaming_json_response
+from backend.services.parse_pool import parse_in_order, srv_parser
+from backend.services.upload_batches import (
+    create_upload_batch,
+    ingest_srv_upload,
+    stream_upload_batch,
+    streams_srv,
+)
 
 router = APIRouter()
 
@@ -21,10 +29,13 @@ async def upload_batch_srvs(
 ):
     """
     Upload multiple SRV HTML files in batch using process_srv_file.
+    Files are scraped on the parse pool; ingestion stays sequential on this connection.
+    Files of SRV_STREAM_MIN_SIZE or more skip the pool and are parsed incrementally while ingesting.
     """
     results = []
-    from backend.services.srv_ingestion import process_srv_file
 
+    # Stage 1: read + validate uploads
+    parse_jobs = []  # (position in results, content)
     for file in files:
         try:
             if not file.filename.endswith(".html"):
@@ -37,44 +48,9 @@ async def upload_batch_srvs(
                 )
                 continue
 
-            # Try to extract PO number from filename with various patterns
-            # Priority 1: Explicit PO_ prefix
-            po_match = re.search(r"PO_?(\d+)", file.filename, re.IGNORECASE)
-
-            # Priority 2: SRV_ prefix (User legacy format)
-            # Priority 2: SRV_ prefix (User legacy format)
-            if not po_match:
-                # Common format: SRV_1234_for_PO_5678.html
-                po_match = re.search(r"PO_(\d+)", file.filename, re.IGNORECASE)
-                if not po_match:
-                    po_match = re.search(r"SRV_(\d+)", file.filename, re.IGNORECASE)
-
-            # Priority 3: Just digits (User said "file name IS the po number")
-            if not po_match:
-                # Careful not to match digits that are parts of dates if possible, but user said "filename IS po number"
-                po_match = re.search(r"^(\d+)", file.filename)
-
-            if po_match:
-                # Keep as raw string to preserve leading zeros
-                po_from_filename = po_match.group(1)
-            else:
-                po_from_filename = None
-
             content = await file.read()
-            success, messages, s_count, f_count = process_srv_file(
-                content, file.filename, db, po_from_filename
-            )
-
-            results.append(
-                {
-                    "filename": file.filename,
-                    "success": success,
-                    "message": "; ".join(messages),
-                    "messages": messages,
-                    "successful": s_count,
-                    "failed": f_count,
-                }
-            )
+            results.append({"filename": file.filename})
+            parse_jobs.append((len(results) - 1, content))
 
         except Exception as e:
             results.append(
@@ -85,6 +61,25 @@ async def upload_batch_srvs(
                 }
             )
 
+    # Stage 2: scrape on the worker pool (in upload order), Stage 3: ingest one file at a time
+    pooled = parse_in_order([content for _, content in parse_jobs if not streams_srv(content)], srv_parser())
+    try:
+        for position, content in parse_jobs:
+            filename = results[position]["filename"]
+
+            if streams_srv(content):
+                results[position] = ingest_srv_upload(db, filename, content)
+                continue
+
+            _, srv_list, parse_error = await pooled.__anext__()
+            if parse_error:
+                results[position] = {"filename": filename, "success": False, "message": f"Error: {str(parse_error)}"}
+                continue
+
+            results[position] = ingest_srv_upload(db, filename, content, srv_list)
+    finally:
+        await pooled.aclose()
+
     return {
         "total": len(files),
         "successful": sum(r.get("successful", 0) for r in results),
@@ -93,35 +88,76 @@ async def upload_batch_srvs(
     }
 
 
+@router.post("/upload/stream")
+async def upload_srv_stream(request: Request, db: sqlite3.Connection = Depends(get_db)):
+    """
+    Streaming batch upload of SRV HTML files (multipart/form-data `files` parts).
+    Per-file results are pushed as SSE `file` events; the final `summary` is persisted,
+    see /api/uploads/{batch_id}.
+    """
+    batch_id = create_upload_batch(db, "srv")
+    return EventStreamResponse(
+        stream_upload_batch(request, "srv", batch_id), headers={"X-Upload-Batch-Id": batch_id}
+    )
+
+
+SRV_LIST_QUERY = """
+    SELECT 
+        s.srv_number,
+        s.srv_date,
+        s.po_number,
+        CASE WHEN po.po_number IS NOT NULL THEN 1 ELSE 0 END as po_found,
+        COALESCE(SUM(si.received_qty), 0) as total_received_qty,
+        COALESCE(SUM(si.rejected_qty), 0) as total_rejected_qty,
+        COALESCE(SUM(si.order_qty), 0) as total_order_qty,
+        COALESCE(SUM(si.challan_qty), 0) as total_challan_qty,
+        (COALESCE(SUM(si.received_qty), 0) - COALESCE(SUM(si.rejected_qty), 0)) as total_accepted_qty,
+        GROUP_CONCAT(DISTINCT si.challan_no) as challan_numbers,
+        '' as invoice_numbers,
+        s.created_at,
+        (SELECT COALESCE(SUM(poi.ord_qty), 0) FROM purchase_order_items poi WHERE poi.po_number = s.po_number) as po_ordered_qty
+    FROM srvs s
+    LEFT JOIN srv_items si ON s.srv_number = si.srv_number
+    LEFT JOIN purchase_orders po ON s.po_number = po.po_number
+"""
+
+
+def _to_srv_list_item(row: sqlite3.Row) -> dict:
+    """Map an SRV list row to the SRVListItem payload"""
+    po_found = bool(row["po_found"])
+    warning_msg = None if po_found else f"PO {row['po_number']} not found in database"
+
+    return {
+        "srv_number": row["srv_number"],
+        "srv_date": row["srv_date"],
+        "po_number": row["po_number"],
+        "total_received_qty": float(row["total_received_qty"]),
+        "total_rejected_qty": float(row["total_rejected_qty"]),
+        "total_order_qty": float(row["total_order_qty"]),
+        "total_challan_qty": float(row["total_challan_qty"]),
+        "total_accepted_qty": float(row["total_accepted_qty"]),
+        "challan_numbers": row["challan_numbers"],
+        "invoice_numbers": row["invoice_numbers"],
+        "po_found": po_found,
+        "warning_message": warning_msg,
+        "created_at": row["created_at"],
+        "po_ordered_qty": float(row["po_ordered_qty"]),
+    }
+
+
 @router.get("", response_model=List[SRVListItem])
 def get_srv_list(
     po_number: str = None,
     skip: int = 0,
     limit: int = 100,
+    stream: Optional[StreamFormat] = None,
     db: sqlite3.Connection = Depends(get_db),
 ):
     """
     Get list of all SRVs with optional PO number filter.
+    `?stream=ndjson` (or `json`) streams rows from the cursor; pair with `limit=-1` for a full export.
     """
-    query = """
-        SELECT 
-            s.srv_number,
-            s.srv_date,
-            s.po_number,
-            CASE WHEN po.po_number IS NOT NULL THEN 1 ELSE 0 END as po_found,
-            COALESCE(SUM(si.received_qty), 0) as total_received_qty,
-            COALESCE(SUM(si.rejected_qty), 0) as total_rejected_qty,
-            COALESCE(SUM(si.order_qty), 0) as total_order_qty,
-            COALESCE(SUM(si.challan_qty), 0) as total_challan_qty,
-            (COALESCE(SUM(si.received_qty), 0) - COALESCE(SUM(si.rejected_qty), 0)) as total_accepted_qty,
-            GROUP_CONCAT(DISTINCT si.challan_no) as challan_numbers,
-            '' as invoice_numbers,
-            s.created_at,
-            (SELECT COALESCE(SUM(poi.ord_qty), 0) FROM purchase_order_items poi WHERE poi.po_number = s.po_number) as po_ordered_qty
-        FROM srvs s
-        LEFT JOIN srv_items si ON s.srv_number = si.srv_number
-        LEFT JOIN purchase_orders po ON s.po_number = po.po_number
-    """
+    query = SRV_LIST_QUERY
 
     params = {}
     if po_number:
@@ -137,33 +173,11 @@ def get_srv_list(
     params["skip"] = skip
     params["limit"] = limit
 
-    result = db.execute(query, params).fetchall()
-
-    srvs = []
-    for row in result:
-        po_found = bool(row["po_found"])
-        warning_msg = None if po_found else f"PO {row['po_number']} not found in database"
+    if stream:
+        return streaming_json_response(stream_query(query, params, _to_srv_list_item), stream)
 
-        srvs.append(
-            {
-                "srv_number": row["srv_number"],
-                "srv_date": row["srv_date"],
-                "po_number": row["po_number"],
-                "total_received_qty": float(row["total_received_qty"]),
-                "total_rejected_qty": float(row["total_rejected_qty"]),
-                "total_order_qty": float(row["total_order_qty"]),
-                "total_challan_qty": float(row["total_challan_qty"]),
-                "total_accepted_qty": float(row["total_accepted_qty"]),
-                "challan_numbers": row["challan_numbers"],
-                "invoice_numbers": row["invoice_numbers"],
-                "po_found": po_found,
-                "warning_message": warning_msg,
-                "created_at": row["created_at"],
-                "po_ordered_qty": float(row["po_ordered_qty"]),
-            }
-        )
-
-    return srvs
+    result = db.execute(query, params).fetchall()
+    return [_to_srv_list_item(row) for row in result]
 
 
 @router.get("/stats", response_model=SRVStats)
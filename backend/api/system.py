@@ -1,7 +1,8 @@
 import logging
 import sqlite3
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from backend.db.session import get_db
 
@@ -24,7 +25,8 @@ async def reset_database(db: sqlite3.Connection = Depends(get_db)):
             "gst_invoices",
             # SRVs
             "srv_items",
-            "srv_headers",
+            "srv_sources",
+            "srvs",
             # Delivery Challans
             "delivery_challan_items",
             "delivery_challans",
@@ -35,10 +37,21 @@ async def reset_database(db: sqlite3.Connection = Depends(get_db)):
             "purchase_orders",
             # Others
             "po_notes_templates",
+            "po_ingest_state",
+            "po_amendments",
+            # Derived state (after the documents: their delete triggers mark fact days dirty)
+            "fact_daily",
+            "fact_monthly",
+            "fact_dirty_days",
         ]
 
         logger.info("Initiating Nuclear Database Reset...")
 
+        # Clients syncing from /api/changes see every purged document as deleted
+        from backend.services.change_log import record_purge
+
+        record_purge(db)
+
         # SQLite specific reset
         # 1. Disable Foreign Keys to allow dropping in any order
         db.execute("PRAGMA foreign_keys = OFF")
@@ -59,6 +72,11 @@ async def reset_database(db: sqlite3.Connection = Depends(get_db)):
 
         db.commit()
 
+        # Pinned closed-FY reports would otherwise outlive the data they were built from
+        from backend.services.report_cache import report_cache
+
+        report_cache.invalidate(db)
+
         logger.info("Database reset completed successfully.")
 
         return {
@@ -110,3 +128,56 @@ async def reconcile_all(db: sqlite3.Connection = Depends(get_db)):
         logger.error(f"Global reconciliation failed: {e}", exc_info=True)
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@router.get("/parse-cache")
+def parse_cache_stats(db: sqlite3.Connection = Depends(get_db)):
+    """Parse cache size and hit/skip counters"""
+    from backend.services.parse_cache import get_parse_cache_stats
+
+    return get_parse_cache_stats(db)
+
+
+@router.delete("/parse-cache")
+def clear_parse_cache(db: sqlite3.Connection = Depends(get_db)):
+    """Drop cached parse results, PO ingest fingerprints and counters (next uploads parse and ingest fully)"""
+    from backend.services.parse_cache import clear_parse_cache as clear_cache
+
+    return {"success": True, "entries_removed": clear_cache(db)}
+
+
+@router.get("/dashboard-cache")
+def dashboard_cache_stats():
+    """Dashboard snapshot age, data versions and hit/miss counters"""
+    from backend.services.dashboard_snapshot import dashboard_snapshot
+
+    return dashboard_snapshot.stats()
+
+
+@router.delete("/dashboard-cache")
+def clear_dashboard_cache():
+    """Drop the cached dashboard snapshot (next load recomputes it)"""
+    from backend.services.dashboard_snapshot import dashboard_snapshot
+
+    dashboard_snapshot.invalidate()
+    return {"success": True}
+
+
+@router.get("/report-cache")
+def report_cache_stats(db: sqlite3.Connection = Depends(get_db)):
+    """Cached report entries (pinned closed-FY invoice registers included), size and hit/miss counters"""
+    from backend.services.report_cache import report_cache
+
+    return report_cache.stats(db)
+
+
+@router.delete("/report-cache")
+def clear_report_cache(
+    endpoint: Optional[str] = Query(None, description="e.g. sales, register/dc (default: all)"),
+    fy: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="Financial year, e.g. 2023-24"),
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """Drop cached reports, including pinned closed-FY results (e.g. after correcting an old document)"""
+    from backend.services.report_cache import report_cache
+
+    return {"success": True, "entries_removed": report_cache.invalidate(db, endpoint, fy)}
@@ -0,0 +1,47 @@
+"""
+Upload Batches Router
+Persisted progress/summary of streaming batch uploads (/api/po/upload/stream, /api/srv/upload/stream).
+"""
+
+import sqlite3
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header
+
+from backend.core.errors import not_found
+from backend.core.sse import EventStreamResponse
+from backend.db.session import get_db
+from backend.services.upload_batches import get_upload_batch, get_upload_batch_files, replay_upload_batch
+
+router = APIRouter()
+
+
+@router.get("/{batch_id}")
+def get_batch(batch_id: str, after: int = 0, db: sqlite3.Connection = Depends(get_db)):
+    """Batch summary plus per-file results (only files with seq > `after`)"""
+    batch = get_upload_batch(db, batch_id)
+    if not batch:
+        raise not_found(f"Upload batch {batch_id} not found", "UploadBatch")
+
+    batch["files"] = get_upload_batch_files(db, batch_id, after)
+    return batch
+
+
+@router.get("/{batch_id}/events")
+def replay_batch_events(
+    batch_id: str,
+    after: int = 0,
+    last_event_id: Optional[str] = Header(default=None),
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """
+    Reconnect to a batch as SSE: replays stored `file` events after Last-Event-ID (or `after`),
+    follows the batch live while it is still running, and ends with the `summary` event.
+    """
+    if not get_upload_batch(db, batch_id):
+        raise not_found(f"Upload batch {batch_id} not found", "UploadBatch")
+
+    if last_event_id and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+
+    return EventStreamResponse(replay_upload_batch(batch_id, after))
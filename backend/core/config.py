@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -22,6 +22,55 @@ class Settings(BaseSettings):
     # to root/db/business.db
     DATABASE_URL: str = "sqlite:///../db/business.db"
 
+    # HTML scraping engine for PO/SRV files: "bs4" (BeautifulSoup) or "lxml" (lxml.html + XPath)
+    SCRAPER_ENGINE: Literal["bs4", "lxml"] = "bs4"
+    # Processes parsing uploaded HTML in batch uploads (0 = one per CPU core, 1 = parse in-process)
+    PARSE_WORKERS: int = 0
+    # Streaming uploads keep each file in memory up to this size, then spool it to a temp file
+    UPLOAD_SPOOL_MAX_SIZE: int = 1024 * 1024
+    # With SCRAPER_ENGINE="lxml", SRV files at least this large are parsed incrementally (lxml iterparse) while ingesting instead of on the parse pool
+    SRV_STREAM_MIN_SIZE: int = 4 * 1024 * 1024
+    # PO batch uploads: files per transaction (SAVEPOINT per file, TOT sync once per PO per group); 1 = commit each file
+    UPLOAD_BATCH_COMMIT_SIZE: int = 50
+    # Content-hash parse cache: re-uploads of identical PO HTML skip parsing and unchanged POs skip ingestion
+    PARSE_CACHE_ENABLED: bool = True
+    PARSE_CACHE_MAX_ENTRIES: int = 5000
+    # Background ingestion job queue: worker threads, attempts per file, retry backoff base
+    INGEST_WORKERS: int = 1
+    INGEST_MAX_ATTEMPTS: int = 3
+    INGEST_RETRY_BASE_SECONDS: float = 2.0
+    # Watch folder: PO/SRV HTML saved here (subfolders included) is queued as ingest jobs; unset = disabled
+    WATCH_FOLDER: Optional[str] = None
+    # "auto" = inotify when available, else polling; network shares need "poll" (no inotify events)
+    WATCH_MODE: Literal["auto", "inotify", "poll"] = "auto"
+    WATCH_POLL_SECONDS: float = 5.0
+    # A file is picked up once it has not changed for this long (downloads are written in chunks)
+    WATCH_DEBOUNCE_SECONDS: float = 2.0
+    # Rate control: files queued per minute (0 = unlimited), paused while the ingest queue holds this many
+    WATCH_MAX_FILES_PER_MINUTE: int = 60
+    WATCH_MAX_QUEUED_FILES: int = 20
+    # Dashboard snapshot cache: serve an out-of-date snapshot for up to MAX_STALE seconds while writes
+    # continue (0 = always recompute after a write); recompute an unchanged one after MAX_AGE seconds
+    DASHBOARD_CACHE_MAX_STALE_SECONDS: float = 2.0
+    DASHBOARD_CACHE_MAX_AGE_SECONDS: float = 300.0
+    # Change events (/api/events): data_version poll interval, keep-alive comment interval and
+    # open event streams per worker process (further clients get 503 + Retry-After)
+    EVENTS_POLL_SECONDS: float = 0.5
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    EVENTS_MAX_CONNECTIONS: int = 50
+    # Change log (/api/changes): the newest RETAIN_ROWS changes are kept in full, older ones only as
+    # the latest change per document; compaction runs once COMPACT_EVERY new changes arrived
+    CHANGE_LOG_RETAIN_ROWS: int = 10000
+    CHANGE_LOG_COMPACT_EVERY: int = 1000
+    # Excel exports: finished workbooks are kept in memory up to this size, then spooled to a temp
+    # file, and sent back in chunks of EXCEL_CHUNK_SIZE bytes
+    EXCEL_SPOOL_MAX_SIZE: int = 8 * 1024 * 1024
+    EXCEL_CHUNK_SIZE: int = 64 * 1024
+    # Report cache (/api/reports results and Excel downloads, stats: /api/system/report-cache): total
+    # size of cached results and files; least recently used entries beyond it are evicted
+    REPORT_CACHE_ENABLED: bool = True
+    REPORT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
     # CORS
     BACKEND_CORS_ORIGINS: list[str] = ["*"]  # Allow all origins for development
 
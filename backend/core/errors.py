@@ -74,3 +74,14 @@ def forbidden(message: str, reason: Optional[str] = None) -> HTTPException:
         logger.warning(f"Forbidden: {message}")
 
     return HTTPException(status_code=403, detail=message)
+
+
+def service_unavailable(message: str, retry_after: Optional[int] = None) -> HTTPException:
+    """
+    503 Service Unavailable - Temporarily at capacity
+    Use for: connection caps, busy background resources
+    """
+    logger.warning(f"Service Unavailable: {message}")
+
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+    return HTTPException(status_code=503, detail=message, headers=headers)
@@ -0,0 +1,128 @@
+"""
+Streaming Multipart Reader
+Yields uploaded files one at a time as their multipart parts finish arriving, instead of
+buffering the whole form like request.form(). File data is spooled to disk above a threshold.
+"""
+
+import logging
+from dataclasses import dataclass
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, List, Optional
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import ClientDisconnect, Request
+
+from backend.core.errors import bad_request
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StreamedFile:
+    filename: str
+    file: SpooledTemporaryFile
+    size: int = 0
+
+    def read(self) -> bytes:
+        self.file.seek(0)
+        return self.file.read()
+
+    def close(self):
+        self.file.close()
+
+
+async def iter_multipart_files(request: Request, spool_max_size: int) -> AsyncIterator[StreamedFile]:
+    """
+    Parse a multipart/form-data body incrementally and yield each file part once complete.
+
+    The consumer owns each yielded StreamedFile and should close() it. Non-file fields are
+    ignored. The next chunk of the body is only read after the consumer resumes, so a slow
+    consumer applies backpressure instead of accumulating files in memory.
+    """
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise bad_request("Expected multipart/form-data upload")
+
+    completed: List[StreamedFile] = []
+    current: Optional[StreamedFile] = None
+    header_name = b""
+    header_value = b""
+    disposition = b""
+    finished = False
+
+    def on_part_begin():
+        nonlocal current, disposition
+        current = None
+        disposition = b""
+
+    def on_header_field(data, start, end):
+        nonlocal header_name
+        header_name += data[start:end]
+
+    def on_header_value(data, start, end):
+        nonlocal header_value
+        header_value += data[start:end]
+
+    def on_header_end():
+        nonlocal header_name, header_value, disposition
+        if header_name.lower() == b"content-disposition":
+            disposition = header_value
+        header_name = b""
+        header_value = b""
+
+    def on_headers_finished():
+        nonlocal current
+        _, options = parse_options_header(disposition)
+        if b"filename" in options:
+            filename = options[b"filename"].decode("utf-8", errors="replace")
+            current = StreamedFile(filename=filename, file=SpooledTemporaryFile(max_size=spool_max_size))
+
+    def on_part_data(data, start, end):
+        if current is not None:
+            # Spooled in memory up to spool_max_size, then rolled over to a temp file
+            current.file.write(data[start:end])
+            current.size += end - start
+
+    def on_part_end():
+        nonlocal current
+        if current is not None:
+            current.file.seek(0)
+            completed.append(current)
+            current = None
+
+    def on_end():
+        nonlocal finished
+        finished = True
+
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": on_part_begin,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_end": on_end,
+        },
+    )
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            while completed:
+                yield completed.pop(0)
+        parser.finalize()
+        while completed:
+            yield completed.pop(0)
+        if not finished:
+            # Body ended without the closing boundary: the client went away mid-upload
+            raise ClientDisconnect()
+    finally:
+        # Parts not handed to the consumer (error or early exit)
+        for streamed in completed:
+            streamed.close()
+        if current is not None:
+            current.close()
@@ -0,0 +1,304 @@
+"""
+Normalization Library
+Number, date and text normalization shared by the scrapers, ingestion and services.
+
+Three conventions coexist and keep their exact behaviour:
+- PO cells (po_scraper): digit-only ints, [digits . -] floats, dd/mm/yyyy dates
+- SRV cells (srv_scraper): plain ints, comma-stripped decimals (0.0 when empty), YYYY-MM-DD dates
+- typed values (ingestion/services): to_int / to_float / to_qty, YYYY-MM-DD dates (iso_date)
+
+Patterns are compiled once and date parsing is memoized, since the same few dates repeat
+across every lot and SRV row of a file. normalize_column converts a whole column of cells,
+calling the converter once per distinct value.
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional, TypeVar, Union
+
+T = TypeVar("T")
+
+# Distinct date strings kept per date parser (a PO/SRV file has a few dozen at most)
+DATE_CACHE_SIZE = 4096
+
+RX_NON_DIGIT = re.compile(r"[^\d]")
+RX_NON_NUMERIC = re.compile(r"[^\d.\-]")
+RX_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+RX_NUM_DATE = re.compile(r"(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{2,4})")
+RX_MON_DATE = re.compile(r"(\d{1,2})[\/\-]([A-Z]{3})[\/\-](\d{2,4})")
+RX_NUM_DATE_LOOSE = re.compile(r"(\d{1,2})[\/\-\.\s](\d{1,2})[\/\-\.\s](\d{2,4})")
+RX_MON_DATE_LOOSE = re.compile(r"(\d{1,2})[\/\-\.\s]([A-Z]{3})[\/\-\.\s](\d{2,4})")
+
+SRV_DATE_FORMATS = (
+    "%d/%m/%Y",  # 27/09/2025
+    "%d-%m-%Y",  # 27-09-2025
+    "%Y-%m-%d",  # 2025-09-27
+    "%d.%m.%Y",  # 27.09.2025
+    "%d %m %Y",  # 27 09 2025
+    "%d/%m/%y",  # 27/09/25
+    "%d-%m-%y",  # 27-09-25
+    "%d.%m.%y",  # 27.09.25
+)
+
+
+# --------------------------------------------------
+# Text
+# --------------------------------------------------
+def clean(text):
+    """Collapse whitespace runs to one space and strip (str.split uses the same whitespace set as \\s)"""
+    return " ".join(text.split()) if text else ""
+
+
+# --------------------------------------------------
+# PO cells (po_scraper)
+# --------------------------------------------------
+def po_int(val):
+    """Digits of a cell as int ('1,234' -> 1234), None when it has none"""
+    try:
+        v = str(val)
+        if not v.isdecimal():
+            v = RX_NON_DIGIT.sub("", v)
+        return int(v) if v else None
+    except Exception:
+        return None
+
+
+def po_float(val):
+    """Float from the digits, '.' and '-' of a cell, None when there are none"""
+    try:
+        v = RX_NON_NUMERIC.sub("", str(val))
+        return float(v) if v else None
+    except Exception:
+        return None
+
+
+def po_date(val):
+    """Cell date as dd/mm/yyyy ('' when unparseable)"""
+    if not val:
+        return ""
+    return _po_date(str(val))
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _po_date(text: str) -> str:
+    s = text.strip().upper()
+
+    # dd/mm/yyyy or dd-mm-yyyy
+    m = RX_NUM_DATE.search(s)
+    if m:
+        d, mth, y = m.groups()
+        if len(y) == 2:
+            y = "20" + y
+        return f"{int(d):02d}/{int(mth):02d}/{int(y)}"
+
+    # dd-MMM-yy or dd-MMM-yyyy
+    m = RX_MON_DATE.search(s)
+    if m:
+        d, mon, y = m.groups()
+        if len(y) == 2:
+            y = "20" + y
+        try:
+            dt = datetime.strptime(f"{d}-{mon}-{y}", "%d-%b-%Y")
+            return dt.strftime("%d/%m/%Y")
+        except Exception:
+            return ""
+
+    return ""
+
+
+# --------------------------------------------------
+# SRV cells (srv_scraper)
+# --------------------------------------------------
+def srv_int(value_str: str) -> Optional[int]:
+    """Parse integer from string, handling empty values."""
+    if value_str is None or value_str == "-" or value_str.strip() == "":
+        return None
+
+    try:
+        return int(value_str.strip())
+    except ValueError:
+        return None
+
+
+def srv_decimal(value_str: str) -> float:
+    """Parse decimal/float from string, handling commas and empty values."""
+    if not value_str or value_str == "-":
+        return 0.0
+
+    try:
+        return float(value_str.replace(",", "").strip())
+    except ValueError:
+        return 0.0
+
+
+def srv_date(date_str: str) -> Optional[str]:
+    """
+    Convert date string to YYYY-MM-DD format (SRV_DATE_FORMATS).
+    Unrecognized values are returned stripped, as-is.
+    """
+    if not date_str or date_str == "-":
+        return None
+    return _srv_date(date_str.strip())
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _srv_date(date_str: str) -> str:
+    for fmt in SRV_DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return date_str
+
+
+# --------------------------------------------------
+# Typed values (ingestion, services)
+# --------------------------------------------------
+def to_int(value: Optional[Union[str, int, float]]) -> Optional[int]:
+    """
+    Convert value to integer, handling None and string inputs
+
+    Args:
+        value: Value to convert (can be str, int, float, or None)
+
+    Returns:
+        Integer value or None if conversion fails
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, int):
+        return value
+
+    if isinstance(value, float):
+        return int(value)
+
+    if isinstance(value, str):
+        if "," not in value:
+            try:
+                # Fast path: plain numbers need no cleanup
+                return int(float(value))
+            except ValueError:
+                pass
+
+        value = value.strip()
+        if not value:
+            return None
+
+        # Remove common formatting characters
+        value = value.replace(",", "").replace(" ", "")
+
+        try:
+            # Try converting to float first (handles decimals), then to int
+            return int(float(value))
+        except (ValueError, TypeError):
+            return None
+
+    return None
+
+
+def to_float(value: Optional[Union[str, int, float]]) -> Optional[float]:
+    """
+    Convert value to float, handling None and string inputs
+
+    Args:
+        value: Value to convert (can be str, int, float, or None)
+
+    Returns:
+        Float value or None if conversion fails
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    if isinstance(value, str):
+        if "," not in value:
+            try:
+                # Fast path: plain numbers need no cleanup
+                return float(value)
+            except ValueError:
+                pass
+
+        value = value.strip()
+        if not value:
+            return None
+
+        # Remove common formatting characters
+        value = value.replace(",", "").replace(" ", "")
+
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return None
+
+    return None
+
+
+def to_qty(value: Optional[Union[str, int, float]]) -> Optional[float]:
+    """
+    Convert value to float rounded to 3 decimal places (Standard for GST quantities)
+    """
+    val = to_float(value)
+    if val is None:
+        return None
+    return round(val, 3)
+
+
+def iso_date(val):
+    """Normalize a date to YYYY-MM-DD ('' when unparseable)"""
+    if not val:
+        return ""
+    return _iso_date(str(val))
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _iso_date(text: str) -> str:
+    s = text.strip().upper()
+
+    # Pass through YYYY-MM-DD
+    if RX_ISO_DATE.match(s):
+        return s
+
+    # dd/mm/yyyy or dd-mm-yyyy or dd.mm.yyyy or dd mm yyyy
+    m = RX_NUM_DATE_LOOSE.search(s)
+    if m:
+        d, mth, y = m.groups()
+        if len(y) == 2:
+            y = "20" + y
+        return f"{int(y)}-{int(mth):02d}-{int(d):02d}"
+
+    # dd-MMM-yy or dd-MMM-yyyy or dd.MMM.yyyy or dd MMM yyyy
+    m = RX_MON_DATE_LOOSE.search(s)
+    if m:
+        d, mon, y = m.groups()
+        if len(y) == 2:
+            y = "20" + y
+        try:
+            dt = datetime.strptime(f"{d}-{mon}-{y}", "%d-%b-%Y")
+            return dt.strftime("%Y-%m-%d")
+        except ValueError:
+            return ""
+
+    return ""
+
+
+# --------------------------------------------------
+# Columns
+# --------------------------------------------------
+def normalize_column(values: Iterable[Any], fn: Callable[[Any], T]) -> List[T]:
+    """Apply fn to a column of cell values, once per distinct value"""
+    memo = {}
+    out = []
+    for value in values:
+        key = (value.__class__, value)
+        try:
+            result = memo[key]
+        except KeyError:
+            result = memo[key] = fn(value)
+        except TypeError:  # unhashable value
+            result = fn(value)
+        out.append(result)
+    return out
@@ -2,86 +2,8 @@
 Number utility functions for Sales Manager
 """
 
-from typing import Optional, Union
-
-
-def to_int(value: Optional[Union[str, int, float]]) -> Optional[int]:
-    """
-    Convert value to integer, handling None and string inputs
-
-    Args:
-        value: Value to convert (can be str, int, float, or None)
-
-    Returns:
-        Integer value or None if conversion fails
-    """
-    if value is None:
-        return None
-
-    if isinstance(value, int):
-        return value
-
-    if isinstance(value, float):
-        return int(value)
-
-    if isinstance(value, str):
-        value = value.strip()
-        if not value:
-            return None
-
-        # Remove common formatting characters
-        value = value.replace(",", "").replace(" ", "")
-
-        try:
-            # Try converting to float first (handles decimals), then to int
-            return int(float(value))
-        except (ValueError, TypeError):
-            return None
-
-    return None
-
-
-def to_float(value: Optional[Union[str, int, float]]) -> Optional[float]:
-    """
-    Convert value to float, handling None and string inputs
-
-    Args:
-        value: Value to convert (can be str, int, float, or None)
-
-    Returns:
-        Float value or None if conversion fails
-    """
-    if value is None:
-        return None
-
-    if isinstance(value, (int, float)):
-        return float(value)
-
-    if isinstance(value, str):
-        value = value.strip()
-        if not value:
-            return None
-
-        # Remove common formatting characters
-        value = value.replace(",", "").replace(" ", "")
-
-        try:
-            return float(value)
-        except (ValueError, TypeError):
-            return None
-
-    return None
-
-
-def to_qty(value: Optional[Union[str, int, float]]) -> Optional[float]:
-    """
-    Convert value to float rounded to 3 decimal places (Standard for GST quantities)
-    """
-    val = to_float(value)
-    if val is None:
-        return None
-    return round(val, 3)
-
+# Conversions live in backend.core.normalize (re-exported here for existing imports)
+from backend.core.normalize import to_float, to_int, to_qty  # noqa: F401
 
 # ============================================================
 # TOLERANCE-BASED COMPARISONS (Per BUSINESS_LOGIC_SPEC)
@@ -0,0 +1,48 @@
+"""
+Server-Sent Events Helpers
+Formatting for text/event-stream frames and a response class for long-running streams.
+"""
+
+import json
+from typing import Any, Optional
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+def format_sse(event: str, data: Any, event_id: Optional[Any] = None) -> str:
+    """Encode one SSE frame (data is JSON-encoded unless already a string)"""
+    payload = data if isinstance(data, str) else json.dumps(data, default=str)
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+def format_sse_comment(text: str = "keep-alive") -> str:
+    """SSE comment frame (ignored by EventSource, keeps proxies from timing out)"""
+    return f": {text}\n\n"
+
+
+class EventStreamResponse(StreamingResponse):
+    """
+    text/event-stream response that only drives the body iterator.
+
+    StreamingResponse (ASGI spec < 2.4) also reads receive() to detect disconnects, which
+    would consume request-body messages that an upload stream is still reading. Here the
+    body iterator owns receive(); after a disconnect, sends become no-ops and the work
+    behind the stream runs to completion.
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(self, content, headers: Optional[dict] = None, **kwargs):
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(headers or {})}
+        super().__init__(content, headers=headers, media_type=self.media_type, **kwargs)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -38,6 +38,28 @@ DATABASE_PATH = DATABASE_DIR / "database"
 MIGRATIONS_DIR = INTERNAL_DIR / "migrations"
 
 
+# Additive, idempotent migrations (CREATE ... IF NOT EXISTS only).
+# init_db only runs for a brand-new database file, so these are also applied to
+# existing databases at startup by ensure_schema().
+RUNTIME_MIGRATIONS = [
+    "032_upload_batches.sql",
+    "033_ingest_jobs.sql",
+    "034_parse_cache.sql",
+    "035_po_amendments.sql",
+    "036_srv_sources.sql",
+    "037_watch_files.sql",
+    "038_search_index.sql",
+    "039_number_changes.sql",
+    "040_material_index.sql",
+    "041_data_versions.sql",
+    "042_fact_tables.sql",
+    "043_change_log.sql",
+    "044_activity_indexes.sql",
+    "045_report_cache.sql",
+    "046_change_log_versions.sql",
+]
+
+
 def init_db(conn: sqlite3.Connection):
     """Initialize database with schema from migrations"""
     logger.info("Initializing new database...")
@@ -72,6 +94,7 @@ def init_db(conn: sqlite3.Connection):
         "028_add_srv_itm_and_rev_no.sql",
         "029_add_manual_override_columns.sql",
         "030_add_po_sl_no.sql",
+        *RUNTIME_MIGRATIONS,
     ]
 
     cursor = conn.cursor()
@@ -93,6 +116,25 @@ def init_db(conn: sqlite3.Connection):
     logger.info("Database initialization complete.")
 
 
+def ensure_schema():
+    """Apply RUNTIME_MIGRATIONS to the current database (safe to run on every startup)"""
+    conn = get_connection()
+    try:
+        for filename in RUNTIME_MIGRATIONS:
+            file_path = MIGRATIONS_DIR / filename
+            if not file_path.exists():
+                logger.warning(f"Migration file not found: {file_path}")
+                continue
+            with open(file_path, "r", encoding="utf-8") as f:
+                conn.executescript(f.read())
+        conn.commit()
+    except Exception as e:
+        logger.error(f"Failed to ensure schema: {e}")
+        raise
+    finally:
+        conn.close()
+
+
 def validate_database_path():
     """Ensure database directory exists"""
     if not DATABASE_DIR.exists():
@@ -177,6 +219,34 @@ def db_transaction(conn: sqlite3.Connection):
         raise
 
 
+@contextmanager
+def db_savepoint(conn: sqlite3.Connection, name: str = "upload_file"):
+    """
+    Savepoint inside an open transaction: on error only the work since the savepoint is
+    rolled back and the outer transaction stays usable.
+
+    Example:
+        with db_transaction(db):
+            for row in rows:
+                try:
+                    with db_savepoint(db):
+                        db.execute("INSERT INTO table1 ...")
+                except sqlite3.IntegrityError:
+                    continue
+    """
+    if not conn.in_transaction:
+        # RELEASE of an outermost savepoint would commit; keep it nested in a real transaction
+        conn.execute("BEGIN")
+    conn.execute(f"SAVEPOINT {name}")
+    try:
+        yield conn
+        conn.execute(f"RELEASE SAVEPOINT {name}")
+    except Exception:
+        conn.execute(f"ROLLBACK TO SAVEPOINT {name}")
+        conn.execute(f"RELEASE SAVEPOINT {name}")
+        raise
+
+
 def verify_wal_mode():
     """Verify that the database is using WAL mode"""
     conn = get_connection()
@@ -0,0 +1,107 @@
+"""
+Streaming Query Helpers
+Iterates SQLite cursors in fixed-size batches and encodes rows as NDJSON or a JSON array,
+so list and register endpoints can send unbounded result sets with constant memory.
+"""
+
+import json
+import logging
+import sqlite3
+from typing import Any, Callable, Iterable, Iterator, Literal, Optional, Sequence, Union
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from backend.db.session import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Rows pulled from SQLite per fetchmany() call (and rows encoded per network chunk)
+STREAM_ARRAYSIZE = 500
+
+StreamFormat = Literal["ndjson", "json"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+def iter_cursor(cursor: sqlite3.Cursor, arraysize: int = STREAM_ARRAYSIZE) -> Iterator[sqlite3.Row]:
+    """Yield rows from an executed cursor without materializing the full result"""
+    cursor.arraysize = arraysize
+    while True:
+        rows = cursor.fetchmany()
+        if not rows:
+            break
+        yield from rows
+
+
+def stream_query(
+    query: str,
+    params: Union[Sequence, dict] = (),
+    row_mapper: Optional[Callable[[sqlite3.Row], Any]] = None,
+    arraysize: int = STREAM_ARRAYSIZE,
+) -> Iterator[Any]:
+    """
+    Execute a read query on a dedicated connection and yield mapped rows.
+
+    The connection is owned by the generator (not the request dependency) because the
+    response body is produced after the route handler has returned.
+    A row_mapper returning None drops the row.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.execute(query, params)
+        for row in iter_cursor(cursor, arraysize):
+            item = row_mapper(row) if row_mapper else dict(row)
+            if item is not None:
+                yield item
+    finally:
+        conn.close()
+
+
+def _encode(item: Any) -> str:
+    if isinstance(item, BaseModel):
+        item = item.model_dump(mode="json")
+    return json.dumps(item, default=str, separators=(",", ":"))
+
+
+def _ndjson_chunks(items: Iterable[Any], batch_size: int) -> Iterator[bytes]:
+    batch = []
+    for item in items:
+        batch.append(_encode(item))
+        if len(batch) >= batch_size:
+            yield ("\n".join(batch) + "\n").encode("utf-8")
+            batch = []
+    if batch:
+        yield ("\n".join(batch) + "\n").encode("utf-8")
+
+
+def _json_array_chunks(items: Iterable[Any], batch_size: int) -> Iterator[bytes]:
+    yield b"["
+    batch = []
+    first = True
+    for item in items:
+        batch.append(_encode(item))
+        if len(batch) >= batch_size:
+            yield (("" if first else ",") + ",".join(batch)).encode("utf-8")
+            first = False
+            batch = []
+    if batch:
+        yield (("" if first else ",") + ",".join(batch)).encode("utf-8")
+    yield b"]"
+
+
+def streaming_json_response(
+    items: Iterable[Any],
+    fmt: StreamFormat = "ndjson",
+    filename: Optional[str] = None,
+    batch_size: int = STREAM_ARRAYSIZE,
+) -> StreamingResponse:
+    """Wrap a row iterator in a StreamingResponse (NDJSON lines or a single JSON array)"""
+    chunks = _json_array_chunks(items, batch_size) if fmt == "json" else _ndjson_chunks(items, batch_size)
+    headers = {"Cache-Control": "no-store"}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES.get(fmt, MEDIA_TYPES["ndjson"]), headers=headers)
@@ -4,6 +4,7 @@ Production Configuration
 """
 
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -13,10 +14,13 @@ from backend.core.exceptions import ResourceNotFoundException, DomainError
 # Import Routers
 from backend.api import (
     buyers,
+    changes,
     common,
     dashboard,
     dc,
+    events,
     health,
+    ingest,
     invoice,
     po,
     po_notes,
@@ -25,6 +29,7 @@ from backend.api import (
     settings,
     srv,
     system,
+    uploads,
 )
 from backend.core.config import settings as app_settings
 from backend.core.exceptions import AppException
@@ -33,7 +38,38 @@ from backend.core.exceptions import AppException
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title=app_settings.PROJECT_NAME, description="SenstoSales ERP API", version="3.4.0")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from backend.db.session import ensure_schema
+    from backend.services.change_feed import close_change_feed, open_change_feed
+    from backend.services.ingest_jobs import start_ingest_workers, stop_ingest_workers
+    from backend.services.number_index import close_number_index, load_number_index
+    from backend.services.watch_folder import start_watch_folder, stop_watch_folder
+
+    ensure_schema()
+    load_number_index()
+    start_ingest_workers()
+    start_watch_folder()
+    open_change_feed()
+    yield
+    close_change_feed()
+    stop_watch_folder()
+    stop_ingest_workers()
+    close_number_index()
+    # Background resources started lazily by requests
+    from backend.services.parse_pool import shutdown_parse_pool
+
+    shutdown_parse_pool()
+
+
+app = FastAPI(
+    title=app_settings.PROJECT_NAME,
+    description="SenstoSales ERP API",
+    version="3.4.0",
+    lifespan=lifespan,
+)
 
 # CORS Configuration
 # Allow all origins for development (including localhost:3001, localhost:3000, etc.)
@@ -90,6 +126,10 @@ app.include_router(settings.router, prefix="/api/settings", tags=["Settings"])
 app.include_router(buyers.router, prefix="/api/buyers", tags=["Buyers"])
 app.include_router(search.router, prefix="/api/search", tags=["Search"])
 app.include_router(system.router, prefix="/api/system", tags=["System"])  # Included system router
+app.include_router(uploads.router, prefix="/api/uploads", tags=["Uploads"])
+app.include_router(ingest.router, prefix="/api/ingest", tags=["Ingestion Jobs"])
+app.include_router(events.router, prefix="/api/events", tags=["Events"])
+app.include_router(changes.router, prefix="/api/changes", tags=["Changes"])
 
 app.include_router(po_notes.router, prefix="/api/po-notes", tags=["PO Notes"])
 
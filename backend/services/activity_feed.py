@@ -0,0 +1,222 @@
+"""
+Activity Feed
+Recent POs, DCs and invoices merged newest first in one statement (GET /api/dashboard/activity).
+
+- Each document type is an indexed scan on its activity sort key (created_at, falling back to
+  the document date; migration 044). The UNION ALL is ordered by that key, so SQLite merges
+  the three scans and stops after the page: cost depends on the page size, not on history.
+- Quantity rollups (ordered / delivered / received) are evaluated for the page rows only.
+- Keyset pagination: every row carries a `cursor`; passing the last one as `before` returns
+  the next older page. Ties on the sort key are broken by type, number and financial year.
+"""
+
+import json
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from backend.services.change_log import read_changes
+from backend.services.status_service import calculate_entity_status
+
+TYPES = ("PO", "DC", "Invoice")
+
+# Per type: (sort_at, type, number, scope) must match the index expressions of migration 044
+_ARMS = {
+    "PO": """
+        SELECT COALESCE(NULLIF(created_at, ''), po_date, '') AS sort_at, 'PO' AS type,
+               po_number AS number, '' AS scope, po_date AS date, supplier_name AS party,
+               po_value AS amount, created_at, NULL AS dc_number
+        FROM purchase_orders
+        {where}
+    """,
+    "DC": """
+        SELECT COALESCE(NULLIF(created_at, ''), dc_date, '') AS sort_at, 'DC' AS type,
+               dc_number AS number, '' AS scope, dc_date AS date, consignee_name AS party,
+               0 AS amount, created_at, NULL AS dc_number
+        FROM delivery_challans
+        {where}
+    """,
+    "Invoice": """
+        SELECT COALESCE(NULLIF(created_at, ''), invoice_date, '') AS sort_at, 'Invoice' AS type,
+               invoice_number AS number, COALESCE(financial_year, '') AS scope, invoice_date AS date,
+               buyer_gstin AS party, total_invoice_value AS amount, created_at, dc_number
+        FROM gst_invoices
+        {where}
+    """,
+}
+
+# Keyset condition per type, on the same expressions as the sort key
+_BEFORE = {
+    "PO": "(COALESCE(NULLIF(created_at, ''), po_date, ''), 'PO', po_number, '')",
+    "DC": "(COALESCE(NULLIF(created_at, ''), dc_date, ''), 'DC', dc_number, '')",
+    "Invoice": "(COALESCE(NULLIF(created_at, ''), invoice_date, ''), 'Invoice', invoice_number, COALESCE(financial_year, ''))",
+}
+
+# Per type: restriction to a set of document numbers (incremental sync)
+_NUMBER_IN = {
+    "PO": "WHERE po_number IN (SELECT value FROM json_each(:numbers_PO))",
+    "DC": "WHERE dc_number IN (SELECT value FROM json_each(:numbers_DC))",
+    "Invoice": "WHERE invoice_number IN (SELECT value FROM json_each(:numbers_Invoice))",
+}
+
+_ENTITY_TYPES = {"po": "PO", "dc": "DC", "invoice": "Invoice"}
+
+FEED_SQL = """
+WITH page AS MATERIALIZED (
+    {arms}
+    ORDER BY sort_at DESC, type DESC, number DESC, scope DESC
+    LIMIT :limit
+)
+SELECT p.*,
+    CASE p.type
+        WHEN 'PO' THEN (SELECT COALESCE(SUM(ord_qty), 0) FROM purchase_order_items WHERE po_number = p.number)
+        WHEN 'Invoice' THEN (SELECT COALESCE(SUM(quantity), 0) FROM gst_invoice_items WHERE invoice_number = p.number)
+        ELSE (
+            SELECT COALESCE(SUM(pod.dely_qty), 0)
+            FROM delivery_challan_items dci
+            LEFT JOIN purchase_order_deliveries pod ON dci.po_item_id = pod.po_item_id AND dci.lot_no = pod.lot_no
+            WHERE dci.dc_number = p.number
+        )
+    END AS t_ord,
+    CASE p.type
+        WHEN 'PO' THEN (
+            SELECT COALESCE(SUM(pod.delivered_qty), 0)
+            FROM purchase_order_deliveries pod
+            JOIN purchase_order_items poi ON pod.po_item_id = poi.id
+            WHERE poi.po_number = p.number
+        )
+        WHEN 'Invoice' THEN (SELECT COALESCE(SUM(dispatch_qty), 0) FROM delivery_challan_items WHERE dc_number = p.dc_number)
+        ELSE (SELECT COALESCE(SUM(dispatch_qty), 0) FROM delivery_challan_items WHERE dc_number = p.number)
+    END AS t_del,
+    CASE p.type
+        WHEN 'PO' THEN (
+            SELECT COALESCE(SUM(pod.received_qty), 0)
+            FROM purchase_order_deliveries pod
+            JOIN purchase_order_items poi ON pod.po_item_id = poi.id
+            WHERE poi.po_number = p.number
+        )
+        WHEN 'Invoice' THEN (
+            SELECT COALESCE(SUM(si.received_qty), 0)
+            FROM srv_items si
+            JOIN srvs s ON si.srv_number = s.srv_number
+            WHERE s.invoice_number = p.number
+        )
+        ELSE (SELECT COALESCE(SUM(received_qty), 0) FROM srv_items WHERE challan_no = p.number)
+    END AS t_recd
+FROM page p
+ORDER BY p.sort_at DESC, p.type DESC, p.number DESC, p.scope DESC
+"""
+
+
+def encode_cursor(row: Dict) -> str:
+    return f"{row['sort_at']}|{row['type']}|{row['number']}|{row['scope']}"
+
+
+def decode_cursor(cursor: str) -> Optional[Dict[str, str]]:
+    """Inverse of encode_cursor (numbers may contain '|'); None when malformed"""
+    parts = cursor.split("|", 2)
+    if len(parts) != 3 or parts[1] not in TYPES or "|" not in parts[2]:
+        return None
+    number, scope = parts[2].rsplit("|", 1)
+    return {"sort_at": parts[0], "type": parts[1], "number": number, "scope": scope}
+
+
+def recent_activity(
+    db: sqlite3.Connection,
+    limit: int = 10,
+    before: Optional[Dict[str, str]] = None,
+    types: Optional[Iterable[str]] = None,
+) -> List[Dict]:
+    """Newest documents first (older than `before` when given), with live status"""
+    selected = [t for t in TYPES if types is None or t in set(types)]
+    if not selected:
+        return []
+    params: Dict[str, object] = {"limit": limit}
+    where = ""
+    if before is not None:
+        params.update({f"before_{k}": v for k, v in before.items()})
+    arms = []
+    for t in selected:
+        if before is not None:
+            where = f"WHERE {_BEFORE[t]} < (:before_sort_at, :before_type, :before_number, :before_scope)"
+        arms.append(_ARMS[t].format(where=where))
+    sql = FEED_SQL.format(arms="UNION ALL".join(arms))
+
+    return [_feed_row(row) for row in db.execute(sql, params).fetchall()]
+
+
+def _feed_row(row: sqlite3.Row) -> Dict:
+    d = dict(row)
+    d["cursor"] = encode_cursor(d)
+    if d["type"] == "Invoice":
+        d["party"] = d["party"] or "Client"
+    else:
+        del d["dc_number"]
+    d["status"] = calculate_entity_status(d["t_ord"], d["t_del"], d["t_recd"])
+    del d["sort_at"], d["scope"]
+    return d
+
+
+def _srv_documents(db: sqlite3.Connection, srv_number: str) -> Optional[List[Tuple[str, str, str]]]:
+    """DCs and invoices whose received quantity an SRV contributes to (None once the SRV is gone)"""
+    header = db.execute("SELECT invoice_number FROM srvs WHERE srv_number = ?", (srv_number,)).fetchone()
+    if header is None:
+        return None
+    docs = [
+        ("DC", row[0], "")
+        for row in db.execute(
+            "SELECT DISTINCT challan_no FROM srv_items WHERE srv_number = ? AND challan_no IS NOT NULL",
+            (srv_number,),
+        )
+    ]
+    if header["invoice_number"]:
+        docs.append(("Invoice", header["invoice_number"], None))
+    return docs
+
+
+def activity_changes(db: sqlite3.Connection, since: int = 0, limit: int = 500) -> Dict:
+    """Feed rows of the documents changed after change log cursor `since`"""
+    log = read_changes(db, since, limit, entities=("po", "dc", "invoice", "srv"))
+    reset = log["reset"]
+
+    # Last operation per document; invoice scope None = any financial year
+    touched: Dict[Tuple[str, str, Optional[str]], str] = {}
+    for change in log["changes"]:
+        if change["entity"] != "srv":
+            doc = (_ENTITY_TYPES[change["entity"]], change["entity_id"], change["scope"] or None)
+            touched[doc] = change["op"]
+            continue
+        docs = _srv_documents(db, change["entity_id"])
+        if docs is None:
+            reset = True
+            continue
+        for doc in docs:
+            touched.setdefault(doc, "update")
+
+    upserts: List[Dict] = []
+    found: Set[Tuple[str, str]] = set()
+    if touched:
+        numbers = {t: sorted({number for (dt, number, _) in touched if dt == t}) for t in TYPES}
+        arms = [_ARMS[t].format(where=_NUMBER_IN[t]) for t in TYPES]
+        params: Dict[str, object] = {"limit": -1}
+        params.update({f"numbers_{t}": json.dumps(numbers[t]) for t in TYPES})
+        for row in db.execute(FEED_SQL.format(arms="UNION ALL".join(arms)), params).fetchall():
+            key = (row["type"], row["number"])
+            # Invoice numbers repeat across financial years: keep only the touched ones
+            if row["type"] == "Invoice" and (*key, None) not in touched and (*key, row["scope"]) not in touched:
+                continue
+            found.add(key)
+            upserts.append(_feed_row(row))
+
+    deletes = [
+        {"type": t, "number": number}
+        for (t, number, _), op in touched.items()
+        if (t, number) not in found and op == "delete"
+    ]
+    return {
+        "upserts": upserts,
+        "deletes": deletes,
+        "cursor": log["cursor"],
+        "head": log["head"],
+        "has_more": log["has_more"],
+        "reset": reset,
+    }
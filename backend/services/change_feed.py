@@ -0,0 +1,211 @@
+"""
+Change Feed
+Per-worker fan-out of data changes to the /api/events SSE streams.
+
+- One watcher per worker process, running only while at least one stream is open. Every
+  EVENTS_POLL_SECONDS it reads PRAGMA data_version on its own connection, which changes
+  whenever another connection (any thread or process) commits; only then does it read the
+  data_versions counters (migration 041) and push the entities whose version moved.
+- Pending changes are merged per subscriber (latest version per entity), so a slow client
+  costs one small dict, never a growing queue.
+- Streams send `versions` (all counters) on connect, `change` ({entity: version, ...}) after
+  each commit that touched those entities, and a keep-alive comment when otherwise idle.
+  The SSE id is the version vector ("po.dc.invoice.srv"), for clients that want to persist it.
+- At most EVENTS_MAX_CONNECTIONS streams per worker; further clients get 503 + Retry-After.
+  A stream takes its slot when its body starts, so a response that is never sent holds none.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from backend.core.config import settings
+from backend.core.sse import format_sse, format_sse_comment
+
+logger = logging.getLogger(__name__)
+
+ENTITIES = ("po", "dc", "invoice", "srv")
+# How often an idle stream checks whether its client is still connected
+DISCONNECT_CHECK_SECONDS = 1.0
+# EventSource reconnect delay sent to clients (ms)
+RETRY_MS = 3000
+
+
+class _Subscriber:
+    __slots__ = ("pending", "wakeup")
+
+    def __init__(self):
+        self.pending: Dict[str, int] = {}
+        self.wakeup = asyncio.Event()
+
+
+class ChangeFeed:
+    def __init__(self):
+        self._lock = threading.Lock()  # guards the connection and the versions (poll thread)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._versions: Dict[str, int] = {}
+        self._subscribers: Set[_Subscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.polls = 0
+        self.change_events = 0
+        self.connections_total = 0
+        self.rejected = 0
+
+    # --------------------------------------------------
+    # Watching
+    # --------------------------------------------------
+    def _poll(self) -> Dict[str, int]:
+        """Entities whose version moved since the last poll (runs in a worker thread)"""
+        with self._lock:
+            if self._closed:
+                return {}
+            if self._conn is None:
+                from backend.db.session import get_connection
+
+                self._conn = get_connection()
+            self.polls += 1
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return {}
+            self._data_version = data_version
+            versions = {row[0]: row[1] for row in self._conn.execute("SELECT entity, version FROM data_versions")}
+            # The first read only establishes the baseline (streams start from a full snapshot)
+            changed = {e: v for e, v in versions.items() if self._versions and self._versions.get(e) != v}
+            self._versions = versions
+            return changed
+
+    async def _refresh(self):
+        """Poll once and hand the changed entities to every open stream"""
+        try:
+            changed = await asyncio.to_thread(self._poll)
+        except sqlite3.Error as e:
+            logger.warning(f"Change feed poll failed: {e}")
+            return
+        if changed:
+            self.change_events += 1
+            for sub in self._subscribers:
+                sub.pending.update(changed)
+                sub.wakeup.set()
+
+    async def _watch(self):
+        try:
+            while self._subscribers and not self._closed:
+                await asyncio.sleep(settings.EVENTS_POLL_SECONDS)
+                await self._refresh()
+        finally:
+            self._task = None
+
+    def versions(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._versions)
+
+    # --------------------------------------------------
+    # Streams
+    # --------------------------------------------------
+    def accepting(self) -> bool:
+        """Whether a new stream fits under EVENTS_MAX_CONNECTIONS (counted as rejected otherwise)"""
+        if self._closed or len(self._subscribers) >= settings.EVENTS_MAX_CONNECTIONS:
+            self.rejected += 1
+            return False
+        return True
+
+    def subscribe(self) -> Optional[_Subscriber]:
+        """Register a stream; None when this worker is at EVENTS_MAX_CONNECTIONS"""
+        if not self.accepting():
+            return None
+        sub = _Subscriber()
+        self._subscribers.add(sub)
+        self.connections_total += 1
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber):
+        self._subscribers.discard(sub)
+
+    async def stream(self, is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[str]:
+        """SSE frames for one subscriber until the client disconnects or the feed closes"""
+        # Subscribed here rather than by the route: the slot is only held while the body runs
+        sub = self.subscribe()
+        if sub is None:
+            # Admitted by the route, but the cap was reached before the body started
+            yield f"retry: {RETRY_MS}\n\n"
+            return
+        try:
+            await self._refresh()
+            versions = self.versions()
+            sub.pending.clear()  # already contained in the snapshot
+            yield f"retry: {RETRY_MS}\n\n"
+            yield format_sse("versions", versions, event_id=self._event_id(versions))
+            last_sent = time.monotonic()
+            while not self._closed:
+                try:
+                    await asyncio.wait_for(sub.wakeup.wait(), DISCONNECT_CHECK_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                if await is_disconnected():
+                    return
+                if sub.pending:
+                    sub.wakeup.clear()
+                    changed, sub.pending = sub.pending, {}
+                    yield format_sse("change", changed, event_id=self._event_id(self.versions()))
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= settings.EVENTS_KEEPALIVE_SECONDS:
+                    yield format_sse_comment()
+                    last_sent = time.monotonic()
+                else:
+                    sub.wakeup.clear()
+        finally:
+            self.unsubscribe(sub)
+
+    @staticmethod
+    def _event_id(versions: Dict[str, int]) -> str:
+        return ".".join(str(versions.get(e, 0)) for e in ENTITIES)
+
+    # --------------------------------------------------
+    # Lifecycle
+    # --------------------------------------------------
+    def stats(self) -> dict:
+        return {
+            "connections": len(self._subscribers),
+            "max_connections": settings.EVENTS_MAX_CONNECTIONS,
+            "connections_total": self.connections_total,
+            "rejected": self.rejected,
+            "watching": self._task is not None,
+            "polls": self.polls,
+            "change_events": self.change_events,
+            "versions": self.versions(),
+            "poll_seconds": settings.EVENTS_POLL_SECONDS,
+            "keepalive_seconds": settings.EVENTS_KEEPALIVE_SECONDS,
+        }
+
+    def open(self):
+        """Startup hook: accept streams (the watcher itself starts with the first one)"""
+        self._closed = False
+
+    def close(self):
+        """Shutdown hook: ends open streams and releases the connection"""
+        self._closed = True
+        for sub in list(self._subscribers):
+            sub.wakeup.set()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._data_version = None
+
+
+change_feed = ChangeFeed()
+
+
+def open_change_feed():
+    change_feed.open()
+
+
+def close_change_feed():
+    change_feed.close()
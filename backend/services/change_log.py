@@ -0,0 +1,194 @@
+"""
+Change Log
+Outbox of document mutations (migration 043) behind GET /api/changes.
+
+- record_change() is called by the write paths (PO ingestion, DC create / update / delete,
+  invoice creation, SRV ingestion / deletion, PO notes) on the connection and in the
+  transaction of the mutation itself: a rolled back write leaves no change behind.
+- Readers keep the last seq they saw as cursor and ask for everything after it. `head` is
+  the newest seq, so a client that just downloaded full lists can start from there.
+- compact_change_log() keeps the last CHANGE_LOG_RETAIN_ROWS changes in full; older rows are
+  reduced to the latest change per document and older deletions are dropped (raising
+  purged_through). A cursor behind purged_through may have missed a deletion: such reads
+  return reset = true and the client should reload its lists.
+- Versions count the changes of one document in change_log_versions (migration 046), which
+  compaction never touches: a document recreated after its rows were compacted away keeps
+  counting up.
+"""
+
+import logging
+import sqlite3
+from typing import Iterable, Optional
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ENTITIES = ("po", "dc", "invoice", "srv", "po_note")
+OPS = ("create", "update", "delete")
+
+# Per-document version counter (migration 046): survives compaction of the document's rows
+BUMP_VERSION_SQL = """
+INSERT INTO change_log_versions (entity, entity_id, scope, version)
+VALUES (:entity, :entity_id, :scope, 1)
+ON CONFLICT (entity, entity_id, scope) DO UPDATE SET version = version + 1
+RETURNING version
+"""
+
+RECORD_SQL = """
+INSERT INTO change_log (entity, entity_id, scope, op, version)
+VALUES (:entity, :entity_id, :scope, :op, :version)
+"""
+
+# Every PO, DC, invoice and SRV (bulk purge by /api/system/reset-db)
+_ALL_DOCUMENTS = """
+    SELECT 'po' AS entity, CAST(po_number AS TEXT) AS entity_id, '' AS scope FROM purchase_orders
+    UNION ALL SELECT 'dc', dc_number, '' FROM delivery_challans
+    UNION ALL SELECT 'invoice', invoice_number, COALESCE(financial_year, '') FROM gst_invoices
+    UNION ALL SELECT 'srv', srv_number, '' FROM srvs
+"""
+
+BUMP_PURGE_VERSIONS_SQL = f"""
+INSERT INTO change_log_versions (entity, entity_id, scope, version)
+SELECT entity, entity_id, scope, 1 FROM ({_ALL_DOCUMENTS}) WHERE true
+ON CONFLICT (entity, entity_id, scope) DO UPDATE SET version = version + 1
+"""
+
+RECORD_PURGE_SQL = f"""
+INSERT INTO change_log (entity, entity_id, scope, op, version)
+SELECT d.entity, d.entity_id, d.scope, 'delete', v.version
+FROM ({_ALL_DOCUMENTS}) d
+JOIN change_log_versions v ON v.entity = d.entity AND v.entity_id = d.entity_id AND v.scope = d.scope
+"""
+
+COMPACT_SUPERSEDED_SQL = """
+DELETE FROM change_log
+WHERE seq <= :horizon
+  AND EXISTS (
+      SELECT 1 FROM change_log later
+      WHERE later.entity = change_log.entity AND later.entity_id = change_log.entity_id
+        AND later.scope = change_log.scope AND later.seq > change_log.seq
+  )
+"""
+
+# Head seq at the last compaction, per process (compaction is re-checked every COMPACT_EVERY changes)
+_compacted_head = 0
+
+
+def record_change(db: sqlite3.Connection, entity: str, entity_id, op: str, scope: Optional[str] = None):
+    """Append one change in the caller's transaction"""
+    params = {"entity": entity, "entity_id": str(entity_id), "scope": scope or "", "op": op}
+    params["version"] = db.execute(BUMP_VERSION_SQL, params).fetchone()[0]
+    db.execute(RECORD_SQL, params)
+
+
+def record_purge(db: sqlite3.Connection) -> int:
+    """Log the deletion of every document before they are purged (caller's transaction)"""
+    db.execute(BUMP_PURGE_VERSIONS_SQL)
+    return db.execute(RECORD_PURGE_SQL).rowcount
+
+
+def head(db: sqlite3.Connection) -> int:
+    return db.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+
+def read_changes(
+    db: sqlite3.Connection, since: int = 0, limit: int = 500, entities: Optional[Iterable[str]] = None
+) -> dict:
+    """Changes after cursor `since` (oldest first), the next cursor and the log head"""
+    where = ["seq > ?"]
+    params: list = [since]
+    if entities:
+        entities = list(entities)
+        where.append(f"entity IN ({', '.join('?' * len(entities))})")
+        params += entities
+
+    # One snapshot for meta, head and rows; inside the caller's transaction when one is open
+    own_transaction = not db.in_transaction
+    if own_transaction:
+        db.execute("BEGIN")
+    try:
+        purged_through, current_head = db.execute(
+            "SELECT purged_through, (SELECT COALESCE(MAX(seq), 0) FROM change_log) FROM change_log_meta"
+        ).fetchone()
+        rows = db.execute(
+            f"""
+            SELECT seq, entity, entity_id, scope, op, version, created_at
+            FROM change_log WHERE {" AND ".join(where)}
+            ORDER BY seq LIMIT ?
+            """,
+            (*params, limit + 1),
+        ).fetchall()
+    finally:
+        if own_transaction:
+            db.commit()
+
+    has_more = len(rows) > limit
+    changes = [dict(row) for row in rows[:limit]]
+    # Without more rows the cursor moves to the head, past changes the entity filter skipped
+    cursor = changes[-1]["seq"] if has_more else max(since, current_head)
+    return {
+        "changes": changes,
+        "cursor": cursor,
+        "head": current_head,
+        "has_more": has_more,
+        "reset": 0 < since < purged_through,
+    }
+
+
+def compact_change_log(db: sqlite3.Connection, retain_rows: Optional[int] = None) -> dict:
+    """Reduce changes older than the last `retain_rows` to the latest per document"""
+    global _compacted_head
+    retain_rows = settings.CHANGE_LOG_RETAIN_ROWS if retain_rows is None else retain_rows
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        current_head = head(db)
+        horizon = current_head - retain_rows
+        superseded = db.execute(COMPACT_SUPERSEDED_SQL, {"horizon": horizon}).rowcount
+        db.execute(
+            """
+            UPDATE change_log_meta SET
+                purged_through = MAX(purged_through, COALESCE(
+                    (SELECT MAX(seq) FROM change_log WHERE op = 'delete' AND seq <= :horizon), 0)),
+                compacted_at = CURRENT_TIMESTAMP
+            """,
+            {"horizon": horizon},
+        )
+        deletions = db.execute(
+            "DELETE FROM change_log WHERE op = 'delete' AND seq <= ?", (horizon,)
+        ).rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    _compacted_head = current_head
+    return {"head": current_head, "superseded_removed": superseded, "deletions_removed": deletions}
+
+
+def maybe_compact_change_log(db: sqlite3.Connection, current_head: int):
+    """Compact once CHANGE_LOG_COMPACT_EVERY changes arrived since the last compaction"""
+    if current_head - _compacted_head < settings.CHANGE_LOG_COMPACT_EVERY:
+        return
+    try:
+        stats = compact_change_log(db)
+        logger.info(f"Change log compacted: {stats}")
+    except sqlite3.OperationalError as e:
+        # Busy writer: the next read retries
+        logger.warning(f"Change log compaction skipped: {e}")
+
+
+def change_log_stats(db: sqlite3.Connection) -> dict:
+    meta = db.execute("SELECT purged_through, compacted_at FROM change_log_meta").fetchone()
+    by_entity = {
+        row[0]: row[1]
+        for row in db.execute("SELECT entity, COUNT(*) FROM change_log GROUP BY entity ORDER BY entity")
+    }
+    return {
+        "rows": sum(by_entity.values()),
+        "by_entity": by_entity,
+        "head": head(db),
+        "purged_through": meta["purged_through"],
+        "compacted_at": meta["compacted_at"],
+        "retain_rows": settings.CHANGE_LOG_RETAIN_ROWS,
+        "compact_every": settings.CHANGE_LOG_COMPACT_EVERY,
+    }
@@ -0,0 +1,212 @@
+"""
+Dashboard Snapshot
+Dashboard summary and insights computed together in one read transaction and cached in process.
+
+- The snapshot records the data_versions (migration 041) it was computed from. Triggers bump
+  those counters on every PO / DC / invoice / SRV write, so a version mismatch means the
+  snapshot is out of date, whichever thread or process wrote.
+- Staleness bounds:
+    DASHBOARD_CACHE_MAX_STALE_SECONDS  an out-of-date snapshot younger than this is still served
+                                       (bulk ingestion bumps versions continuously; 0 = never)
+    DASHBOARD_CACHE_MAX_AGE_SECONDS    an up-to-date snapshot older than this is recomputed anyway
+                                       ("new today", "last 7 days" and the month move with the clock)
+  A snapshot from a previous day is never served.
+- Counters (hits, stale hits, misses, invalidations, compute time): GET /api/system/dashboard-cache.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_SQL = """
+SELECT
+    (SELECT SUM(total_invoice_value) FROM gst_invoices WHERE strftime('%Y-%m', created_at) = :month) AS total_sales,
+    -- Pending POs: unified HWM logic of reconciliation_ledger ("Closed" = nothing pending)
+    (
+        SELECT COUNT(*) FROM (
+            SELECT po_number, SUM(pending_qty) AS total_pending
+            FROM reconciliation_ledger
+            GROUP BY po_number
+        )
+        WHERE total_pending > 0.001
+    ) AS active_pos,
+    (SELECT COUNT(*) FROM purchase_orders WHERE date(created_at) = :today) AS new_pos_today,
+    -- Active challans: not invoiced yet
+    (
+        SELECT COUNT(DISTINCT dc.dc_number)
+        FROM delivery_challans dc
+        LEFT JOIN gst_invoices i ON dc.dc_number = i.dc_number
+        WHERE i.invoice_number IS NULL
+    ) AS active_challans,
+    (SELECT SUM(po_value) FROM purchase_orders) AS total_po_value,
+    -- Global reconciliation snapshot, straight from the tables instead of the ledger view
+    (SELECT SUM(ord_qty) FROM purchase_order_items) AS total_ordered,
+    (SELECT SUM(dispatch_qty) FROM delivery_challan_items) AS total_delivered,
+    (SELECT SUM(received_qty) FROM srv_items) AS total_received,
+    (SELECT COUNT(*) FROM purchase_orders WHERE po_status = 'New' OR po_status IS NULL) AS unapproved_pos,
+    (
+        SELECT COUNT(*) FROM srv_items
+        WHERE rejected_qty > 0 AND created_at >= date('now', '-7 days')
+    ) AS recent_rejections
+"""
+
+
+def read_versions(db: sqlite3.Connection) -> Dict[str, int]:
+    """Current data version per entity ('po', 'dc', 'invoice', 'srv')"""
+    return {row[0]: row[1] for row in db.execute("SELECT entity, version FROM data_versions")}
+
+
+def _summary(row: sqlite3.Row) -> dict:
+    return {
+        "total_sales_month": row["total_sales"] or 0.0,
+        "sales_growth": 0.0,
+        "pending_pos": row["active_pos"],
+        "new_pos_today": row["new_pos_today"],
+        "active_challans": row["active_challans"],
+        "active_challans_growth": "Stable",
+        "total_po_value": row["total_po_value"] or 0.0,
+        "po_value_growth": 0.0,
+        "active_po_count": row["active_pos"],
+        "total_ordered": row["total_ordered"] or 0.0,
+        "total_delivered": row["total_delivered"] or 0.0,
+        "total_received": row["total_received"] or 0.0,
+    }
+
+
+def _insights(row: sqlite3.Row) -> List[dict]:
+    """Deterministic insights/alerts based on business rules"""
+    insights = []
+
+    # Rule 1: Pending POs
+    if row["unapproved_pos"] > 5:
+        insights.append(
+            {
+                "type": "warning",
+                "text": f"{row['unapproved_pos']} Purchase Orders pending approval",
+                "action": "view_pending",
+            }
+        )
+
+    # Rule 2: Uninvoiced Challans
+    uninvoiced = row["active_challans"]
+    if uninvoiced > 0:
+        insights.append(
+            {
+                "type": "success" if uninvoiced < 10 else "warning",
+                "text": f"{uninvoiced} Challans ready for invoicing",
+                "action": "view_uninvoiced",
+            }
+        )
+
+    # Rule 3: Recent Rejections (SRV)
+    if row["recent_rejections"] > 0:
+        insights.append(
+            {
+                "type": "error",
+                "text": f"{row['recent_rejections']} items rejected in last 7 days",
+                "action": "view_srv",
+            }
+        )
+
+    # Fallback if quiet
+    if not insights:
+        insights.append(
+            {
+                "type": "success",
+                "text": "All systems operational. No immediate alerts.",
+                "action": "none",
+            }
+        )
+    return insights
+
+
+def compute_snapshot(db: sqlite3.Connection) -> dict:
+    """Summary + insights and the data versions they reflect, from one read transaction"""
+    now = datetime.now()
+    # Inside the caller's transaction when one is open (a bare BEGIN would fail there)
+    own_transaction = not db.in_transaction
+    if own_transaction:
+        db.execute("BEGIN")
+    try:
+        versions = read_versions(db)
+        row = db.execute(
+            SUMMARY_SQL, {"month": now.strftime("%Y-%m"), "today": now.strftime("%Y-%m-%d")}
+        ).fetchone()
+    finally:
+        if own_transaction:
+            db.commit()
+    return {
+        "versions": versions,
+        "day": now.strftime("%Y-%m-%d"),
+        "summary": _summary(row),
+        "insights": _insights(row),
+    }
+
+
+class DashboardSnapshotCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[dict] = None
+        self._computed_at = 0.0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.last_compute_ms = 0.0
+        self.total_compute_ms = 0.0
+
+    def get(self, db: sqlite3.Connection) -> dict:
+        versions = read_versions(db)
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot["day"] == datetime.now().strftime("%Y-%m-%d"):
+                age = time.monotonic() - self._computed_at
+                if snapshot["versions"] == versions and age < settings.DASHBOARD_CACHE_MAX_AGE_SECONDS:
+                    self.hits += 1
+                    return snapshot
+                if age < settings.DASHBOARD_CACHE_MAX_STALE_SECONDS:
+                    self.stale_hits += 1
+                    return snapshot
+
+            # One recompute at a time; concurrent readers wait for it instead of repeating it
+            self.misses += 1
+            started = time.perf_counter()
+            snapshot = compute_snapshot(db)
+            self.last_compute_ms = (time.perf_counter() - started) * 1000
+            self.total_compute_ms += self.last_compute_ms
+            self._snapshot = snapshot
+            self._computed_at = time.monotonic()
+            return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "cached": self._snapshot is not None,
+                "age_seconds": round(time.monotonic() - self._computed_at, 3) if self._snapshot else None,
+                "versions": self._snapshot["versions"] if self._snapshot else None,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "last_compute_ms": round(self.last_compute_ms, 2),
+                "avg_compute_ms": round(self.total_compute_ms / self.misses, 2) if self.misses else 0.0,
+                "max_stale_seconds": settings.DASHBOARD_CACHE_MAX_STALE_SECONDS,
+                "max_age_seconds": settings.DASHBOARD_CACHE_MAX_AGE_SECONDS,
+            }
+
+
+dashboard_snapshot = DashboardSnapshotCache()
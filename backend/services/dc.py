@@ -16,9 +16,10 @@ from backend.core.exceptions import (
     ResourceNotFoundError,
     ValidationError,
 )
-from backend.core.number_utils import to_qty
+from backend.core.normalize import to_qty
 from backend.core.result import ServiceResult
 from backend.db.models import DCCreate
+from backend.services.change_log import record_change
 
 logger = logging.getLogger(__name__)
 
@@ -339,6 +340,9 @@ def create_dc(dc: DCCreate, items: List[dict], db: sqlite3.Connection) -> Servic
 
         ReconciliationService.reconcile_dc_creation(db, items, final_dc_number)
 
+        record_change(db, "dc", final_dc_number, "create")
+        record_change(db, "po", dc.po_number, "update")
+
         logger.info(f"Successfully created DC {final_dc_number} with {len(items)} items")
 
         return ServiceResult.ok({"success": True, "dc_number": final_dc_number})
@@ -490,6 +494,9 @@ def update_dc(
         # ATOMIC SYNC: Apply new quantities
         ReconciliationService.reconcile_dc_creation(db, items, dc_number)
 
+        record_change(db, "dc", dc_number, "update")
+        record_change(db, "po", dc.po_number, "update")
+
         logger.info(f"Successfully updated DC {dc_number}")
         return ServiceResult.ok({"success": True, "dc_number": dc_number})
 
@@ -530,7 +537,7 @@ def delete_dc(dc_number: str, db: sqlite3.Connection) -> ServiceResult[Dict]:
 
         # Check if DC exists
         dc_row = db.execute(
-            "SELECT 1 FROM delivery_challans WHERE dc_number = ?", (dc_number,)
+            "SELECT po_number FROM delivery_challans WHERE dc_number = ?", (dc_number,)
         ).fetchone()
         if not dc_row:
             raise ResourceNotFoundError("DC", dc_number)
@@ -544,6 +551,9 @@ def delete_dc(dc_number: str, db: sqlite3.Connection) -> ServiceResult[Dict]:
         # Note: reconcile_reversion reads items, so we must do it before delete.
         db.execute("DELETE FROM delivery_challans WHERE dc_number = ?", (dc_number,))
 
+        record_change(db, "dc", dc_number, "delete")
+        record_change(db, "po", dc_row["po_number"], "update")
+
         logger.info(f"Successfully deleted DC {dc_number}")
         return ServiceResult.ok({"success": True, "message": f"DC {dc_number} deleted"})
 
@@ -0,0 +1,131 @@
+"""
+Streaming Excel Export
+Writes tabular exports (registers, report downloads) with constant memory.
+
+- Rows come from an iterator (typically a SQLite cursor via iter_cursor) and go straight into
+  an xlsxwriter workbook in constant_memory mode: each row is flushed to the sheet XML as soon
+  as the next one starts, and strings are stored inline instead of in a shared-string table.
+- The workbook is written to a SpooledTemporaryFile (EXCEL_SPOOL_MAX_SIZE bytes in memory, then
+  disk) and sent back in EXCEL_CHUNK_SIZE chunks; the file is closed once the body is sent.
+- constant_memory requires column widths before the first row, so they are estimated from the
+  first WIDTH_SAMPLE_ROWS rows (held back and written once the widths are set).
+"""
+
+import math
+import sqlite3
+from itertools import islice
+from tempfile import SpooledTemporaryFile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import xlsxwriter
+from fastapi.responses import StreamingResponse
+
+from backend.core.config import settings
+from backend.db.streaming import iter_cursor
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Rows used to estimate column widths (longer values further down are not measured)
+WIDTH_SAMPLE_ROWS = 1000
+MAX_COLUMN_WIDTH = 60
+
+
+def _cell(value: Any) -> Any:
+    # Blank cells for NULL / NaN, like DataFrame.to_excel(na_rep="")
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def _column_widths(columns: Sequence[str], sample: List[Sequence[Any]], padding: int) -> List[int]:
+    widths = [len(str(col)) for col in columns]
+    for row in sample:
+        for i, value in enumerate(row):
+            if value is not None and i < len(widths):
+                widths[i] = max(widths[i], len(str(value)))
+    return [min(width + padding, MAX_COLUMN_WIDTH) for width in widths]
+
+
+def write_xlsx(
+    output,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    sheet_name: str = "Report",
+    header_format: Optional[Dict[str, Any]] = None,
+    width_padding: int = 4,
+) -> int:
+    """Write a header row and all `rows` (sequences in column order) to `output`; returns the row count"""
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_fmt = workbook.add_format(header_format or {"bold": True, "border": 1, "align": "center"})
+
+        rows = iter(rows)
+        sample = [[_cell(v) for v in row] for row in islice(rows, WIDTH_SAMPLE_ROWS)]
+        for i, width in enumerate(_column_widths(columns, sample, width_padding)):
+            worksheet.set_column(i, i, width)
+
+        worksheet.write_row(0, 0, columns, header_fmt)
+        for row_num, row in enumerate(sample, start=1):
+            worksheet.write_row(row_num, 0, row)
+        row_count = len(sample)
+        for row_num, row in enumerate(rows, start=len(sample) + 1):
+            worksheet.write_row(row_num, 0, [_cell(v) for v in row])
+            row_count = row_num
+    finally:
+        workbook.close()
+    return row_count
+
+
+def _file_chunks(file, chunk_size: int) -> Iterator[bytes]:
+    try:
+        while chunk := file.read(chunk_size):
+            yield chunk
+    finally:
+        file.close()
+
+
+def xlsx_file_response(file, filename: str, size: Optional[int] = None) -> StreamingResponse:
+    """Stream an open workbook file from its current position as an attachment (closed when sent)"""
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    return StreamingResponse(
+        _file_chunks(file, settings.EXCEL_CHUNK_SIZE), media_type=XLSX_MEDIA_TYPE, headers=headers
+    )
+
+
+def xlsx_response(
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    filename: str,
+    sheet_name: str = "Report",
+    header_format: Optional[Dict[str, Any]] = None,
+    width_padding: int = 4,
+) -> StreamingResponse:
+    """Build the workbook in a spooled temp file and stream it back as an attachment"""
+    spool = SpooledTemporaryFile(max_size=settings.EXCEL_SPOOL_MAX_SIZE)
+    try:
+        write_xlsx(spool, columns, rows, sheet_name, header_format, width_padding)
+        size = spool.tell()
+        spool.seek(0)
+    except Exception:
+        spool.close()
+        raise
+    return xlsx_file_response(spool, filename, size)
+
+
+def write_query_xlsx(db: sqlite3.Connection, query: str, params: Sequence[Any], output, **kwargs) -> int:
+    """Write a query result to `output`, reading the cursor in batches (columns from the cursor description)"""
+    cursor = db.execute(query, params)
+    columns = [d[0] for d in cursor.description]
+    return write_xlsx(output, columns, iter_cursor(cursor), **kwargs)
+
+
+def query_xlsx_response(
+    db: sqlite3.Connection, query: str, params: Sequence[Any], filename: str, **kwargs
+) -> StreamingResponse:
+    """Export a query result (see write_query_xlsx)"""
+    cursor = db.execute(query, params)
+    columns = [d[0] for d in cursor.description]
+    return xlsx_response(columns, iter_cursor(cursor), filename, **kwargs)
@@ -22,51 +22,15 @@ class ExcelService:
     def generate_response(data: List[Dict], report_type: str) -> StreamingResponse:
         """
         Convert list of dicts to Excel download response (Legacy fallback)
+        Written row by row through the constant-memory export engine (see excel_export.py).
         """
-        output = io.BytesIO()
-
-        # Convert to DataFrame
-        if not data:
-            df = pd.DataFrame()  # Empty
-        else:
-            df = pd.DataFrame(data)
-
-        # Write to Excel with formatting
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df.to_excel(writer, sheet_name="Report", index=False)
-
-            workbook = writer.book
-            worksheet = writer.sheets["Report"]
-
-            # Formats
-            header_fmt = workbook.add_format(
-                {
-                    "bold": True,
-                    "bg_color": "#4F81BD",
-                    "font_color": "white",
-                    "border": 1,
-                }
-            )
-
-            # Apply header format
-            for col_num, value in enumerate(df.columns.values):
-                worksheet.write(0, col_num, value, header_fmt)
+        from backend.services.excel_export import xlsx_response
 
-            # Auto-adjust column width
-            for i, col in enumerate(df.columns):
-                column_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                worksheet.set_column(i, i, column_len)
-
-        output.seek(0)
-
-        filename = f"{report_type}.xlsx"
-        headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers=headers,
-        )
+        # Columns in order of first appearance across all rows (as pd.DataFrame(data) would)
+        columns = list(dict.fromkeys(key for row in data for key in row))
+        rows = ([row.get(col) for col in columns] for row in data)
+        header_fmt = {"bold": True, "bg_color": "#4F81BD", "font_color": "white", "border": 1}
+        return xlsx_response(columns, rows, f"{report_type}.xlsx", header_format=header_fmt, width_padding=2)
 
     @staticmethod
     def _write_standard_header(
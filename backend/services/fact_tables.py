@@ -0,0 +1,304 @@
+"""
+Fact Tables
+Pre-aggregated day x buyer x material category facts (migration 042) and the cube query over them.
+
+- Triggers record every document day a write touched in fact_dirty_days. refresh_facts()
+  recomputes exactly those days from the document lines (one statement, day-range index
+  lookups) and the months containing them, then clears the dirty set, all in one write
+  transaction. Readers call it first, so facts are never stale and a refresh costs the
+  days written since the last one, not the history.
+- Lines are attributed by document date: PO items by PO date, DC items by DC date, invoice
+  items by invoice date, active SRV items by SRV date. Buyer is that of the PO behind the
+  document (via the DC for invoices), category that of the PO item the line refers to.
+- Category '*' rows are the per day x buyer totals; their document counts are distinct
+  documents. Per-category rows count a document once in every category it has lines of.
+- rebuild_facts() recomputes everything (scripts/rebuild_facts.py, POST /api/reports/cube/rebuild).
+"""
+
+import calendar
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+MEASURES = (
+    "ordered_qty",
+    "ordered_value",
+    "dispatched_qty",
+    "dispatched_value",
+    "invoiced_qty",
+    "invoiced_taxable_value",
+    "invoiced_value",
+    "received_qty",
+    "accepted_qty",
+    "rejected_qty",
+    "po_count",
+    "dc_count",
+    "invoice_count",
+    "srv_count",
+)
+
+ALL_CATEGORIES = "*"
+
+# Document lines of the dirty days; every kind has at least one row per document (empty
+# documents still count) with NULL measures where a line has nothing to contribute.
+LINES_SQL = """
+lines AS (
+    SELECT substr(po.po_date, 1, 10) AS day, COALESCE(po.buyer_id, 0) AS buyer_id,
+           COALESCE(CAST(poi.mtrl_cat AS TEXT), '') AS mtrl_cat, 'PO' AS kind, po.po_number AS doc,
+           poi.ord_qty AS ordered_qty, poi.ord_qty * poi.po_rate AS ordered_value,
+           NULL AS dispatched_qty, NULL AS dispatched_value,
+           NULL AS invoiced_qty, NULL AS invoiced_taxable_value, NULL AS invoiced_value,
+           NULL AS received_qty, NULL AS accepted_qty, NULL AS rejected_qty
+    FROM fact_dirty_days d
+    JOIN purchase_orders po ON po.po_date >= d.day AND po.po_date < d.day || '~'
+    LEFT JOIN purchase_order_items poi ON poi.po_number = po.po_number
+    UNION ALL
+    SELECT substr(dc.dc_date, 1, 10), COALESCE(po.buyer_id, 0),
+           COALESCE(CAST(poi.mtrl_cat AS TEXT), ''), 'DC', dc.dc_number,
+           NULL, NULL,
+           dci.dispatch_qty, dci.dispatch_qty * poi.po_rate,
+           NULL, NULL, NULL,
+           NULL, NULL, NULL
+    FROM fact_dirty_days d
+    JOIN delivery_challans dc ON dc.dc_date >= d.day AND dc.dc_date < d.day || '~'
+    LEFT JOIN purchase_orders po ON po.po_number = dc.po_number
+    LEFT JOIN delivery_challan_items dci ON dci.dc_number = dc.dc_number
+    LEFT JOIN purchase_order_items poi ON poi.id = dci.po_item_id
+    UNION ALL
+    SELECT substr(inv.invoice_date, 1, 10), COALESCE(po.buyer_id, 0),
+           COALESCE(CAST(poi.mtrl_cat AS TEXT), ''), 'Invoice',
+           inv.invoice_number || '/' || COALESCE(inv.financial_year, ''),
+           NULL, NULL,
+           NULL, NULL,
+           gii.quantity, gii.taxable_value, gii.total_amount,
+           NULL, NULL, NULL
+    FROM fact_dirty_days d
+    JOIN gst_invoices inv ON inv.invoice_date >= d.day AND inv.invoice_date < d.day || '~'
+    LEFT JOIN delivery_challans dc ON dc.dc_number = inv.dc_number
+    LEFT JOIN purchase_orders po ON po.po_number = dc.po_number
+    LEFT JOIN gst_invoice_items gii
+      ON gii.invoice_number = inv.invoice_number AND gii.financial_year IS inv.financial_year
+    LEFT JOIN purchase_order_items poi ON poi.id = gii.po_item_id
+    UNION ALL
+    SELECT substr(s.srv_date, 1, 10), COALESCE(po.buyer_id, 0),
+           COALESCE(CAST(poi.mtrl_cat AS TEXT), ''), 'SRV', s.srv_number,
+           NULL, NULL,
+           NULL, NULL,
+           NULL, NULL, NULL,
+           si.received_qty, si.accepted_qty, si.rejected_qty
+    FROM fact_dirty_days d
+    JOIN srvs s ON s.srv_date >= d.day AND s.srv_date < d.day || '~'
+    LEFT JOIN srv_items si ON si.srv_number = s.srv_number
+    LEFT JOIN purchase_orders po ON po.po_number = COALESCE(si.po_number, s.po_number)
+    LEFT JOIN purchase_order_items poi ON poi.po_number = si.po_number AND poi.po_item_no = si.po_item_no
+    WHERE s.is_active = 1
+)
+"""
+
+_AGGREGATES = """
+           TOTAL(ordered_qty), TOTAL(ordered_value), TOTAL(dispatched_qty), TOTAL(dispatched_value),
+           TOTAL(invoiced_qty), TOTAL(invoiced_taxable_value), TOTAL(invoiced_value),
+           TOTAL(received_qty), TOTAL(accepted_qty), TOTAL(rejected_qty),
+           COUNT(DISTINCT CASE WHEN kind = 'PO' THEN doc END),
+           COUNT(DISTINCT CASE WHEN kind = 'DC' THEN doc END),
+           COUNT(DISTINCT CASE WHEN kind = 'Invoice' THEN doc END),
+           COUNT(DISTINCT CASE WHEN kind = 'SRV' THEN doc END)
+"""
+
+REFRESH_DAILY_SQL = f"""
+INSERT INTO fact_daily (day, buyer_id, mtrl_cat, {", ".join(MEASURES)})
+WITH {LINES_SQL}
+SELECT day, buyer_id, mtrl_cat, {_AGGREGATES}
+FROM lines
+GROUP BY day, buyer_id, mtrl_cat
+UNION ALL
+SELECT day, buyer_id, '{ALL_CATEGORIES}', {_AGGREGATES}
+FROM lines
+GROUP BY day, buyer_id
+"""
+
+REFRESH_MONTHLY_SQL = f"""
+INSERT INTO fact_monthly (month, buyer_id, mtrl_cat, {", ".join(MEASURES)})
+SELECT substr(f.day, 1, 7), f.buyer_id, f.mtrl_cat, {", ".join(f"SUM(f.{m})" for m in MEASURES)}
+FROM (SELECT DISTINCT substr(day, 1, 7) AS month FROM fact_dirty_days) m
+JOIN fact_daily f ON f.day >= m.month AND f.day < m.month || '~'
+GROUP BY substr(f.day, 1, 7), f.buyer_id, f.mtrl_cat
+"""
+
+MARK_ALL_DAYS_SQL = """
+INSERT INTO fact_dirty_days (day)
+SELECT day FROM (
+    SELECT substr(po_date, 1, 10) AS day FROM purchase_orders
+    UNION SELECT substr(dc_date, 1, 10) FROM delivery_challans
+    UNION SELECT substr(invoice_date, 1, 10) FROM gst_invoices
+    UNION SELECT substr(srv_date, 1, 10) FROM srvs
+)
+WHERE day IS NOT NULL
+ON CONFLICT DO NOTHING
+"""
+
+# Financial year ('2024-25') of a 'YYYY-MM...' column
+_FY_SQL = (
+    "printf('%d-%02d', CAST(substr({col}, 1, 4) AS INTEGER) - (CAST(substr({col}, 6, 2) AS INTEGER) < 4), "
+    "(CAST(substr({col}, 1, 4) AS INTEGER) + (CAST(substr({col}, 6, 2) AS INTEGER) >= 4)) % 100)"
+)
+
+DIMENSIONS = ("day", "month", "fy", "buyer", "category")
+
+# One refresh at a time per process (other processes wait on the write lock)
+_refresh_lock = threading.Lock()
+
+
+# --------------------------------------------------
+# Maintenance
+# --------------------------------------------------
+def _refresh(db: sqlite3.Connection) -> int:
+    days = db.execute("SELECT COUNT(*) FROM fact_dirty_days").fetchone()[0]
+    if not days:
+        return 0
+    db.execute("DELETE FROM fact_daily WHERE day IN (SELECT day FROM fact_dirty_days)")
+    db.execute(REFRESH_DAILY_SQL)
+    db.execute(
+        "DELETE FROM fact_monthly WHERE month IN (SELECT DISTINCT substr(day, 1, 7) FROM fact_dirty_days)"
+    )
+    db.execute(REFRESH_MONTHLY_SQL)
+    db.execute("DELETE FROM fact_dirty_days")
+    return days
+
+
+def refresh_facts(db: sqlite3.Connection) -> int:
+    """Recompute the days written since the last refresh; returns the number of days recomputed"""
+    if db.in_transaction:
+        # Inside the caller's write transaction: its own uncommitted writes are marked too
+        return _refresh(db)
+    with _refresh_lock:
+        if not db.execute("SELECT EXISTS (SELECT 1 FROM fact_dirty_days)").fetchone()[0]:
+            return 0
+        started = time.perf_counter()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            days = _refresh(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    if days > 1:
+        logger.info(f"Fact tables: {days} days refreshed in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return days
+
+
+def rebuild_facts(db: sqlite3.Connection) -> dict:
+    """Recompute all facts from the document tables"""
+    started = time.perf_counter()
+    with _refresh_lock:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM fact_daily")
+            db.execute("DELETE FROM fact_monthly")
+            db.execute("DELETE FROM fact_dirty_days")
+            db.execute(MARK_ALL_DAYS_SQL)
+            days = _refresh(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return {
+        "days": days,
+        "daily_rows": db.execute("SELECT COUNT(*) FROM fact_daily").fetchone()[0],
+        "monthly_rows": db.execute("SELECT COUNT(*) FROM fact_monthly").fetchone()[0],
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+# --------------------------------------------------
+# Cube query
+# --------------------------------------------------
+def _is_month_end(day: str) -> bool:
+    try:
+        year, month, dom = int(day[:4]), int(day[5:7]), int(day[8:10])
+    except ValueError:
+        return False
+    return dom == calendar.monthrange(year, month)[1]
+
+
+def cube_query(
+    db: sqlite3.Connection,
+    group_by: Sequence[str] = ("month",),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    buyer_id: Optional[int] = None,
+    category: Optional[str] = None,
+) -> dict:
+    """
+    Group-by slice over the fact tables: one row per combination of the `group_by`
+    dimensions (day, month, fy, buyer, category) with every measure summed.
+    Month-aligned ranges without a day dimension are answered from fact_monthly.
+    """
+    unknown = [d for d in group_by if d not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimension(s): {', '.join(unknown)}")
+    dims = list(dict.fromkeys(group_by))
+
+    monthly = (
+        "day" not in dims
+        and (start_date is None or start_date[8:10] == "01")
+        and (end_date is None or _is_month_end(end_date))
+    )
+    table, period = ("fact_monthly", "f.month") if monthly else ("fact_daily", "f.day")
+
+    where: List[str] = []
+    params: Dict[str, object] = {}
+    if start_date:
+        where.append(f"{period} >= :start")
+        params["start"] = start_date[:7] if monthly else start_date
+    if end_date:
+        where.append(f"{period} <= :end")
+        params["end"] = end_date[:7] if monthly else end_date
+    if buyer_id is not None:
+        where.append("f.buyer_id = :buyer_id")
+        params["buyer_id"] = buyer_id
+    if category is not None:
+        where.append("f.mtrl_cat = :category")
+        params["category"] = category
+    elif "category" in dims:
+        where.append(f"f.mtrl_cat <> '{ALL_CATEGORIES}'")
+    else:
+        where.append(f"f.mtrl_cat = '{ALL_CATEGORIES}'")
+
+    select: List[str] = []
+    group: List[str] = []
+    for dim in dims:
+        if dim == "day":
+            select.append("f.day AS day")
+            group.append("f.day")
+        elif dim == "month":
+            expr = "f.month" if monthly else "substr(f.day, 1, 7)"
+            select.append(f"{expr} AS month")
+            group.append(expr)
+        elif dim == "fy":
+            expr = _FY_SQL.format(col=period)
+            select.append(f"{expr} AS fy")
+            group.append(expr)
+        elif dim == "buyer":
+            select += ["f.buyer_id AS buyer_id", "MAX(b.name) AS buyer_name"]
+            group.append("f.buyer_id")
+        elif dim == "category":
+            select.append("f.mtrl_cat AS category")
+            group.append("f.mtrl_cat")
+
+    sql = f"""
+    SELECT {", ".join(select + [f"SUM(f.{m}) AS {m}" for m in MEASURES])}
+    FROM {table} f
+    {"LEFT JOIN buyers b ON b.id = f.buyer_id" if "buyer" in dims else ""}
+    {"WHERE " + " AND ".join(where) if where else ""}
+    {"GROUP BY " + ", ".join(group) if group else ""}
+    {"ORDER BY " + ", ".join(group) if group else ""}
+    """
+    rows = [dict(row) for row in db.execute(sql, params).fetchall()]
+    if not group and rows and rows[0]["po_count"] is None:
+        rows = []  # grand total over nothing
+    return {"dimensions": dims, "source": table, "rows": rows}
@@ -0,0 +1,385 @@
+"""
+Ingestion Job Queue
+SQLite-backed background ingestion of PO/SRV uploads (ingest_jobs / ingest_job_files).
+
+Upload endpoints persist the files and return a job id immediately; worker threads claim
+queued files one at a time, parse them on the parse pool and ingest them with the same
+per-file helpers as the batch endpoints. Transient failures (locked database, crashed
+parse worker) are retried with exponential backoff; files left 'running' by a stopped
+server are re-queued at startup, so jobs resume where they stopped. Files claimed by a
+sibling process that is still alive (uvicorn --workers) are left to it.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from backend.core.config import settings
+from backend.db.session import get_connection
+from backend.services.ingest_po import POIngestionService
+from backend.services.parse_cache import parse_cached_blocking
+from backend.services.parse_pool import parse_blocking, po_parser, srv_parser
+from backend.services.upload_batches import ingest_po_upload, ingest_srv_upload, streams_srv
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: the same file is expected to succeed on a later attempt
+RETRYABLE_ERRORS = (sqlite3.OperationalError, BrokenProcessPool)
+
+# Idle workers re-check the queue at least this often (retries become due without a wake-up)
+IDLE_POLL_SECONDS = 1.0
+
+FILE_COLUMNS = """
+    seq, filename, size_bytes, status, attempts, last_error, result_json,
+    started_at, finished_at, duration_ms
+"""
+
+_workers: List[threading.Thread] = []
+_stop = threading.Event()
+_wake = threading.Event()
+
+
+# --------------------------------------------------
+# Jobs
+# --------------------------------------------------
+def create_ingest_job(db: sqlite3.Connection, kind: str, files: List[Tuple[str, bytes]]) -> str:
+    """Persist a job and its file payloads (non-HTML files are recorded as failed right away)"""
+    job_id = uuid.uuid4().hex
+    db.execute("INSERT INTO ingest_jobs (id, kind, total_files) VALUES (?, ?, ?)", (job_id, kind, len(files)))
+
+    rows = []
+    for seq, (filename, content) in enumerate(files, start=1):
+        if filename.lower().endswith(".html"):
+            rows.append((job_id, seq, filename, content, len(content), "queued", None))
+        else:
+            rows.append((job_id, seq, filename, None, len(content), "failed", "Only HTML files are supported"))
+
+    db.executemany(
+        """
+        INSERT INTO ingest_job_files (job_id, seq, filename, content, size_bytes, status, last_error)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    _refresh_job(db, job_id)
+    db.commit()
+    wake_ingest_workers()
+    return job_id
+
+
+def get_ingest_job(db: sqlite3.Connection, job_id: str) -> Optional[Dict]:
+    row = db.execute("SELECT * FROM ingest_jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def list_ingest_jobs(db: sqlite3.Connection, limit: int = 50) -> List[Dict]:
+    rows = db.execute("SELECT * FROM ingest_jobs ORDER BY created_at DESC, rowid DESC LIMIT ?", (limit,)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_ingest_job_files(db: sqlite3.Connection, job_id: str) -> List[Dict]:
+    """Per-file state and timing (payloads excluded)"""
+    rows = db.execute(
+        f"SELECT {FILE_COLUMNS} FROM ingest_job_files WHERE job_id = ? ORDER BY seq", (job_id,)
+    ).fetchall()
+
+    files = []
+    for row in rows:
+        entry = dict(row)
+        result_json = entry.pop("result_json")
+        entry["result"] = json.loads(result_json) if result_json else None
+        files.append(entry)
+    return files
+
+
+def cancel_ingest_job(db: sqlite3.Connection, job_id: str) -> int:
+    """Cancel files that have not started; a file already running finishes. Returns files cancelled."""
+    cancelled = db.execute(
+        """
+        UPDATE ingest_job_files
+        SET status = 'cancelled', finished_at = CURRENT_TIMESTAMP
+        WHERE job_id = ? AND status = 'queued'
+        """,
+        (job_id,),
+    ).rowcount
+    _refresh_job(db, job_id)
+    db.commit()
+    return cancelled
+
+
+def resume_ingest_job(db: sqlite3.Connection, job_id: str) -> int:
+    """Re-queue cancelled and failed files (with a fresh attempt budget). Returns files re-queued."""
+    requeued = db.execute(
+        """
+        UPDATE ingest_job_files
+        SET status = 'queued', attempts = 0, next_attempt_at = 0, last_error = NULL,
+            result_json = NULL, finished_at = NULL, duration_ms = NULL
+        WHERE job_id = ? AND status IN ('cancelled', 'failed') AND content IS NOT NULL
+        """,
+        (job_id,),
+    ).rowcount
+    if requeued:
+        db.execute("UPDATE ingest_jobs SET completed_at = NULL WHERE id = ?", (job_id,))
+    _refresh_job(db, job_id)
+    db.commit()
+    wake_ingest_workers()
+    return requeued
+
+
+def _refresh_job(db: sqlite3.Connection, job_id: str):
+    """Recompute a job's counters and status from its files"""
+    counts = db.execute(
+        """
+        SELECT
+            COALESCE(SUM(status = 'succeeded'), 0) AS succeeded,
+            COALESCE(SUM(status = 'failed'), 0) AS failed,
+            COALESCE(SUM(status = 'cancelled'), 0) AS cancelled,
+            COALESCE(SUM(status = 'running'), 0) AS running,
+            COALESCE(SUM(status = 'queued'), 0) AS queued
+        FROM ingest_job_files
+        WHERE job_id = ?
+        """,
+        (job_id,),
+    ).fetchone()
+
+    if counts["running"]:
+        status = "running"
+    elif counts["queued"]:
+        # Waiting for a worker, or for a retry to become due after earlier progress
+        status = "running" if counts["succeeded"] or counts["failed"] else "queued"
+    elif counts["cancelled"]:
+        status = "cancelled"
+    elif counts["failed"] and not counts["succeeded"]:
+        status = "failed"
+    else:
+        status = "completed"
+
+    finished = status in ("completed", "failed", "cancelled")
+    db.execute(
+        """
+        UPDATE ingest_jobs
+        SET status = ?, succeeded_files = ?, failed_files = ?, cancelled_files = ?,
+            started_at = CASE WHEN ? = 'running' THEN COALESCE(started_at, CURRENT_TIMESTAMP) ELSE started_at END,
+            completed_at = CASE WHEN ? THEN COALESCE(completed_at, CURRENT_TIMESTAMP) ELSE NULL END
+        WHERE id = ?
+        """,
+        (status, counts["succeeded"], counts["failed"], counts["cancelled"], status, finished, job_id),
+    )
+
+
+# --------------------------------------------------
+# Worker side
+# --------------------------------------------------
+def _claim_alive(claimed_by: Optional[str]) -> bool:
+    """Whether the process in a claimed_by worker id ("<pid>-<n>") is still running"""
+    try:
+        pid = int((claimed_by or "").split("-")[0])
+    except ValueError:
+        return False
+    if pid == os.getpid():
+        # This process has not started its workers yet: the claim is from an earlier server with the same pid
+        return False
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if os.name == "nt":
+        # os.kill(pid, 0) sends CTRL_C_EVENT on Windows
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def recover_interrupted_files(db: sqlite3.Connection) -> int:
+    """Re-queue files left 'running' by a server process that is gone (they count as an attempt)"""
+    rows = db.execute("SELECT id, job_id, claimed_by FROM ingest_job_files WHERE status = 'running'").fetchall()
+    orphaned = [row for row in rows if not _claim_alive(row["claimed_by"])]
+    recovered = db.execute(
+        """
+        UPDATE ingest_job_files
+        SET status = 'queued', claimed_by = NULL, next_attempt_at = 0,
+            last_error = 'Interrupted by server shutdown'
+        WHERE status = 'running' AND id IN (SELECT value FROM json_each(?))
+        """,
+        (json.dumps([row["id"] for row in orphaned]),),
+    ).rowcount
+    for job_id in sorted({row["job_id"] for row in orphaned}):
+        _refresh_job(db, job_id)
+    db.commit()
+    return recovered
+
+
+def claim_next_file(db: sqlite3.Connection, worker_id: str) -> Optional[sqlite3.Row]:
+    """Atomically claim the oldest due queued file (None when nothing is due)"""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        row = db.execute(
+            """
+            UPDATE ingest_job_files
+            SET status = 'running', attempts = attempts + 1, claimed_by = ?, started_at = CURRENT_TIMESTAMP
+            WHERE id = (
+                SELECT f.id
+                FROM ingest_job_files f
+                JOIN ingest_jobs j ON j.id = f.job_id
+                WHERE f.status = 'queued' AND f.next_attempt_at <= ?
+                ORDER BY j.created_at, j.rowid, f.seq
+                LIMIT 1
+            )
+            RETURNING id, job_id, seq, filename, attempts
+            """,
+            (worker_id, time.time()),
+        ).fetchone()
+        if row:
+            _refresh_job(db, row["job_id"])
+        db.commit()
+        return row
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _finish_file(db: sqlite3.Connection, file_row: sqlite3.Row, status: str, result: Optional[Dict], error: Optional[str], duration_ms: float):
+    db.execute(
+        """
+        UPDATE ingest_job_files
+        SET status = ?, result_json = ?, last_error = ?, duration_ms = ?, finished_at = CURRENT_TIMESTAMP,
+            content = CASE WHEN ? = 'succeeded' THEN NULL ELSE content END
+        WHERE id = ?
+        """,
+        (status, json.dumps(result, default=str) if result else None, error, round(duration_ms, 2), status, file_row["id"]),
+    )
+    _refresh_job(db, file_row["job_id"])
+    db.commit()
+
+
+def _schedule_retry(db: sqlite3.Connection, file_row: sqlite3.Row, error: str, duration_ms: float):
+    delay = settings.INGEST_RETRY_BASE_SECONDS * (2 ** (file_row["attempts"] - 1))
+    db.execute(
+        """
+        UPDATE ingest_job_files
+        SET status = 'queued', claimed_by = NULL, last_error = ?, duration_ms = ?, next_attempt_at = ?
+        WHERE id = ?
+        """,
+        (error, round(duration_ms, 2), time.time() + delay, file_row["id"]),
+    )
+    _refresh_job(db, file_row["job_id"])
+    db.commit()
+    logger.warning(f"Ingest file {file_row['filename']} attempt {file_row['attempts']} failed ({error}); retrying in {delay:.0f}s")
+
+
+def process_claimed_file(db: sqlite3.Connection, file_row: sqlite3.Row, ingestion_service: POIngestionService):
+    """Parse + ingest one claimed file and record the outcome (retry, failed or succeeded)"""
+    started = time.perf_counter()
+    try:
+        job = db.execute(
+            """
+            SELECT j.kind, f.content
+            FROM ingest_job_files f JOIN ingest_jobs j ON j.id = f.job_id
+            WHERE f.id = ?
+            """,
+            (file_row["id"],),
+        ).fetchone()
+
+        if job["kind"] == "po":
+            parser = po_parser()
+            po_header, po_items = parse_cached_blocking(db, job["content"], "po", lambda c: parse_blocking(c, parser))
+            result = ingest_po_upload(
+                db, file_row["filename"], po_header, po_items, ingestion_service, reraise=RETRYABLE_ERRORS
+            )
+        else:
+            srv_list = None if streams_srv(job["content"]) else parse_blocking(job["content"], srv_parser())
+            result = ingest_srv_upload(db, file_row["filename"], job["content"], srv_list)
+
+    except RETRYABLE_ERRORS as e:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if file_row["attempts"] < settings.INGEST_MAX_ATTEMPTS:
+            _schedule_retry(db, file_row, f"{type(e).__name__}: {e}", duration_ms)
+        else:
+            _finish_file(db, file_row, "failed", None, f"{type(e).__name__}: {e}", duration_ms)
+        return
+    except Exception as e:
+        # Parse errors and bad payloads fail the same way on every attempt
+        logger.error(f"Ingest file {file_row['filename']} failed: {e}", exc_info=True)
+        _finish_file(db, file_row, "failed", None, f"Error: {str(e)}", (time.perf_counter() - started) * 1000)
+        return
+
+    duration_ms = (time.perf_counter() - started) * 1000
+    if result.get("success"):
+        _finish_file(db, file_row, "succeeded", result, None, duration_ms)
+    else:
+        _finish_file(db, file_row, "failed", result, result.get("message"), duration_ms)
+
+
+def _worker_loop(worker_id: str):
+    db = get_connection()
+    ingestion_service = POIngestionService()
+    try:
+        while not _stop.is_set():
+            try:
+                file_row = claim_next_file(db, worker_id)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Ingest worker {worker_id} could not claim work: {e}")
+                file_row = None
+
+            if file_row is None:
+                _wake.wait(IDLE_POLL_SECONDS)
+                _wake.clear()
+                continue
+
+            try:
+                process_claimed_file(db, file_row, ingestion_service)
+            except Exception as e:
+                # Bookkeeping failed (e.g. database locked): the file stays 'running' until restart recovery
+                logger.error(f"Ingest worker {worker_id} lost file {file_row['filename']}: {e}", exc_info=True)
+                db.rollback()
+    finally:
+        db.close()
+
+
+def wake_ingest_workers():
+    _wake.set()
+
+
+def start_ingest_workers():
+    """Recover interrupted files and start INGEST_WORKERS daemon threads (per server process)"""
+    if _workers or settings.INGEST_WORKERS <= 0:
+        return
+
+    db = get_connection()
+    try:
+        recovered = recover_interrupted_files(db)
+    finally:
+        db.close()
+    if recovered:
+        print(f"♻️ Re-queued {recovered} interrupted ingest file(s)", flush=True)
+
+    _stop.clear()
+    for n in range(settings.INGEST_WORKERS):
+        worker_id = f"{os.getpid()}-{n + 1}"
+        thread = threading.Thread(target=_worker_loop, args=(worker_id,), name=f"ingest-worker-{n + 1}", daemon=True)
+        thread.start()
+        _workers.append(thread)
+    logger.info(f"Started {settings.INGEST_WORKERS} ingest worker(s)")
+
+
+def stop_ingest_workers(timeout: float = 10.0):
+    """Signal workers to stop after their current file and wait for them"""
+    _stop.set()
+    _wake.set()
+    for thread in _workers:
+        thread.join(timeout)
+    _workers.clear()
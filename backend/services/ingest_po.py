@@ -3,12 +3,14 @@ PO Ingestion Service - Writes scraper output to database
 Normalizes data into items and deliveries tables
 """
 
+import json
 import sqlite3
 import uuid
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from backend.core.date_utils import normalize_date
-from backend.core.number_utils import to_float, to_int, to_qty
+from backend.core.normalize import iso_date, to_float, to_int, to_qty
+from backend.services.change_log import record_change
+from backend.services.reconciliation_service import DeferredSync
 
 
 def to_money(val) -> float:
@@ -19,11 +21,49 @@ def to_money(val) -> float:
         return 0.00
 
 
+HEADER_UPSERT = """
+    INSERT INTO purchase_orders (
+        po_number, po_date, buyer_id, supplier_name, supplier_gstin, supplier_code, supplier_phone, 
+        supplier_fax, supplier_email, department_no, enquiry_no, enquiry_date, 
+        quotation_ref, quotation_date, rc_no, order_type, po_status, tin_no, 
+        ecc_no, mpct_no, po_value, fob_value, ex_rate, currency, net_po_value, 
+        amend_no, remarks, issuer_name, issuer_designation, issuer_phone, 
+        inspection_by, inspection_at, financial_year
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(po_number) DO UPDATE SET 
+        po_date=excluded.po_date, buyer_id=excluded.buyer_id, supplier_name=excluded.supplier_name,
+        supplier_gstin=excluded.supplier_gstin, supplier_code=excluded.supplier_code,
+        supplier_phone=excluded.supplier_phone, amend_no=excluded.amend_no, 
+        po_value=excluded.po_value, net_po_value=excluded.net_po_value, 
+        financial_year=excluded.financial_year, updated_at=CURRENT_TIMESTAMP
+"""
+
+ITEM_UPSERT = """
+    INSERT INTO purchase_order_items (
+        id, po_number, po_item_no, status, material_code, material_description, 
+        drg_no, mtrl_cat, unit, po_rate, ord_qty
+    ) VALUES (?, ?, ?, 'Active', ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(po_number, po_item_no) DO UPDATE SET
+        status='Active',
+        material_code=excluded.material_code, material_description=excluded.material_description,
+        drg_no=excluded.drg_no, mtrl_cat=excluded.mtrl_cat, unit=excluded.unit,
+        po_rate=excluded.po_rate, ord_qty=excluded.ord_qty,
+        updated_at=CURRENT_TIMESTAMP
+"""
+
+DELIVERY_INSERT = """
+    INSERT INTO purchase_order_deliveries (
+        po_item_id, lot_no, dely_qty, dely_date, entry_allow_date, 
+        dest_code, delivered_qty, received_qty, manual_override_qty
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 class POIngestionService:
     """Handles PO data ingestion from scraper to database"""
 
     def ingest_po(
-        self, db: sqlite3.Connection, po_header: Dict, po_items: List[Dict]
+        self, db: sqlite3.Connection, po_header: Dict, po_items: List[Dict], bulk: bool = True, amend: bool = True
     ) -> Tuple[bool, List[str]]:
         """
         Ingest PO from scraper output.
@@ -33,9 +73,30 @@ class POIngestionService:
             db: Active database connection
             po_header: Dictionary containing PO header details
             po_items: List of dictionaries containing PO item details
+            bulk: Prefetch + executemany item/delivery writes (False = original per-row statements)
+            amend: Diff an existing PO against the upload and write only changes (needs bulk)
 
         Returns: (success, warnings)
         """
+        success, warnings, _ = self.ingest_po_detailed(db, po_header, po_items, bulk=bulk, amend=amend)
+        return success, warnings
+
+    def ingest_po_detailed(
+        self,
+        db: sqlite3.Connection,
+        po_header: Dict,
+        po_items: List[Dict],
+        bulk: bool = True,
+        amend: bool = True,
+        deferred_sync: Optional[DeferredSync] = None,
+    ) -> Tuple[bool, List[str], Optional[Dict]]:
+        """
+        ingest_po() that also returns the amendment change summary
+        (None for new POs and for the full-rewrite paths).
+        With deferred_sync, reconciliation is queued there instead of run inline (batch commits).
+
+        Returns: (success, warnings, changes)
+        """
         if not po_items:
             raise ValueError("Scraper returned zero items for this PO. Aborting ingestion.")
 
@@ -44,7 +105,6 @@ class POIngestionService:
         print(f"📦 Items to process: {[item.get('PO ITM') for item in po_items]}", flush=True)
 
         warnings = []
-        processed_item_ids = []
 
         try:
             # 1. Extract & Sanitize PO number
@@ -86,7 +146,7 @@ class POIngestionService:
             # 4. Prepare Header Data
             from backend.core.utils import get_financial_year
 
-            po_date = normalize_date(po_header.get("PO DATE"))
+            po_date = iso_date(po_header.get("PO DATE"))
             financial_year = get_financial_year(po_date) if po_date else "2025-26"
 
             header_data = {
@@ -102,9 +162,9 @@ class POIngestionService:
                 "supplier_email": po_header.get("EMAIL") or po_header.get("WEBSITE"),
                 "department_no": to_int(po_header.get("DVN")),
                 "enquiry_no": po_header.get("ENQUIRY"),
-                "enquiry_date": normalize_date(po_header.get("ENQ DATE")),
+                "enquiry_date": iso_date(po_header.get("ENQ DATE")),
                 "quotation_ref": po_header.get("QUOTATION"),
-                "quotation_date": normalize_date(po_header.get("QUOT-DATE")),
+                "quotation_date": iso_date(po_header.get("QUOT-DATE")),
                 "rc_no": po_header.get("RC NO"),
                 "order_type": po_header.get("ORD-TYPE"),
                 "po_status": po_header.get("PO STATUS") or "Open",
@@ -126,147 +186,32 @@ class POIngestionService:
                 "financial_year": financial_year,
             }
 
-            # 5. Upsert Header
-            db.execute(
-                """
-                INSERT INTO purchase_orders (
-                    po_number, po_date, buyer_id, supplier_name, supplier_gstin, supplier_code, supplier_phone, 
-                    supplier_fax, supplier_email, department_no, enquiry_no, enquiry_date, 
-                    quotation_ref, quotation_date, rc_no, order_type, po_status, tin_no, 
-                    ecc_no, mpct_no, po_value, fob_value, ex_rate, currency, net_po_value, 
-                    amend_no, remarks, issuer_name, issuer_designation, issuer_phone, 
-                    inspection_by, inspection_at, financial_year
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(po_number) DO UPDATE SET 
-                    po_date=excluded.po_date, buyer_id=excluded.buyer_id, supplier_name=excluded.supplier_name,
-                    supplier_gstin=excluded.supplier_gstin, supplier_code=excluded.supplier_code,
-                    supplier_phone=excluded.supplier_phone, amend_no=excluded.amend_no, 
-                    po_value=excluded.po_value, net_po_value=excluded.net_po_value, 
-                    financial_year=excluded.financial_year, updated_at=CURRENT_TIMESTAMP
-                """,
-                tuple(header_data.values()),
-            )
+            # Existing PO (re-upload / amendment): write only what changed
+            if existing and bulk and amend:
+                from backend.services.po_amendment import apply_po_amendment, describe_changes
 
-            # 6. Process Items
-            # Scraper now returns structured objects with nested 'deliveries'
-            for item in po_items:
-                po_item_no = to_int(item.get("PO ITM"))
-                if po_item_no is None:
-                    continue
-
-                # Use existing ID to prevent breaking FKs on update
-                existing_item = db.execute(
-                    "SELECT id FROM purchase_order_items WHERE po_number = ? AND po_item_no = ?",
-                    (po_number, po_item_no),
-                ).fetchone()
-                item_id = existing_item["id"] if existing_item else str(uuid.uuid4())
-                processed_item_ids.append(item_id)
-
-                ord_qty = to_qty(item.get("ORD QTY") or item.get("ordered_quantity") or 0)
-                po_rate = to_money(item.get("PO RATE") or item.get("po_rate") or 0)
-
-                db.execute(
-                    """
-                    INSERT INTO purchase_order_items (
-                        id, po_number, po_item_no, status, material_code, material_description, 
-                        drg_no, mtrl_cat, unit, po_rate, ord_qty
-                    ) VALUES (?, ?, ?, 'Active', ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(po_number, po_item_no) DO UPDATE SET
-                        status='Active',
-                        material_code=excluded.material_code, material_description=excluded.material_description,
-                        drg_no=excluded.drg_no, mtrl_cat=excluded.mtrl_cat, unit=excluded.unit,
-                        po_rate=excluded.po_rate, ord_qty=excluded.ord_qty,
-                        updated_at=CURRENT_TIMESTAMP
-                    """,
-                    (
-                        item_id,
-                        po_number,
-                        po_item_no,
-                        item.get("MATERIAL CODE"),
-                        item.get("DESCRIPTION") or item.get("material_description"),
-                        item.get("DRG") or item.get("drg_no"),
-                        to_int(item.get("MTRL CAT")),
-                        item.get("UNIT"),
-                        po_rate,
-                        ord_qty,
-                    ),
-                )
+                changes = apply_po_amendment(db, self, po_number, header_data, po_items, deferred_sync)
+                if changes["has_changes"]:
+                    record_change(db, "po", po_number, "update")
+                warnings.append(f"ℹ️ {describe_changes(changes)}")
+                warnings.append(f"✅ Ingested PO {po_number} with {len(po_items)} items.")
+                return True, warnings, changes
 
-                # 8. Manage Deliveries
-                # Backup tracking data before refreshing schedules
-                existing_tracking = {}
-                rows = db.execute(
-                    "SELECT lot_no, delivered_qty, received_qty FROM purchase_order_deliveries WHERE po_item_id = ?",
-                    (item_id,),
-                ).fetchall()
-                for row in rows:
-                    existing_tracking[to_int(row["lot_no"])] = {
-                        "delivered": row["delivered_qty"] or 0,
-                        "received": row["received_qty"] or 0,
-                    }
-
-                db.execute("DELETE FROM purchase_order_deliveries WHERE po_item_id = ?", (item_id,))
-
-                # Iterate through extracted lots
-                deliveries = item.get("deliveries", [])
-                if not deliveries:
-                    # Fallback for old scraper or manual items
-                    deliveries = [{"LOT NO": 1, "DELY QTY": ord_qty}]
-
-                for dely in deliveries:
-                    lot_no = to_int(dely.get("LOT NO") or 1)
-                    track = existing_tracking.get(lot_no, {"delivered": 0, "received": 0})
-
-                    # Use RCD QTY from PO HTML if available (it's the truth for PO state)
-                    rcd_qty = to_qty(dely.get("RCD QTY"))
-                    if rcd_qty is None:
-                        rcd_qty = track["received"]
-
-                    # Support manual override of DSP (delivered) quantity
-                    # Router sends "DSP QTY" if it's a manual edit session
-                    dsp_qty = to_qty(dely.get("DSP QTY"))
-                    manual_override = 0.0
-                    if dsp_qty is not None:
-                        manual_override = dsp_qty
-                    else:
-                        dsp_qty = track["delivered"]
-
-                    db.execute(
-                        """
-                        INSERT INTO purchase_order_deliveries (
-                            po_item_id, lot_no, dely_qty, dely_date, entry_allow_date, 
-                            dest_code, delivered_qty, received_qty, manual_override_qty
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (
-                            item_id,
-                            lot_no,
-                            to_qty(dely.get("DELY QTY") or ord_qty),
-                            normalize_date(dely.get("DELY DATE")),
-                            normalize_date(dely.get("ENTRY ALLOW DATE") or dely.get("DELY DATE")),
-                            to_int(dely.get("DEST CODE")),
-                            dsp_qty,
-                            rcd_qty,
-                            manual_override,
-                        ),
-                    )
-
-            # 9. Handle Cancelled Items (Amendments)
-            if processed_item_ids:
-                placeholders = ",".join(["?"] * len(processed_item_ids))
-                db.execute(
-                    f"""
-                    UPDATE purchase_order_items 
-                    SET status = 'Cancelled', updated_at = CURRENT_TIMESTAMP 
-                    WHERE po_number = ? AND id NOT IN ({placeholders})
-                    """,
-                    [po_number] + processed_item_ids,
-                )
+            # 5. Upsert Header
+            db.execute(HEADER_UPSERT, tuple(header_data.values()))
+
+            # 6-9. Items, delivery schedules, cancelled items
+            if bulk:
+                self._write_items_bulk(db, po_number, po_items)
+            else:
+                self._write_items_rowwise(db, po_number, po_items)
 
             # Reconciliation: Only for UPDATES to existing POs
             # For NEW uploads, there's nothing to reconcile yet
             # For EXISTING uploads, sync to update received quantities from PO HTML
-            if existing:  # PO existed before this ingestion
+            if existing and deferred_sync is not None:
+                deferred_sync.add_po(po_number)
+            elif existing:  # PO existed before this ingestion
                 print(
                     f"🔄 Running TOT Sync for updated PO {po_number} (syncing RCD QTY)...",
                     flush=True,
@@ -282,8 +227,10 @@ class POIngestionService:
             else:
                 print(f"ℹ️ New PO upload {po_number}, skipping sync", flush=True)
 
+            record_change(db, "po", po_number, "update" if existing else "create")
+
             warnings.append(f"✅ Ingested PO {po_number} with {len(po_items)} items.")
-            return True, warnings
+            return True, warnings, None
 
         except Exception as e:
             print(f"❌ INGESTION ERROR: {type(e).__name__}: {str(e)}", flush=True)
@@ -292,6 +239,191 @@ class POIngestionService:
             traceback.print_exc()
             raise ValueError(f"Ingestion Failure: {str(e)}") from e
 
+    # --------------------------------------------------
+    # Item / delivery writes
+    # --------------------------------------------------
+    @staticmethod
+    def _item_row(item_id: str, po_number: str, po_item_no: int, item: Dict) -> Tuple:
+        """purchase_order_items upsert parameters (ord_qty is the last element)"""
+        ord_qty = to_qty(item.get("ORD QTY") or item.get("ordered_quantity") or 0)
+        po_rate = to_money(item.get("PO RATE") or item.get("po_rate") or 0)
+        return (
+            item_id,
+            po_number,
+            po_item_no,
+            item.get("MATERIAL CODE"),
+            item.get("DESCRIPTION") or item.get("material_description"),
+            item.get("DRG") or item.get("drg_no"),
+            to_int(item.get("MTRL CAT")),
+            item.get("UNIT"),
+            po_rate,
+            ord_qty,
+        )
+
+    @staticmethod
+    def _delivery_rows(item_id: str, item: Dict, ord_qty, existing_tracking: Dict) -> List[Tuple]:
+        """purchase_order_deliveries insert parameters for one item's lots"""
+        # Iterate through extracted lots
+        deliveries = item.get("deliveries", [])
+        if not deliveries:
+            # Fallback for old scraper or manual items
+            deliveries = [{"LOT NO": 1, "DELY QTY": ord_qty}]
+
+        rows = []
+        for dely in deliveries:
+            lot_no = to_int(dely.get("LOT NO") or 1)
+            track = existing_tracking.get(lot_no, {"delivered": 0, "received": 0})
+
+            # Use RCD QTY from PO HTML if available (it's the truth for PO state)
+            rcd_qty = to_qty(dely.get("RCD QTY"))
+            if rcd_qty is None:
+                rcd_qty = track["received"]
+
+            # Support manual override of DSP (delivered) quantity
+            # Router sends "DSP QTY" if it's a manual edit session
+            dsp_qty = to_qty(dely.get("DSP QTY"))
+            manual_override = 0.0
+            if dsp_qty is not None:
+                manual_override = dsp_qty
+            else:
+                dsp_qty = track["delivered"]
+
+            rows.append(
+                (
+                    item_id,
+                    lot_no,
+                    to_qty(dely.get("DELY QTY") or ord_qty),
+                    iso_date(dely.get("DELY DATE")),
+                    iso_date(dely.get("ENTRY ALLOW DATE") or dely.get("DELY DATE")),
+                    to_int(dely.get("DEST CODE")),
+                    dsp_qty,
+                    rcd_qty,
+                    manual_override,
+                )
+            )
+        return rows
+
+    def _write_items_rowwise(self, db: sqlite3.Connection, po_number: str, po_items: List[Dict]):
+        """Original path: 4 + lots statements per item"""
+        processed_item_ids = []
+
+        # 6. Process Items
+        # Scraper now returns structured objects with nested 'deliveries'
+        for item in po_items:
+            po_item_no = to_int(item.get("PO ITM"))
+            if po_item_no is None:
+                continue
+
+            # Use existing ID to prevent breaking FKs on update
+            existing_item = db.execute(
+                "SELECT id FROM purchase_order_items WHERE po_number = ? AND po_item_no = ?",
+                (po_number, po_item_no),
+            ).fetchone()
+            item_id = existing_item["id"] if existing_item else str(uuid.uuid4())
+            processed_item_ids.append(item_id)
+
+            item_row = self._item_row(item_id, po_number, po_item_no, item)
+            db.execute(ITEM_UPSERT, item_row)
+
+            # 8. Manage Deliveries
+            # Backup tracking data before refreshing schedules
+            existing_tracking = {}
+            rows = db.execute(
+                "SELECT lot_no, delivered_qty, received_qty FROM purchase_order_deliveries WHERE po_item_id = ?",
+                (item_id,),
+            ).fetchall()
+            for row in rows:
+                existing_tracking[to_int(row["lot_no"])] = {
+                    "delivered": row["delivered_qty"] or 0,
+                    "received": row["received_qty"] or 0,
+                }
+
+            db.execute("DELETE FROM purchase_order_deliveries WHERE po_item_id = ?", (item_id,))
+
+            for delivery_row in self._delivery_rows(item_id, item, item_row[-1], existing_tracking):
+                db.execute(DELIVERY_INSERT, delivery_row)
+
+        # 9. Handle Cancelled Items (Amendments)
+        if processed_item_ids:
+            placeholders = ",".join(["?"] * len(processed_item_ids))
+            db.execute(
+                f"""
+                UPDATE purchase_order_items 
+                SET status = 'Cancelled', updated_at = CURRENT_TIMESTAMP 
+                WHERE po_number = ? AND id NOT IN ({placeholders})
+                """,
+                [po_number] + processed_item_ids,
+            )
+
+    def _write_items_bulk(self, db: sqlite3.Connection, po_number: str, po_items: List[Dict]):
+        """
+        Same result as _write_items_rowwise with a fixed number of statements:
+        two prefetch queries, one executemany upsert, one delete, one executemany insert, one cancel update.
+        Item ids are client-side UUIDs, so no RETURNING round trip is needed to link deliveries.
+        """
+        # Prefetch existing item ids and delivery tracking for the whole PO
+        item_ids = {
+            row["po_item_no"]: row["id"]
+            for row in db.execute(
+                "SELECT id, po_item_no FROM purchase_order_items WHERE po_number = ?", (po_number,)
+            )
+        }
+        tracking: Dict[str, Dict] = {}
+        for row in db.execute(
+            """
+            SELECT d.po_item_id, d.lot_no, d.delivered_qty, d.received_qty
+            FROM purchase_order_deliveries d
+            JOIN purchase_order_items i ON i.id = d.po_item_id
+            WHERE i.po_number = ?
+            ORDER BY d.rowid
+            """,
+            (po_number,),
+        ):
+            tracking.setdefault(row["po_item_id"], {})[to_int(row["lot_no"])] = {
+                "delivered": row["delivered_qty"] or 0,
+                "received": row["received_qty"] or 0,
+            }
+
+        item_rows = []
+        deliveries_by_item: Dict[str, List[Tuple]] = {}
+        for item in po_items:
+            po_item_no = to_int(item.get("PO ITM"))
+            if po_item_no is None:
+                continue
+
+            # A repeated item number reuses the id of its first occurrence (same as the upsert)
+            item_id = item_ids.setdefault(po_item_no, str(uuid.uuid4()))
+            item_row = self._item_row(item_id, po_number, po_item_no, item)
+            item_rows.append(item_row)
+
+            delivery_rows = self._delivery_rows(item_id, item, item_row[-1], tracking.get(item_id, {}))
+            # The last occurrence of an item wins, tracking carried over from the previous one
+            deliveries_by_item[item_id] = delivery_rows
+            tracking[item_id] = {
+                row[1]: {"delivered": row[6] or 0, "received": row[7] or 0} for row in delivery_rows
+            }
+
+        if not item_rows:
+            return
+
+        processed_ids = json.dumps(list(deliveries_by_item))
+        db.executemany(ITEM_UPSERT, item_rows)
+        db.execute(
+            "DELETE FROM purchase_order_deliveries WHERE po_item_id IN (SELECT value FROM json_each(?))",
+            (processed_ids,),
+        )
+        db.executemany(DELIVERY_INSERT, [row for rows in deliveries_by_item.values() for row in rows])
+
+        # 9. Handle Cancelled Items (Amendments)
+        db.execute(
+            """
+            UPDATE purchase_order_items
+            SET status = 'Cancelled', updated_at = CURRENT_TIMESTAMP
+            WHERE po_number = ? AND id NOT IN (SELECT value FROM json_each(?))
+            """,
+            (po_number, processed_ids),
+        )
+
 
 # Singleton instance
 po_ingestion_service = POIngestionService()
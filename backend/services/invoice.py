@@ -15,8 +15,9 @@ from backend.core.exceptions import (
     ResourceNotFoundError,
     ValidationError,
 )
-from backend.core.number_utils import to_qty
+from backend.core.normalize import to_qty
 from backend.core.result import ServiceResult
+from backend.services.change_log import record_change
 
 logger = logging.getLogger(__name__)
 
@@ -407,6 +408,8 @@ def create_invoice(invoice_data: dict, db: sqlite3.Connection) -> ServiceResult[
             )
 
         # DC-Invoice link is now stored directly in gst_invoices.dc_number
+        record_change(db, "invoice", invoice_number, "create", scope=fy)
+        record_change(db, "dc", dc_number, "update")
 
         logger.info(
             f"Successfully created invoice {invoice_number} from DC {dc_number} with {len(invoice_items)} items"
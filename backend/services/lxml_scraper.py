@@ -0,0 +1,250 @@
+"""
+lxml Scraper Engine
+Extracts PO and SRV data directly from lxml.html element trees using XPath and
+text_content(), without building a BeautifulSoup tree. Selected with SCRAPER_ENGINE="lxml".
+
+Field resolution, normalization and item/SRV grouping are shared with po_scraper and
+srv_scraper; this module only replaces tree traversal and text extraction, mirroring
+BeautifulSoup's string semantics (get_text() skips <script>/<style> and comments,
+while the string walk used by header fallbacks includes comments).
+
+srv_rows_stream() is the streaming variant for large SRV exports: lxml iterparse over a
+file object, one table row at a time (used with SCRAPER_ENGINE="lxml", see srv_streamable).
+"""
+
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+import lxml.html
+from bs4.dammit import EncodingDetector, UnicodeDammit
+from lxml import etree
+
+from backend.core.normalize import clean
+from backend.services.po_scraper import (
+    RX_MATERIAL_CODE,
+    build_items,
+    build_po_header,
+)
+
+# Compiled XPath expressions (document order is preserved for unions)
+X_TABLES = etree.XPath("//table")
+X_ROWS = etree.XPath(".//tr")
+X_CELLS = etree.XPath(".//td | .//th")
+X_TDS = etree.XPath(".//td")
+X_GET_TEXT = etree.XPath(".//text()[not(parent::script) and not(parent::style)]")
+X_ALL_STRINGS = etree.XPath(".//text() | .//comment()")
+X_HAS_SCRIPT = etree.XPath("boolean(//script | //style)")
+
+
+def parse_document(content: Union[bytes, str]):
+    """
+    Parse HTML into an lxml document root (None for empty input).
+    Bytes are decoded with the same detection BeautifulSoup uses so both engines see identical text.
+    """
+    if isinstance(content, str):
+        data, encoding = content.encode("utf-8"), "utf-8"
+    else:
+        dammit = UnicodeDammit(content, is_html=True)
+        if dammit.unicode_markup is None:
+            return None
+        data, encoding = dammit.unicode_markup.encode("utf-8"), "utf-8"
+
+    if not data.strip():
+        return None
+
+    parser = lxml.html.HTMLParser(encoding=encoding)
+    try:
+        return lxml.html.document_fromstring(data, parser=parser)
+    except etree.ParserError:
+        return None
+
+
+class LxmlDocument:
+    """lxml implementation of the document adapter consumed by po_scraper.build_po_header"""
+
+    def __init__(self, root):
+        self.root = root
+        self.tables = X_TABLES(root)
+        # Without <script>/<style> the plain itertext() walk equals BeautifulSoup's get_text()
+        self._plain_text = not X_HAS_SCRIPT(root)
+        self._text_cache = {}
+
+    def get_text(self, el) -> str:
+        if self._plain_text:
+            return "".join(el.itertext())
+        return "".join(X_GET_TEXT(el))
+
+    def _cell_text(self, cell) -> str:
+        # Nested tables repeat cells across tables; extract each element once
+        text = self._text_cache.get(cell)
+        if text is None:
+            text = self._text_cache[cell] = clean(self.get_text(cell))
+        return text
+
+    def text_grid(self):
+        return [[[self._cell_text(cell) for cell in X_CELLS(row)] for row in X_ROWS(table)] for table in self.tables]
+
+    def stripped_text(self, el, separator: str = " ") -> str:
+        strings = el.itertext() if self._plain_text else X_GET_TEXT(el)
+        return separator.join(s.strip() for s in strings if s.strip())
+
+    def table_texts(self):
+        for table in self.tables:
+            yield self.stripped_text(table)
+
+    def text(self):
+        return self.stripped_text(self.root)
+
+    def table_row_texts(self):
+        for table in self.tables:
+            yield [self.get_text(row) for row in X_ROWS(table)]
+
+    def strings_after(self, label_rx):
+        """Strings following the first string matching label_rx (comments included, as in bs4)"""
+        strings = _all_strings(self.root)
+        for idx, text in enumerate(strings):
+            if label_rx.search(text):
+                return iter(strings[idx + 1 :])
+        return None
+
+
+def _all_strings(el) -> List[str]:
+    return [(node.text or "") if isinstance(node, etree._Comment) else str(node) for node in X_ALL_STRINGS(el)]
+
+
+def _contains_string(el, rx) -> bool:
+    return any(rx.search(text) for text in _all_strings(el))
+
+
+# --------------------------------------------------
+# PO
+# --------------------------------------------------
+def extract_po_header_lxml(root) -> Dict:
+    return build_po_header(LxmlDocument(root))
+
+
+def extract_items_lxml(root, doc: Optional[LxmlDocument] = None) -> List[Dict]:
+    doc = doc or LxmlDocument(root)
+    item_table = next((t for t in doc.tables if _contains_string(t, RX_MATERIAL_CODE)), None)
+    if item_table is None:
+        return []
+
+    rows = X_ROWS(item_table)
+    header_idx = next((i for i, r in enumerate(rows) if _contains_string(r, RX_MATERIAL_CODE)), None)
+    if header_idx is None:
+        return []
+
+    return build_items([clean(doc.get_text(td)) for td in X_TDS(row)] for row in rows[header_idx + 1 :])
+
+
+def parse_po_html_lxml(content: Union[bytes, str]) -> Tuple[Dict, List[Dict]]:
+    """PO HTML -> (header, items) using lxml.html only"""
+    root = parse_document(content)
+    if root is None:
+        root = lxml.html.document_fromstring("<html><body></body></html>")
+
+    doc = LxmlDocument(root)
+    return build_po_header(doc), extract_items_lxml(root, doc)
+
+
+# --------------------------------------------------
+# SRV
+# --------------------------------------------------
+def srv_tables_lxml(html_content: Union[bytes, str]) -> Iterator[Tuple[List[str], Iterator[List[str]]]]:
+    """Yield (normalized headers, lazy row values) per table, for srv_scraper.group_srv_rows"""
+    root = parse_document(html_content)
+    if root is None:
+        return
+
+    doc = LxmlDocument(root)
+
+    def table_rows(rows):
+        for row in rows:
+            yield [doc.stripped_text(td, "") for td in X_TDS(row)]
+
+    for table in doc.tables:
+        rows = X_ROWS(table)
+        if not rows:
+            continue
+
+        headers = [" ".join(doc.stripped_text(cell, "").upper().split()) for cell in X_CELLS(rows[0])]
+        yield headers, table_rows(rows[1:])
+
+
+# --------------------------------------------------
+# SRV (streaming)
+# --------------------------------------------------
+STREAM_SNIFF_BYTES = 64 * 1024
+
+
+def _stream_encoding(source: BinaryIO) -> str:
+    """Declared charset from the head of the file (utf-8 otherwise, as parse_srv_bytes decodes)"""
+    head = source.read(STREAM_SNIFF_BYTES)
+    source.seek(0)
+    return EncodingDetector.find_declared_encoding(head, is_html=True) or "utf-8"
+
+
+def srv_rows_stream(source: BinaryIO) -> Iterator[Tuple[List[str], List[str]]]:
+    """
+    Yield (headers, values) for every data row of every table, parsing `source` (a seekable binary
+    file) incrementally with iterparse. Rows are cleared once read, so memory stays bounded by the
+    largest row rather than the document.
+
+    Text matches srv_tables_lxml: headers are the upper-cased, whitespace-normalized cells of a
+    table's first row, values the stripped <td> texts. The same headers list object is yielded for
+    every row of a table. Rows of a nested table belong to that table only (unlike srv_tables_lxml,
+so files with nested tables are not streamed).
+    """
+    events = etree.iterparse(
+        source,
+        events=("start", "end"),
+        tag=("table", "tr", "script", "style"),
+        html=True,
+        recover=True,
+        huge_tree=True,
+        encoding=_stream_encoding(source),
+    )
+
+    tables: List[Dict] = []  # open tables, innermost last: {"headers": [...] | None}
+    plain_text = True  # no <script>/<style> seen yet: itertext() equals the get_text() walk
+
+    def stripped(el) -> str:
+        strings = el.itertext() if plain_text else X_GET_TEXT(el)
+        return "".join(s.strip() for s in strings if s.strip())
+
+    for event, el in events:
+        tag = el.tag
+        if tag == "table":
+            if event == "start":
+                tables.append({"headers": None})
+            else:
+                tables.pop()
+                if not tables:
+                    _release(el)
+            continue
+
+        if tag in ("script", "style"):
+            plain_text = False
+            continue
+
+        if event != "end" or not tables:
+            continue
+
+        # </tr> of the innermost open table
+        table = tables[-1]
+        if table["headers"] is None:
+            table["headers"] = [" ".join(stripped(cell).upper().split()) for cell in X_CELLS(el)]
+        else:
+            yield table["headers"], [stripped(td) for td in X_TDS(el)]
+
+        if len(tables) == 1:
+            # Nested tables stay intact until their outer row is done
+            _release(el)
+
+
+def _release(el):
+    """Free a processed element and the siblings parsed before it"""
+    el.clear(keep_tail=True)
+    parent = el.getparent()
+    if parent is not None:
+        while el.getprevious() is not None:
+            del parent[0]
@@ -0,0 +1,120 @@
+"""
+Material Index
+Material-level search over PO items (trigram FTS5 index of migration 040) with each item's
+delivery history.
+
+- Query terms of 3+ characters match anywhere in the material code, drawing number or
+  description (case-insensitive); all terms must match. Shorter terms are ignored.
+- Results are ranked with bm25 (code > drawing number > description); as in search_index,
+  only the MATCH_CAP most recently indexed matching items are ranked.
+- History is computed for the returned items only, in one statement: delivery lots, DCs and
+  dispatched quantity, active SRVs and received / rejected quantity, plus running totals per
+  material code in PO date order.
+"""
+
+import json
+import re
+import sqlite3
+from typing import List, Optional
+
+MATCH_CAP = 1000
+MIN_TERM_LENGTH = 3  # trigram tokenizer: shorter terms cannot use the index
+
+# FTS5 column filters for the `field` parameter
+FIELDS = {
+    "all": "",
+    "code": "material_code : ",
+    "drg": "drg_no : ",
+    "description": "description : ",
+}
+
+RX_WHITESPACE = re.compile(r"\s+")
+
+MATERIAL_SEARCH_SQL = f"""
+WITH matches AS (
+    SELECT rowid, bm25(material_fts, 10.0, 5.0, 1.0) AS score
+    FROM material_fts
+    WHERE material_fts MATCH ?
+    ORDER BY rowid DESC
+    LIMIT {MATCH_CAP}
+),
+hits AS (
+    SELECT mi.po_item_id, m.score
+    FROM matches m JOIN material_index mi ON mi.id = m.rowid
+    ORDER BY m.score, m.rowid DESC
+    LIMIT ?
+),
+items AS (
+    SELECT h.score, poi.id, poi.po_number, po.po_date, poi.po_item_no, poi.material_code,
+           poi.material_description, poi.drg_no, poi.unit, COALESCE(poi.ord_qty, 0) AS ord_qty
+    FROM hits h
+    JOIN purchase_order_items poi ON poi.id = h.po_item_id
+    JOIN purchase_orders po ON po.po_number = poi.po_number
+),
+lots AS (
+    SELECT pod.po_item_id,
+           json_group_array(json_object('lot_no', pod.lot_no, 'dely_qty', pod.dely_qty, 'dely_date', pod.dely_date)) AS lots
+    FROM purchase_order_deliveries pod
+    WHERE pod.po_item_id IN (SELECT id FROM items)
+    GROUP BY pod.po_item_id
+),
+dispatched AS (
+    SELECT dci.po_item_id, SUM(dci.dispatch_qty) AS qty, json_group_array(DISTINCT dci.dc_number) AS dcs
+    FROM delivery_challan_items dci
+    WHERE dci.po_item_id IN (SELECT id FROM items)
+    GROUP BY dci.po_item_id
+),
+received AS (
+    SELECT i.id AS po_item_id, SUM(si.received_qty) AS qty, SUM(si.rejected_qty) AS rejected,
+           json_group_array(DISTINCT si.srv_number) AS srvs
+    FROM items i
+    JOIN srv_items si ON si.po_number = i.po_number AND si.po_item_no = i.po_item_no
+    JOIN srvs s ON s.srv_number = si.srv_number AND s.is_active = 1
+    GROUP BY i.id
+)
+SELECT i.id AS po_item_id, i.po_number, i.po_date, i.po_item_no, i.material_code,
+       i.material_description, i.drg_no, i.unit,
+       i.ord_qty AS ordered_qty,
+       COALESCE(d.qty, 0) AS dispatched_qty,
+       COALESCE(r.qty, 0) AS received_qty,
+       COALESCE(r.rejected, 0) AS rejected_qty,
+       COALESCE(l.lots, '[]') AS lots,
+       COALESCE(d.dcs, '[]') AS dc_numbers,
+       COALESCE(r.srvs, '[]') AS srv_numbers,
+       SUM(i.ord_qty) OVER w AS cumulative_ordered_qty,
+       SUM(COALESCE(d.qty, 0)) OVER w AS cumulative_dispatched_qty,
+       SUM(COALESCE(r.qty, 0)) OVER w AS cumulative_received_qty
+FROM items i
+LEFT JOIN lots l ON l.po_item_id = i.id
+LEFT JOIN dispatched d ON d.po_item_id = i.id
+LEFT JOIN received r ON r.po_item_id = i.id
+WINDOW w AS (
+    PARTITION BY i.material_code ORDER BY i.po_date, i.po_number, i.po_item_no
+    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+)
+ORDER BY i.score, i.po_date DESC, i.po_number DESC, i.po_item_no
+"""
+
+
+def build_material_query(q: str, field: str = "all") -> Optional[str]:
+    """FTS5 trigram query: each whitespace-separated term of 3+ characters as a quoted substring"""
+    terms = [t for t in RX_WHITESPACE.split((q or "").upper()) if len(t) >= MIN_TERM_LENGTH]
+    if not terms:
+        return None
+    column = FIELDS[field]
+    return " AND ".join(f'{column}"{t.replace(chr(34), chr(34) * 2)}"' for t in terms)
+
+
+def search_materials(db: sqlite3.Connection, q: str, field: str = "all", limit: int = 50) -> List[dict]:
+    """Matching PO items with their ordered / dispatched / received history, best match first"""
+    match = build_material_query(q, field)
+    if match is None:
+        return []
+    results = []
+    for row in db.execute(MATERIAL_SEARCH_SQL, (match, limit)).fetchall():
+        item = dict(row)
+        for key in ("lots", "dc_numbers", "srv_numbers"):
+            item[key] = json.loads(item[key])
+        item["pending_qty"] = max(0.0, round(item["ordered_qty"] - item["dispatched_qty"], 3))
+        results.append(item)
+    return results
@@ -0,0 +1,279 @@
+"""
+Number Index
+In-process typeahead index of PO, DC, invoice and SRV numbers per financial year.
+
+- One sorted list per (type, financial year); prefix lookups are a bisect plus a short scan.
+- Loaded at startup in one read transaction together with the current number_changes cursor.
+- Triggers (migration 039) append every insert / delete / renumbering to number_changes in the
+  writing transaction. Each lookup first replays the committed rows past the cursor (one
+  rowid range read on the index's own connection), so results are never stale and rolled back
+  writes are never seen, whichever thread or process wrote them.
+- number_changes is compacted to the last KEEP_CHANGES rows; an index whose cursor fell behind
+  the compacted range (or that finds a gap) reloads from the base tables.
+
+Serves GET /api/search/suggest, GET /api/search/suggest/stats and /api/common/check-duplicate.
+"""
+
+import bisect
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("PO", "DC", "Invoice", "SRV")
+KEEP_CHANGES = 10000
+# Replayed changes between compactions of number_changes
+COMPACT_EVERY = 1000
+
+LOAD_SQL = """
+SELECT 'PO' AS kind, po_number AS number, po_date AS doc_date FROM purchase_orders
+UNION ALL SELECT 'DC', dc_number, dc_date FROM delivery_challans
+UNION ALL SELECT 'Invoice', invoice_number, invoice_date FROM gst_invoices
+UNION ALL SELECT 'SRV', srv_number, srv_date FROM srvs
+"""
+
+
+def financial_year_of(doc_date: Optional[str]) -> str:
+    """'2024-25' for dates from 2024-04-01 to 2025-03-31; '' when the date is missing or not ISO"""
+    if not doc_date or len(doc_date) < 7 or not (doc_date[:4].isdigit() and doc_date[5:7].isdigit()):
+        return ""
+    year, month = int(doc_date[:4]), int(doc_date[5:7])
+    start = year if month >= 4 else year - 1
+    return f"{start}-{str(start + 1)[2:]}"
+
+
+class _Bucket:
+    """Numbers of one type in one financial year: sorted match keys + key -> [number, refcount]"""
+
+    __slots__ = ("keys", "entries")
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self.entries: Dict[str, list] = {}
+
+    def add(self, number: str):
+        key = number.upper()
+        if key == number:
+            key = number  # share the string object
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry[1] += 1
+            return
+        self.entries[key] = [number, 1]
+        bisect.insort(self.keys, key)
+
+    def remove(self, number: str):
+        key = number.upper()
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self.entries[key]
+            i = bisect.bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                del self.keys[i]
+
+    def prefixed(self, prefix: str, limit: int) -> List[str]:
+        out = []
+        keys = self.keys
+        i = bisect.bisect_left(keys, prefix)
+        while i < len(keys) and len(out) < limit and keys[i].startswith(prefix):
+            out.append(self.entries[keys[i]][0])
+            i += 1
+        return out
+
+    def contains(self, number: str) -> bool:
+        entry = self.entries.get(number.upper())
+        return entry is not None and entry[0] == number
+
+
+class NumberIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._cursor = 0
+        self._since_compaction = 0
+        self.loaded_at: Optional[float] = None
+        self.load_seconds = 0.0
+        self.reloads = 0
+        self.changes_applied = 0
+        self.lookups = 0
+
+    # --------------------------------------------------
+    # Loading and change replay
+    # --------------------------------------------------
+    def load(self):
+        """(Re)build from the base tables; positions the cursor at the snapshot it read"""
+        with self._lock:
+            self._load()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            from backend.db.session import get_connection
+
+            self._conn = get_connection()
+        return self._conn
+
+    def _load(self):
+        started = time.perf_counter()
+        conn = self._connection()
+        buckets: Dict[Tuple[str, str], _Bucket] = {}
+        conn.execute("BEGIN")
+        try:
+            cursor = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM number_changes").fetchone()[0]
+            for kind, number, doc_date in conn.execute(LOAD_SQL):
+                if number is None:
+                    continue
+                self._bucket(buckets, kind, financial_year_of(doc_date)).add(str(number))
+        finally:
+            conn.commit()
+        self._buckets = buckets
+        self._cursor = cursor
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - started
+        self.reloads += 1
+        self._compact()
+
+    @staticmethod
+    def _bucket(buckets: Dict[Tuple[str, str], _Bucket], kind: str, fy: str) -> _Bucket:
+        bucket = buckets.get((kind, fy))
+        if bucket is None:
+            bucket = buckets[(kind, fy)] = _Bucket()
+        return bucket
+
+    def _catch_up(self):
+        if self.loaded_at is None:
+            self._load()
+            return
+        rows = self._connection().execute(
+            "SELECT seq, kind, number, doc_date, op FROM number_changes WHERE seq > ? ORDER BY seq",
+            (self._cursor,),
+        ).fetchall()
+        if not rows:
+            return
+        if rows[0][0] != self._cursor + 1:
+            # Rows we never saw were compacted away (or the table was rebuilt)
+            logger.info("Number index cursor fell behind number_changes, reloading")
+            self._load()
+            return
+        for seq, kind, number, doc_date, op in rows:
+            bucket = self._bucket(self._buckets, kind, financial_year_of(doc_date))
+            if op == "+":
+                bucket.add(str(number))
+            else:
+                bucket.remove(str(number))
+            self._cursor = seq
+        self.changes_applied += len(rows)
+        self._since_compaction += len(rows)
+        if self._since_compaction >= COMPACT_EVERY:
+            self._compact()
+
+    def _compact(self):
+        self._since_compaction = 0
+        conn = self._connection()
+        # Never wait for a writer here: lookups hold the lock
+        conn.execute("PRAGMA busy_timeout = 0")
+        try:
+            conn.execute("DELETE FROM number_changes WHERE seq <= ?", (self._cursor - KEEP_CHANGES,))
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            # Busy writer: harmless, the next compaction retries
+            conn.rollback()
+            logger.warning(f"Number index compaction skipped: {e}")
+        finally:
+            conn.execute("PRAGMA busy_timeout = 5000")
+
+    # --------------------------------------------------
+    # Lookups
+    # --------------------------------------------------
+    def _selected(self, kinds: Iterable[str], fy: Optional[str]) -> List[Tuple[Tuple[str, str], _Bucket]]:
+        kinds = set(kinds)
+        return sorted(
+            (key, bucket)
+            for key, bucket in self._buckets.items()
+            if key[0] in kinds and (fy is None or key[1] == fy)
+        )
+
+    def suggest(
+        self, prefix: str, kinds: Iterable[str] = KINDS, fy: Optional[str] = None, limit: int = 10
+    ) -> List[dict]:
+        """Numbers starting with `prefix` (case-insensitive), shortest/lowest first"""
+        prefix = prefix.strip().upper()
+        if not prefix:
+            return []
+        with self._lock:
+            self._catch_up()
+            self.lookups += 1
+            found = []
+            for (kind, year), bucket in self._selected(kinds, fy):
+                for number in bucket.prefixed(prefix, limit):
+                    found.append((number.upper(), year, kind, number))
+        found.sort(key=lambda f: (len(f[0]), f[0], f[1], f[2]))
+        return [{"type": kind, "number": number, "financial_year": year} for _, year, kind, number in found[:limit]]
+
+    def contains(self, kind: str, fy: str, number: str) -> bool:
+        """Exact (case-sensitive) number lookup within a financial year"""
+        with self._lock:
+            self._catch_up()
+            self.lookups += 1
+            bucket = self._buckets.get((kind, fy))
+            return bucket is not None and bucket.contains(number)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._catch_up()
+            counts: Dict[str, Dict[str, int]] = {}
+            memory = sys.getsizeof(self._buckets)
+            for (kind, fy), bucket in self._buckets.items():
+                counts.setdefault(kind, {})[fy or "unknown"] = len(bucket.keys)
+                memory += sys.getsizeof(bucket.keys) + sys.getsizeof(bucket.entries)
+                for key, entry in bucket.entries.items():
+                    memory += sys.getsizeof(key) + sys.getsizeof(entry)
+                    if entry[0] is not key:
+                        memory += sys.getsizeof(entry[0])
+            return {
+                "numbers": sum(len(b.keys) for b in self._buckets.values()),
+                "by_type": counts,
+                "memory_bytes": memory,
+                "cursor": self._cursor,
+                "changes_applied": self.changes_applied,
+                "lookups": self.lookups,
+                "reloads": self.reloads,
+                "load_ms": round(self.load_seconds * 1000, 2),
+                "loaded_at": self.loaded_at,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._buckets = {}
+            self.loaded_at = None
+
+
+number_index = NumberIndex()
+
+
+def load_number_index():
+    """Startup hook: build the index (a failure only disables typeahead until the next lookup)"""
+    try:
+        number_index.load()
+        stats = number_index.stats()
+        print(
+            f"🔢 Number index: {stats['numbers']} numbers, {stats['memory_bytes'] / 1024:.0f} KB, "
+            f"loaded in {stats['load_ms']} ms",
+            flush=True,
+        )
+    except Exception as e:
+        logger.error(f"Number index load failed: {e}", exc_info=True)
+
+
+def close_number_index():
+    number_index.close()
@@ -0,0 +1,304 @@
+"""
+Parse Cache
+Content-addressed cache of scraper output keyed by the SHA-256 of the uploaded file.
+
+- Byte-identical re-uploads reuse the stored parse result (no HTML parse).
+- Files that differ only in line breaks (CRLF vs LF, re-indentation, blank lines) hit through
+  a normalized hash. Spaces within a line are kept: the scrapers match some labels literally.
+- po_ingest_state remembers which parse result was last ingested per PO together with a
+  fingerprint of the PO's rows (and the DC/SRV/invoice quantities reconciliation reads).
+  If both still match, re-ingesting would change nothing and the upload is a no-op.
+
+Counters in parse_cache_counters track cache effectiveness (GET /api/system/parse-cache).
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever scraper output changes shape or content, so stale entries are ignored
+PARSE_CACHE_VERSION = 1
+
+# Whitespace runs that contain a line break (normalized to a single "\n")
+RX_LINE_BREAKS = re.compile(rb"[ \t]*(?:\r\n|\r|\n)\s*")
+
+COUNTERS = ("exact_hits", "normalized_hits", "misses", "ingest_skipped", "ingested")
+
+
+# --------------------------------------------------
+# Keys and counters
+# --------------------------------------------------
+def content_keys(content: bytes) -> Tuple[str, str]:
+    """(file_hash, norm_hash) for an uploaded file"""
+    file_hash = hashlib.sha256(content).hexdigest()
+    norm_hash = hashlib.sha256(RX_LINE_BREAKS.sub(b"\n", content).strip()).hexdigest()
+    return file_hash, norm_hash
+
+
+def result_json(result: Any) -> str:
+    return json.dumps(result, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def result_hash(result: Any) -> str:
+    """Stable hash of a parse result (e.g. PO (header, items))"""
+    return hashlib.sha256(result_json(result).encode("utf-8")).hexdigest()
+
+
+def bump_counter(db: sqlite3.Connection, counter: str, amount: int = 1):
+    """Increment a cache counter (part of the caller's transaction)"""
+    db.execute(
+        """
+        INSERT INTO parse_cache_counters (counter, value) VALUES (?, ?)
+        ON CONFLICT(counter) DO UPDATE SET value = value + excluded.value
+        """,
+        (counter, amount),
+    )
+
+
+def get_parse_cache_stats(db: sqlite3.Connection) -> Dict:
+    counters = {name: 0 for name in COUNTERS}
+    for row in db.execute("SELECT counter, value FROM parse_cache_counters"):
+        counters[row["counter"]] = row["value"]
+
+    entries = db.execute(
+        "SELECT COUNT(*) AS entries, COALESCE(SUM(LENGTH(result_json)), 0) AS result_bytes FROM parse_cache"
+    ).fetchone()
+
+    lookups = counters["exact_hits"] + counters["normalized_hits"] + counters["misses"]
+    uploads = counters["ingest_skipped"] + counters["ingested"]
+    return {
+        "enabled": settings.PARSE_CACHE_ENABLED,
+        "parser_version": PARSE_CACHE_VERSION,
+        "entries": entries["entries"],
+        "result_bytes": entries["result_bytes"],
+        **counters,
+        "parse_hit_rate": round((lookups - counters["misses"]) / lookups, 4) if lookups else None,
+        "ingest_skip_rate": round(counters["ingest_skipped"] / uploads, 4) if uploads else None,
+    }
+
+
+def clear_parse_cache(db: sqlite3.Connection) -> int:
+    """Drop cached parse results, ingest fingerprints and counters. Returns entries removed."""
+    removed = db.execute("DELETE FROM parse_cache").rowcount
+    db.execute("DELETE FROM po_ingest_state")
+    db.execute("DELETE FROM parse_cache_counters")
+    db.commit()
+    return removed
+
+
+# --------------------------------------------------
+# Parse results
+# --------------------------------------------------
+def lookup_parse(db: sqlite3.Connection, content: bytes, kind: str) -> Optional[Any]:
+    """Cached parse result for this content (exact bytes first, then line-break-normalized)"""
+    if not settings.PARSE_CACHE_ENABLED:
+        return None
+
+    file_hash, norm_hash = content_keys(content)
+    row = db.execute(
+        "SELECT file_hash, result_json FROM parse_cache WHERE file_hash = ? AND kind = ? AND parser_version = ?",
+        (file_hash, kind, PARSE_CACHE_VERSION),
+    ).fetchone()
+    counter = "exact_hits"
+
+    if row is None:
+        row = db.execute(
+            """
+            SELECT file_hash, result_json FROM parse_cache
+            WHERE norm_hash = ? AND kind = ? AND parser_version = ?
+            ORDER BY last_used_at DESC
+            LIMIT 1
+            """,
+            (norm_hash, kind, PARSE_CACHE_VERSION),
+        ).fetchone()
+        counter = "normalized_hits"
+
+    if row is None:
+        bump_counter(db, "misses")
+        db.commit()
+        return None
+
+    db.execute(
+        "UPDATE parse_cache SET hits = hits + 1, last_used_at = CURRENT_TIMESTAMP WHERE file_hash = ?",
+        (row["file_hash"],),
+    )
+    bump_counter(db, counter)
+    if counter == "normalized_hits":
+        # Remember these exact bytes too, so the next upload is an exact hit
+        _insert_entry(db, content, kind, row["result_json"])
+    db.commit()
+    return json.loads(row["result_json"])
+
+
+def store_parse(db: sqlite3.Connection, content: bytes, kind: str, result: Any, commit: bool = True):
+    """
+    Cache a fresh parse result (evicting least recently used entries beyond PARSE_CACHE_MAX_ENTRIES).
+    commit=False leaves the entry in the caller's open transaction.
+    """
+    if not settings.PARSE_CACHE_ENABLED:
+        return
+
+    _insert_entry(db, content, kind, result_json(result))
+    db.execute(
+        """
+        DELETE FROM parse_cache WHERE file_hash IN (
+            SELECT file_hash FROM parse_cache ORDER BY last_used_at DESC, rowid DESC LIMIT -1 OFFSET ?
+        )
+        """,
+        (settings.PARSE_CACHE_MAX_ENTRIES,),
+    )
+    if commit:
+        db.commit()
+
+
+def _insert_entry(db: sqlite3.Connection, content: bytes, kind: str, payload: str):
+    file_hash, norm_hash = content_keys(content)
+    db.execute(
+        """
+        INSERT INTO parse_cache (file_hash, norm_hash, kind, parser_version, result_json, result_hash, size_bytes)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(file_hash) DO UPDATE SET
+            norm_hash = excluded.norm_hash, kind = excluded.kind, parser_version = excluded.parser_version,
+            result_json = excluded.result_json, result_hash = excluded.result_hash,
+            last_used_at = CURRENT_TIMESTAMP
+        """,
+        (
+            file_hash,
+            norm_hash,
+            kind,
+            PARSE_CACHE_VERSION,
+            payload,
+            hashlib.sha256(payload.encode("utf-8")).hexdigest(),
+            len(content),
+        ),
+    )
+
+
+def parse_cached_blocking(db: sqlite3.Connection, content: bytes, kind: str, parse: Callable[[bytes], Any]) -> Any:
+    """Cached result, or parse(content) and cache it (worker threads)"""
+    cached = lookup_parse(db, content, kind)
+    if cached is not None:
+        return cached
+
+    result = parse(content)
+    store_parse(db, content, kind, result)
+    return result
+
+
+async def parse_cached(db: sqlite3.Connection, content: bytes, kind: str, parser: Callable[[bytes], Any]) -> Any:
+    """Cached result, or parse on the parse pool and cache it"""
+    from backend.services.parse_pool import parse_one
+
+    cached = lookup_parse(db, content, kind)
+    if cached is not None:
+        return cached
+
+    result = await parse_one(content, parser)
+    store_parse(db, content, kind, result)
+    return result
+
+
+async def parse_in_order_cached(
+    db: sqlite3.Connection, contents: Sequence[bytes], kind: str, parser: Callable[[bytes], Any], commit: bool = True
+) -> AsyncIterator[Tuple[int, Any, Optional[Exception]]]:
+    """
+    parse_in_order() that serves cache hits directly and sends only misses to the parse pool.
+    commit=False stores new entries in the caller's open transaction (grouped batch commits).
+    """
+    from backend.services.parse_pool import parse_in_order
+
+    cached: List[Optional[Any]] = [lookup_parse(db, content, kind) for content in contents]
+    misses = [idx for idx, hit in enumerate(cached) if hit is None]
+
+    parsed = parse_in_order([contents[idx] for idx in misses], parser)
+    try:
+        for idx, hit in enumerate(cached):
+            if hit is not None:
+                yield idx, hit, None
+                continue
+
+            _, result, error = await parsed.__anext__()
+            if error is None:
+                store_parse(db, contents[idx], kind, result, commit=commit)
+            yield idx, result, error
+    finally:
+        await parsed.aclose()
+
+
+# --------------------------------------------------
+# PO ingest state
+# --------------------------------------------------
+def po_db_fingerprint(db: sqlite3.Connection, po_number: str) -> str:
+    """Hash of everything a PO re-ingest (upsert + reconciliation sync) reads or writes for this PO"""
+    digest = hashlib.sha256()
+
+    def feed(rows):
+        for row in rows:
+            digest.update(repr(tuple(row)).encode("utf-8"))
+        digest.update(b"|")
+
+    feed(db.execute("SELECT * FROM purchase_orders WHERE po_number = ?", (po_number,)))
+    feed(db.execute("SELECT * FROM purchase_order_items WHERE po_number = ? ORDER BY po_item_no, id", (po_number,)))
+    feed(
+        db.execute(
+            """
+            SELECT d.* FROM purchase_order_deliveries d
+            JOIN purchase_order_items i ON i.id = d.po_item_id
+            WHERE i.po_number = ?
+            ORDER BY i.po_item_no, d.lot_no, d.rowid
+            """,
+            (po_number,),
+        )
+    )
+    feed(
+        db.execute(
+            """
+            SELECT
+                (SELECT COUNT(*) || ':' || COALESCE(SUM(dci.dispatch_qty), 0)
+                 FROM delivery_challan_items dci JOIN purchase_order_items i ON i.id = dci.po_item_id
+                 WHERE i.po_number = ?),
+                (SELECT COUNT(*) || ':' || COALESCE(SUM(received_qty), 0) FROM srv_items WHERE po_number = ?),
+                (SELECT COUNT(*) || ':' || COALESCE(SUM(gii.quantity), 0)
+                 FROM gst_invoice_items gii JOIN purchase_order_items i ON i.id = gii.po_item_id
+                 WHERE i.po_number = ?)
+            """,
+            (po_number, po_number, po_number),
+        )
+    )
+    return digest.hexdigest()
+
+
+def po_ingest_unchanged(db: sqlite3.Connection, po_number: str, parsed_hash: str) -> bool:
+    """True when this parse result was the last one ingested for the PO and its rows are untouched since"""
+    if not settings.PARSE_CACHE_ENABLED:
+        return False
+
+    state = db.execute(
+        "SELECT result_hash, db_fingerprint FROM po_ingest_state WHERE po_number = ?", (po_number,)
+    ).fetchone()
+    if state is None or state["result_hash"] != parsed_hash:
+        return False
+    return state["db_fingerprint"] == po_db_fingerprint(db, po_number)
+
+
+def record_po_ingest(db: sqlite3.Connection, po_number: str, parsed_hash: str):
+    """Remember the ingested result and resulting PO fingerprint (inside the ingest transaction)"""
+    if not settings.PARSE_CACHE_ENABLED:
+        return
+
+    db.execute(
+        """
+        INSERT INTO po_ingest_state (po_number, result_hash, db_fingerprint) VALUES (?, ?, ?)
+        ON CONFLICT(po_number) DO UPDATE SET
+            result_hash = excluded.result_hash, db_fingerprint = excluded.db_fingerprint,
+            ingested_at = CURRENT_TIMESTAMP
+        """,
+        (po_number, parsed_hash, po_db_fingerprint(db, po_number)),
+    )
@@ -0,0 +1,173 @@
+"""
+Parse Worker Pool
+Fans uploaded PO/SRV HTML out to a process pool and hands parsed results back in upload
+order, so batch parsing scales with CPU cores while a single DB-writer stage ingests sequentially.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def parse_worker_count() -> int:
+    """Configured parse workers (PARSE_WORKERS=0 means one per CPU core)"""
+    workers = settings.PARSE_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def get_parse_executor() -> Optional[Executor]:
+    """Shared process pool, created on first use (None when parsing runs in-process)"""
+    global _executor
+    if parse_worker_count() <= 1:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            # spawn: same behaviour on Windows/PyInstaller builds, and no fork of a threaded server
+            _executor = ProcessPoolExecutor(
+                max_workers=parse_worker_count(), mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Started parse pool with {parse_worker_count()} workers")
+        return _executor
+
+
+def shutdown_parse_pool():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _discard_broken_pool(executor: Executor):
+    """A worker died (crash/OOM): drop the pool so the next submission starts a fresh one"""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            logger.warning("Parse pool broken, restarting workers")
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+# --------------------------------------------------
+# Worker functions (module-level so they pickle)
+# --------------------------------------------------
+def parse_po_bytes(content: bytes, engine: str) -> Tuple[Dict, List[Dict]]:
+    from backend.services.po_scraper import parse_po_html
+
+    return parse_po_html(content, engine=engine)
+
+
+def parse_srv_bytes(content: bytes, engine: str) -> List[Dict]:
+    from backend.services.srv_scraper import scrape_srv_html
+
+    return scrape_srv_html(content.decode("utf-8"), engine=engine)
+
+
+def po_parser() -> Callable[[bytes], Tuple[Dict, List[Dict]]]:
+    return partial(parse_po_bytes, engine=settings.SCRAPER_ENGINE)
+
+
+def srv_parser() -> Callable[[bytes], List[Dict]]:
+    return partial(parse_srv_bytes, engine=settings.SCRAPER_ENGINE)
+
+
+# --------------------------------------------------
+# Fan-out / ordered fan-in
+# --------------------------------------------------
+async def parse_in_order(
+    contents: Sequence[bytes], parser: Callable[[bytes], Any]
+) -> AsyncIterator[Tuple[int, Any, Optional[Exception]]]:
+    """
+    Parse every payload on the pool and yield (index, result, error) in input order.
+
+    Errors are isolated per file: a failing parse yields its exception instead of a result
+    and does not affect the others. At most ~2 payloads per worker are in flight, which
+    bounds the pickled copies held by the pool for very large batches.
+    """
+    executor = get_parse_executor()
+    if executor is None:
+        for idx, content in enumerate(contents):
+            try:
+                yield idx, parser(content), None
+            except Exception as e:
+                yield idx, None, e
+        return
+
+    loop = asyncio.get_running_loop()
+    window = parse_worker_count() * 2
+    in_flight = deque()
+    next_idx = 0
+
+    def restart_pool(broken: Executor):
+        nonlocal executor
+        if broken is executor:
+            _discard_broken_pool(broken)
+            executor = get_parse_executor()
+
+    def submit():
+        nonlocal next_idx
+        while next_idx < len(contents) and len(in_flight) < window:
+            try:
+                future = loop.run_in_executor(executor, parser, contents[next_idx])
+            except BrokenProcessPool:
+                restart_pool(executor)
+                continue
+            in_flight.append((next_idx, future, executor))
+            next_idx += 1
+
+    submit()
+    try:
+        while in_flight:
+            idx, future, pool = in_flight.popleft()
+            try:
+                result, error = await future, None
+            except BrokenProcessPool as e:
+                # Files already in flight fail with the pool; the rest go to a fresh pool
+                result, error = None, e
+                restart_pool(pool)
+            except Exception as e:
+                result, error = None, e
+            submit()
+            yield idx, result, error
+    finally:
+        # Consumer stopped early (client disconnect): drop anything still queued
+        for _, future, _ in in_flight:
+            future.cancel()
+
+
+async def parse_one(content: bytes, parser: Callable[[bytes], Any]) -> Any:
+    """Parse a single payload off the event loop (raises the parser's exception)"""
+    async for _, result, error in parse_in_order([content], parser):
+        if error:
+            raise error
+        return result
+
+
+def parse_blocking(content: bytes, parser: Callable[[bytes], Any]) -> Any:
+    """Parse a single payload on the pool from a worker thread (blocks; raises the parser's exception)"""
+    executor = get_parse_executor()
+    if executor is None:
+        return parser(content)
+
+    try:
+        return executor.submit(parser, content).result()
+    except BrokenProcessPool:
+        _discard_broken_pool(executor)
+        raise
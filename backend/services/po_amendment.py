@@ -0,0 +1,353 @@
+"""
+PO Amendment Engine
+Diff-based re-ingestion of an existing PO: compares the incoming scrape with the stored
+items and delivery lots, writes only inserted, changed and cancelled rows, and reconciles
+only items whose quantities changed.
+
+Only source columns (what the PO HTML defines) are compared. Reconciliation-derived
+quantities (delivered/received/rcd/rejected) of untouched items are left as stored; they
+are kept current by DC/SRV reconciliation. The change summary is returned to the caller
+and stored in po_amendments as an audit record.
+"""
+
+import json
+import logging
+import sqlite3
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from backend.core.normalize import to_int
+from backend.services.reconciliation_service import DeferredSync, ReconciliationService
+
+logger = logging.getLogger(__name__)
+
+# Header columns an existing PO's upsert overwrites (ON CONFLICT ... DO UPDATE SET)
+HEADER_FIELDS = (
+    "po_date",
+    "buyer_id",
+    "supplier_name",
+    "supplier_gstin",
+    "supplier_code",
+    "supplier_phone",
+    "amend_no",
+    "po_value",
+    "net_po_value",
+    "financial_year",
+)
+
+# Item source columns -> index in POIngestionService._item_row()
+ITEM_FIELDS = {
+    "material_code": 3,
+    "material_description": 4,
+    "drg_no": 5,
+    "mtrl_cat": 6,
+    "unit": 7,
+    "po_rate": 8,
+    "ord_qty": 9,
+}
+
+# Lot source columns -> index in POIngestionService._delivery_rows()
+LOT_FIELDS = {
+    "dely_qty": 2,
+    "dely_date": 3,
+    "entry_allow_date": 4,
+    "dest_code": 5,
+    "manual_override_qty": 8,
+}
+
+# Inputs of ReconciliationService._recalculate_delivery_status
+ITEM_QTY_FIELDS = {"ord_qty"}
+LOT_QTY_FIELDS = {"dely_qty", "manual_override_qty"}
+
+LOT_UPDATE = """
+    UPDATE purchase_order_deliveries
+    SET dely_qty = ?, dely_date = ?, entry_allow_date = ?, dest_code = ?, manual_override_qty = ?
+    WHERE rowid = ?
+"""
+
+
+def _same(stored, incoming) -> bool:
+    if isinstance(stored, (int, float)) and isinstance(incoming, (int, float)):
+        return abs(stored - incoming) < 1e-9
+    return stored == incoming
+
+
+def _field_changes(stored: Dict, incoming: Tuple, fields: Dict[str, int]) -> Dict:
+    return {
+        name: {"from": stored[name], "to": incoming[idx]}
+        for name, idx in fields.items()
+        if not _same(stored[name], incoming[idx])
+    }
+
+
+def _lots_by_number(rows: List) -> Optional[Dict]:
+    """{lot_no: row}, or None when lot numbers repeat (item lots are then replaced wholesale)"""
+    lots = {}
+    for row in rows:
+        lot_no = to_int(row["lot_no"] if isinstance(row, sqlite3.Row) else row[1])
+        if lot_no in lots:
+            return None
+        lots[lot_no] = row
+    return lots
+
+
+def apply_po_amendment(
+    db: sqlite3.Connection,
+    service,
+    po_number: str,
+    header_data: Dict,
+    po_items: List[Dict],
+    deferred_sync: Optional[DeferredSync] = None,
+) -> Dict:
+    """
+    Apply an incoming scrape of an existing PO as a minimal set of writes.
+    `service` provides the row mapping (POIngestionService._item_row/_delivery_rows) so values
+    are normalized exactly like a full ingest. Item reconciliation runs inline, or is queued on
+    `deferred_sync` when given. Returns the change summary.
+    """
+    from backend.services.ingest_po import DELIVERY_INSERT, HEADER_UPSERT, ITEM_UPSERT
+
+    stored_header = db.execute(
+        f"SELECT {', '.join(HEADER_FIELDS)} FROM purchase_orders WHERE po_number = ?", (po_number,)
+    ).fetchone()
+    header_changes = {
+        name: {"from": stored_header[name], "to": header_data[name]}
+        for name in HEADER_FIELDS
+        if not _same(stored_header[name], header_data[name])
+    }
+
+    stored_items = {
+        row["po_item_no"]: row
+        for row in db.execute(
+            f"""
+            SELECT id, po_item_no, status, {', '.join(ITEM_FIELDS)}
+            FROM purchase_order_items WHERE po_number = ?
+            """,
+            (po_number,),
+        )
+    }
+    stored_lots: Dict[str, List[sqlite3.Row]] = {}
+    for row in db.execute(
+        f"""
+        SELECT d.rowid AS rid, d.po_item_id, d.lot_no, d.delivered_qty, d.received_qty, {', '.join('d.' + f for f in LOT_FIELDS)}
+        FROM purchase_order_deliveries d
+        JOIN purchase_order_items i ON i.id = d.po_item_id
+        WHERE i.po_number = ?
+        ORDER BY d.rowid
+        """,
+        (po_number,),
+    ):
+        stored_lots.setdefault(row["po_item_id"], []).append(row)
+
+    # Incoming items by number; a repeated number keeps the last occurrence (as the upsert would)
+    incoming: Dict[int, Dict] = {}
+    repeated = set()
+    for item in po_items:
+        po_item_no = to_int(item.get("PO ITM"))
+        if po_item_no is None:
+            continue
+        if po_item_no in incoming:
+            repeated.add(po_item_no)
+        incoming[po_item_no] = item
+
+    summary = {
+        "po_number": po_number,
+        "amend_no": {"from": stored_header["amend_no"], "to": header_data["amend_no"]},
+        "header_changes": header_changes,
+        "items_added": [],
+        "items_changed": [],
+        "items_reactivated": [],
+        "items_cancelled": [],
+        "lots_added": [],
+        "lots_changed": [],
+        "lots_removed": [],
+        "items_reconciled": [],
+        "items_unchanged": 0,
+    }
+
+    item_writes = []
+    lot_inserts = []
+    lot_updates = []
+    lot_deletes = []
+    reconcile = {}  # item_id -> po_item_no
+
+    for po_item_no, item in incoming.items():
+        stored = stored_items.get(po_item_no)
+        item_id = stored["id"] if stored else str(uuid.uuid4())
+        item_row = service._item_row(item_id, po_number, po_item_no, item)
+        current_lots = stored_lots.get(item_id, [])
+        tracking = {
+            to_int(lot["lot_no"]): {"delivered": lot["delivered_qty"] or 0, "received": lot["received_qty"] or 0}
+            for lot in current_lots
+        }
+        new_lots = service._delivery_rows(item_id, item, item_row[-1], tracking)
+
+        if stored is None:
+            summary["items_added"].append(po_item_no)
+            item_writes.append(item_row)
+            lot_inserts.extend(new_lots)
+            summary["lots_added"].extend({"po_item_no": po_item_no, "lot_no": lot[1]} for lot in new_lots)
+            reconcile[item_id] = po_item_no
+            continue
+
+        changed = False
+        field_changes = _field_changes(stored, item_row, ITEM_FIELDS)
+        if field_changes or stored["status"] != "Active":
+            item_writes.append(item_row)
+            changed = True
+            if field_changes:
+                summary["items_changed"].append({"po_item_no": po_item_no, "changes": field_changes})
+            if stored["status"] != "Active":
+                summary["items_reactivated"].append(po_item_no)
+            if ITEM_QTY_FIELDS & field_changes.keys():
+                reconcile[item_id] = po_item_no
+
+        stored_by_lot = _lots_by_number(current_lots)
+        incoming_by_lot = _lots_by_number(new_lots)
+        if po_item_no in repeated or stored_by_lot is None or incoming_by_lot is None:
+            # Ambiguous lot identity: replace this item's lots (same as a full ingest)
+            lot_deletes.extend(lot["rid"] for lot in current_lots)
+            lot_inserts.extend(new_lots)
+            summary["lots_removed"].extend({"po_item_no": po_item_no, "lot_no": lot["lot_no"]} for lot in current_lots)
+            summary["lots_added"].extend({"po_item_no": po_item_no, "lot_no": lot[1]} for lot in new_lots)
+            reconcile[item_id] = po_item_no
+            continue
+
+        for lot_no, new_lot in incoming_by_lot.items():
+            old_lot = stored_by_lot.get(lot_no)
+            if old_lot is None:
+                lot_inserts.append(new_lot)
+                summary["lots_added"].append({"po_item_no": po_item_no, "lot_no": lot_no})
+                reconcile[item_id] = po_item_no
+                changed = True
+                continue
+
+            lot_changes = _field_changes(old_lot, new_lot, LOT_FIELDS)
+            if lot_changes:
+                lot_updates.append(tuple(new_lot[idx] for idx in LOT_FIELDS.values()) + (old_lot["rid"],))
+                summary["lots_changed"].append({"po_item_no": po_item_no, "lot_no": lot_no, "changes": lot_changes})
+                changed = True
+                if LOT_QTY_FIELDS & lot_changes.keys():
+                    reconcile[item_id] = po_item_no
+
+        for lot_no, old_lot in stored_by_lot.items():
+            if lot_no not in incoming_by_lot:
+                lot_deletes.append(old_lot["rid"])
+                summary["lots_removed"].append({"po_item_no": po_item_no, "lot_no": lot_no})
+                reconcile[item_id] = po_item_no
+                changed = True
+
+        if not changed:
+            summary["items_unchanged"] += 1
+
+    cancelled = [
+        (row["id"], po_item_no)
+        for po_item_no, row in stored_items.items()
+        if po_item_no not in incoming and row["status"] != "Cancelled"
+    ]
+    summary["items_cancelled"] = [po_item_no for _, po_item_no in cancelled]
+
+    # Writes: only rows that differ
+    if header_changes:
+        db.execute(HEADER_UPSERT, tuple(header_data.values()))
+    if item_writes:
+        db.executemany(ITEM_UPSERT, item_writes)
+    if lot_deletes:
+        db.execute(
+            "DELETE FROM purchase_order_deliveries WHERE rowid IN (SELECT value FROM json_each(?))",
+            (json.dumps(lot_deletes),),
+        )
+    if lot_updates:
+        db.executemany(LOT_UPDATE, lot_updates)
+    if lot_inserts:
+        db.executemany(DELIVERY_INSERT, lot_inserts)
+    if cancelled:
+        db.execute(
+            """
+            UPDATE purchase_order_items
+            SET status = 'Cancelled', updated_at = CURRENT_TIMESTAMP
+            WHERE id IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps([item_id for item_id, _ in cancelled]),),
+        )
+
+    # Reconcile only items whose quantity inputs changed
+    if reconcile and deferred_sync is not None:
+        deferred_sync.add_items(po_number, list(reconcile))
+        summary["items_reconciled"] = sorted(reconcile.values())
+    elif reconcile:
+        try:
+            ReconciliationService.sync_po_items(db, list(reconcile))
+            summary["items_reconciled"] = sorted(reconcile.values())
+        except Exception as sync_err:
+            print(f"⚠️ TOT Sync failed (non-critical): {sync_err}", flush=True)
+
+    summary["has_changes"] = bool(
+        header_changes
+        or item_writes
+        or summary["items_cancelled"]
+        or summary["lots_added"]
+        or summary["lots_changed"]
+        or summary["lots_removed"]
+    )
+    if summary["has_changes"]:
+        record_amendment(db, summary)
+    return summary
+
+
+def describe_changes(summary: Dict) -> str:
+    """One-line description of a change summary for upload messages"""
+    if not summary["has_changes"]:
+        return f"No changes to PO {summary['po_number']}"
+
+    parts = []
+    if summary["header_changes"]:
+        parts.append(f"{len(summary['header_changes'])} header field(s)")
+    for key, label in (
+        ("items_added", "item(s) added"),
+        ("items_changed", "item(s) changed"),
+        ("items_reactivated", "item(s) reactivated"),
+        ("items_cancelled", "item(s) cancelled"),
+        ("lots_added", "lot(s) added"),
+        ("lots_changed", "lot(s) changed"),
+        ("lots_removed", "lot(s) removed"),
+    ):
+        if summary[key]:
+            parts.append(f"{len(summary[key])} {label}")
+    return f"Amendment {summary['amend_no']['from']} -> {summary['amend_no']['to']}: " + ", ".join(parts)
+
+
+# --------------------------------------------------
+# Audit records
+# --------------------------------------------------
+def record_amendment(db: sqlite3.Connection, summary: Dict):
+    db.execute(
+        """
+        INSERT INTO po_amendments (
+            po_number, amend_from, amend_to, items_added, items_changed, items_cancelled,
+            lots_changed, summary_json
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            summary["po_number"],
+            summary["amend_no"]["from"],
+            summary["amend_no"]["to"],
+            len(summary["items_added"]),
+            len(summary["items_changed"]) + len(summary["items_reactivated"]),
+            len(summary["items_cancelled"]),
+            len(summary["lots_added"]) + len(summary["lots_changed"]) + len(summary["lots_removed"]),
+            json.dumps(summary, default=str),
+        ),
+    )
+
+
+def list_amendments(db: sqlite3.Connection, po_number: str) -> List[Dict]:
+    rows = db.execute(
+        "SELECT * FROM po_amendments WHERE po_number = ? ORDER BY id DESC", (po_number,)
+    ).fetchall()
+    amendments = []
+    for row in rows:
+        entry = dict(row)
+        entry["summary"] = json.loads(entry.pop("summary_json"))
+        amendments.append(entry)
+    return amendments
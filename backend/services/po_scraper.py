@@ -5,7 +5,8 @@ Extracts PO data from HTML files
 
 import logging
 import re
-from datetime import datetime
+
+from backend.core.normalize import clean, normalize_column, po_date, po_float, po_int
 
 logger = logging.getLogger(__name__)
 
@@ -17,69 +18,212 @@ RX_DRG = re.compile(
     r"(?:DRG|DRAWING)(?:[\s\.]*NO[\s\.]*|[\s\.]+)?[\:\-]?\s*([A-Z0-9][A-Z0-9\.\-]*)", re.IGNORECASE
 )
 
+# Item row columns converted per column in build_items: (key, <td> index, converter)
+LOT_COLUMNS = (
+    ("MTRL CAT", 2, po_int),
+    ("PO RATE", 4, po_float),
+    ("ORD QTY", 5, po_float),
+    ("RCD QTY", 6, po_float),  # Maps to received_quantity
+    ("ITEM VALUE", 7, po_float),
+    ("LOT NO", 8, po_int),
+    ("DELY QTY", 9, po_float),
+    ("DELY DATE", 10, po_date),
+    ("ENTRY ALLOW DATE", 11, po_date),
+    ("DEST CODE", 12, po_int),
+)
+
 
 # --------------------------------------------------
 # Helpers
 # --------------------------------------------------
-def clean(text):
-    return re.sub(r"\s+", " ", text or "").strip()
-
-
 def has_value(text):
     return bool(text and any(c.isalnum() for c in text))
 
 
-def to_int(val):
-    try:
-        v = re.sub(r"[^\d]", "", str(val))
-        return int(v) if v else None
-    except Exception:
-        return None
-
-
-def to_float(val):
-    try:
-        v = re.sub(r"[^\d.\-]", "", str(val))
-        return float(v) if v else None
-    except Exception:
-        return None
+# --------------------------------------------------
+# Header Cell Grid
+# --------------------------------------------------
+# Every label regex extract_po_header may look up (including fallbacks).
+# The combined prefilter lets cells that match none of them be skipped with one regex call.
+HEADER_LABELS = (
+    r"TIN\s+NO",
+    r"ECC\s+NO",
+    r"MPCT\s+NO",
+    r"PHONE",
+    r"FAX",
+    r"EMAIL",
+    r"WEBSITE",
+    r"PURCHASE\s+ORDER(?:\s+NO[\.]?)?",
+    r"^PO\s+DATE$",
+    r"^ENQUIRY$",
+    r"SUPP\s+CODE",
+    r"ORD-TYPE",
+    r"DVN",
+    r"QUOTATION",
+    r"QUOT-DATE",
+    r"PO\s+STATUS",
+    r"AMEND\s+NO",
+    r"PO-VALUE",
+    r"RC\s+NO",
+    r"EX\s+RATE",
+    r"CURRENCY",
+    r"FOB\s+VALUE",
+    r"NET\s+PO\s+VAL",
+    r"ENQ\s+DATE",
+    r"REMARKS",
+    r"TOTAL\s+VALUE",
+    r"^SUPP\s+NAME\s+M/S$",
+    r"PURCHASE\s+ORDER",
+    r"Purchase\s+Order\s+No",
+    r"(PO\s+)?DATE",
+    r"INSPECTION\s+BY",
+    r"^NAME$",
+    r"DESIGNATION",
+    r"^PHONE\s+NO$",
+)
 
+_LABEL_RX = {}
+_INLINE_RX = {}
+
+
+def _label_rx(label_rx):
+    rx = _LABEL_RX.get(label_rx)
+    if rx is None:
+        rx = _LABEL_RX[label_rx] = re.compile(label_rx, re.IGNORECASE)
+    return rx
+
+
+def _inline_rx(label_rx):
+    rx = _INLINE_RX.get(label_rx)
+    if rx is None:
+        rx = _INLINE_RX[label_rx] = re.compile(rf"{label_rx}[:\.]?\s*(.+)", re.IGNORECASE)
+    return rx
+
+
+RX_ANY_LABEL = re.compile("|".join(f"(?:{rx})" for rx in HEADER_LABELS), re.IGNORECASE)
+
+
+class HeaderCellGrid:
+    """
+    Normalized cell grid for header extraction.
+
+    Built once per document from the cleaned text of every table/row/cell, addressed by
+    (table, row, col). Each cell is matched against the known labels once (behind the
+    combined prefilter); find_value then resolves a label from its precomputed hit list
+    instead of re-walking the document. The grid is parser-agnostic, so the BeautifulSoup
+    and lxml engines share it.
+    """
+
+    def __init__(self, grid, labels=HEADER_LABELS):
+        self.grid = grid  # grid[t][r] -> list of cleaned cell texts
+        self.hits = {rx: [] for rx in labels}  # label -> [(t, r, c)] in document order
+        compiled = [(rx, _label_rx(rx)) for rx in labels]
+
+        for t_idx, rows in enumerate(grid):
+            for r_idx, cells in enumerate(rows):
+                for c_idx, text in enumerate(cells):
+                    if text and RX_ANY_LABEL.search(text):
+                        for label, rx in compiled:
+                            if rx.search(text):
+                                self.hits[label].append((t_idx, r_idx, c_idx))
+
+    def _label_hits(self, label_rx):
+        hits = self.hits.get(label_rx)
+        if hits is None:
+            # Label outside HEADER_LABELS: scan the precomputed texts once and remember it
+            rx = _label_rx(label_rx)
+            hits = self.hits[label_rx] = [
+                (t_idx, r_idx, c_idx)
+                for t_idx, rows in enumerate(self.grid)
+                for r_idx, cells in enumerate(rows)
+                for c_idx, text in enumerate(cells)
+                if rx.search(text)
+            ]
+        return hits
+
+    def find_value(self, label_rx, prefer="below", allow_label_like=False):
+        label_found = False
+        final_empty_match = False  # Track if we found an empty match (to distinguish None vs "")
 
-def normalize_date(val):
-    if not val:
-        return ""
+        for t_idx, r_idx, c_idx in self._label_hits(label_rx):
+            rows = self.grid[t_idx]
+            cells = rows[r_idx]
+            cell_text = cells[c_idx]
+
+            label_found = True
+            inline = _inline_rx(label_rx).search(cell_text)
+
+            found_val = None
+            if inline and has_value(inline.group(1)):
+                val = clean(inline.group(1))
+                if allow_label_like or not RX_LABEL_ONLY.match(val):
+                    found_val = val
+
+            # Check ADJACENT
+            if not found_val and prefer in ["adjacent", "any"] and c_idx + 1 < len(cells):
+                val = cells[c_idx + 1]
+                if has_value(val):
+                    if allow_label_like or not RX_LABEL_ONLY.match(val):
+                        found_val = val
+                elif prefer != "below":
+                    # Adjacent cell exists but is empty; keep looking for a non-empty instance
+                    final_empty_match = True
+
+            # Check BELOW
+            if not found_val and r_idx + 1 < len(rows) and prefer in ["below", "any"]:
+                below_cells = rows[r_idx + 1]
+                if c_idx < len(below_cells):
+                    val = below_cells[c_idx]
+                    if has_value(val):
+                        if allow_label_like or not RX_LABEL_ONLY.match(val):
+                            found_val = val
+                    else:
+                        final_empty_match = True
 
-    s = str(val).strip().upper()
+            # Validate found value
+            if found_val:
+                # Reject corruption patterns
+                if (
+                    found_val.upper().startswith("DETAILS")
+                    or "RAISED ON PO" in found_val.upper()
+                    or len(found_val) > 100
+                ):
+                    continue  # Keep looking
 
-    # dd/mm/yyyy or dd-mm-yyyy
-    m = re.search(r"(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{2,4})", s)
-    if m:
-        d, mth, y = m.groups()
-        if len(y) == 2:
-            y = "20" + y
-        return f"{int(d):02d}/{int(mth):02d}/{int(y)}"
+                return found_val
 
-    # dd-MMM-yy or dd-MMM-yyyy
-    m = re.search(r"(\d{1,2})[\/\-]([A-Z]{3})[\/\-](\d{2,4})", s)
-    if m:
-        d, mon, y = m.groups()
-        if len(y) == 2:
-            y = "20" + y
-        try:
-            dt = datetime.strptime(f"{d}-{mon}-{y}", "%d-%b-%Y")
-            return dt.strftime("%d/%m/%Y")
-        except Exception:
+        # Return "" if we found the label (and maybe an empty value) but no valid value
+        # Return None if we never even found the label
+        if final_empty_match or label_found:
             return ""
-
-    return ""
+        return None
 
 
-# --------------------------------------------------
-# Header Extraction
-# --------------------------------------------------
-def extract_po_header(soup):
-    tables = soup.find_all("table")
-    header = {}
+def soup_text_grid(tables):
+    """Cleaned cell-text grid for BeautifulSoup tables (same traversal as the per-label scan)"""
+    text_cache = {}
+    grid = []
+    for table in tables:
+        table_rows = []
+        for row in table.find_all("tr"):
+            row_texts = []
+            for cell in row.find_all(["td", "th"]):
+                # Nested tables repeat cells across tables; get_text() once per Tag
+                key = id(cell)
+                text = text_cache.get(key)
+                if text is None:
+                    text = text_cache[key] = clean(cell.get_text())
+                row_texts.append(text)
+            table_rows.append(row_texts)
+        grid.append(table_rows)
+    return grid
+
+
+def _scan_value_finder(tables):
+    """
+    Original per-label table scan (walks every cell for each lookup).
+    Kept as the reference implementation for parity checks and benchmarks.
+    """
 
     def find_value(label_rx, prefer="below", allow_label_like=False):
         label_found = False
@@ -146,6 +290,19 @@ def extract_po_header(soup):
             return ""
         return None
 
+    return find_value
+
+
+# --------------------------------------------------
+# Header Extraction
+# --------------------------------------------------
+def resolve_header_fields(find_value):
+    """
+    Resolve raw header fields through a find_value(label_rx, prefer, allow_label_like) lookup.
+    Shared by every parser engine; values are not normalized yet.
+    """
+    header = {}
+
     # Inline fields
     for k, rx in {
         "TIN NO": r"TIN\s+NO",
@@ -220,19 +377,16 @@ def extract_po_header(soup):
         val = find_value(rx, prefer="any", allow_label_like=allow)
         header[k] = val if val is not None else ""
 
-    # DRG
-    header["DRG"] = ""
-    for table in tables:
-        m = RX_DRG.search(table.get_text(" ", strip=True))
-        if m:
-            header["DRG"] = m.group(1)
-            break
+    return header
+
 
+def normalize_header_fields(header):
+    """Numeric and date normalization of resolved header fields (in place)"""
     # ---- numeric normalization ----
     # NOTE: Database schema changes - po_number, tin_no, rc_no are TEXT now
     # Only convert fields that are actually INTEGER in the database
     for k in ["DVN", "AMEND NO"]:  # department_no and amend_no are INTEGER
-        header[k] = to_int(header.get(k))
+        header[k] = po_int(header.get(k))
 
     # Keep these as strings (they map to TEXT columns in database)
     # "PURCHASE ORDER" -> po_number (TEXT)
@@ -244,19 +398,89 @@ def extract_po_header(soup):
         header[k] = str(val) if val is not None else None
 
     for k in ["PO-VALUE", "TOTAL VALUE", "NET PO VAL", "FOB VALUE", "EX RATE"]:
-        header[k] = to_float(header.get(k))
+        header[k] = po_float(header.get(k))
 
-    header["DRG"] = to_int(header.get("DRG"))
+    header["DRG"] = po_int(header.get("DRG"))
 
     # ---- date normalization ----
     for k in ["PO DATE", "QUOT-DATE", "ENQ DATE"]:
-        header[k] = normalize_date(header.get(k))
+        header[k] = po_date(header.get(k))
+
+
+class SoupDocument:
+    """BeautifulSoup access used by build_po_header (the lxml engine provides the same methods)"""
+
+    def __init__(self, soup):
+        self.soup = soup
+        self.tables = soup.find_all("table")
+
+    def text_grid(self):
+        return soup_text_grid(self.tables)
+
+    def table_texts(self):
+        for table in self.tables:
+            yield table.get_text(" ", strip=True)
+
+    def text(self):
+        return self.soup.get_text(" ", strip=True)
+
+    def table_row_texts(self):
+        for table in self.soup.find_all("table"):
+            yield [row.get_text() for row in table.find_all("tr")]
+
+    def strings_after(self, label_rx):
+        """Strings following the first string matching label_rx (None if the label is absent)"""
+        node = self.soup.find(string=label_rx)
+        if not node:
+            return None
+
+        def walk(curr):
+            while True:
+                curr = curr.find_next(string=True)
+                if not curr:
+                    return
+                yield curr
+
+        return walk(node)
+
+
+def _first_value_string(strings, lookahead):
+    """First non-label text among the next `lookahead` strings"""
+    for i, txt in enumerate(strings):
+        if i >= lookahead:
+            break
+        txt = clean(txt)
+        if not txt or txt == ":" or txt == "-" or not has_value(txt):
+            continue
+        if not RX_LABEL_ONLY.match(txt):
+            return txt
+    return None
+
+
+def build_po_header(doc, find_value=None):
+    """
+    Build the normalized PO header from a parsed document adapter
+    (SoupDocument here, LxmlDocument in lxml_scraper).
+    """
+    if find_value is None:
+        find_value = HeaderCellGrid(doc.text_grid()).find_value
+    header = resolve_header_fields(find_value)
+
+    # DRG
+    header["DRG"] = ""
+    for table_text in doc.table_texts():
+        m = RX_DRG.search(table_text)
+        if m:
+            header["DRG"] = m.group(1)
+            break
+
+    normalize_header_fields(header)
 
     # NUCLEAR FALLBACK: If PO DATE is still empty/whitespace, scan near "PO DATE" label
     # This handles BHEL format where table-based extraction fails
     if not header.get("PO DATE") or not header["PO DATE"].strip():
         # Strategy: Find "PO DATE" label in text, then look for date within next 200 chars
-        text_content = soup.get_text(" ", strip=True)
+        text_content = doc.text()
         po_date_match = re.search(r"PO\s+DATE", text_content, re.IGNORECASE)
 
         if po_date_match:
@@ -264,23 +488,19 @@ def extract_po_header(soup):
             search_window = text_content[po_date_match.end() : po_date_match.end() + 200]
             date_match = re.search(r"(\d{1,2}/\d{1,2}/\d{4})", search_window)
             if date_match:
-                header["PO DATE"] = normalize_date(date_match.group(1))
+                header["PO DATE"] = po_date(date_match.group(1))
 
         # Ultimate fallback: if still empty, try all tables for date in row below "PO DATE"
         if not header.get("PO DATE") or not header["PO DATE"].strip():
-            tables = soup.find_all("table")
-            for table in tables:
-                rows = table.find_all("tr")
-                for r_idx, row in enumerate(rows):
+            for rows in doc.table_row_texts():
+                for r_idx, row_text in enumerate(rows):
                     # Check if this row contains "PO DATE"
-                    row_text = clean(row.get_text())
-                    if re.search(r"PO\s+DATE", row_text, re.IGNORECASE):
+                    if re.search(r"PO\s+DATE", clean(row_text), re.IGNORECASE):
                         # Check next row for date
                         if r_idx + 1 < len(rows):
-                            next_row_text = rows[r_idx + 1].get_text()
-                            date_match = re.search(r"(\d{1,2}/\d{1,2}/\d{4})", next_row_text)
+                            date_match = re.search(r"(\d{1,2}/\d{1,2}/\d{4})", rows[r_idx + 1])
                             if date_match:
-                                header["PO DATE"] = normalize_date(date_match.group(1))
+                                header["PO DATE"] = po_date(date_match.group(1))
                                 break
                     if header.get("PO DATE"):
                         break
@@ -288,33 +508,11 @@ def extract_po_header(soup):
     # Fallback for INSPECTION BY (Handles div/font nesting not in standard table rows)
     if not header.get("INSPECTION BY"):
         try:
-            insp_node = soup.find(string=re.compile(r"INSPECTION\s+BY", re.IGNORECASE))
-            if insp_node:
-                # Strategy: Look ahead for the next substantial text node
-                # We skip the node itself if it contains the value (inline split failed earlier)
-                # But here we assume it wasn't found in table.
-
-                # If text is just label "Inspection By :", value is next.
-                curr = insp_node
-                found_val = None
-
-                # Try traversing next elements
-                for _ in range(5):  # Check next 5 elements
-                    curr = curr.find_next(string=True)
-                    if not curr:
-                        break
-
-                    txt = clean(curr)
-                    if not txt or txt == ":" or txt == "-" or not has_value(txt):
-                        continue
-
-                    # Found candidate
-                    if not RX_LABEL_ONLY.match(txt):
-                        found_val = txt
-                        break
-
-                if found_val:
-                    header["INSPECTION BY"] = found_val
+            # If text is just label "Inspection By :", value is in one of the next 5 text nodes
+            strings = doc.strings_after(re.compile(r"INSPECTION\s+BY", re.IGNORECASE))
+            found_val = _first_value_string(strings, 5) if strings is not None else None
+            if found_val:
+                header["INSPECTION BY"] = found_val
         except Exception as e:
             logger.warning(f"Failed to extract INSPECTION BY: {e}")
 
@@ -322,28 +520,11 @@ def extract_po_header(soup):
     # Only run fallback if label was NOT FOUND in table structure at all
     if header.get("_RC_NO_NOT_FOUND"):
         try:
-            rc_node = soup.find(string=re.compile(r"RC\s*NO", re.IGNORECASE))
-            if rc_node:
-                curr = rc_node
-                found_val = None
-                # RC NO value was seen 5 nodes away in debug
-                for _ in range(10):
-                    curr = curr.find_next(string=True)
-                    if not curr:
-                        break
-
-                    txt = clean(curr)
-                    if not txt or txt == ":" or txt == "-" or not has_value(txt):
-                        continue
-
-                    # Found candidate
-                    # Ensure it's not a known label from other fields to be safe
-                    if not RX_LABEL_ONLY.match(txt):
-                        found_val = txt
-                        break
-
-                if found_val:
-                    header["RC NO"] = found_val
+            # RC NO value was seen 5 nodes away in debug
+            strings = doc.strings_after(re.compile(r"RC\s*NO", re.IGNORECASE))
+            found_val = _first_value_string(strings, 10) if strings is not None else None
+            if found_val:
+                header["RC NO"] = found_val
         except Exception as e:
             logger.warning(f"Failed to extract RC NO fallback: {e}")
 
@@ -353,56 +534,58 @@ def extract_po_header(soup):
     return header
 
 
+def extract_po_header(soup, use_grid=True):
+    """
+    Extract PO header fields.
+    Labels are resolved from a HeaderCellGrid built once per document;
+    use_grid=False falls back to the original per-label scan (parity checks / benchmarks).
+    """
+    doc = SoupDocument(soup)
+    return build_po_header(doc, None if use_grid else _scan_value_finder(doc.tables))
+
+
 # --------------------------------------------------
 # Item Extraction
 # --------------------------------------------------
+RX_MATERIAL_CODE = re.compile("MATERIAL CODE", re.I)
+
+
 def extract_items(soup):
     tables = soup.find_all("table")
-    item_table = next((t for t in tables if t.find(string=re.compile("MATERIAL CODE", re.I))), None)
+    item_table = next((t for t in tables if t.find(string=RX_MATERIAL_CODE)), None)
     if not item_table:
         return []
 
     rows = item_table.find_all("tr")
     header_idx = next(
-        (i for i, r in enumerate(rows) if r.find(string=re.compile("MATERIAL CODE", re.I))),
+        (i for i, r in enumerate(rows) if r.find(string=RX_MATERIAL_CODE)),
         None,
     )
     if header_idx is None:
         return []
 
+    return build_items([clean(td.get_text()) for td in row.find_all("td")] for row in rows[header_idx + 1 :])
+
+
+def build_items(item_rows):
+    """
+    Assemble PO items from the cleaned <td> texts of each row after the MATERIAL CODE header.
+    Shared by the BeautifulSoup and lxml engines.
+    """
     # Phase 1: Collection - Store all delivery rows (composite key: PO_ITM + LOT_NO)
-    delivery_rows = []
+    lot_rows = []  # (item_id, cols)
     description_map = {}  # Map item_id -> description text
 
     # We iterate all rows after header
-    for row in rows[header_idx + 1 :]:
-        cols = [clean(td.get_text()) for td in row.find_all("td")]
+    for cols in item_rows:
 
         # Case A: Item Row (Standard format has ~13 columns, but robustly >= 8)
         # BHEL POs usually have column 0 as Item Sl No.
         if len(cols) >= 8 and cols[0] and cols[0].isdigit():
-            item_id = to_int(cols[0])
+            item_id = po_int(cols[0])
             if item_id is not None:
                 # Each row represents a delivery lot for this item
-                delivery_rows.append(
-                    {
-                        "PO ITM": item_id,
-                        "MATERIAL CODE": cols[1],
-                        "MTRL CAT": to_int(cols[2]) if len(cols) > 2 else None,
-                        "UNIT": cols[3] if len(cols) > 3 else "",
-                        "PO RATE": to_float(cols[4]) if len(cols) > 4 else None,
-                        "ORD QTY": to_float(cols[5]) if len(cols) > 5 else None,
-                        "RCD QTY": to_float(cols[6])
-                        if len(cols) > 6
-                        else None,  # Maps to received_quantity
-                        "ITEM VALUE": to_float(cols[7]) if len(cols) > 7 else None,
-                        "LOT NO": to_int(cols[8]) if len(cols) > 8 else None,
-                        "DELY QTY": to_float(cols[9]) if len(cols) > 9 else None,
-                        "DELY DATE": normalize_date(cols[10]) if len(cols) > 10 else "",
-                        "ENTRY ALLOW DATE": normalize_date(cols[11]) if len(cols) > 11 else "",
-                        "DEST CODE": to_int(cols[12]) if len(cols) > 12 else None,
-                    }
-                )
+                lot_rows.append((item_id, cols))
 
         # Case B: Description Row
         # Usually 4 columns: [Desc, Spacer, ItemID, Spacer]
@@ -427,6 +610,22 @@ def extract_items(soup):
                 new_desc = (current_desc + " " + desc_text).strip() if current_desc else desc_text
                 description_map[link_id] = new_desc
 
+    # Numeric/date columns are converted one column at a time (values repeat across lots);
+    # a missing cell converts like None (None / "")
+    columns = [
+        (key, normalize_column([cols[idx] if len(cols) > idx else None for _, cols in lot_rows], fn))
+        for key, idx, fn in LOT_COLUMNS
+    ]
+    delivery_rows = [
+        {
+            "PO ITM": item_id,
+            "MATERIAL CODE": cols[1],
+            "UNIT": cols[3] if len(cols) > 3 else "",
+            **{key: values[n] for key, values in columns},
+        }
+        for n, (item_id, cols) in enumerate(lot_rows)
+    ]
+
     # Phase 2: Aggregation - Group delivery rows by PO_ITM
     items_map = {}
 
@@ -494,3 +693,28 @@ def extract_items(soup):
 
     # Conversion to list and sorting
     return sorted(list(items_map.values()), key=lambda x: x["PO ITM"])
+
+
+# --------------------------------------------------
+# Engine Selection
+# --------------------------------------------------
+def parse_po_html(content, engine=None):
+    """
+    Parse PO HTML into (header, items) with the configured engine.
+    engine: "bs4" (BeautifulSoup + lxml backend) or "lxml" (lxml.html + XPath);
+    defaults to settings.SCRAPER_ENGINE.
+    """
+    if engine is None:
+        from backend.core.config import settings
+
+        engine = settings.SCRAPER_ENGINE
+
+    if engine == "lxml":
+        from backend.services.lxml_scraper import parse_po_html_lxml
+
+        return parse_po_html_lxml(content)
+
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "lxml")
+    return extract_po_header(soup), extract_items(soup)
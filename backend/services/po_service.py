@@ -6,10 +6,11 @@ Separates concerns from the API router.
 
 import logging
 import sqlite3
-from typing import List
+from typing import Iterator, List
 
 from backend.core.exceptions import ResourceNotFoundError
 from backend.db.models import PODetail, POHeader, POItem, POListItem, POStats
+from backend.db.streaming import stream_query
 from backend.services.status_service import (
     calculate_entity_status,
 )
@@ -53,75 +54,79 @@ class POService:
                 total_value_change=0.0,
             )
 
+    # BAL = ORD - DLV (where DLV is High Water Mark)
+    LIST_POS_QUERY = """
+        SELECT 
+            po.po_number, po.po_date, po.supplier_name, po.po_value, po.amend_no, po.po_status, po.financial_year, po.created_at,
+            rl.total_ordered,
+            rl.total_delivered,
+            rl.total_pending,
+            rl.total_items,
+            COALESCE((SELECT SUM(rejected_qty) FROM srv_items WHERE po_number = po.po_number), 0) as total_rejected,
+            COALESCE((
+                SELECT SUM(pod.received_qty) 
+                FROM purchase_order_deliveries pod 
+                JOIN purchase_order_items poi ON pod.po_item_id = poi.id 
+                WHERE poi.po_number = po.po_number
+            ), 0) as total_received
+        FROM purchase_orders po
+        LEFT JOIN (
+            SELECT 
+                po_number,
+                SUM(ord_qty) as total_ordered,
+                SUM(actual_delivered_qty) as total_delivered,
+                SUM(pending_qty) as total_pending,
+                COUNT(*) as total_items
+            FROM reconciliation_ledger
+            GROUP BY po_number
+        ) rl ON po.po_number = rl.po_number
+        ORDER BY po.created_at DESC
+    """
+
+    @staticmethod
+    def _to_list_item(row: sqlite3.Row) -> POListItem:
+        """Map a LIST_POS_QUERY row to a POListItem with live status"""
+        t_ordered = row["total_ordered"] or 0
+        t_delivered = row["total_delivered"] or 0
+        t_pending = row["total_pending"] or 0
+        t_received = row["total_received"] or 0
+        t_items = row["total_items"] or 0
+
+        # Determine Status using CENTRALIZED logic (same as Dashboard)
+        status = calculate_entity_status(t_ordered, t_delivered, t_received)
+
+        return POListItem(
+            po_number=row["po_number"],
+            po_date=row["po_date"],
+            supplier_name=row["supplier_name"],
+            po_value=row["po_value"],
+            amend_no=row["amend_no"],
+            po_status=status,
+            linked_dc_numbers="", # Optimized out, can be added if needed
+            total_ordered_quantity=t_ordered,
+            total_dispatched_quantity=t_delivered, # UI labels this as 'Delivered'
+            total_received_quantity=t_received,
+            total_rejected_quantity=row["total_rejected"],
+            total_pending_quantity=t_pending,
+            total_items_count=t_items,
+            financial_year=row["financial_year"],
+            created_at=row["created_at"],
+        )
+
     def list_pos(self, db: sqlite3.Connection) -> List[POListItem]:
         """
         List all Purchase Orders with aggregated quantity details.
         Uses reconciliation_ledger for unified HWM logic.
         """
-        # BAL = ORD - DLV (where DLV is High Water Mark)
-        query = """
-            SELECT 
-                po.po_number, po.po_date, po.supplier_name, po.po_value, po.amend_no, po.po_status, po.financial_year, po.created_at,
-                rl.total_ordered,
-                rl.total_delivered,
-                rl.total_pending,
-                rl.total_items,
-                COALESCE((SELECT SUM(rejected_qty) FROM srv_items WHERE po_number = po.po_number), 0) as total_rejected,
-                COALESCE((
-                    SELECT SUM(pod.received_qty) 
-                    FROM purchase_order_deliveries pod 
-                    JOIN purchase_order_items poi ON pod.po_item_id = poi.id 
-                    WHERE poi.po_number = po.po_number
-                ), 0) as total_received
-            FROM purchase_orders po
-            LEFT JOIN (
-                SELECT 
-                    po_number,
-                    SUM(ord_qty) as total_ordered,
-                    SUM(actual_delivered_qty) as total_delivered,
-                    SUM(pending_qty) as total_pending,
-                    COUNT(*) as total_items
-                FROM reconciliation_ledger
-                GROUP BY po_number
-            ) rl ON po.po_number = rl.po_number
-            ORDER BY po.created_at DESC
-        """
-
-        rows = db.execute(query).fetchall()
-
-        results = []
-        for row in rows:
-            t_ordered = row["total_ordered"] or 0
-            t_delivered = row["total_delivered"] or 0
-            t_pending = row["total_pending"] or 0
-            t_received = row["total_received"] or 0
-            t_items = row["total_items"] or 0
-
-            # Determine Status using CENTRALIZED logic (same as Dashboard)
-            from backend.services.status_service import calculate_entity_status
-            status = calculate_entity_status(t_ordered, t_delivered, t_received)
-
-            results.append(
-                POListItem(
-                    po_number=row["po_number"],
-                    po_date=row["po_date"],
-                    supplier_name=row["supplier_name"],
-                    po_value=row["po_value"],
-                    amend_no=row["amend_no"],
-                    po_status=status,
-                    linked_dc_numbers="", # Optimized out, can be added if needed
-                    total_ordered_quantity=t_ordered,
-                    total_dispatched_quantity=t_delivered, # UI labels this as 'Delivered'
-                    total_received_quantity=t_received,
-                    total_rejected_quantity=row["total_rejected"],
-                    total_pending_quantity=t_pending,
-                    total_items_count=t_items,
-                    financial_year=row["financial_year"],
-                    created_at=row["created_at"],
-                )
-            )
+        rows = db.execute(self.LIST_POS_QUERY).fetchall()
+        return [self._to_list_item(row) for row in rows]
 
-        return results
+    def iter_pos(self) -> Iterator[POListItem]:
+        """
+        Stream Purchase Orders row by row (same shape as list_pos).
+        Used by `?stream=` so memory stays flat regardless of table size.
+        """
+        return stream_query(self.LIST_POS_QUERY, (), self._to_list_item)
 
     def get_po_detail(self, db: sqlite3.Connection, po_number: str) -> PODetail:
         """
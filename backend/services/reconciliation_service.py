@@ -6,9 +6,9 @@ Enforces the "Triangle of Truth" logic to ensure data consistency.
 
 import logging
 import sqlite3
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
-from backend.core.number_utils import to_qty
+from backend.core.normalize import to_int, to_qty
 
 logger = logging.getLogger(__name__)
 
@@ -418,6 +418,67 @@ class ReconciliationService:
             logger.error(f"Failed to reconcile SRV deletion for {srv_number}: {e}")
             raise
 
+    @staticmethod
+    def reconcile_srv_changes(
+        db: sqlite3.Connection,
+        srv_number: str,
+        po_number: str,
+        added: List[Dict],
+        removed: List[Dict],
+    ) -> List[str]:
+        """
+        Coalesced reconciliation for a diff-based SRV re-upload (rows already written).
+        DC item receipts move once per (challan, item, lot) by the net of removed and added rows,
+        then each affected PO item is recalculated once (lot receipts are rebuilt from srv_items there).
+        Returns the affected PO item ids.
+        """
+        try:
+            item_ids = {
+                row["po_item_no"]: row["id"]
+                for row in db.execute(
+                    "SELECT id, po_item_no FROM purchase_order_items WHERE po_number = ?", (po_number,)
+                )
+            }
+
+            affected = set()
+            dc_deltas = {}  # (challan_no, po_item_id, lot_no) -> [received, accepted, rejected]
+            for sign, rows in ((-1, removed), (1, added)):
+                for item in rows:
+                    po_item_id = item_ids.get(to_int(item["po_item_no"]))
+                    if not po_item_id:
+                        continue
+                    affected.add(po_item_id)
+
+                    if item.get("challan_no"):
+                        received = to_qty(item.get("received_qty") or 0)
+                        rejected = to_qty(item.get("rejected_qty") or 0)
+                        delta = dc_deltas.setdefault((item["challan_no"], po_item_id, item.get("lot_no")), [0.0, 0.0, 0.0])
+                        delta[0] += sign * received
+                        delta[1] += sign * max(0, received - rejected)
+                        delta[2] += sign * rejected
+
+            for (challan_no, po_item_id, lot_no), (received, accepted, rejected) in dc_deltas.items():
+                if max(abs(received), abs(accepted), abs(rejected)) < 0.001:
+                    continue
+                db.execute(
+                    """
+                    UPDATE delivery_challan_items
+                    SET received_qty = MAX(0, received_qty + ?), accepted_qty = MAX(0, accepted_qty + ?), rejected_qty = MAX(0, rejected_qty + ?)
+                    WHERE dc_number = ? AND po_item_id = ? AND (lot_no = ? OR ? IS NULL)
+                """,
+                    (received, accepted, rejected, challan_no, po_item_id, lot_no, lot_no),
+                )
+
+            for po_item_id in sorted(affected):
+                ReconciliationService._recalculate_delivery_status(db, po_item_id)
+
+            logger.info(f"Reconciled SRV {srv_number} changes: {len(affected)} PO items.")
+            return sorted(affected)
+
+        except Exception as e:
+            logger.error(f"Failed to reconcile SRV changes for {srv_number}: {e}")
+            raise
+
     @staticmethod
     def sync_po(db: sqlite3.Connection, po_number: str) -> None:
         """
@@ -445,6 +506,22 @@ class ReconciliationService:
             logger.error(f"Failed to sync PO {po_number}: {e}")
             raise
 
+    @staticmethod
+    def sync_po_items(db: sqlite3.Connection, po_item_ids: List[str]) -> None:
+        """
+        Partial TOT-5 sync: recalculates delivery status for the given items only.
+        Used by diff-based amendments, where only items with changed quantities need it.
+        """
+        try:
+            for po_item_id in po_item_ids:
+                ReconciliationService._recalculate_delivery_status(db, po_item_id)
+
+            logger.info(f"TOT-5: Reconciled {len(po_item_ids)} amended items.")
+
+        except Exception as e:
+            logger.error(f"Failed to sync items {po_item_ids}: {e}")
+            raise
+
     @staticmethod
     def sync_po_status(db: sqlite3.Connection, po_number: str) -> None:
         """
@@ -505,3 +582,45 @@ class ReconciliationService:
         except Exception as e:
             logger.error(f"Failed to sync PO status for {po_number}: {e}")
             raise
+
+
+class DeferredSync:
+    """
+    Reconciliation work collected while ingesting a group of uploads, run once at the group commit.
+    Each PO is synced at most once; a full sync_po supersedes item-level syncs queued for the same PO.
+    """
+
+    def __init__(self):
+        self.full_pos: Set[str] = set()
+        self.items: Dict[str, Set[str]] = {}
+
+    def add_po(self, po_number: str) -> None:
+        self.full_pos.add(po_number)
+
+    def add_items(self, po_number: str, po_item_ids: List[str]) -> None:
+        self.items.setdefault(po_number, set()).update(po_item_ids)
+
+    def merge(self, other: "DeferredSync") -> None:
+        self.full_pos |= other.full_pos
+        for po_number, po_item_ids in other.items.items():
+            self.add_items(po_number, list(po_item_ids))
+
+    def __len__(self) -> int:
+        return len(self.full_pos | self.items.keys())
+
+    def flush(self, db: sqlite3.Connection) -> int:
+        """Run the queued syncs (failures are non-critical, as for inline syncs). Returns POs synced."""
+        synced = 0
+        for po_number in sorted(self.full_pos | self.items.keys()):
+            try:
+                if po_number in self.full_pos:
+                    ReconciliationService.sync_po(db, po_number)
+                else:
+                    ReconciliationService.sync_po_items(db, sorted(self.items[po_number]))
+                synced += 1
+            except Exception as sync_err:
+                print(f"⚠️ TOT Sync failed for PO {po_number} (non-critical): {sync_err}", flush=True)
+
+        self.full_pos.clear()
+        self.items.clear()
+        return synced
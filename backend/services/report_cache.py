@@ -0,0 +1,373 @@
+"""
+Report Cache
+Results of the /api/reports endpoints (reconciliation, sales, registers, daily dispatch) kept
+in the report_cache table (migration 045), shared by all worker processes.
+
+- Key: endpoint + normalized parameters (defaults resolved, None dropped, key order ignored)
+  + format ('json' result or 'xlsx' download). Each entry records the data_versions vector
+  (migration 041) read before it was computed; it is served while that vector is unchanged.
+- Invoice register entries whose period lies entirely in closed financial years (ending before
+  1 April of the current FY) are pinned: later writes do not expire them, only an explicit
+  invalidation (DELETE /api/system/report-cache, optionally per endpoint or FY) or size eviction
+  does. Other reports read documents outside the period (lifetime DC / SRV totals of the POs
+  in it, PO rates of the DC register) and stay keyed on the data versions.
+- Excel downloads are written once to db/report_cache/<key>.xlsx and later downloads stream
+  that file. JSON results are stored as JSON text.
+- Total size is bounded by REPORT_CACHE_MAX_BYTES: least recently used entries are evicted,
+  unpinned ones first.
+- Report routes are read-only: cache bookkeeping commits on the request connection, and a
+  busy database only skips the bookkeeping (the report itself is still returned).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from fastapi.responses import StreamingResponse
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ENTITIES = ("po", "dc", "invoice", "srv")
+
+# Endpoints whose rows come only from documents dated inside the requested period
+PINNABLE_ENDPOINTS = frozenset({"register/invoice"})
+
+STORE_SQL = """
+INSERT INTO report_cache (
+    cache_key, endpoint, params, format, start_date, end_date, versions, pinned, result, file_name, bytes
+) VALUES (
+    :cache_key, :endpoint, :params, :format, :start_date, :end_date, :versions, :pinned, :result, :file_name, :bytes
+)
+ON CONFLICT(cache_key) DO UPDATE SET
+    versions = excluded.versions,
+    pinned = excluded.pinned,
+    result = excluded.result,
+    file_name = excluded.file_name,
+    bytes = excluded.bytes,
+    hits = 0,
+    created_at = CURRENT_TIMESTAMP,
+    last_hit_at = NULL
+"""
+
+
+# --------------------------------------------------
+# Keys and periods
+# --------------------------------------------------
+def normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Parameters that select the result, in key order, without unset values"""
+    return {key: params[key] for key in sorted(params) if params[key] is not None and params[key] != ""}
+
+
+def cache_key(endpoint: str, params: Dict[str, Any], fmt: str) -> str:
+    payload = json.dumps({"endpoint": endpoint, "params": params, "format": fmt}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _parse_date(value: Any) -> Optional[str]:
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def period_of(params: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """(start, end) ISO dates covered by the parameters; (None, None) when not date bound"""
+    if "date" in params:
+        day = _parse_date(params["date"])
+        return day, day
+    if "start_date" in params and "end_date" in params:
+        return _parse_date(params["start_date"]), _parse_date(params["end_date"])
+    return None, None
+
+
+def current_fy_start(today: Optional[datetime] = None) -> str:
+    today = today or datetime.now()
+    year = today.year if today.month >= 4 else today.year - 1
+    return f"{year}-04-01"
+
+
+def fy_range(fy: str) -> Tuple[str, str]:
+    """'2023-24' -> ('2023-04-01', '2024-03-31')"""
+    start_year = int(fy.split("-")[0])
+    return f"{start_year}-04-01", f"{start_year + 1}-03-31"
+
+
+def is_closed_period(start: Optional[str], end: Optional[str], today: Optional[datetime] = None) -> bool:
+    return bool(start and end and start <= end and end < current_fy_start(today))
+
+
+def version_token(db: sqlite3.Connection) -> str:
+    """data_versions as one comparable string ("po.dc.invoice.srv")"""
+    versions = {row[0]: row[1] for row in db.execute("SELECT entity, version FROM data_versions")}
+    return ".".join(str(versions.get(e, 0)) for e in ENTITIES)
+
+
+def cache_dir() -> Path:
+    """Excel artifacts directory, next to the database"""
+    from backend.db import session
+
+    return Path(session.DATABASE_PATH).parent / "report_cache"
+
+
+# --------------------------------------------------
+# Cache
+# --------------------------------------------------
+class ReportCache:
+    def __init__(self):
+        self._lock = threading.Lock()  # guards the counters
+        self.hits = 0
+        self.pinned_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.write_skips = 0
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _lookup(self, db: sqlite3.Connection, key: str, versions: str) -> Optional[sqlite3.Row]:
+        row = db.execute(
+            "SELECT endpoint, pinned, versions, result, file_name FROM report_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row["versions"] == versions or (row["pinned"] and row["endpoint"] in PINNABLE_ENDPOINTS):
+            return row
+        return None
+
+    def _write(self, db: sqlite3.Connection, statements: Callable[[], Any]) -> Any:
+        """Run cache bookkeeping in its own short transaction; skipped when the database is busy"""
+        try:
+            result = statements()
+            db.commit()
+            return result
+        except sqlite3.OperationalError as e:
+            db.rollback()
+            self._count("write_skips")
+            logger.warning(f"Report cache write skipped: {e}")
+            return None
+
+    def _touch(self, db: sqlite3.Connection, key: str, pinned: bool):
+        self._count("pinned_hits" if pinned else "hits")
+        self._write(
+            db,
+            lambda: db.execute(
+                "UPDATE report_cache SET hits = hits + 1, last_hit_at = CURRENT_TIMESTAMP WHERE cache_key = ?",
+                (key,),
+            ),
+        )
+
+    def _store(self, db: sqlite3.Connection, entry: Dict[str, Any]):
+        def statements():
+            db.execute(STORE_SQL, entry)
+            return self._evict(db, keep=entry["cache_key"])
+
+        removed = self._write(db, statements)
+        if removed is not None:
+            self._count("stores")
+            self._remove_files(removed)
+
+    def _entry(self, key: str, endpoint: str, params: Dict[str, Any], fmt: str, versions: str) -> Dict[str, Any]:
+        start, end = period_of(params)
+        return {
+            "cache_key": key,
+            "endpoint": endpoint,
+            "params": json.dumps(params, sort_keys=True, default=str),
+            "format": fmt,
+            "start_date": start,
+            "end_date": end,
+            "versions": versions,
+            "pinned": int(endpoint in PINNABLE_ENDPOINTS and is_closed_period(start, end)),
+            "result": None,
+            "file_name": None,
+            "bytes": 0,
+        }
+
+    # --------------------------------------------------
+    # JSON results
+    # --------------------------------------------------
+    def result(self, db: sqlite3.Connection, endpoint: str, params: Dict[str, Any], compute: Callable[[], Any]) -> Any:
+        """Cached result of compute() (a JSON-serializable report) for these parameters"""
+        if not settings.REPORT_CACHE_ENABLED:
+            return compute()
+        params = normalize_params(params)
+        key = cache_key(endpoint, params, "json")
+        # Versions are read before computing: a write in between only makes the entry expire early
+        versions = version_token(db)
+        row = self._lookup(db, key, versions)
+        if row is not None:
+            self._touch(db, key, bool(row["pinned"]))
+            return json.loads(row["result"])
+
+        self._count("misses")
+        result = compute()
+        entry = self._entry(key, endpoint, params, "json", versions)
+        entry["result"] = json.dumps(result, separators=(",", ":"), default=str)
+        entry["bytes"] = len(entry["result"])
+        self._store(db, entry)
+        return result
+
+    # --------------------------------------------------
+    # Excel artifacts
+    # --------------------------------------------------
+    def xlsx(
+        self,
+        db: sqlite3.Connection,
+        endpoint: str,
+        params: Dict[str, Any],
+        filename: str,
+        build: Callable[[BinaryIO], Any],
+    ) -> StreamingResponse:
+        """Excel download for these parameters; build(output) writes the workbook on a miss"""
+        from backend.services.excel_export import xlsx_file_response
+
+        if not settings.REPORT_CACHE_ENABLED:
+            spool = SpooledTemporaryFile(max_size=settings.EXCEL_SPOOL_MAX_SIZE)
+            try:
+                build(spool)
+                size = spool.tell()
+                spool.seek(0)
+            except Exception:
+                spool.close()
+                raise
+            return xlsx_file_response(spool, filename, size)
+
+        params = normalize_params(params)
+        key = cache_key(endpoint, params, "xlsx")
+        versions = version_token(db)
+        directory = cache_dir()
+        row = self._lookup(db, key, versions)
+        if row is not None and row["file_name"]:
+            try:
+                # Opened before responding: an eviction meanwhile cannot cut the download short
+                file = open(directory / row["file_name"], "rb")
+            except FileNotFoundError:
+                file = None
+            if file is not None:
+                self._touch(db, key, bool(row["pinned"]))
+                return xlsx_file_response(file, filename, os.fstat(file.fileno()).st_size)
+
+        self._count("misses")
+        directory.mkdir(parents=True, exist_ok=True)
+        file_name = f"{key}.xlsx"
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                build(out)
+            os.replace(tmp_path, directory / file_name)
+        except Exception:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        file = open(directory / file_name, "rb")
+        size = os.fstat(file.fileno()).st_size
+
+        entry = self._entry(key, endpoint, params, "xlsx", versions)
+        entry["file_name"] = file_name
+        entry["bytes"] = size
+        self._store(db, entry)
+        return xlsx_file_response(file, filename, size)
+
+    # --------------------------------------------------
+    # Eviction and invalidation
+    # --------------------------------------------------
+    def _evict(self, db: sqlite3.Connection, keep: str) -> List[str]:
+        """Drop least recently used entries beyond REPORT_CACHE_MAX_BYTES; returns their files"""
+        total = db.execute("SELECT COALESCE(SUM(bytes), 0) FROM report_cache").fetchone()[0]
+        if total <= settings.REPORT_CACHE_MAX_BYTES:
+            return []
+        victims, files = [], []
+        for row in db.execute(
+            """
+            SELECT cache_key, file_name, bytes FROM report_cache
+            WHERE cache_key <> ?
+            ORDER BY pinned, COALESCE(last_hit_at, created_at)
+            """,
+            (keep,),
+        ):
+            if total <= settings.REPORT_CACHE_MAX_BYTES:
+                break
+            victims.append((row["cache_key"],))
+            if row["file_name"]:
+                files.append(row["file_name"])
+            total -= row["bytes"]
+        db.executemany("DELETE FROM report_cache WHERE cache_key = ?", victims)
+        self._count("evictions", len(victims))
+        return files
+
+    def _remove_files(self, file_names: List[str]):
+        directory = cache_dir()
+        for name in file_names:
+            try:
+                (directory / name).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Could not remove cached report {name}: {e}")
+
+    def invalidate(self, db: sqlite3.Connection, endpoint: Optional[str] = None, fy: Optional[str] = None) -> int:
+        """Drop entries (pinned ones included) of one endpoint and/or overlapping one FY; all when unfiltered"""
+        where, params = [], []
+        if endpoint:
+            where.append("endpoint = ?")
+            params.append(endpoint)
+        if fy:
+            start, end = fy_range(fy)
+            where.append("start_date <= ? AND end_date >= ?")
+            params += [end, start]
+        condition = f"WHERE {' AND '.join(where)}" if where else ""
+
+        rows = db.execute(f"SELECT file_name FROM report_cache {condition}", params).fetchall()
+        removed = db.execute(f"DELETE FROM report_cache {condition}", params).rowcount
+        db.commit()
+        self._remove_files([row["file_name"] for row in rows if row["file_name"]])
+        if not where:
+            # Full clear: also artifacts whose entry never got stored (busy database, crash)
+            directory = cache_dir()
+            if directory.exists():
+                self._remove_files([p.name for p in directory.iterdir() if p.suffix in (".xlsx", ".tmp")])
+        return removed
+
+    def stats(self, db: sqlite3.Connection) -> dict:
+        by_endpoint = {
+            row["endpoint"]: {"entries": row["entries"], "pinned": row["pinned"], "bytes": row["bytes"]}
+            for row in db.execute(
+                """
+                SELECT endpoint, COUNT(*) AS entries, SUM(pinned) AS pinned, SUM(bytes) AS bytes
+                FROM report_cache GROUP BY endpoint ORDER BY endpoint
+                """
+            )
+        }
+        with self._lock:
+            lookups = self.hits + self.pinned_hits + self.misses
+            counters = {
+                "hits": self.hits,
+                "pinned_hits": self.pinned_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.pinned_hits) / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "write_skips": self.write_skips,
+            }
+        return {
+            "enabled": settings.REPORT_CACHE_ENABLED,
+            "entries": sum(e["entries"] for e in by_endpoint.values()),
+            "pinned": sum(e["pinned"] for e in by_endpoint.values()),
+            "bytes": sum(e["bytes"] for e in by_endpoint.values()),
+            "max_bytes": settings.REPORT_CACHE_MAX_BYTES,
+            "closed_before": current_fy_start(),
+            "versions": version_token(db),
+            "by_endpoint": by_endpoint,
+            **counters,
+        }
+
+
+report_cache = ReportCache()
@@ -5,9 +5,12 @@ Phase 4 Requirement: No AI, purely SQL-based.
 """
 
 import sqlite3
+from typing import Iterator, Sequence
 
 import pandas as pd
 
+from backend.db.streaming import stream_query
+
 
 def get_po_reconciliation_by_date(
     start_date: str, end_date: str, db: sqlite3.Connection
@@ -91,36 +94,23 @@ def get_monthly_sales_summary(
 
     Ordered Value = Sum(ord_qty * po_rate) by PO Date Month
     Delivered Value = Sum(dispatch_qty * po_rate) by DC Date Month (proxy for revenue realization)
-    """
-    # 1. Ordered Value Query
-    q_ordered = """
-    SELECT 
-        strftime('%Y-%m', po.po_date) as month,
-        SUM(poi.ord_qty * poi.po_rate) as ordered_value
-    FROM purchase_orders po
-    JOIN purchase_order_items poi ON po.po_number = poi.po_number
-    WHERE po.po_date BETWEEN ? AND ?
-    GROUP BY month
-    """
 
-    # 2. Delivered Value Query
-    q_delivered = """
-    SELECT 
-        strftime('%Y-%m', dc.dc_date) as month,
-        SUM(dci.dispatch_qty * poi.po_rate) as delivered_value
-    FROM delivery_challans dc
-    JOIN delivery_challan_items dci ON dc.dc_number = dci.dc_number
-    JOIN purchase_order_items poi ON dci.po_item_id = poi.id
-    WHERE dc.dc_date BETWEEN ? AND ?
-    GROUP BY month
+    Served from the pre-aggregated fact tables (services/fact_tables.py).
     """
+    from backend.services.fact_tables import cube_query, refresh_facts
 
+    columns = ["month", "ordered_value", "delivered_value"]
     try:
-        df_ord = pd.read_sql_query(q_ordered, db, params=[start_date, end_date])
-        df_del = pd.read_sql_query(q_delivered, db, params=[start_date, end_date])
-
-        # Merge on month (Outer join to keep all months)
-        df = pd.merge(df_ord, df_del, on="month", how="outer").fillna(0)
+        refresh_facts(db)
+        rows = cube_query(db, ["month"], start_date, end_date)["rows"]
+        df = pd.DataFrame(
+            [
+                (r["month"], r["ordered_value"], r["dispatched_value"])
+                for r in rows
+                if r["po_count"] or r["dc_count"]
+            ],
+            columns=columns,
+        )
 
         # Sort by month desc (for Table view consistency)
         df = df.sort_values("month", ascending=False)
@@ -128,14 +118,10 @@ def get_monthly_sales_summary(
         return df
     except Exception as e:
         print(f"Error generating Revenue Velocity report: {e}")
-        return pd.DataFrame(columns=["month", "ordered_value", "delivered_value"])
+        return pd.DataFrame(columns=columns)
 
 
-def get_dc_register(start_date: str, end_date: str, db: sqlite3.Connection) -> pd.DataFrame:
-    """
-    Generate DC Register.
-    """
-    query = """
+DC_REGISTER_QUERY = """
     SELECT 
         dc.dc_number,
         dc.dc_date,
@@ -151,6 +137,13 @@ def get_dc_register(start_date: str, end_date: str, db: sqlite3.Connection) -> p
     GROUP BY dc.dc_number, dc.dc_date, dc.po_number, dc.consignee_name
     ORDER BY dc.dc_date DESC;
     """
+
+
+def get_dc_register(start_date: str, end_date: str, db: sqlite3.Connection) -> pd.DataFrame:
+    """
+    Generate DC Register.
+    """
+    query = DC_REGISTER_QUERY
     try:
         df = pd.read_sql_query(query, db, params=[start_date, end_date])
         return df
@@ -159,11 +152,7 @@ def get_dc_register(start_date: str, end_date: str, db: sqlite3.Connection) -> p
         return pd.DataFrame()
 
 
-def get_invoice_register(start_date: str, end_date: str, db: sqlite3.Connection) -> pd.DataFrame:
-    """
-    Detailed Invoice Register
-    """
-    query = """
+INVOICE_REGISTER_QUERY = """
     SELECT 
         invoice_number,
         invoice_date,
@@ -179,6 +168,13 @@ def get_invoice_register(start_date: str, end_date: str, db: sqlite3.Connection)
     WHERE invoice_date BETWEEN ? AND ?
     ORDER BY invoice_date DESC;
     """
+
+
+def get_invoice_register(start_date: str, end_date: str, db: sqlite3.Connection) -> pd.DataFrame:
+    """
+    Detailed Invoice Register
+    """
+    query = INVOICE_REGISTER_QUERY
     try:
         df = pd.read_sql_query(query, db, params=[start_date, end_date])
         return df
@@ -187,11 +183,7 @@ def get_invoice_register(start_date: str, end_date: str, db: sqlite3.Connection)
         return pd.DataFrame()
 
 
-def get_pending_po_items(db: sqlite3.Connection) -> pd.DataFrame:
-    """
-    Get items where pending_qty > 0
-    """
-    query = """
+PENDING_PO_ITEMS_QUERY = """
     SELECT 
         po_number,
         po_item_no,
@@ -203,6 +195,13 @@ def get_pending_po_items(db: sqlite3.Connection) -> pd.DataFrame:
     WHERE pending_qty > 0
     ORDER BY po_number, po_item_no;
     """
+
+
+def get_pending_po_items(db: sqlite3.Connection) -> pd.DataFrame:
+    """
+    Get items where pending_qty > 0
+    """
+    query = PENDING_PO_ITEMS_QUERY
     try:
         df = pd.read_sql_query(query, db)
         return df
@@ -242,6 +241,35 @@ def get_po_register(start_date: str, end_date: str, db: sqlite3.Connection) -> p
         return pd.DataFrame()
 
 
+def _register_row_mapper(required: Sequence[str]):
+    """
+    Row mapper matching the buffered register output:
+    rows with a null key column are dropped and remaining nulls become "".
+    """
+
+    def mapper(row: sqlite3.Row):
+        if any(row[col] is None for col in required):
+            return None
+        return {key: ("" if row[key] is None else row[key]) for key in row.keys()}
+
+    return mapper
+
+
+def iter_dc_register(start_date: str, end_date: str) -> Iterator[dict]:
+    """Stream DC Register rows without building a DataFrame"""
+    return stream_query(DC_REGISTER_QUERY, (start_date, end_date), _register_row_mapper(["dc_number"]))
+
+
+def iter_invoice_register(start_date: str, end_date: str) -> Iterator[dict]:
+    """Stream Invoice Register rows without building a DataFrame"""
+    return stream_query(INVOICE_REGISTER_QUERY, (start_date, end_date), _register_row_mapper(["invoice_number"]))
+
+
+def iter_pending_po_items() -> Iterator[dict]:
+    """Stream pending PO items without building a DataFrame"""
+    return stream_query(PENDING_PO_ITEMS_QUERY, (), _register_row_mapper(["po_number", "material_description"]))
+
+
 def get_reconciliation_lots(po_number: str, db: sqlite3.Connection) -> list:
     """
     Get available lots/items for dispatch from a PO.
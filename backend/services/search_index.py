@@ -0,0 +1,197 @@
+"""
+Search Index
+Global search over POs, DCs and invoices backed by the FTS5 index of migration 038.
+
+- search_docs / search_fts are kept in sync by triggers on the business tables, so there is
+  nothing to maintain here: a search is one ranked FTS query plus one status query per type.
+- Every query token is a prefix match ("980" finds PO 9800123) and all tokens must match.
+- Ranking is bm25 with document numbers weighted above party names above material text;
+  a document's score is that of its best-matching row (header or any of its items).
+- Only the MATCH_CAP most recently indexed matching rows are ranked, so latency depends on the
+  cap, not on table size. Very common terms therefore rank recent documents only; longer
+  queries narrow the match set back below the cap.
+"""
+
+import json
+import re
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from backend.services.status_service import calculate_entity_status
+
+# bm25 weights for the number / party / material columns
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+# Matching index rows ranked per search (newest first, before grouping per document)
+MATCH_CAP = 1000
+MAX_QUERY_TOKENS = 8
+
+# unicode61 splits on everything that is not a letter or digit ("SE/123/24-25" -> SE 123 24 25)
+RX_TOKEN = re.compile(r"[^\W_]+")
+
+TYPE_LABELS = {"PO": "Purchase Order", "DC": "Delivery Challan", "Invoice": "Tax Invoice"}
+
+HITS_SQL = f"""
+WITH matches AS (
+    SELECT rowid, bm25(search_fts, {", ".join(map(str, BM25_WEIGHTS))}) AS score
+    FROM search_fts
+    WHERE search_fts MATCH ?
+    ORDER BY rowid DESC
+    LIMIT {MATCH_CAP}
+),
+docs AS (
+    SELECT d.kind, d.ref, d.scope, MIN(m.score) AS score
+    FROM matches m
+    JOIN search_docs d ON d.id = m.rowid
+    GROUP BY d.kind, d.ref, d.scope
+),
+ranked AS (
+    SELECT kind, ref, scope, score,
+           ROW_NUMBER() OVER (PARTITION BY kind ORDER BY score, ref DESC) AS rn
+    FROM docs
+)
+SELECT kind, ref, scope, score FROM ranked WHERE rn <= ? ORDER BY score, ref DESC
+"""
+
+PO_SQL = """
+WITH keys(po_number) AS (SELECT DISTINCT value FROM json_each(?)),
+ordered AS (
+    SELECT poi.po_number, SUM(poi.ord_qty) AS t_ord
+    FROM purchase_order_items poi
+    WHERE poi.po_number IN (SELECT po_number FROM keys)
+    GROUP BY poi.po_number
+),
+delivered AS (
+    SELECT poi.po_number, SUM(dci.dispatch_qty) AS t_del
+    FROM purchase_order_items poi
+    JOIN delivery_challan_items dci ON dci.po_item_id = poi.id
+    WHERE poi.po_number IN (SELECT po_number FROM keys)
+    GROUP BY poi.po_number
+),
+received AS (
+    SELECT si.po_number, SUM(si.received_qty) AS t_recd
+    FROM srv_items si
+    WHERE si.po_number IN (SELECT po_number FROM keys)
+    GROUP BY si.po_number
+)
+SELECT po.po_number AS ref, '' AS scope, po.po_date AS date, po.supplier_name AS party, po.po_value AS amount,
+       COALESCE(o.t_ord, 0) AS t_ord, COALESCE(d.t_del, 0) AS t_del, COALESCE(r.t_recd, 0) AS t_recd
+FROM keys k
+JOIN purchase_orders po ON po.po_number = k.po_number
+LEFT JOIN ordered o ON o.po_number = po.po_number
+LEFT JOIN delivered d ON d.po_number = po.po_number
+LEFT JOIN received r ON r.po_number = po.po_number
+"""
+
+DC_SQL = """
+WITH keys(dc_number) AS (SELECT DISTINCT value FROM json_each(?)),
+items AS (
+    -- t_ord: ordered quantity of the PO items the DC dispatches against
+    SELECT dci.dc_number, SUM(dci.dispatch_qty) AS t_del, SUM(poi.ord_qty) AS t_ord
+    FROM delivery_challan_items dci
+    LEFT JOIN purchase_order_items poi ON poi.id = dci.po_item_id
+    WHERE dci.dc_number IN (SELECT dc_number FROM keys)
+    GROUP BY dci.dc_number
+),
+received AS (
+    SELECT si.challan_no AS dc_number, SUM(si.received_qty) AS t_recd
+    FROM srv_items si
+    WHERE si.challan_no IN (SELECT dc_number FROM keys)
+    GROUP BY si.challan_no
+)
+SELECT dc.dc_number AS ref, '' AS scope, dc.dc_date AS date, dc.consignee_name AS party, 0 AS amount,
+       COALESCE(i.t_ord, 0) AS t_ord, COALESCE(i.t_del, 0) AS t_del, COALESCE(r.t_recd, 0) AS t_recd
+FROM keys k
+JOIN delivery_challans dc ON dc.dc_number = k.dc_number
+LEFT JOIN items i ON i.dc_number = dc.dc_number
+LEFT JOIN received r ON r.dc_number = dc.dc_number
+"""
+
+INVOICE_SQL = """
+WITH keys(invoice_number, scope) AS (
+    SELECT DISTINCT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?)
+),
+invoices AS (
+    SELECT inv.*, k.scope
+    FROM keys k
+    JOIN gst_invoices inv
+      ON inv.invoice_number = k.invoice_number AND COALESCE(inv.financial_year, '') = k.scope
+),
+items AS (
+    SELECT i.invoice_number, i.scope, SUM(gii.quantity) AS qty
+    FROM invoices i
+    JOIN gst_invoice_items gii
+      ON gii.invoice_number = i.invoice_number AND gii.financial_year IS i.financial_year
+    GROUP BY i.invoice_number, i.scope
+),
+received AS (
+    SELECT s.invoice_number, SUM(si.received_qty) AS t_recd
+    FROM srvs s
+    JOIN srv_items si ON si.srv_number = s.srv_number
+    WHERE s.invoice_number IN (SELECT invoice_number FROM keys)
+    GROUP BY s.invoice_number
+)
+SELECT i.invoice_number AS ref, i.scope, i.invoice_date AS date, i.buyer_name AS party,
+       i.total_invoice_value AS amount,
+       -- Invoice total ordered volume is its own invoiced (= delivered) volume
+       COALESCE(it.qty, 0) AS t_ord, COALESCE(it.qty, 0) AS t_del, COALESCE(r.t_recd, 0) AS t_recd
+FROM invoices i
+LEFT JOIN items it ON it.invoice_number = i.invoice_number AND it.scope = i.scope
+LEFT JOIN received r ON r.invoice_number = i.invoice_number
+"""
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """FTS5 query for user input: every token as a quoted prefix term, all required"""
+    tokens = RX_TOKEN.findall(q or "")[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return None
+    return " AND ".join(f'"{token}"*' for token in tokens)
+
+
+def search_hits(db: sqlite3.Connection, q: str, per_type: int = 5) -> List[Tuple[str, str, str, float]]:
+    """Best (kind, ref, scope, score) per document, at most `per_type` per kind, best first"""
+    match = build_match_query(q)
+    if match is None:
+        return []
+    return [tuple(row) for row in db.execute(HITS_SQL, (match, per_type)).fetchall()]
+
+
+def _details(db: sqlite3.Connection, kind: str, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], dict]:
+    if kind == "Invoice":
+        rows = db.execute(INVOICE_SQL, (json.dumps([list(k) for k in keys]),)).fetchall()
+    else:
+        sql = PO_SQL if kind == "PO" else DC_SQL
+        rows = db.execute(sql, (json.dumps([ref for ref, _ in keys]),)).fetchall()
+    return {(str(row["ref"]), row["scope"]): dict(row) for row in rows}
+
+
+def global_search(db: sqlite3.Connection, q: str, per_type: int = 5) -> List[dict]:
+    """Ranked search results across POs, DCs and invoices (shape of GET /api/search)"""
+    hits = search_hits(db, q, per_type)
+    keys_by_kind: Dict[str, List[Tuple[str, str]]] = {}
+    for kind, ref, scope, _ in hits:
+        keys_by_kind.setdefault(kind, []).append((ref, scope))
+    details = {kind: _details(db, kind, keys) for kind, keys in keys_by_kind.items()}
+
+    results = []
+    for kind, ref, scope, _ in hits:
+        d = details[kind].get((ref, scope))
+        if d is None:
+            continue
+        if kind == "Invoice":
+            party = d["party"] or "Client"
+        else:
+            party = d["party"] or "Unknown"
+        results.append(
+            {
+                "id": ref,
+                "type": kind,
+                "type_label": TYPE_LABELS[kind],
+                "number": ref,
+                "date": d["date"] or "",
+                "party": party,
+                "amount": d["amount"] or 0,
+                "status": calculate_entity_status(d["t_ord"], d["t_del"], d["t_recd"]),
+            }
+        )
+    return results
@@ -3,12 +3,13 @@ SRV Ingestion Service
 Validates and inserts SRV data into the database.
 """
 
+import io
 import sqlite3
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from backend.core.number_utils import to_qty
-from backend.services.srv_scraper import scrape_srv_html
+from backend.core.normalize import to_qty
+from backend.services.srv_scraper import iter_srv_html, scrape_srv_html, srv_streamable
 
 
 def validate_srv_data(srv_data: Dict, db: sqlite3.Connection) -> Tuple[bool, str, bool]:
@@ -193,55 +194,11 @@ def ingest_srv_to_db(srv_data: Dict, db: sqlite3.Connection, po_found: bool = Tr
         )
 
         # 2. Insert SRV items
-        for item in items:
-            # Enforce accounting invariant: Received = Accepted + Rejected
-            received_qty = to_qty(item.get("received_qty", 0))
-            rejected_qty = to_qty(item.get("rejected_qty", 0))
-            accepted_qty = to_qty(item.get("accepted_qty", 0))
+        _insert_srv_items(db, header, items)
+        if header.get("file_hash"):
+            from backend.services.srv_upsert import record_srv_source
 
-            if accepted_qty == 0 and received_qty > 0:
-                accepted_qty = max(0, received_qty - rejected_qty)
-
-            db.execute(
-                """
-                INSERT INTO srv_items 
-                (srv_number, po_number, po_item_no, lot_no, srv_item_no, rev_no, 
-                 received_qty, rejected_qty, accepted_qty, order_qty, challan_qty, unit,
-                 challan_no, challan_date, invoice_no, invoice_date, 
-                 div_code, pmir_no, finance_date, cnote_no, cnote_date,
-                 created_at)
-                VALUES 
-                (:srv_number, :po_number, :po_item_no, :lot_no, :srv_item_no, :rev_no,
-                 :received_qty, :rejected_qty, :accepted_qty, :order_qty, :challan_qty, :unit,
-                 :challan_no, :challan_date, :invoice_no, :invoice_date,
-                 :div_code, :pmir_no, :finance_date, :cnote_no, :cnote_date,
-                 :created_at)
-            """,
-                {
-                    "srv_number": header["srv_number"],
-                    "po_number": header["po_number"],
-                    "po_item_no": item["po_item_no"],
-                    "lot_no": item.get("lot_no"),
-                    "srv_item_no": item.get("srv_item_no"),
-                    "rev_no": item.get("rev_no"),
-                    "received_qty": received_qty,
-                    "rejected_qty": rejected_qty,
-                    "accepted_qty": accepted_qty,
-                    "order_qty": item.get("order_qty", 0),
-                    "challan_qty": item.get("challan_qty", 0),
-                    "unit": item.get("unit"),
-                    "challan_no": item.get("challan_no"),
-                    "challan_date": item.get("challan_date"),
-                    "invoice_no": item.get("invoice_no"),
-                    "invoice_date": item.get("invoice_date"),
-                    "div_code": item.get("div_code"),
-                    "pmir_no": item.get("pmir_no"),
-                    "finance_date": item.get("finance_date"),
-                    "cnote_no": item.get("cnote_no"),
-                    "cnote_date": item.get("cnote_date"),
-                    "created_at": datetime.now().isoformat(),
-                },
-            )
+            record_srv_source(db, header)
 
         # 3. ATOMIC SYNC: Reconciliation Service
         from backend.services.reconciliation_service import ReconciliationService
@@ -253,6 +210,12 @@ def ingest_srv_to_db(srv_data: Dict, db: sqlite3.Connection, po_found: bool = Tr
             # Update PO status after receipt
             ReconciliationService.sync_po_status(db, header["po_number"])
 
+        from backend.services.change_log import record_change
+
+        record_change(db, "srv", header["srv_number"], "create")
+        if po_found:
+            record_change(db, "po", header["po_number"], "update")
+
         # 4. Commit transaction
         db.commit()
         return True
@@ -262,6 +225,101 @@ def ingest_srv_to_db(srv_data: Dict, db: sqlite3.Connection, po_found: bool = Tr
         raise e
 
 
+def append_srv_items(srv_data: Dict, db: sqlite3.Connection, po_found: bool = True) -> bool:
+    """
+    Add items to an SRV ingested earlier from the same file (streamed rows of an SRV that
+    reappear after another SRV). Reconciliation is incremental, so only the new items are applied.
+    """
+    header = srv_data["header"]
+    items = srv_data["items"]
+
+    try:
+        _insert_srv_items(db, header, items)
+        if header.get("file_hash"):
+            from backend.services.srv_upsert import record_srv_source, stored_srv_hash
+
+            # Assembled from several runs of rows: the content hash of one run does not describe it
+            header["content_hash"] = stored_srv_hash(db, header["srv_number"])
+            record_srv_source(db, header)
+
+        from backend.services.reconciliation_service import ReconciliationService
+
+        if po_found:
+            ReconciliationService.reconcile_srv_ingestion(
+                db, items, header["srv_number"], header["po_number"]
+            )
+            ReconciliationService.sync_po_status(db, header["po_number"])
+
+        from backend.services.change_log import record_change
+
+        record_change(db, "srv", header["srv_number"], "update")
+        if po_found:
+            record_change(db, "po", header["po_number"], "update")
+
+        db.commit()
+        return True
+
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
+SRV_ITEM_INSERT = """
+    INSERT INTO srv_items 
+    (srv_number, po_number, po_item_no, lot_no, srv_item_no, rev_no, 
+     received_qty, rejected_qty, accepted_qty, order_qty, challan_qty, unit,
+     challan_no, challan_date, invoice_no, invoice_date, 
+     div_code, pmir_no, finance_date, cnote_no, cnote_date,
+     created_at)
+    VALUES 
+    (:srv_number, :po_number, :po_item_no, :lot_no, :srv_item_no, :rev_no,
+     :received_qty, :rejected_qty, :accepted_qty, :order_qty, :challan_qty, :unit,
+     :challan_no, :challan_date, :invoice_no, :invoice_date,
+     :div_code, :pmir_no, :finance_date, :cnote_no, :cnote_date,
+     :created_at)
+"""
+
+
+def srv_item_row(header: Dict, item: Dict) -> Dict:
+    """srv_items insert parameters for one scraped item (values exactly as stored)"""
+    # Enforce accounting invariant: Received = Accepted + Rejected
+    received_qty = to_qty(item.get("received_qty", 0))
+    rejected_qty = to_qty(item.get("rejected_qty", 0))
+    accepted_qty = to_qty(item.get("accepted_qty", 0))
+
+    if accepted_qty == 0 and received_qty > 0:
+        accepted_qty = max(0, received_qty - rejected_qty)
+
+    return {
+        "srv_number": header["srv_number"],
+        "po_number": header["po_number"],
+        "po_item_no": item.get("po_item_no"),
+        "lot_no": item.get("lot_no"),
+        "srv_item_no": item.get("srv_item_no"),
+        "rev_no": item.get("rev_no"),
+        "received_qty": received_qty,
+        "rejected_qty": rejected_qty,
+        "accepted_qty": accepted_qty,
+        "order_qty": item.get("order_qty", 0),
+        "challan_qty": item.get("challan_qty", 0),
+        "unit": item.get("unit"),
+        "challan_no": item.get("challan_no"),
+        "challan_date": item.get("challan_date"),
+        "invoice_no": item.get("invoice_no"),
+        "invoice_date": item.get("invoice_date"),
+        "div_code": item.get("div_code"),
+        "pmir_no": item.get("pmir_no"),
+        "finance_date": item.get("finance_date"),
+        "cnote_no": item.get("cnote_no"),
+        "cnote_date": item.get("cnote_date"),
+        "created_at": datetime.now().isoformat(),
+    }
+
+
+def _insert_srv_items(db: sqlite3.Connection, header: Dict, items: List[Dict]):
+    db.executemany(SRV_ITEM_INSERT, [srv_item_row(header, item) for item in items])
+
+
 def get_srv_aggregated_quantities(po_number: str, db: sqlite3.Connection) -> Dict:
     """
     Get aggregated received and rejected quantities per PO item from all SRVs.
@@ -301,51 +359,72 @@ def process_srv_file(
     filename: str,
     db: sqlite3.Connection,
     po_from_filename: Optional[str] = None,
+    srv_list: Optional[Iterable[Dict]] = None,
 ) -> Tuple[bool, List[str], int, int]:
     """
     Process an uploaded SRV HTML file.
     Parses content, validates against DB, and ingests if valid.
     Handles files containing multiple SRVs.
+    srv_list: already-scraped SRVs (e.g. from the parse pool). When omitted, large files are parsed
+    incrementally (iter_srv_html, see srv_streamable) and each new SRV is ingested as soon as its rows
+    are read; other files are scraped with settings.SCRAPER_ENGINE.
+
+    Re-uploads are idempotent: SRVs whose stored rows were written from this file or match its
+    content are skipped, and changed SRVs of the same PO are diffed against the stored rows (srv_upsert).
+    When streaming, changed stored SRVs are held until the file is fully read, so rows of an SRV that
+    reappear later in the file are hashed and diffed together with its first run.
     """
     import hashlib
 
+    from backend.services.srv_upsert import (
+        apply_srv_diff,
+        describe_srv_changes,
+        get_srv_source,
+        srv_content_hash,
+        stored_srv_hash,
+    )
+
     file_hash = hashlib.sha256(contents).hexdigest()
 
     try:
-        html_content = contents.decode("utf-8")
-        srv_list = scrape_srv_html(html_content)
-
-        if not srv_list:
-            return (
-                False,
-                ["No valid SRVs found in file. Did you upload a PO instead?"],
-                0,
-                1,
-            )
+        streamed = srv_list is None and srv_streamable(contents)
+        if streamed:
+            srv_list = iter_srv_html(io.BytesIO(contents))
+        elif srv_list is None:
+            srv_list = scrape_srv_html(contents.decode("utf-8"))
 
         results = []
-        for srv_data in srv_list:
-            header = srv_data.get("header", {})
-            header["file_hash"] = file_hash  # Inject hash
-
-            # Check for exact duplicate file upload (Idempotency)
-            # User requested Overwrite instead of Skip.
-            # So we check if SRV exists, and if so, delete it before re-ingesting.
-
-            existing_srv = db.execute(
-                "SELECT 1 FROM srvs WHERE srv_number = :srv_number",
-                {"srv_number": header.get("srv_number")},
-            ).fetchone()
+        ingested = set()  # SRVs written (or found unchanged) from this file; streamed continuations append to them
+        same_file = set()  # SRVs last written from this very file: all their rows are already stored
+        deferred = {}  # streamed: changed stored SRVs, diffed once all their rows are read
+        rejected = set()  # SRVs that failed validation; their streamed continuations are dropped
 
-            if existing_srv:
-                # Delete existing SRV to allow overwrite
-                # This handles rollback of quantities from PO items implicitly in delete_srv
-                delete_srv(header.get("srv_number"), db)
+        def ingest(srv_data: Dict, defer: bool):
+            header = srv_data["header"]
+            srv_number = header.get("srv_number")
 
             # If PO extraction failed from HTML, try filename fallback
             if not header.get("po_number") and po_from_filename:
                 header["po_number"] = str(po_from_filename)
 
+            # Idempotency: skip SRVs whose stored rows still are what this file (or content) produces.
+            # srv_sources alone is not trusted: the rows may have been removed since (e.g. reset-db)
+            stored_hash = stored_srv_hash(db, srv_number) if srv_number else None
+            source = get_srv_source(db, srv_number) if stored_hash else None
+            header["content_hash"] = srv_content_hash(header, srv_data.get("items", []))
+            if source and source["file_hash"] == file_hash and source["content_hash"] == stored_hash:
+                same_file.add(srv_number)
+            if stored_hash and (srv_number in same_file or stored_hash == header["content_hash"]):
+                ingested.add(srv_number)
+                results.append(
+                    {"success": True, "srv_number": srv_number, "warnings": ["Unchanged"], "status": "Unchanged"}
+                )
+                return
+
+            if defer and stored_hash:
+                deferred[srv_number] = srv_data
+                return
+
             # Validate
             is_valid, message, po_found = validate_srv_data(srv_data, db)
 
@@ -355,6 +434,7 @@ def process_srv_file(
                 header["warning_message"] = message
 
             if not is_valid:
+                rejected.add(srv_number)
                 results.append(
                     {
                         "success": False,
@@ -362,13 +442,26 @@ def process_srv_file(
                         "error": message,
                     }
                 )
-                continue
+                return
+
+            existing_srv = db.execute(
+                "SELECT po_number FROM srvs WHERE srv_number = :srv_number",
+                {"srv_number": srv_number},
+            ).fetchone()
 
             # Ingest
             try:
-                ingest_srv_to_db(srv_data, db, po_found)
-
-                status_msg = "Updated (Overwritten)" if existing_srv else "Created"
+                if existing_srv and existing_srv["po_number"] == header["po_number"]:
+                    # Overwrite as a diff: only changed rows are written and reconciled
+                    changes = apply_srv_diff(srv_data, db, po_found)
+                    status_msg = f"Updated ({describe_srv_changes(changes)})" if changes["has_changes"] else "Unchanged"
+                else:
+                    if existing_srv:
+                        # Moved to another PO: roll back the old receipts, then ingest from scratch
+                        delete_srv(srv_number, db)
+                    ingest_srv_to_db(srv_data, db, po_found)
+                    status_msg = "Updated (Overwritten)" if existing_srv else "Created"
+                ingested.add(srv_number)
                 if message != "Valid":
                     status_msg += f" - {message}"
 
@@ -392,6 +485,35 @@ def process_srv_file(
                     }
                 )
 
+        for srv_data in srv_list:
+            header = srv_data.setdefault("header", {})
+            header["file_hash"] = file_hash  # Inject hash
+            srv_number = header.get("srv_number")
+
+            if header.pop("continuation", False):
+                if srv_number in rejected:
+                    continue
+                if srv_number in deferred:
+                    deferred[srv_number]["items"].extend(srv_data.get("items", []))
+                    continue
+                if srv_number in ingested:
+                    if srv_number not in same_file:
+                        results.extend(_append_continuation(srv_data, db))
+                    continue
+
+            ingest(srv_data, defer=streamed)
+
+        for srv_data in deferred.values():
+            ingest(srv_data, defer=False)
+
+        if not results:
+            return (
+                False,
+                ["No valid SRVs found in file. Did you upload a PO instead?"],
+                0,
+                1,
+            )
+
         # Summarize results
         success_count = sum(1 for r in results if r["success"])
 
@@ -418,7 +540,22 @@ def process_srv_file(
         import traceback
 
         traceback.print_exc()
-        return False, [str(e)]
+        return False, [str(e)], 0, 1
+
+
+def _append_continuation(srv_data: Dict, db: sqlite3.Connection) -> List[Dict]:
+    """Append a streamed continuation of an SRV ingested earlier from the same file (failures only)"""
+    header = srv_data["header"]
+    is_valid, message, po_found = validate_srv_data(srv_data, db)
+    if not is_valid:
+        return [{"success": False, "srv_number": header.get("srv_number", "Unknown"), "error": message}]
+
+    try:
+        append_srv_items(srv_data, db, po_found)
+        return []
+    except Exception as e:
+        print(f"Error appending to SRV {header.get('srv_number')}: {e}")
+        return [{"success": False, "srv_number": header.get("srv_number", "Unknown"), "error": str(e)}]
 
 
 def delete_srv(srv_number: str, db: sqlite3.Connection) -> Tuple[bool, str]:
@@ -474,6 +611,12 @@ def delete_srv(srv_number: str, db: sqlite3.Connection) -> Tuple[bool, str]:
             {"srv_number": srv_number},
         )
 
+        from backend.services.change_log import record_change
+
+        record_change(db, "srv", srv_number, "delete")
+        for po_number in sorted({row["po_number"] for row in affected_items}):
+            record_change(db, "po", po_number, "update")
+
         db.commit()
         return True, f"SRV {srv_number} has been permanently deleted"
 
@@ -4,18 +4,21 @@ Parses SRV HTML files from buyers (BHEL, NTPC, etc.) and extracts structured dat
 """
 
 import re
-from datetime import datetime
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, Iterator, List, Optional
 
 from bs4 import BeautifulSoup
 
+from backend.core.normalize import srv_date, srv_decimal, srv_int
 
-def scrape_srv_html(html_content: str) -> List[Dict]:
+
+def scrape_srv_html(html_content: str, engine: Optional[str] = None) -> List[Dict]:
     """
     Parse SRV HTML and extract structured data for MULTIPLE SRVs.
 
     Args:
         html_content: Raw HTML string from SRV file
+        engine: "bs4" (BeautifulSoup html.parser) or "lxml" (lxml.html + XPath);
+            defaults to settings.SCRAPER_ENGINE
 
     Returns:
         List of dicts, each with structure:
@@ -24,14 +27,28 @@ def scrape_srv_html(html_content: str) -> List[Dict]:
             "items": [ ... ]
         }
     """
+    if engine is None:
+        from backend.core.config import settings
+
+        engine = settings.SCRAPER_ENGINE
+
+    if engine == "lxml":
+        from backend.services.lxml_scraper import srv_tables_lxml
+
+        return group_srv_rows(srv_tables_lxml(html_content))
+
     soup = BeautifulSoup(html_content, "html.parser")
+    return group_srv_rows(_soup_srv_tables(soup))
 
-    # We need to find the main data table and group rows by SRV Number
-    srv_groups = {}  # {srv_number: {header: {}, items: []}}
 
-    tables = soup.find_all("table")
-    for table in tables:
-        # Get headers
+def _soup_srv_tables(soup):
+    """Yield (normalized headers, lazy row values) for every table in the soup"""
+
+    def table_rows(table):
+        for row in table.find_all("tr")[1:]:  # Skip header
+            yield [cell.get_text(strip=True) for cell in row.find_all("td")]
+
+    for table in soup.find_all("table"):
         header_row = table.find("tr")
         if not header_row:
             continue
@@ -43,81 +60,220 @@ def scrape_srv_html(html_content: str) -> List[Dict]:
             text = " ".join(text.split())
             headers.append(text)
 
-        # Check if this is the main table (has PO ITM, SRV NO, RECVD QTY etc)
-        # Also check for "PO ITEM" or "SRV NO" variates
-        header_set = set(headers)
-        if ("PO ITM" in header_set or "PO ITEM" in header_set) and (
-            "SRV NO" in header_set or "SRV NUMBER" in header_set
-        ):
-            # Process data rows
-            rows = table.find_all("tr")[1:]  # Skip header
-
-            for row in rows:
-                cells = row.find_all("td")
-                if len(cells) < 5 or (len(cells) == 1 and cells[0].get_text(strip=True) == ""):
-                    continue
-
-                # Parse the row
-                # We need a temporary item extraction to get the SRV Number
-                # We reuse parse_srv_item_row but we need to extract header info from it too
-
-                # To do this cleanly, we'll manually extract SRV NO first
-                # Map headers
-                header_map = {h: i for i, h in enumerate(headers)}
-
-                # Extract SRV number directly without nested function
-                srv_number = None
-                for key in ["SRV NO", "SRV", "SRV_NO"]:
-                    if key in header_map and header_map[key] < len(cells):
-                        srv_number = cells[header_map[key]].get_text(strip=True)
-                        break
-
-                # Validation: Skip header rows or invalid rows
-                if not srv_number or srv_number in ["SRV NO", "SRV ITM", "SRV"]:
-                    continue
-                if not re.search(r"\d+", srv_number):
-                    continue
-
-                # Initialize group if not exists
-                if srv_number not in srv_groups:
-                    # Extract Header Info from this row
-                    po_number_raw = None
-                    for key in ["PO NO", "PURCHASE ORDER", "PO_NO", "PO NUMBER"]:
-                        if key in header_map and header_map[key] < len(cells):
-                            po_number_raw = cells[header_map[key]].get_text(strip=True)
-                            break
-                    # Keep as TEXT - do NOT convert to int (database schema changed to TEXT)
-                    po_number = str(po_number_raw) if po_number_raw else None
-                    
-                    srv_date_raw = None
-                    for key in ["SRV DATE", "DATE"]:
-                        if key in header_map and header_map[key] < len(cells):
-                            srv_date_raw = cells[header_map[key]].get_text(strip=True)
-                            break
-                    srv_date = parse_date(srv_date_raw)
-
-                    srv_groups[srv_number] = {
-                        "header": {
-                            "srv_number": srv_number,  # Already TEXT
-                            "srv_date": srv_date,
-                            "po_number": po_number,  # TEXT
-                            "srv_status": "Received",
-                            "po_found": True,  # Default, updated in ingestion
-                        },
-                        "items": [],
-                    }
-
-                # Extract Item
-                item = parse_srv_item_row(cells, headers)
-                if item and item.get("po_item_no") is not None:
-                    srv_groups[srv_number]["items"].append(item)
+        yield headers, table_rows(table)
+
+
+# Header names per SRV item field, in priority order
+SRV_ITEM_COLUMNS = {
+    "po_item_no": ["PO ITM", "ITEM", "ITM", "PO_ITM", "PO ITEM"],
+    "row_srv_number": ["SRV NO", "SRV", "SRV_NO"],
+    "srv_item_no": ["SRV ITM", "SRV ITEM"],
+    "rev_no": ["REV NO", "REV"],
+    "lot_no": ["SUB ITM", "LOT NO", "LOT"],
+    "received_qty": ["RECVD QTY", "RECEIVED QTY", "RCD QTY", "RECEIVED"],
+    "rejected_qty": ["REJ QTY", "REJECTED QTY", "REJECTED"],
+    "accepted_qty": ["ACCEPTED QTY", "ACCPT QTY", "ACCEPTED", "ACCEPTED QUANTITY", "OK QTY", "QTY OK"],
+    "challan_no": ["CHALLAN NO", "CHALLAN", "DC NO", "DC NUMBER", "CHALLAN NUMBER"],
+    "challan_date": ["CHALLAN DATE", "CHALLAN DT", "DC DATE", "DC DT"],
+    "invoice_no": ["TAX INV", "INVOICE NO", "INV NO", "TAX INVOICE NO", "TAX INVOICE", "GST INV NO"],
+    "invoice_date": ["TAX INV DT", "INVOICE DATE", "INV DT", "TAX INVOICE DATE", "TAX INV DATE"],
+    "unit": ["UNIT", "UOM"],
+    "order_qty": ["ORDER QTY", "PO QTY", "ORDERED QTY", "PO QUANTITY", "ORDER QUANTITY"],
+    "challan_qty": ["CHALLAN QTY", "DC QTY", "DC QUANTITY", "CHALLAN QUANTITY"],
+    "div_code": ["DIV", "DIVISION"],
+    "pmir_no": ["PMIR NO", "PMIR"],
+    "finance_date": ["FINANCE DT", "FINANCE DATE"],
+    "cnote_no": ["CNOTE NO.", "CNOTE NO", "CNOTE"],
+    "cnote_date": ["CNOTE DATE", "CNOTE DT"],
+}
+
+# Header names for the SRV group header, in priority order
+SRV_NUMBER_COLUMNS = ["SRV NO", "SRV", "SRV_NO"]
+SRV_PO_COLUMNS = ["PO NO", "PURCHASE ORDER", "PO_NO", "PO NUMBER"]
+SRV_DATE_COLUMNS = ["SRV DATE", "DATE"]
+
+
+def srv_column_map(headers: List[str]) -> Dict[str, Optional[int]]:
+    """Cell index per SRV item field for a table's headers (None when the table has no such column)"""
+    header_map = {h: i for i, h in enumerate(headers)}
+    return {
+        field: next((header_map[key] for key in keys if key in header_map), None)
+        for field, keys in SRV_ITEM_COLUMNS.items()
+    }
+
+
+def srv_table_columns(headers: List[str]) -> Optional[Dict]:
+    """
+    Column lookups for an SRV data table, built once per table (None if the table is not one).
+    Group header fields keep every candidate index: a row shorter than the first one falls back to the next.
+    """
+    # Check if this is the main table (has PO ITM, SRV NO, RECVD QTY etc)
+    # Also check for "PO ITEM" or "SRV NO" variates
+    header_set = set(headers)
+    if not (
+        ("PO ITM" in header_set or "PO ITEM" in header_set)
+        and ("SRV NO" in header_set or "SRV NUMBER" in header_set)
+    ):
+        return None
+
+    header_map = {h: i for i, h in enumerate(headers)}
+    return {
+        "headers": headers,
+        "srv_number": [header_map[key] for key in SRV_NUMBER_COLUMNS if key in header_map],
+        "po_number": [header_map[key] for key in SRV_PO_COLUMNS if key in header_map],
+        "srv_date": [header_map[key] for key in SRV_DATE_COLUMNS if key in header_map],
+        "items": srv_column_map(headers),
+    }
+
+
+def _first_value(values: List[str], candidates: List[int]) -> Optional[str]:
+    return next((values[idx] for idx in candidates if idx < len(values)), None)
+
+
+def _row_srv_number(values: List[str], columns: Dict) -> Optional[str]:
+    """SRV number of a data row, or None for rows to skip (short rows, repeated headers, blanks)"""
+    if len(values) < 5 or (len(values) == 1 and values[0] == ""):
+        return None
+
+    srv_number = _first_value(values, columns["srv_number"])
+
+    # Validation: Skip header rows or invalid rows
+    if not srv_number or srv_number in ["SRV NO", "SRV ITM", "SRV"]:
+        return None
+    if not re.search(r"\d+", srv_number):
+        return None
+    return srv_number
+
+
+def _new_srv_group(srv_number: str, values: List[str], columns: Dict) -> Dict:
+    """SRV group with its header taken from the first row of the SRV"""
+    po_number_raw = _first_value(values, columns["po_number"])
+    # Keep as TEXT - do NOT convert to int (database schema changed to TEXT)
+    po_number = str(po_number_raw) if po_number_raw else None
+
+    return {
+        "header": {
+            "srv_number": srv_number,  # Already TEXT
+            "srv_date": srv_date(_first_value(values, columns["srv_date"])),
+            "po_number": po_number,  # TEXT
+            "srv_status": "Received",
+            "po_found": True,  # Default, updated in ingestion
+        },
+        "items": [],
+    }
+
+
+def _add_srv_item(group: Dict, values: List[str], columns: Dict):
+    item = parse_srv_item_values(values, columns["headers"], columns["items"])
+    if item and item.get("po_item_no") is not None:
+        group["items"].append(item)
+
+
+def group_srv_rows(tables) -> List[Dict]:
+    """
+    Group SRV table rows by SRV number.
+    tables yields (headers, rows) where rows is an iterable of stripped <td> texts;
+    rows are only consumed for tables that look like the SRV data table.
+    """
+    # We need to find the main data table and group rows by SRV Number
+    srv_groups = {}  # {srv_number: {header: {}, items: []}}
+
+    for headers, rows in tables:
+        columns = srv_table_columns(headers)
+        if columns is None:
+            continue
+
+        for values in rows:
+            srv_number = _row_srv_number(values, columns)
+            if srv_number is None:
+                continue
+
+            # Initialize group if not exists (header info from this row)
+            if srv_number not in srv_groups:
+                srv_groups[srv_number] = _new_srv_group(srv_number, values, columns)
+
+            _add_srv_item(srv_groups[srv_number], values, columns)
 
     # Convert groups to list
-    results = []
-    for _srv_num, data in srv_groups.items():
-        results.append(data)
+    return list(srv_groups.values())
+
+
+def iter_srv_groups(rows) -> Iterator[Dict]:
+    """
+    Incremental grouping for streamed rows: rows yields (headers, values) with the same headers
+    object for every row of a table. A group is yielded as soon as its run of rows ends, so only
+    the open SRV is held in memory.
+    An SRV whose rows reappear after another SRV is yielded again with header["continuation"] = True
+    holding only the later rows (group_srv_rows would have merged them).
+    """
+    current = None
+    emitted = set()
+    table_headers, columns = None, None
+
+    for headers, values in rows:
+        if headers is not table_headers:
+            table_headers, columns = headers, srv_table_columns(headers)
+        if columns is None:
+            continue
+
+        srv_number = _row_srv_number(values, columns)
+        if srv_number is None:
+            continue
+
+        if current is None or current["header"]["srv_number"] != srv_number:
+            if current is not None:
+                emitted.add(current["header"]["srv_number"])
+                yield current
+            current = _new_srv_group(srv_number, values, columns)
+            if srv_number in emitted:
+                current["header"]["continuation"] = True
+
+        _add_srv_item(current, values, columns)
+
+    if current is not None:
+        yield current
+
+
+RX_TABLE_TAG = re.compile(rb"<(/?)table\b", re.IGNORECASE)
+
+
+def has_nested_tables(content: bytes) -> bool:
+    """True if any <table> opens inside another one (tags in comments/scripts count too)"""
+    depth = 0
+    for match in RX_TABLE_TAG.finditer(content):
+        if match.group(1):
+            depth = max(depth - 1, 0)
+        else:
+            depth += 1
+            if depth > 1:
+                return True
+    return False
+
 
-    return results
+def srv_streamable(content: bytes) -> bool:
+    """
+    Whether an SRV upload is parsed incrementally (iter_srv_html) instead of buffered (scrape_srv_html).
+    Only with SCRAPER_ENGINE="lxml" and for files of at least SRV_STREAM_MIN_SIZE bytes. Files with
+    nested tables stay buffered: iterparse assigns nested rows to the inner table only, while the
+    buffered scrapers also count them for the outer one.
+    """
+    from backend.core.config import settings
+
+    return (
+        settings.SCRAPER_ENGINE == "lxml"
+        and len(content) >= settings.SRV_STREAM_MIN_SIZE
+        and not has_nested_tables(content)
+    )
+
+
+def iter_srv_html(source: BinaryIO) -> Iterator[Dict]:
+    """
+    Streaming SRV extraction for large multi-SRV exports: lxml iterparse over a binary file object,
+    yielding SRV groups while the file is still being parsed (see iter_srv_groups).
+    """
+    from backend.services.lxml_scraper import srv_rows_stream
+
+    return iter_srv_groups(srv_rows_stream(source))
 
 
 # Deprecated/Unused helper functions kept for compatibility if needed,
@@ -128,7 +284,17 @@ def scrape_srv_html(html_content: str) -> List[Dict]:
 
 
 def parse_srv_item_row(cells: List, headers: List[str]) -> Optional[Dict]:
-    """Parse a single SRV item row."""
+    """Parse a single SRV item row (BeautifulSoup cells)."""
+    return parse_srv_item_values([cell.get_text(strip=True) for cell in cells], headers)
+
+
+def parse_srv_item_values(
+    values: List[str], headers: List[str], columns: Optional[Dict[str, Optional[int]]] = None
+) -> Optional[Dict]:
+    """
+    Parse a single SRV item row from its stripped cell texts.
+    columns: srv_column_map(headers), built once per table by callers parsing many rows.
+    """
     item = {
         "po_item_no": None,
         "lot_no": None,
@@ -139,184 +305,67 @@ def parse_srv_item_row(cells: List, headers: List[str]) -> Optional[Dict]:
     }
 
     try:
-        # Map headers to cell indexes
-        header_map = {}
-        for idx, header in enumerate(headers):
-            header_map[header] = idx
+        if columns is None:
+            columns = srv_column_map(headers)
 
         # Helper to safely get cell text
-        def get_val(keys):
-            for key in keys:
-                if key in header_map:
-                    return cells[header_map[key]].get_text(strip=True)
-            return None
+        def get_val(field):
+            idx = columns[field]
+            return values[idx] if idx is not None else None
 
         # Extract PO Item Number
-        val = get_val(["PO ITM", "ITEM", "ITM", "PO_ITM", "PO ITEM"])
+        val = get_val("po_item_no")
         if val:
-            item["po_item_no"] = parse_int(val)
-        elif len(cells) > 0:
+            item["po_item_no"] = srv_int(val)
+        elif len(values) > 0:
             # Fallback to logic if header parsing completely failed but structure is known
             # But with the exact map this shouldn't be needed often
             try:
-                item["po_item_no"] = parse_int(
-                    cells[2].get_text(strip=True)
-                )  # Index 2 is PO ITM usually
+                item["po_item_no"] = srv_int(values[2])  # Index 2 is PO ITM usually
             except Exception:
                 pass
 
         # Extract SRV Number (for internal grouping/validation)
-        item["row_srv_number"] = get_val(["SRV NO", "SRV", "SRV_NO"])
+        item["row_srv_number"] = get_val("row_srv_number")
 
         # Extract SRV Item Number
-        item["srv_item_no"] = parse_int(get_val(["SRV ITM", "SRV ITEM"]))
+        item["srv_item_no"] = srv_int(get_val("srv_item_no"))
 
         # Extract Revision Number
-        item["rev_no"] = parse_int(get_val(["REV NO", "REV"]))
+        item["rev_no"] = srv_int(get_val("rev_no"))
 
         # Extract Lot Number (SUB ITM)
-        item["lot_no"] = parse_int(get_val(["SUB ITM", "LOT NO", "LOT"]))
-
-        # Extract Received Quantity
-        item["received_qty"] = parse_decimal(
-            get_val(["RECVD QTY", "RECEIVED QTY", "RCD QTY", "RECEIVED"])
-        )
-
-        # Extract Rejected Quantity
-        item["rejected_qty"] = parse_decimal(get_val(["REJ QTY", "REJECTED QTY", "REJECTED"]))
-
-        # Extract Accepted Quantity
-        item["accepted_qty"] = parse_decimal(
-            get_val(
-                [
-                    "ACCEPTED QTY",
-                    "ACCPT QTY",
-                    "ACCEPTED",
-                    "ACCEPTED QUANTITY",
-                    "OK QTY",
-                    "QTY OK",
-                ]
-            )
-        )
-
-        # Extract Challan Number
-        item["challan_no"] = (
-            get_val(["CHALLAN NO", "CHALLAN", "DC NO", "DC NUMBER", "CHALLAN NUMBER"]) or None
-        )
-
-        # Extract Challan Date
-        item["challan_date"] = parse_date(
-            get_val(["CHALLAN DATE", "CHALLAN DT", "DC DATE", "DC DT"])
-        )
-
-        # Extract Invoice Number (TAX INV)
-        item["invoice_no"] = (
-            get_val(
-                [
-                    "TAX INV",
-                    "INVOICE NO",
-                    "INV NO",
-                    "TAX INVOICE NO",
-                    "TAX INVOICE",
-                    "GST INV NO",
-                ]
-            )
-            or None
-        )
-
-        # Extract Invoice Date (TAX INV DT)
-        item["invoice_date"] = parse_date(
-            get_val(
-                [
-                    "TAX INV DT",
-                    "INVOICE DATE",
-                    "INV DT",
-                    "TAX INVOICE DATE",
-                    "TAX INV DATE",
-                ]
-            )
-        )
+        item["lot_no"] = srv_int(get_val("lot_no"))
+
+        # Extract Received / Rejected / Accepted Quantity
+        item["received_qty"] = srv_decimal(get_val("received_qty"))
+        item["rejected_qty"] = srv_decimal(get_val("rejected_qty"))
+        item["accepted_qty"] = srv_decimal(get_val("accepted_qty"))
+
+        # Extract Challan Number / Date
+        item["challan_no"] = get_val("challan_no") or None
+        item["challan_date"] = srv_date(get_val("challan_date"))
+
+        # Extract Invoice Number / Date (TAX INV / TAX INV DT)
+        item["invoice_no"] = get_val("invoice_no") or None
+        item["invoice_date"] = srv_date(get_val("invoice_date"))
 
         # Extract Unit
-        item["unit"] = get_val(["UNIT", "UOM"]) or None
+        item["unit"] = get_val("unit") or None
 
         # Extract Quantities
-        item["order_qty"] = parse_decimal(
-            get_val(["ORDER QTY", "PO QTY", "ORDERED QTY", "PO QUANTITY", "ORDER QUANTITY"])
-        )
-        item["challan_qty"] = parse_decimal(
-            get_val(["CHALLAN QTY", "DC QTY", "DC QUANTITY", "CHALLAN QUANTITY"])
-        )
+        item["order_qty"] = srv_decimal(get_val("order_qty"))
+        item["challan_qty"] = srv_decimal(get_val("challan_qty"))
 
         # Extract Extended Fields
-        item["div_code"] = get_val(["DIV", "DIVISION"]) or None
-        item["pmir_no"] = get_val(["PMIR NO", "PMIR"]) or None
-        item["finance_date"] = parse_date(get_val(["FINANCE DT", "FINANCE DATE"]))
-        item["cnote_no"] = get_val(["CNOTE NO.", "CNOTE NO", "CNOTE"]) or None
-        item["cnote_date"] = parse_date(get_val(["CNOTE DATE", "CNOTE DT"]))
+        item["div_code"] = get_val("div_code") or None
+        item["pmir_no"] = get_val("pmir_no") or None
+        item["finance_date"] = srv_date(get_val("finance_date"))
+        item["cnote_no"] = get_val("cnote_no") or None
+        item["cnote_date"] = srv_date(get_val("cnote_date"))
 
         return item
 
     except Exception as e:
         print(f"Error parsing SRV item row: {e}")
         return None
-
-
-def parse_date(date_str: str) -> Optional[str]:
-    """
-    Convert date string to YYYY-MM-DD format.
-    Handles formats: DD/MM/YYYY, DD-MM-YYYY, etc.
-    """
-    if not date_str or date_str == "-" or date_str == "":
-        return None
-
-    # Remove extra whitespace
-    date_str = date_str.strip()
-
-    # Try different date formats
-    formats = [
-        "%d/%m/%Y",  # 27/09/2025
-        "%d-%m-%Y",  # 27-09-2025
-        "%Y-%m-%d",  # 2025-09-27
-        "%d.%m.%Y",  # 27.09.2025
-        "%d %m %Y",  # 27 09 2025
-        "%d/%m/%y",  # 27/09/25
-        "%d-%m-%y",  # 27-09-25
-        "%d.%m.%y",  # 27.09.25
-    ]
-
-    for fmt in formats:
-        try:
-            dt = datetime.strptime(date_str, fmt)
-            return dt.strftime("%Y-%m-%d")
-        except ValueError:
-            continue
-
-    # If no format matches, return as-is
-    return date_str
-
-
-def parse_int(value_str: str) -> Optional[int]:
-    """Parse integer from string, handling empty values."""
-    if value_str is None or value_str == "-" or value_str.strip() == "":
-        return None
-
-    try:
-        # Remove any non-digit characters except the first minus sign
-        cleaned = value_str.strip()
-        return int(cleaned)
-    except ValueError:
-        return None
-
-
-def parse_decimal(value_str: str) -> float:
-    """Parse decimal/float from string, handling commas and empty values."""
-    if not value_str or value_str == "-" or value_str == "":
-        return 0.0
-
-    try:
-        # Remove commas and extra whitespace
-        cleaned = value_str.replace(",", "").strip()
-        return float(cleaned)
-    except ValueError:
-        return 0.0
@@ -0,0 +1,215 @@
+"""
+SRV Upsert Engine
+Idempotent re-upload of SRVs. An SRV last written from the same file, or whose normalized
+content matches the stored rows, is skipped without touching srv_items. Otherwise the incoming items are
+diffed against the stored rows: only added and removed rows are written, and reconciliation
+runs once per affected PO item instead of a full reversal followed by a full re-ingest.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from backend.core.normalize import to_qty
+from backend.services.change_log import record_change
+from backend.services.reconciliation_service import ReconciliationService
+from backend.services.srv_ingestion import SRV_ITEM_INSERT, srv_item_row
+
+logger = logging.getLogger(__name__)
+
+# srv_items columns compared on re-upload (everything taken from the export; created_at excluded)
+SRV_ITEM_FIELDS = (
+    "po_item_no",
+    "lot_no",
+    "srv_item_no",
+    "rev_no",
+    "received_qty",
+    "rejected_qty",
+    "accepted_qty",
+    "order_qty",
+    "challan_qty",
+    "unit",
+    "challan_no",
+    "challan_date",
+    "invoice_no",
+    "invoice_date",
+    "div_code",
+    "pmir_no",
+    "finance_date",
+    "cnote_no",
+    "cnote_date",
+)
+SRV_QTY_FIELDS = {"received_qty", "rejected_qty", "accepted_qty", "order_qty", "challan_qty"}
+
+# Row identity used to report a removed + added pair as one changed item
+SRV_ITEM_IDENTITY = ("po_item_no", "lot_no", "srv_item_no")
+
+
+def _normalize(field: str, value):
+    # Compare as stored: column affinity turns "12" into 12 and numbers into text
+    if value is None:
+        return None
+    if field in SRV_QTY_FIELDS:
+        return to_qty(value)
+    return str(value)
+
+
+def srv_item_key(row) -> tuple:
+    """Comparable form of an srv_items row (stored row or srv_item_row() parameters)"""
+    return tuple(_normalize(field, row[field]) for field in SRV_ITEM_FIELDS)
+
+
+def _invoice_number(items: List[Dict]) -> Optional[str]:
+    # srvs.invoice_number is taken from the first item (as in ingest_srv_to_db)
+    return items[0].get("invoice_no") if items and items[0].get("invoice_no") else None
+
+
+def _srv_hash(srv_number, po_number, srv_date, invoice_number, item_keys) -> str:
+    rows = sorted(json.dumps(key) for key in item_keys)
+    header = [None if value is None else str(value) for value in (srv_number, po_number, srv_date, invoice_number)]
+    return hashlib.sha256(json.dumps([*header, rows]).encode("utf-8")).hexdigest()
+
+
+def srv_content_hash(header: Dict, items: List[Dict]) -> str:
+    """Order-independent hash of what an SRV upload would store"""
+    return _srv_hash(
+        header.get("srv_number"),
+        header.get("po_number"),
+        header.get("srv_date"),
+        _invoice_number(items),
+        (srv_item_key(srv_item_row(header, item)) for item in items),
+    )
+
+
+def stored_srv_hash(db: sqlite3.Connection, srv_number: str) -> Optional[str]:
+    """srv_content_hash of the SRV as currently stored (None when it does not exist)"""
+    header = db.execute(
+        "SELECT srv_number, po_number, srv_date, invoice_number FROM srvs WHERE srv_number = ?", (srv_number,)
+    ).fetchone()
+    if header is None:
+        return None
+    rows = db.execute(f"SELECT {', '.join(SRV_ITEM_FIELDS)} FROM srv_items WHERE srv_number = ?", (srv_number,))
+    return _srv_hash(*header, (srv_item_key(row) for row in rows))
+
+
+def get_srv_source(db: sqlite3.Connection, srv_number: str) -> Optional[sqlite3.Row]:
+    return db.execute(
+        "SELECT file_hash, content_hash FROM srv_sources WHERE srv_number = ?", (srv_number,)
+    ).fetchone()
+
+
+def record_srv_source(db: sqlite3.Connection, header: Dict) -> None:
+    """Remember the upload an SRV was written from (runs inside the caller's transaction)"""
+    db.execute(
+        """
+        INSERT INTO srv_sources (srv_number, file_hash, content_hash, updated_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(srv_number) DO UPDATE SET
+            file_hash = excluded.file_hash,
+            content_hash = excluded.content_hash,
+            updated_at = excluded.updated_at
+        """,
+        (header["srv_number"], header["file_hash"], header.get("content_hash") or ""),
+    )
+
+
+def apply_srv_diff(srv_data: Dict, db: sqlite3.Connection, po_found: bool = True) -> Dict:
+    """
+    Write an incoming scrape of an existing SRV (same PO) as a minimal set of changes.
+    Items are matched against stored rows as a multiset of their stored values, so a changed
+    row is one delete plus one insert. Returns the change summary.
+    """
+    header = srv_data["header"]
+    items = srv_data["items"]
+    srv_number = header["srv_number"]
+
+    stored_header = db.execute(
+        "SELECT srv_date, invoice_number FROM srvs WHERE srv_number = ?", (srv_number,)
+    ).fetchone()
+    invoice_number = _invoice_number(items)
+    header_changed = (stored_header["srv_date"], stored_header["invoice_number"]) != (
+        header["srv_date"],
+        invoice_number,
+    )
+
+    stored = {}  # key -> stored rows not yet matched
+    for row in db.execute(
+        f"SELECT rowid, {', '.join(SRV_ITEM_FIELDS)} FROM srv_items WHERE srv_number = ?", (srv_number,)
+    ):
+        stored.setdefault(srv_item_key(row), []).append(row)
+
+    added = []
+    for item in items:
+        row = srv_item_row(header, item)
+        matches = stored.get(srv_item_key(row))
+        if matches:
+            matches.pop()
+        else:
+            added.append(row)
+    removed = [dict(row) for rows in stored.values() for row in rows]
+
+    try:
+        if header_changed:
+            db.execute(
+                "UPDATE srvs SET srv_date = ?, invoice_number = ?, updated_at = ? WHERE srv_number = ?",
+                (header["srv_date"], invoice_number, datetime.now().isoformat(), srv_number),
+            )
+        if removed:
+            db.execute(
+                "DELETE FROM srv_items WHERE rowid IN (SELECT value FROM json_each(?))",
+                (json.dumps([row["rowid"] for row in removed]),),
+            )
+        if added:
+            db.executemany(SRV_ITEM_INSERT, added)
+
+        reconciled = []
+        if po_found and (added or removed):
+            reconciled = ReconciliationService.reconcile_srv_changes(
+                db, srv_number, header["po_number"], added, removed
+            )
+            ReconciliationService.sync_po_status(db, header["po_number"])
+
+        if header_changed or added or removed:
+            record_change(db, "srv", srv_number, "update")
+            if po_found and (added or removed):
+                record_change(db, "po", header["po_number"], "update")
+
+        record_srv_source(db, header)
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to apply SRV {srv_number} changes: {e}")
+        raise
+
+    def identities(rows):
+        return Counter(tuple(_normalize(f, row[f]) for f in SRV_ITEM_IDENTITY) for row in rows)
+
+    changed = sum((identities(added) & identities(removed)).values())
+    return {
+        "srv_number": srv_number,
+        "has_changes": bool(header_changed or added or removed),
+        "header_changed": header_changed,
+        "items_added": len(added) - changed,
+        "items_changed": changed,
+        "items_removed": len(removed) - changed,
+        "items_unchanged": len(items) - len(added),
+        "reconciled_items": len(reconciled),
+    }
+
+
+def describe_srv_changes(summary: Dict) -> str:
+    """One-line summary for upload results, e.g. 'items: 2 changed, 1 added'"""
+    parts = [
+        f"{summary[key]} {label}"
+        for key, label in (("items_changed", "changed"), ("items_added", "added"), ("items_removed", "removed"))
+        if summary[key]
+    ]
+    text = f"items: {', '.join(parts)}" if parts else ""
+    if summary["header_changed"]:
+        text = f"{text}, header updated" if text else "header updated"
+    return text or "no changes"
@@ -57,7 +57,7 @@ def calculate_pending_quantity(ordered: float, fulfilled: float) -> float:
     - At PO level, 'Fulfilled' is typically Total Dispatched.
     - At Invoice/DC level, 'Fulfilled' could be Total Received.
     """
-    from backend.core.number_utils import to_qty
+    from backend.core.normalize import to_qty
 
     ordered_val = float(ordered or 0)
     fulfilled_val = float(fulfilled or 0)
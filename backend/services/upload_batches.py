@@ -0,0 +1,420 @@
+"""
+Upload Batch Service
+Per-file PO/SRV upload ingestion shared by the batch endpoints, grouped commits for large
+PO batches (N files per transaction, SAVEPOINT per file), plus the streaming
+batch upload: files are ingested as multipart parts arrive, results are pushed as
+Server-Sent Events and persisted (upload_batches / upload_batch_files) for reconnects.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Type
+
+from starlette.requests import ClientDisconnect, Request
+
+from backend.core.config import settings
+from backend.core.multipart_stream import iter_multipart_files
+from backend.core.sse import format_sse, format_sse_comment
+from backend.db.session import db_savepoint, db_transaction, get_connection
+from backend.services.ingest_po import POIngestionService
+from backend.services.parse_cache import bump_counter, parse_cached, po_ingest_unchanged, record_po_ingest, result_hash
+from backend.services.parse_pool import parse_one, po_parser, srv_parser
+from backend.services.reconciliation_service import DeferredSync
+from backend.services.srv_scraper import srv_streamable
+
+logger = logging.getLogger(__name__)
+
+# How often a reconnected client polls for results of a batch that is still running
+REPLAY_POLL_SECONDS = 0.5
+
+
+# --------------------------------------------------
+# Per-file ingestion
+# --------------------------------------------------
+def po_number_from_filename(filename: str) -> Optional[str]:
+    """PO number hint from an SRV filename (PO_1234 / SRV_1234 / leading digits)"""
+    # Priority 1: Explicit PO_ prefix
+    po_match = re.search(r"PO_?(\d+)", filename, re.IGNORECASE)
+
+    # Priority 2: SRV_ prefix (User legacy format)
+    if not po_match:
+        # Common format: SRV_1234_for_PO_5678.html
+        po_match = re.search(r"PO_(\d+)", filename, re.IGNORECASE)
+        if not po_match:
+            po_match = re.search(r"SRV_(\d+)", filename, re.IGNORECASE)
+
+    # Priority 3: Just digits (User said "file name IS the po number")
+    if not po_match:
+        po_match = re.search(r"^(\d+)", filename)
+
+    # Keep as raw string to preserve leading zeros
+    return po_match.group(1) if po_match else None
+
+
+def ingest_po_upload(
+    db: sqlite3.Connection,
+    filename: str,
+    po_header: Dict,
+    po_items: List[Dict],
+    ingestion_service: Optional[POIngestionService] = None,
+    reraise: Tuple[Type[Exception], ...] = (),
+) -> Dict:
+    """
+    Ingest one parsed PO file in its own transaction and return its batch result entry.
+    A PO whose parse result and rows are unchanged since its last ingest is skipped (see parse_cache).
+    Exceptions listed in `reraise` propagate after rollback (e.g. for callers that retry).
+    """
+    ingestion_service = ingestion_service or POIngestionService()
+    result = {
+        "filename": filename,
+        "success": False,
+        "po_number": None,
+        "message": "",
+        "linked_srvs": 0,
+    }
+
+    if not po_header.get("PURCHASE ORDER"):
+        print(f"🔥🔥🔥 PARSING FAILED for {filename}: PO Number missing", flush=True)
+        result["message"] = "Could not extract PO number from HTML"
+        return result
+
+    po_number = str(po_header.get("PURCHASE ORDER")).strip()
+    parsed_hash = result_hash([po_header, po_items])
+
+    try:
+        if po_ingest_unchanged(db, po_number, parsed_hash):
+            bump_counter(db, "ingest_skipped")
+            db.commit()
+            result.update(
+                success=True, po_number=po_number, skipped=True, message=f"PO {po_number} unchanged since last upload, skipped"
+            )
+            return result
+
+        # Atomic transaction per file: if one file fails, only that one is rolled back
+        with db_transaction(db):
+            success, warnings, changes = ingestion_service.ingest_po_detailed(db, po_header, po_items)
+            if not success:
+                raise ValueError(f"Ingestion Error: {warnings}")
+            record_po_ingest(db, po_number, parsed_hash)
+            bump_counter(db, "ingested")
+
+        result["success"] = True
+        result["po_number"] = po_header.get("PURCHASE ORDER")
+        result["message"] = warnings[0] if warnings else f"Successfully ingested PO {po_header.get('PURCHASE ORDER')}"
+        if changes is not None:
+            result["changes"] = changes
+    except reraise:
+        raise
+    except Exception as e:
+        import traceback
+
+        print(f"🔥🔥🔥 UPLOAD ERROR for {filename}:", flush=True)
+        print("".join(traceback.format_exception(e)), flush=True)
+        result["message"] = f"Error: {str(e)}"
+
+    return result
+
+
+def streams_srv(content: bytes) -> bool:
+    """Large SRV exports skip the parse pool and are parsed incrementally during ingestion (see srv_streamable)"""
+    return srv_streamable(content)
+
+
+def ingest_srv_upload(
+    db: sqlite3.Connection, filename: str, content: bytes, srv_list: Optional[List[Dict]] = None
+) -> Dict:
+    """Ingest one SRV file (optionally pre-scraped, streamed otherwise) and return its batch result entry"""
+    from backend.services.srv_ingestion import process_srv_file
+
+    try:
+        success, messages, s_count, f_count = process_srv_file(
+            content, filename, db, po_number_from_filename(filename), srv_list=srv_list
+        )
+        return {
+            "filename": filename,
+            "success": success,
+            "message": "; ".join(messages),
+            "messages": messages,
+            "successful": s_count,
+            "failed": f_count,
+        }
+    except Exception as e:
+        return {"filename": filename, "success": False, "message": f"Error: {str(e)}"}
+
+
+# --------------------------------------------------
+# Grouped batch commits
+# --------------------------------------------------
+class POCommitGroup:
+    """
+    Batch-commit mode for PO uploads: up to `size` files share one transaction and each file runs
+    in its own SAVEPOINT, so a bad file still rolls back alone. Reconciliation is deferred to the
+    group commit, where each touched PO is synced once.
+    Results are final only after commit(): if the group commit fails, its files are marked failed.
+    """
+
+    def __init__(self, db: sqlite3.Connection, ingestion_service: POIngestionService, size: int):
+        self.db = db
+        self.ingestion_service = ingestion_service
+        self.size = max(1, size)
+        self.group: List[Dict] = []  # results of files in the open transaction
+        self.pending: List[Tuple[str, str]] = []  # (po_number, parsed_hash) to record after the sync
+        self.deferred_sync = DeferredSync()
+        self.transactions = 0
+        self.synced_pos = 0
+
+    def add(self, result: Dict, po_header: Dict, po_items: List[Dict]):
+        """Ingest one parsed file into the open group (commits when the group is full)"""
+        self.group.append(result)
+        try:
+            self._ingest(result, po_header, po_items)
+        finally:
+            if len(self.group) >= self.size:
+                self.commit()
+
+    def _ingest(self, result: Dict, po_header: Dict, po_items: List[Dict]):
+        if not po_header.get("PURCHASE ORDER"):
+            print(f"🔥🔥🔥 PARSING FAILED for {result['filename']}: PO Number missing", flush=True)
+            result["message"] = "Could not extract PO number from HTML"
+            return
+
+        po_number = str(po_header.get("PURCHASE ORDER")).strip()
+        parsed_hash = result_hash([po_header, po_items])
+        file_sync = DeferredSync()
+        try:
+            with db_savepoint(self.db):
+                if po_ingest_unchanged(self.db, po_number, parsed_hash):
+                    bump_counter(self.db, "ingest_skipped")
+                    result.update(
+                        success=True, po_number=po_number, skipped=True, message=f"PO {po_number} unchanged since last upload, skipped"
+                    )
+                    return
+
+                success, warnings, changes = self.ingestion_service.ingest_po_detailed(
+                    self.db, po_header, po_items, deferred_sync=file_sync
+                )
+                if not success:
+                    raise ValueError(f"Ingestion Error: {warnings}")
+                bump_counter(self.db, "ingested")
+        except Exception as e:
+            import traceback
+
+            print(f"🔥🔥🔥 UPLOAD ERROR for {result['filename']}:", flush=True)
+            print("".join(traceback.format_exception(e)), flush=True)
+            result["message"] = f"Error: {str(e)}"
+            return
+
+        self.deferred_sync.merge(file_sync)
+        self.pending.append((po_number, parsed_hash))
+        result["success"] = True
+        result["po_number"] = po_number
+        result["message"] = warnings[0] if warnings else f"Successfully ingested PO {po_number}"
+        if changes is not None:
+            result["changes"] = changes
+
+    def commit(self):
+        """Run the deferred syncs, record ingest state and commit the open group"""
+        if not self.group:
+            return
+
+        try:
+            self.synced_pos += self.deferred_sync.flush(self.db)
+            # After the sync, so the fingerprints match the reconciled rows
+            for po_number, parsed_hash in self.pending:
+                record_po_ingest(self.db, po_number, parsed_hash)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Batch commit of {len(self.group)} file(s) rolled back: {e}")
+            for result in self.group:
+                if result["success"]:
+                    result.pop("changes", None)
+                    result.pop("skipped", None)
+                    result.update(success=False, message=f"Error: batch commit failed: {str(e)}")
+        finally:
+            self.transactions += 1
+            self.group = []
+            self.pending = []
+            self.deferred_sync = DeferredSync()
+
+
+# --------------------------------------------------
+# Persistence
+# --------------------------------------------------
+def create_upload_batch(db: sqlite3.Connection, kind: str) -> str:
+    batch_id = uuid.uuid4().hex
+    db.execute("INSERT INTO upload_batches (id, kind) VALUES (?, ?)", (batch_id, kind))
+    db.commit()
+    return batch_id
+
+
+def record_upload_file(db: sqlite3.Connection, batch_id: str, seq: int, result: Dict, size: int, duration_ms: float):
+    db.execute(
+        """
+        INSERT INTO upload_batch_files (batch_id, seq, filename, success, message, result_json, size_bytes, duration_ms)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            batch_id,
+            seq,
+            result.get("filename"),
+            1 if result.get("success") else 0,
+            result.get("message"),
+            json.dumps(result, default=str),
+            size,
+            round(duration_ms, 2),
+        ),
+    )
+    db.execute(
+        """
+        UPDATE upload_batches
+        SET total_files = total_files + 1,
+            successful = successful + ?,
+            failed = failed + ?,
+            total_bytes = total_bytes + ?
+        WHERE id = ?
+        """,
+        (1 if result.get("success") else 0, 0 if result.get("success") else 1, size, batch_id),
+    )
+    db.commit()
+
+
+def finish_upload_batch(db: sqlite3.Connection, batch_id: str, status: str, error: Optional[str] = None):
+    db.execute(
+        "UPDATE upload_batches SET status = ?, error = ?, completed_at = CURRENT_TIMESTAMP WHERE id = ?",
+        (status, error, batch_id),
+    )
+    db.commit()
+
+
+def get_upload_batch(db: sqlite3.Connection, batch_id: str) -> Optional[Dict]:
+    row = db.execute("SELECT * FROM upload_batches WHERE id = ?", (batch_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def get_upload_batch_files(db: sqlite3.Connection, batch_id: str, after: int = 0) -> List[Dict]:
+    rows = db.execute(
+        """
+        SELECT seq, result_json, size_bytes, duration_ms
+        FROM upload_batch_files
+        WHERE batch_id = ? AND seq > ?
+        ORDER BY seq
+        """,
+        (batch_id, after),
+    ).fetchall()
+    return [_file_event(row) for row in rows]
+
+
+def _file_event(row: sqlite3.Row) -> Dict:
+    return {
+        "seq": row["seq"],
+        "size_bytes": row["size_bytes"],
+        "duration_ms": row["duration_ms"],
+        **json.loads(row["result_json"]),
+    }
+
+
+# --------------------------------------------------
+# Streaming upload
+# --------------------------------------------------
+async def stream_upload_batch(request: Request, kind: str, batch_id: str) -> AsyncIterator[str]:
+    """
+    Ingest files as their multipart parts arrive and yield one SSE frame per file.
+
+    Events: `batch` (id), `file` (per-file result, SSE id = file seq), `summary` (final totals).
+    Uses its own connection because the body is produced after the route handler returns.
+    """
+    db = get_connection()
+    ingestion_service = POIngestionService()
+    parser = po_parser() if kind == "po" else srv_parser()
+    seq = 0
+    status, error = "completed", None
+    started = time.perf_counter()
+
+    try:
+        yield format_sse("batch", {"batch_id": batch_id, "kind": kind})
+
+        async for streamed in iter_multipart_files(request, settings.UPLOAD_SPOOL_MAX_SIZE):
+            seq += 1
+            file_started = time.perf_counter()
+            try:
+                if not streamed.filename.lower().endswith(".html"):
+                    result = {"filename": streamed.filename, "success": False, "message": "Only HTML files are supported"}
+                else:
+                    content = streamed.read()
+                    try:
+                        if kind == "srv" and streams_srv(content):
+                            parsed = None  # parsed incrementally by ingest_srv_upload
+                        elif kind == "po":
+                            parsed = await parse_cached(db, content, "po", parser)
+                        else:
+                            parsed = await parse_one(content, parser)
+                    except Exception as e:
+                        result = {"filename": streamed.filename, "success": False, "message": f"Error: {str(e)}"}
+                    else:
+                        if kind == "po":
+                            po_header, po_items = parsed
+                            result = ingest_po_upload(db, streamed.filename, po_header, po_items, ingestion_service)
+                        else:
+                            result = ingest_srv_upload(db, streamed.filename, content, parsed)
+                    del content
+            finally:
+                streamed.close()
+
+            duration_ms = (time.perf_counter() - file_started) * 1000
+            record_upload_file(db, batch_id, seq, result, streamed.size, duration_ms)
+            yield format_sse(
+                "file",
+                {"seq": seq, "size_bytes": streamed.size, "duration_ms": round(duration_ms, 2), **result},
+                event_id=seq,
+            )
+
+    except GeneratorExit:
+        status, error = "interrupted", "Event stream closed before the upload finished"
+        raise
+    except ClientDisconnect:
+        # Body stopped arriving: files received so far are ingested and recorded
+        status, error = "interrupted", "Client disconnected before the upload finished"
+        logger.warning(f"Upload batch {batch_id} interrupted after {seq} file(s)")
+    except Exception as e:
+        status, error = "failed", str(e)
+        logger.error(f"Upload batch {batch_id} failed: {e}", exc_info=True)
+    finally:
+        try:
+            finish_upload_batch(db, batch_id, status, error)
+            summary = get_upload_batch(db, batch_id)
+        finally:
+            db.close()
+
+    elapsed = time.perf_counter() - started
+    summary["elapsed_seconds"] = round(elapsed, 3)
+    summary["files_per_second"] = round(seq / elapsed, 2) if elapsed > 0 else None
+    yield format_sse("summary", summary)
+
+
+async def replay_upload_batch(batch_id: str, after: int = 0) -> AsyncIterator[str]:
+    """
+    SSE replay for reconnecting clients: stored file events after `after`
+    (the Last-Event-ID), then live results while the batch is still running, then the summary.
+    """
+    db = get_connection()
+    try:
+        while True:
+            batch = get_upload_batch(db, batch_id)
+            for event in get_upload_batch_files(db, batch_id, after):
+                after = event["seq"]
+                yield format_sse("file", event, event_id=after)
+
+            if batch["status"] != "running":
+                yield format_sse("summary", batch)
+                return
+
+            yield format_sse_comment()
+            await asyncio.sleep(REPLAY_POLL_SECONDS)
+    finally:
+        db.close()
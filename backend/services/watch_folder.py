@@ -0,0 +1,471 @@
+"""
+Watch-Folder Ingestion
+Picks up PO/SRV HTML exports saved into settings.WATCH_FOLDER (subfolders included) and
+queues them on the background ingestion job queue, so downloaded files need no browser upload.
+Queued files go through the same parse/ingest helpers as the batch upload endpoints.
+
+Changes are detected with inotify where available (Linux, local disks) and by polling stat()
+otherwise; network shares do not deliver inotify events, so WATCH_MODE=poll forces polling.
+A file is taken once it has been quiet for WATCH_DEBOUNCE_SECONDS (downloads are written in
+chunks). Every version taken is recorded in watch_files with its content hash: files unchanged
+since they were recorded are not re-read, and content already queued or ingested from any path
+is skipped, as are copies of one file found in the same cycle. Files are queued at most
+WATCH_MAX_FILES_PER_MINUTE, and not while the ingest queue already holds WATCH_MAX_QUEUED_FILES
+files, so a large drop does not starve interactive use. If inotify fails while running (e.g.
+the watch limit is reached), the watcher falls back to polling.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import logging
+import os
+import re
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from backend.core.config import settings
+from backend.db.session import get_connection
+from backend.services.ingest_jobs import create_ingest_job
+
+logger = logging.getLogger(__name__)
+
+HTML_SUFFIXES = (".html", ".htm")
+
+# In inotify mode the folder is still rescanned this often (events can be lost on queue overflow)
+RESCAN_SECONDS = 60.0
+
+# Export markers (the same table headers the scrapers look for; words may be split by &nbsp;)
+_SEP = rb"(?:\s|&nbsp;|&#160;|\xc2\xa0)+"
+RX_SRV_NUMBER = re.compile(rb"SRV" + _SEP + rb"(?:NO|NUMBER)\b", re.I)
+RX_PO_ITEM = re.compile(rb"PO" + _SEP + rb"IT(?:E)?M\b", re.I)
+RX_MATERIAL_CODE = re.compile(rb"MATERIAL" + _SEP + rb"CODE", re.I)
+
+# Content already taken from another path (or an earlier version of this one) that is not failed
+DUPLICATE_SQL = """
+    SELECT w.path, w.kind, w.job_id, w.seq
+    FROM watch_files w
+    JOIN ingest_job_files f ON f.job_id = w.job_id AND f.seq = w.seq
+    WHERE w.file_hash = ? AND f.status IN ('queued', 'running', 'succeeded')
+    LIMIT 1
+"""
+
+Signature = Tuple[int, int]  # (size, mtime_ns)
+
+_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+_watcher: Optional["FolderWatcher"] = None
+
+
+def classify_html(content: bytes) -> Optional[str]:
+    """'srv' for SRV listings (PO ITM + SRV NO columns), 'po' for PO exports (MATERIAL CODE table), else None"""
+    if RX_SRV_NUMBER.search(content) and RX_PO_ITEM.search(content):
+        return "srv"
+    if RX_MATERIAL_CODE.search(content):
+        return "po"
+    return None
+
+
+def file_signature(path: Path) -> Optional[Signature]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def scan_folder(root: Path) -> Dict[str, Signature]:
+    """Signature of every HTML file under root, keyed by POSIX path relative to root"""
+    found = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in filenames:
+            if name.lower().endswith(HTML_SUFFIXES):
+                path = Path(dirpath) / name
+                sig = file_signature(path)
+                if sig:
+                    found[path.relative_to(root).as_posix()] = sig
+    return found
+
+
+# --------------------------------------------------
+# inotify (Linux, via libc; no extra dependency)
+# --------------------------------------------------
+class Inotify:
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, root: Path):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("libc has no inotify support")
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self.dirs: Dict[int, Path] = {}
+        try:
+            self.add_tree(root)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def add_tree(self, top: Path):
+        """Watch top and its subfolders; folders gone by now are skipped, other failures raise OSError"""
+        for dirpath, dirnames, _ in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dirpath), self.MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR):
+                    continue  # Moved out or deleted since it was listed
+                raise OSError(err, f"inotify_add_watch failed for {dirpath}")
+            self.dirs[wd] = Path(dirpath)
+
+    def read(self, timeout: float) -> Optional[Set[str]]:
+        """Relative paths touched within timeout; None when events were lost (caller rescans)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        touched: Set[str] = set()
+        offset = 0
+        while offset + self.EVENT.size <= len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            directory = self.dirs.get(wd)
+            if directory is None or not name or name.startswith("."):
+                continue
+            path = directory / name
+            if mask & self.IN_ISDIR:
+                # New or moved-in folder: watch it and take the files already inside
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self.add_tree(path)
+                    touched.update((path / rel).relative_to(self.root).as_posix() for rel in scan_folder(path))
+            elif name.lower().endswith(HTML_SUFFIXES):
+                touched.add(path.relative_to(self.root).as_posix())
+        return touched
+
+    def close(self):
+        os.close(self.fd)
+
+
+# --------------------------------------------------
+# Watcher
+# --------------------------------------------------
+class FolderWatcher:
+    """Detects, debounces, records and queues the HTML files of one folder (run() on one thread)"""
+
+    def __init__(self, root: Path, mode: str = "auto"):
+        self.root = root
+        self.inotify: Optional[Inotify] = None
+        if mode in ("auto", "inotify"):
+            try:
+                self.inotify = Inotify(root)
+            except OSError as e:
+                if mode == "inotify":
+                    raise
+                logger.info(f"Watch folder: inotify unavailable ({e}), polling every {settings.WATCH_POLL_SECONDS}s")
+        self.mode = "inotify" if self.inotify else "poll"
+        self.known: Dict[str, Signature] = {}
+        self.pending: Dict[str, Tuple[Signature, float]] = {}  # rel path -> (signature, quiet since)
+        self.tokens = float(settings.WATCH_MAX_FILES_PER_MINUTE)
+        self.refilled_at = time.monotonic()
+        self.last_scan_at: Optional[float] = None
+        self.queued_files = 0
+
+    # ---- change detection ----
+    def touch(self, rel: str, sig: Optional[Signature] = None):
+        sig = sig or file_signature(self.root / rel)
+        if sig is None:
+            self.pending.pop(rel, None)
+            self.known.pop(rel, None)
+            return
+        self.known[rel] = sig
+        current = self.pending.get(rel)
+        if current is None or current[0] != sig:
+            self.pending[rel] = (sig, time.monotonic())
+
+    def rescan(self):
+        found = scan_folder(self.root)
+        for rel, sig in found.items():
+            if self.known.get(rel) != sig:
+                self.touch(rel, sig)
+        for rel in self.known.keys() - found.keys():
+            self.known.pop(rel, None)
+            self.pending.pop(rel, None)
+        self.last_scan_at = time.time()
+
+    def wait_for_changes(self, stop: threading.Event, timeout: float):
+        if self.inotify is None:
+            if not stop.wait(timeout):
+                self.rescan()
+            return
+        # Short reads so a stop request is noticed promptly
+        try:
+            touched = self.inotify.read(min(timeout, 1.0))
+        except OSError as e:
+            # e.g. the inotify watch limit: folders without a watch would be missed from now on
+            logger.warning(f"Watch folder: inotify failed ({e}), polling every {settings.WATCH_POLL_SECONDS}s")
+            self.inotify.close()
+            self.inotify = None
+            self.mode = "poll"
+            self.rescan()
+            return
+        if touched is None:
+            logger.warning("Watch folder: inotify queue overflowed, rescanning")
+            self.rescan()
+            return
+        for rel in touched:
+            self.touch(rel)
+
+    def ready_files(self) -> List[str]:
+        """Pending files quiet for WATCH_DEBOUNCE_SECONDS, oldest first (changed ones restart their wait)"""
+        now = time.monotonic()
+        ready = []
+        for rel, (sig, since) in list(self.pending.items()):
+            if now - since < settings.WATCH_DEBOUNCE_SECONDS:
+                continue
+            current = file_signature(self.root / rel)
+            if current is None:
+                self.pending.pop(rel)
+            elif current != sig:
+                self.touch(rel, current)
+            else:
+                ready.append(rel)
+        return sorted(ready, key=lambda rel: self.pending[rel][0][1])
+
+    # ---- rate control ----
+    def budget(self, db: sqlite3.Connection) -> int:
+        """Files that may be queued now (token bucket, paused while the ingest queue is full)"""
+        backlog = db.execute(
+            "SELECT COUNT(*) FROM ingest_job_files WHERE status IN ('queued', 'running')"
+        ).fetchone()[0]
+        room = max(0, settings.WATCH_MAX_QUEUED_FILES - backlog)
+        per_minute = settings.WATCH_MAX_FILES_PER_MINUTE
+        if per_minute <= 0:
+            return room
+        now = time.monotonic()
+        self.tokens = min(float(per_minute), self.tokens + (now - self.refilled_at) * per_minute / 60)
+        self.refilled_at = now
+        return min(room, int(self.tokens))
+
+    # ---- recording + queueing ----
+    def _record(self, db, rel, file_hash, kind, sig, status, job_id=None, seq=None, note=None):
+        db.execute(
+            """
+            INSERT INTO watch_files (path, file_hash, kind, size_bytes, mtime_ns, status, job_id, seq, note)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                file_hash = excluded.file_hash, kind = excluded.kind, size_bytes = excluded.size_bytes,
+                mtime_ns = excluded.mtime_ns, status = excluded.status, job_id = excluded.job_id,
+                seq = excluded.seq, note = excluded.note, updated_at = CURRENT_TIMESTAMP
+            """,
+            (rel, file_hash, kind, sig[0], sig[1], status, job_id, seq, note),
+        )
+
+    def examine(self, db: sqlite3.Connection, rel: str) -> Optional[Tuple[str, bytes, str, Signature]]:
+        """(kind, content, hash, signature) of a file to queue; None once recorded as nothing to do"""
+        sig = self.pending.pop(rel)[0]
+        stored = db.execute(
+            "SELECT file_hash, size_bytes, mtime_ns FROM watch_files WHERE path = ?", (rel,)
+        ).fetchone()
+        if stored and (stored["size_bytes"], stored["mtime_ns"]) == sig:
+            return None  # Recorded version (e.g. rescan after a restart)
+
+        try:
+            content = (self.root / rel).read_bytes()
+        except OSError as e:
+            # Still being written or locked by the downloading program: wait for the next change
+            logger.debug(f"Watch folder: cannot read {rel} yet: {e}")
+            self.pending[rel] = (sig, time.monotonic())
+            return None
+        file_hash = hashlib.sha256(content).hexdigest()
+
+        duplicate = db.execute(DUPLICATE_SQL, (file_hash,)).fetchone()
+        if duplicate:
+            if duplicate["path"] == rel:
+                note = "Touched without content changes"
+            else:
+                note = f"Same content as {duplicate['path']}"
+            self._record(db, rel, file_hash, duplicate["kind"], sig, "duplicate", duplicate["job_id"], duplicate["seq"], note)
+            return None
+
+        kind = classify_html(content)
+        if kind is None:
+            self._record(db, rel, file_hash, None, sig, "unrecognized", note="Not a BHEL PO or SRV export")
+            return None
+        return kind, content, file_hash, sig
+
+    def process_ready(self, db: sqlite3.Connection) -> int:
+        """Queue ready files within the rate budget (POs before SRVs); returns files queued"""
+        ready = self.ready_files()
+        if not ready:
+            return 0
+
+        budget = self.budget(db)
+        taken: Dict[str, List[Tuple[str, bytes, str, Signature]]] = {"po": [], "srv": []}
+        first_by_hash: Dict[str, str] = {}  # content taken in this cycle -> its path
+        same_batch: List[Tuple[str, str, Signature]] = []  # copies of content taken in this cycle
+        count = 0
+        for rel in ready:
+            if count >= budget:
+                break  # Left pending for a later cycle
+            examined = self.examine(db, rel)
+            if examined:
+                kind, content, file_hash, sig = examined
+                if file_hash in first_by_hash:
+                    same_batch.append((rel, file_hash, sig))
+                    continue
+                first_by_hash[file_hash] = rel
+                taken[kind].append((rel, content, file_hash, sig))
+                count += 1
+        db.commit()
+
+        # POs first: workers claim jobs in creation order and SRVs need their PO
+        queued_as: Dict[str, Tuple[str, str, int]] = {}  # path -> (kind, job id, seq)
+        for kind in ("po", "srv"):
+            files = taken[kind]
+            if not files:
+                continue
+            job_id = create_ingest_job(db, kind, [(Path(rel).name, content) for rel, content, _, _ in files])
+            for seq, (rel, _, file_hash, sig) in enumerate(files, start=1):
+                self._record(db, rel, file_hash, kind, sig, "queued", job_id, seq)
+                queued_as[rel] = (kind, job_id, seq)
+            db.commit()
+            print(f"📂 Watch folder: queued {len(files)} {kind.upper()} file(s) as ingest job {job_id}", flush=True)
+
+        if same_batch:
+            for rel, file_hash, sig in same_batch:
+                original = first_by_hash[file_hash]
+                kind, job_id, seq = queued_as[original]
+                self._record(db, rel, file_hash, kind, sig, "duplicate", job_id, seq, f"Same content as {original}")
+            db.commit()
+
+        self.tokens -= count
+        self.queued_files += count
+        return count
+
+    def run(self, stop: threading.Event):
+        db = get_connection()
+        try:
+            self.rescan()
+            last_rescan = time.monotonic()
+            while not stop.is_set():
+                if self.pending:
+                    timeout = min(settings.WATCH_DEBOUNCE_SECONDS, settings.WATCH_POLL_SECONDS) / 2
+                elif self.inotify:
+                    timeout = RESCAN_SECONDS
+                else:
+                    timeout = settings.WATCH_POLL_SECONDS
+                self.wait_for_changes(stop, timeout)
+
+                if self.inotify and time.monotonic() - last_rescan >= RESCAN_SECONDS:
+                    self.rescan()
+                    last_rescan = time.monotonic()
+
+                try:
+                    self.process_ready(db)
+                except sqlite3.OperationalError as e:
+                    # Locked database: files stay recorded as they were and are retried on the next cycle
+                    logger.warning(f"Watch folder: could not queue files: {e}")
+                    db.rollback()
+                    self.known.clear()  # Next rescan re-examines every file (recorded ones are skipped by stat)
+        finally:
+            db.close()
+            if self.inotify:
+                self.inotify.close()
+
+    def status(self) -> Dict:
+        return {
+            "folder": str(self.root),
+            "mode": self.mode,
+            "pending": len(self.pending),
+            "tracked": len(self.known),
+            "queued_files": self.queued_files,
+            "last_scan_at": self.last_scan_at,
+        }
+
+
+# --------------------------------------------------
+# Lifecycle + status
+# --------------------------------------------------
+def _watch_loop(watcher: FolderWatcher):
+    try:
+        watcher.run(_stop)
+    except Exception as e:
+        logger.error(f"Watch folder stopped: {e}", exc_info=True)
+
+
+def start_watch_folder():
+    """Start the watcher thread when WATCH_FOLDER is set (single server process)"""
+    global _thread, _watcher
+    if _thread or not settings.WATCH_FOLDER:
+        return
+
+    root = Path(settings.WATCH_FOLDER).expanduser()
+    if not root.is_dir():
+        logger.error(f"Watch folder {root} does not exist; watching disabled")
+        return
+
+    _stop.clear()
+    _watcher = FolderWatcher(root, settings.WATCH_MODE)
+    _thread = threading.Thread(target=_watch_loop, args=(_watcher,), name="watch-folder", daemon=True)
+    _thread.start()
+    print(f"📂 Watching {root} for PO/SRV files ({_watcher.mode})", flush=True)
+
+
+def stop_watch_folder(timeout: float = 10.0):
+    global _thread
+    _stop.set()
+    if _thread:
+        _thread.join(timeout)
+    _thread = None
+
+
+def get_watch_status(db: sqlite3.Connection, limit: int = 50) -> Dict:
+    """Watcher state plus the most recently recorded files with their ingest outcome"""
+    rows = db.execute(
+        """
+        SELECT w.path, w.kind, w.status, w.note, w.size_bytes, w.job_id, w.seq, w.updated_at,
+               f.status AS ingest_status, f.last_error AS ingest_error
+        FROM watch_files w
+        LEFT JOIN ingest_job_files f ON f.job_id = w.job_id AND f.seq = w.seq
+        ORDER BY w.updated_at DESC, w.rowid DESC
+        LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+    running = bool(_thread and _thread.is_alive())
+    return {
+        "enabled": bool(settings.WATCH_FOLDER),
+        "running": running,
+        **(_watcher.status() if _watcher and running else {"folder": settings.WATCH_FOLDER}),
+        "files": [dict(row) for row in rows],
+    }
@@ -0,0 +1,31 @@
+-- Migration 032: Upload Batches
+-- Persisted summary and per-file results of streaming batch uploads (/upload/stream),
+-- so a client can reconnect and read progress or the final summary.
+
+CREATE TABLE IF NOT EXISTS upload_batches (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL CHECK (kind IN ('po', 'srv')),
+    status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'completed', 'interrupted', 'failed')),
+    total_files INTEGER NOT NULL DEFAULT 0,
+    successful INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    total_bytes INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS upload_batch_files (
+    batch_id TEXT NOT NULL REFERENCES upload_batches(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    filename TEXT,
+    success INTEGER NOT NULL DEFAULT 0,
+    message TEXT,
+    result_json TEXT,
+    size_bytes INTEGER,
+    duration_ms REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (batch_id, seq)
+);
+
+CREATE INDEX IF NOT EXISTS idx_upload_batches_started ON upload_batches(started_at DESC);
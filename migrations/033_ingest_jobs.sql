@@ -0,0 +1,38 @@
+-- Migration 033: Ingestion Job Queue
+-- Background PO/SRV ingestion: uploads are persisted as jobs (payload included) and
+-- processed by worker threads, so batches survive browser timeouts and server restarts.
+
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL CHECK (kind IN ('po', 'srv')),
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'completed', 'failed', 'cancelled')),
+    total_files INTEGER NOT NULL DEFAULT 0,
+    succeeded_files INTEGER NOT NULL DEFAULT 0,
+    failed_files INTEGER NOT NULL DEFAULT 0,
+    cancelled_files INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS ingest_job_files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES ingest_jobs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    content BLOB,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'succeeded', 'failed', 'cancelled')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,  -- unix time; retry backoff
+    last_error TEXT,
+    result_json TEXT,
+    claimed_by TEXT,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    duration_ms REAL,
+    UNIQUE (job_id, seq)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_job_files_queue ON ingest_job_files(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_ingest_jobs_created ON ingest_jobs(created_at DESC);
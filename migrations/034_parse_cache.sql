@@ -0,0 +1,31 @@
+-- Migration 034: Parse Cache
+-- Content-addressed cache of scraper output (re-uploads of the same HTML skip parsing)
+-- and the last ingested state per PO (unchanged re-uploads skip ingestion).
+
+CREATE TABLE IF NOT EXISTS parse_cache (
+    file_hash TEXT PRIMARY KEY,          -- sha256 of the uploaded bytes
+    norm_hash TEXT NOT NULL,             -- sha256 with line-break runs normalized
+    kind TEXT NOT NULL CHECK (kind IN ('po', 'srv')),
+    parser_version INTEGER NOT NULL,
+    result_json TEXT NOT NULL,           -- normalized scraper output
+    result_hash TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_parse_cache_norm ON parse_cache(norm_hash, kind);
+CREATE INDEX IF NOT EXISTS idx_parse_cache_last_used ON parse_cache(last_used_at);
+
+CREATE TABLE IF NOT EXISTS po_ingest_state (
+    po_number TEXT PRIMARY KEY,
+    result_hash TEXT NOT NULL,           -- parse result last ingested for this PO
+    db_fingerprint TEXT NOT NULL,        -- PO header/items/deliveries right after that ingest
+    ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS parse_cache_counters (
+    counter TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
@@ -0,0 +1,18 @@
+-- Migration 035: PO Amendments
+-- Audit trail of diff-based PO re-ingestion: one row per upload that changed an existing PO,
+-- with the full change summary (header fields, items, lots, reconciled items).
+
+CREATE TABLE IF NOT EXISTS po_amendments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    po_number TEXT NOT NULL,
+    amend_from INTEGER,
+    amend_to INTEGER,
+    items_added INTEGER NOT NULL DEFAULT 0,
+    items_changed INTEGER NOT NULL DEFAULT 0,     -- includes reactivated items
+    items_cancelled INTEGER NOT NULL DEFAULT 0,
+    lots_changed INTEGER NOT NULL DEFAULT 0,      -- lots added + changed + removed
+    summary_json TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_po_amendments_po ON po_amendments(po_number, id);
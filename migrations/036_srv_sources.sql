@@ -0,0 +1,10 @@
+-- Migration 036: SRV Sources
+-- Upload each SRV was last written from: file hash and a hash of its normalized content.
+-- A re-upload skips an SRV only while its stored rows still hash to content_hash.
+
+CREATE TABLE IF NOT EXISTS srv_sources (
+    srv_number TEXT PRIMARY KEY REFERENCES srvs(srv_number) ON DELETE CASCADE,
+    file_hash TEXT NOT NULL,
+    content_hash TEXT NOT NULL,           -- of the stored rows after the write
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
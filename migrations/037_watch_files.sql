@@ -0,0 +1,20 @@
+-- Migration 037: Watch Folder Files
+-- Files picked up from WATCH_FOLDER: content hash and stat signature of the version last seen,
+-- and the ingest job file it was queued as (outcome is read from ingest_job_files).
+
+CREATE TABLE IF NOT EXISTS watch_files (
+    path TEXT PRIMARY KEY,                 -- relative to WATCH_FOLDER
+    file_hash TEXT NOT NULL,
+    kind TEXT CHECK (kind IN ('po', 'srv')),
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    mtime_ns INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL CHECK (status IN ('queued', 'duplicate', 'unrecognized')),
+    job_id TEXT REFERENCES ingest_jobs(id) ON DELETE SET NULL,
+    seq INTEGER,                           -- ingest_job_files.seq (for duplicates: of the original)
+    note TEXT,
+    first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_watch_files_hash ON watch_files(file_hash);
+CREATE INDEX IF NOT EXISTS idx_watch_files_updated ON watch_files(updated_at DESC);
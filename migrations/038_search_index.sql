@@ -0,0 +1,208 @@
+-- Migration 038: Search Index
+-- FTS5 index behind /api/search. search_docs holds one row per searchable document
+-- (item_key = '') and one per PO / invoice item (material text); search_fts indexes it as an
+-- external-content table. Triggers on the business tables keep both in sync.
+
+CREATE TABLE IF NOT EXISTS search_docs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL CHECK (kind IN ('PO', 'DC', 'Invoice')),
+    ref TEXT NOT NULL,                     -- po_number / dc_number / invoice_number
+    scope TEXT NOT NULL DEFAULT '',        -- financial_year for invoices
+    item_key TEXT NOT NULL DEFAULT '',     -- item id, '' for the document itself
+    number TEXT NOT NULL DEFAULT '',
+    party TEXT NOT NULL DEFAULT '',
+    material TEXT NOT NULL DEFAULT '',     -- material code, description and drawing number
+    UNIQUE (kind, ref, scope, item_key)
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    number, party, material,
+    content = 'search_docs',
+    content_rowid = 'id',
+    tokenize = 'unicode61',
+    prefix = '2 3 4'
+);
+
+-- Lookups behind the status of each hit (POs, DCs and invoices by number)
+CREATE INDEX IF NOT EXISTS idx_srv_items_po_number ON srv_items(po_number);
+CREATE INDEX IF NOT EXISTS idx_srv_items_challan_no ON srv_items(challan_no);
+CREATE INDEX IF NOT EXISTS idx_srvs_invoice_number ON srvs(invoice_number);
+CREATE INDEX IF NOT EXISTS idx_dci_dc_number ON delivery_challan_items(dc_number);
+CREATE INDEX IF NOT EXISTS idx_dci_po_item_id ON delivery_challan_items(po_item_id);
+
+-- search_docs -> search_fts
+CREATE TRIGGER IF NOT EXISTS trg_search_docs_ai AFTER INSERT ON search_docs
+BEGIN
+    INSERT INTO search_fts (rowid, number, party, material)
+    VALUES (new.id, new.number, new.party, new.material);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_docs_ad AFTER DELETE ON search_docs
+BEGIN
+    INSERT INTO search_fts (search_fts, rowid, number, party, material)
+    VALUES ('delete', old.id, old.number, old.party, old.material);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_docs_au AFTER UPDATE ON search_docs
+BEGIN
+    INSERT INTO search_fts (search_fts, rowid, number, party, material)
+    VALUES ('delete', old.id, old.number, old.party, old.material);
+    INSERT INTO search_fts (rowid, number, party, material)
+    VALUES (new.id, new.number, new.party, new.material);
+END;
+
+-- Purchase orders
+CREATE TRIGGER IF NOT EXISTS trg_search_po_ai AFTER INSERT ON purchase_orders
+BEGIN
+    INSERT INTO search_docs (kind, ref, number, party)
+    VALUES ('PO', new.po_number, new.po_number, COALESCE(new.supplier_name, ''))
+    ON CONFLICT (kind, ref, scope, item_key) DO UPDATE SET number = excluded.number, party = excluded.party;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_po_au AFTER UPDATE OF po_number, supplier_name ON purchase_orders
+WHEN old.po_number IS NOT new.po_number OR old.supplier_name IS NOT new.supplier_name
+BEGIN
+    DELETE FROM search_docs WHERE kind = 'PO' AND ref = old.po_number AND item_key = '';
+    INSERT INTO search_docs (kind, ref, number, party)
+    VALUES ('PO', new.po_number, new.po_number, COALESCE(new.supplier_name, ''))
+    ON CONFLICT (kind, ref, scope, item_key) DO UPDATE SET number = excluded.number, party = excluded.party;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_po_ad AFTER DELETE ON purchase_orders
+BEGIN
+    DELETE FROM search_docs WHERE kind = 'PO' AND ref = old.po_number;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_poi_ai AFTER INSERT ON purchase_order_items
+BEGIN
+    INSERT INTO search_docs (kind, ref, item_key, material)
+    VALUES (
+        'PO', new.po_number, new.id,
+        TRIM(COALESCE(new.material_code, '') || ' ' || COALESCE(new.material_description, '') || ' ' || COALESCE(new.drg_no, ''))
+    )
+    ON CONFLICT (kind, ref, scope, item_key) DO UPDATE SET material = excluded.material;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_poi_au
+AFTER UPDATE OF id, po_number, material_code, material_description, drg_no ON purchase_order_items
+WHEN old.id IS NOT new.id OR old.po_number IS NOT new.po_number
+    OR old.material_code IS NOT new.material_code
+    OR old.material_description IS NOT new.material_description
+    OR old.drg_no IS NOT new.drg_no
+BEGIN
+    DELETE FROM search_docs WHERE kind = 'PO' AND ref = old.po_number AND item_key = old.id;
+    INSERT INTO search_docs (kind, ref, item_key, material)
+    VALUES (
+        'PO', new.po_number, new.id,
+        TRIM(COALESCE(new.material_code, '') || ' ' || COALESCE(new.material_description, '') || ' ' || COALESCE(new.drg_no, ''))
+    )
+    ON CONFLICT (kind, ref, scope, item_key) DO UPDATE SET material = excluded.material;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_poi_ad AFTER DELETE ON purchase_order_items
+BEGIN
+    DELETE FROM search_docs WHERE kind = 'PO' AND ref = old.po_number AND item_key = old.id;
+END;
+
+-- Delivery challans
+CREATE TRIGGER IF NOT EXISTS trg_search_dc_ai AFTER INSERT ON delivery_challans
+BEGIN
+    INSERT INTO search_docs (kind, ref, number, party)
+    VALUES ('DC', new.dc_number, new.dc_number, COALESCE(new.consignee_name, ''))
+    ON CONFLICT (kind, ref, scope, item_key) DO UPDATE SET number = excluded.number, party = excluded.party;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_dc_au AFTER UPDATE OF dc_number, consignee_name ON delivery_challans
+WHEN old.dc_number IS NOT new.dc_number OR old.consignee_name IS NOT new.consignee_name
+BEGIN
+    DELETE FROM search_docs WHERE kind = 'DC' AND ref = old.dc_number;
+    INSERT INTO search_docs (kind, ref, number, party)
+    VALUES ('DC', new.dc_number, new.dc_number, COALESCE(new.consignee_name, ''))
+    ON CONFLICT (kind, ref, scope, item_key) DO UPDATE SET number = excluded.number, party = excluded.party;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_dc_ad AFTER DELETE ON delivery_challans
+BEGIN
+    DELETE FROM search_docs WHERE kind = 'DC' AND ref = old.dc_number;
+END;
+
+-- GST invoices (scoped by financial year)
+CREATE TRIGGER IF NOT EXISTS trg_search_inv_ai AFTER INSERT ON gst_invoices
+BEGIN
+    INSERT INTO search_docs (kind, ref, scope, number, party)
+    VALUES ('Invoice', new.invoice_number, COALESCE(new.financial_year, ''), new.invoice_number, COALESCE(new.buyer_name, ''))
+    ON CONFLICT (kind, ref, scope, item_key) DO UPDATE SET number = excluded.number, party = excluded.party;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_inv_au
+AFTER UPDATE OF invoice_number, financial_year, buyer_name ON gst_invoices
+WHEN old.invoice_number IS NOT new.invoice_number OR old.financial_year IS NOT new.financial_year
+    OR old.buyer_name IS NOT new.buyer_name
+BEGIN
+    DELETE FROM search_docs
+    WHERE kind = 'Invoice' AND ref = old.invoice_number AND scope = COALESCE(old.financial_year, '') AND item_key = '';
+    INSERT INTO search_docs (kind, ref, scope, number, party)
+    VALUES ('Invoice', new.invoice_number, COALESCE(new.financial_year, ''), new.invoice_number, COALESCE(new.buyer_name, ''))
+    ON CONFLICT (kind, ref, scope, item_key) DO UPDATE SET number = excluded.number, party = excluded.party;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_inv_ad AFTER DELETE ON gst_invoices
+BEGIN
+    DELETE FROM search_docs
+    WHERE kind = 'Invoice' AND ref = old.invoice_number AND scope = COALESCE(old.financial_year, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_invi_ai AFTER INSERT ON gst_invoice_items
+BEGIN
+    INSERT INTO search_docs (kind, ref, scope, item_key, material)
+    VALUES ('Invoice', new.invoice_number, COALESCE(new.financial_year, ''), new.id, COALESCE(new.description, ''))
+    ON CONFLICT (kind, ref, scope, item_key) DO UPDATE SET material = excluded.material;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_invi_au
+AFTER UPDATE OF id, invoice_number, financial_year, description ON gst_invoice_items
+WHEN old.id IS NOT new.id OR old.invoice_number IS NOT new.invoice_number
+    OR old.financial_year IS NOT new.financial_year OR old.description IS NOT new.description
+BEGIN
+    DELETE FROM search_docs
+    WHERE kind = 'Invoice' AND ref = old.invoice_number AND scope = COALESCE(old.financial_year, '') AND item_key = old.id;
+    INSERT INTO search_docs (kind, ref, scope, item_key, material)
+    VALUES ('Invoice', new.invoice_number, COALESCE(new.financial_year, ''), new.id, COALESCE(new.description, ''))
+    ON CONFLICT (kind, ref, scope, item_key) DO UPDATE SET material = excluded.material;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_search_invi_ad AFTER DELETE ON gst_invoice_items
+BEGIN
+    DELETE FROM search_docs
+    WHERE kind = 'Invoice' AND ref = old.invoice_number AND scope = COALESCE(old.financial_year, '') AND item_key = old.id;
+END;
+
+-- Initial population for databases that predate the index (each part runs only while it is empty)
+INSERT INTO search_docs (kind, ref, number, party)
+SELECT 'PO', po_number, po_number, COALESCE(supplier_name, '') FROM purchase_orders
+WHERE NOT EXISTS (SELECT 1 FROM search_docs WHERE kind = 'PO' AND item_key = '')
+ON CONFLICT DO NOTHING;
+
+INSERT INTO search_docs (kind, ref, item_key, material)
+SELECT 'PO', po_number, id,
+       TRIM(COALESCE(material_code, '') || ' ' || COALESCE(material_description, '') || ' ' || COALESCE(drg_no, ''))
+FROM purchase_order_items
+WHERE NOT EXISTS (SELECT 1 FROM search_docs WHERE kind = 'PO' AND item_key <> '')
+ON CONFLICT DO NOTHING;
+
+INSERT INTO search_docs (kind, ref, number, party)
+SELECT 'DC', dc_number, dc_number, COALESCE(consignee_name, '') FROM delivery_challans
+WHERE NOT EXISTS (SELECT 1 FROM search_docs WHERE kind = 'DC')
+ON CONFLICT DO NOTHING;
+
+INSERT INTO search_docs (kind, ref, scope, number, party)
+SELECT 'Invoice', invoice_number, COALESCE(financial_year, ''), invoice_number, COALESCE(buyer_name, '')
+FROM gst_invoices
+WHERE NOT EXISTS (SELECT 1 FROM search_docs WHERE kind = 'Invoice' AND item_key = '')
+ON CONFLICT DO NOTHING;
+
+INSERT INTO search_docs (kind, ref, scope, item_key, material)
+SELECT 'Invoice', invoice_number, COALESCE(financial_year, ''), id, COALESCE(description, '')
+FROM gst_invoice_items
+WHERE NOT EXISTS (SELECT 1 FROM search_docs WHERE kind = 'Invoice' AND item_key <> '')
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,80 @@
+-- Migration 039: Number Changes
+-- Inserts / deletes / renumberings of PO, DC, invoice and SRV numbers, written by triggers in the
+-- same transaction as the change. The in-process typeahead index (services/number_index.py)
+-- replays rows past its cursor, so it only ever sees committed changes.
+
+CREATE TABLE IF NOT EXISTS number_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL CHECK (kind IN ('PO', 'DC', 'Invoice', 'SRV')),
+    number TEXT NOT NULL,
+    doc_date TEXT,                         -- financial year is derived from it
+    op TEXT NOT NULL CHECK (op IN ('+', '-'))
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_po_ai AFTER INSERT ON purchase_orders
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('PO', new.po_number, new.po_date, '+');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_po_au AFTER UPDATE OF po_number, po_date ON purchase_orders
+WHEN old.po_number IS NOT new.po_number OR old.po_date IS NOT new.po_date
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('PO', old.po_number, old.po_date, '-');
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('PO', new.po_number, new.po_date, '+');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_po_ad AFTER DELETE ON purchase_orders
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('PO', old.po_number, old.po_date, '-');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_dc_ai AFTER INSERT ON delivery_challans
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('DC', new.dc_number, new.dc_date, '+');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_dc_au AFTER UPDATE OF dc_number, dc_date ON delivery_challans
+WHEN old.dc_number IS NOT new.dc_number OR old.dc_date IS NOT new.dc_date
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('DC', old.dc_number, old.dc_date, '-');
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('DC', new.dc_number, new.dc_date, '+');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_dc_ad AFTER DELETE ON delivery_challans
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('DC', old.dc_number, old.dc_date, '-');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_invoice_ai AFTER INSERT ON gst_invoices
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('Invoice', new.invoice_number, new.invoice_date, '+');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_invoice_au AFTER UPDATE OF invoice_number, invoice_date ON gst_invoices
+WHEN old.invoice_number IS NOT new.invoice_number OR old.invoice_date IS NOT new.invoice_date
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('Invoice', old.invoice_number, old.invoice_date, '-');
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('Invoice', new.invoice_number, new.invoice_date, '+');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_invoice_ad AFTER DELETE ON gst_invoices
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('Invoice', old.invoice_number, old.invoice_date, '-');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_srv_ai AFTER INSERT ON srvs
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('SRV', new.srv_number, new.srv_date, '+');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_srv_au AFTER UPDATE OF srv_number, srv_date ON srvs
+WHEN old.srv_number IS NOT new.srv_number OR old.srv_date IS NOT new.srv_date
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('SRV', old.srv_number, old.srv_date, '-');
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('SRV', new.srv_number, new.srv_date, '+');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_numbers_srv_ad AFTER DELETE ON srvs
+BEGIN
+    INSERT INTO number_changes (kind, number, doc_date, op) VALUES ('SRV', old.srv_number, old.srv_date, '-');
+END;
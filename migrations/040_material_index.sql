@@ -0,0 +1,88 @@
+-- Migration 040: Material Index
+-- One row per PO item with its material code, drawing number and description normalized for search
+-- (upper case, whitespace runs collapsed), plus a trigram FTS5 index over them so any fragment of
+-- at least 3 characters matches ("0505703" finds drawing 32510505703, also inside descriptions).
+-- Maintained by triggers on purchase_order_items, i.e. in the ingestion transaction.
+
+CREATE TABLE IF NOT EXISTS material_index (
+    id INTEGER PRIMARY KEY,
+    po_item_id TEXT NOT NULL UNIQUE,
+    material_code TEXT NOT NULL DEFAULT '',
+    drg_no TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT ''
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS material_fts USING fts5(
+    material_code, drg_no, description,
+    content = 'material_index',
+    content_rowid = 'id',
+    tokenize = 'trigram'
+);
+
+-- material_index -> material_fts
+CREATE TRIGGER IF NOT EXISTS trg_material_index_ai AFTER INSERT ON material_index
+BEGIN
+    INSERT INTO material_fts (rowid, material_code, drg_no, description)
+    VALUES (new.id, new.material_code, new.drg_no, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_material_index_ad AFTER DELETE ON material_index
+BEGIN
+    INSERT INTO material_fts (material_fts, rowid, material_code, drg_no, description)
+    VALUES ('delete', old.id, old.material_code, old.drg_no, old.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_material_index_au AFTER UPDATE ON material_index
+BEGIN
+    INSERT INTO material_fts (material_fts, rowid, material_code, drg_no, description)
+    VALUES ('delete', old.id, old.material_code, old.drg_no, old.description);
+    INSERT INTO material_fts (rowid, material_code, drg_no, description)
+    VALUES (new.id, new.material_code, new.drg_no, new.description);
+END;
+
+-- purchase_order_items -> material_index
+CREATE TRIGGER IF NOT EXISTS trg_material_poi_ai AFTER INSERT ON purchase_order_items
+BEGIN
+    INSERT INTO material_index (po_item_id, material_code, drg_no, description)
+    VALUES (
+        new.id,
+        UPPER(TRIM(COALESCE(new.material_code, ''))),
+        UPPER(TRIM(COALESCE(new.drg_no, ''))),
+        UPPER(TRIM(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(COALESCE(new.material_description, ''), char(13), ' '), char(10), ' '), char(9), ' '), '    ', ' '), '  ', ' '), '  ', ' ')))
+    )
+    ON CONFLICT (po_item_id) DO UPDATE SET
+        material_code = excluded.material_code, drg_no = excluded.drg_no, description = excluded.description;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_material_poi_au
+AFTER UPDATE OF id, material_code, material_description, drg_no ON purchase_order_items
+WHEN old.id IS NOT new.id OR old.material_code IS NOT new.material_code
+    OR old.material_description IS NOT new.material_description OR old.drg_no IS NOT new.drg_no
+BEGIN
+    DELETE FROM material_index WHERE po_item_id = old.id AND old.id IS NOT new.id;
+    INSERT INTO material_index (po_item_id, material_code, drg_no, description)
+    VALUES (
+        new.id,
+        UPPER(TRIM(COALESCE(new.material_code, ''))),
+        UPPER(TRIM(COALESCE(new.drg_no, ''))),
+        UPPER(TRIM(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(COALESCE(new.material_description, ''), char(13), ' '), char(10), ' '), char(9), ' '), '    ', ' '), '  ', ' '), '  ', ' ')))
+    )
+    ON CONFLICT (po_item_id) DO UPDATE SET
+        material_code = excluded.material_code, drg_no = excluded.drg_no, description = excluded.description;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_material_poi_ad AFTER DELETE ON purchase_order_items
+BEGIN
+    DELETE FROM material_index WHERE po_item_id = old.id;
+END;
+
+-- Initial population for databases that predate the index
+INSERT INTO material_index (po_item_id, material_code, drg_no, description)
+SELECT
+        poi.id,
+        UPPER(TRIM(COALESCE(poi.material_code, ''))),
+        UPPER(TRIM(COALESCE(poi.drg_no, ''))),
+        UPPER(TRIM(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(COALESCE(poi.material_description, ''), char(13), ' '), char(10), ' '), char(9), ' '), '    ', ' '), '  ', ' '), '  ', ' ')))
+FROM purchase_order_items poi
+WHERE NOT EXISTS (SELECT 1 FROM material_index)
+ON CONFLICT DO NOTHING;
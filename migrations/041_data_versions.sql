@@ -0,0 +1,156 @@
+-- Migration 041: Data Versions
+-- One counter per business entity, bumped by triggers in the same transaction as every insert,
+-- update or delete of its tables. Readers compare versions to tell whether cached results built
+-- from those tables (dashboard snapshot, ...) are still current.
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    entity TEXT PRIMARY KEY CHECK (entity IN ('po', 'dc', 'invoice', 'srv')),
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_versions (entity) VALUES ('po'), ('dc'), ('invoice'), ('srv') ON CONFLICT DO NOTHING;
+
+-- purchase_orders -> po
+CREATE TRIGGER IF NOT EXISTS trg_version_po_ai AFTER INSERT ON purchase_orders
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'po';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_po_au AFTER UPDATE ON purchase_orders
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'po';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_po_ad AFTER DELETE ON purchase_orders
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'po';
+END;
+
+-- purchase_order_items -> po
+CREATE TRIGGER IF NOT EXISTS trg_version_poi_ai AFTER INSERT ON purchase_order_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'po';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_poi_au AFTER UPDATE ON purchase_order_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'po';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_poi_ad AFTER DELETE ON purchase_order_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'po';
+END;
+
+-- purchase_order_deliveries -> po
+CREATE TRIGGER IF NOT EXISTS trg_version_pod_ai AFTER INSERT ON purchase_order_deliveries
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'po';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_pod_au AFTER UPDATE ON purchase_order_deliveries
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'po';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_pod_ad AFTER DELETE ON purchase_order_deliveries
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'po';
+END;
+
+-- delivery_challans -> dc
+CREATE TRIGGER IF NOT EXISTS trg_version_dc_ai AFTER INSERT ON delivery_challans
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'dc';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_dc_au AFTER UPDATE ON delivery_challans
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'dc';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_dc_ad AFTER DELETE ON delivery_challans
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'dc';
+END;
+
+-- delivery_challan_items -> dc
+CREATE TRIGGER IF NOT EXISTS trg_version_dci_ai AFTER INSERT ON delivery_challan_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'dc';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_dci_au AFTER UPDATE ON delivery_challan_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'dc';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_dci_ad AFTER DELETE ON delivery_challan_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'dc';
+END;
+
+-- gst_invoices -> invoice
+CREATE TRIGGER IF NOT EXISTS trg_version_inv_ai AFTER INSERT ON gst_invoices
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'invoice';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_inv_au AFTER UPDATE ON gst_invoices
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'invoice';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_inv_ad AFTER DELETE ON gst_invoices
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'invoice';
+END;
+
+-- gst_invoice_items -> invoice
+CREATE TRIGGER IF NOT EXISTS trg_version_invi_ai AFTER INSERT ON gst_invoice_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'invoice';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_invi_au AFTER UPDATE ON gst_invoice_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'invoice';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_invi_ad AFTER DELETE ON gst_invoice_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'invoice';
+END;
+
+-- srvs -> srv
+CREATE TRIGGER IF NOT EXISTS trg_version_srv_ai AFTER INSERT ON srvs
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'srv';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_srv_au AFTER UPDATE ON srvs
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'srv';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_srv_ad AFTER DELETE ON srvs
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'srv';
+END;
+
+-- srv_items -> srv
+CREATE TRIGGER IF NOT EXISTS trg_version_srvi_ai AFTER INSERT ON srv_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'srv';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_srvi_au AFTER UPDATE ON srv_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'srv';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_version_srvi_ad AFTER DELETE ON srv_items
+BEGIN
+    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE entity = 'srv';
+END;
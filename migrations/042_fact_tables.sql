@@ -0,0 +1,368 @@
+-- Migration 042: Fact Tables
+-- Pre-aggregated document lines for /api/reports/cube and the sales summary.
+--   fact_daily    day x buyer x material category: ordered, dispatched, invoiced, received
+--                 quantities/values and document counts
+--   fact_monthly  the same rolled up per month
+-- Category '*' rows hold the per day x buyer totals across all categories (document counts
+-- cannot be summed over categories: one DC can carry lines of several categories).
+--
+-- Triggers only record which days a write touched (fact_dirty_days, including the days of
+-- documents whose buyer or category resolution depends on the changed row). The fact service
+-- recomputes exactly those days before answering a query (services/fact_tables.py).
+
+CREATE TABLE IF NOT EXISTS fact_daily (
+    day TEXT NOT NULL,                     -- YYYY-MM-DD of the document date
+    buyer_id INTEGER NOT NULL DEFAULT 0,   -- purchase_orders.buyer_id, 0 = unknown
+    mtrl_cat TEXT NOT NULL DEFAULT '',     -- purchase_order_items.mtrl_cat, '*' = all categories
+    ordered_qty REAL NOT NULL DEFAULT 0,
+    ordered_value REAL NOT NULL DEFAULT 0,
+    dispatched_qty REAL NOT NULL DEFAULT 0,
+    dispatched_value REAL NOT NULL DEFAULT 0,  -- dispatch_qty x PO rate
+    invoiced_qty REAL NOT NULL DEFAULT 0,
+    invoiced_taxable_value REAL NOT NULL DEFAULT 0,
+    invoiced_value REAL NOT NULL DEFAULT 0,
+    received_qty REAL NOT NULL DEFAULT 0,      -- active SRVs only
+    accepted_qty REAL NOT NULL DEFAULT 0,
+    rejected_qty REAL NOT NULL DEFAULT 0,
+    po_count INTEGER NOT NULL DEFAULT 0,
+    dc_count INTEGER NOT NULL DEFAULT 0,
+    invoice_count INTEGER NOT NULL DEFAULT 0,
+    srv_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, buyer_id, mtrl_cat)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fact_monthly (
+    month TEXT NOT NULL,                   -- YYYY-MM
+    buyer_id INTEGER NOT NULL DEFAULT 0,
+    mtrl_cat TEXT NOT NULL DEFAULT '',
+    ordered_qty REAL NOT NULL DEFAULT 0,
+    ordered_value REAL NOT NULL DEFAULT 0,
+    dispatched_qty REAL NOT NULL DEFAULT 0,
+    dispatched_value REAL NOT NULL DEFAULT 0,
+    invoiced_qty REAL NOT NULL DEFAULT 0,
+    invoiced_taxable_value REAL NOT NULL DEFAULT 0,
+    invoiced_value REAL NOT NULL DEFAULT 0,
+    received_qty REAL NOT NULL DEFAULT 0,
+    accepted_qty REAL NOT NULL DEFAULT 0,
+    rejected_qty REAL NOT NULL DEFAULT 0,
+    po_count INTEGER NOT NULL DEFAULT 0,
+    dc_count INTEGER NOT NULL DEFAULT 0,
+    invoice_count INTEGER NOT NULL DEFAULT 0,
+    srv_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, buyer_id, mtrl_cat)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fact_dirty_days (
+    day TEXT PRIMARY KEY NOT NULL
+);
+
+-- Day-range lookups of the recompute
+CREATE INDEX IF NOT EXISTS idx_po_date ON purchase_orders(po_date);
+CREATE INDEX IF NOT EXISTS idx_dc_date ON delivery_challans(dc_date);
+CREATE INDEX IF NOT EXISTS idx_invoice_date ON gst_invoices(invoice_date);
+CREATE INDEX IF NOT EXISTS idx_srvs_date ON srvs(srv_date);
+CREATE INDEX IF NOT EXISTS idx_invoice_items_po_item ON gst_invoice_items(po_item_id);
+
+
+-- Purchase orders (buyer of every DC / SRV / invoice of the PO)
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_po_ai
+AFTER INSERT ON purchase_orders
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(new.po_date, 1, 10) WHERE new.po_date IS NOT NULL ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(dc.dc_date, 1, 10) FROM delivery_challans dc WHERE dc.po_number = new.po_number AND dc.dc_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.srv_number IN (SELECT srv_number FROM srv_items WHERE po_number = new.po_number) AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.po_number = new.po_number AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv WHERE inv.dc_number IN (SELECT dc_number FROM delivery_challans WHERE po_number = new.po_number) AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_po_au
+AFTER UPDATE OF po_date, buyer_id ON purchase_orders
+WHEN old.po_date IS NOT new.po_date OR old.buyer_id IS NOT new.buyer_id
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(old.po_date, 1, 10) WHERE old.po_date IS NOT NULL ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day) SELECT substr(new.po_date, 1, 10) WHERE new.po_date IS NOT NULL ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(dc.dc_date, 1, 10) FROM delivery_challans dc WHERE dc.po_number = new.po_number AND dc.dc_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.srv_number IN (SELECT srv_number FROM srv_items WHERE po_number = new.po_number) AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.po_number = new.po_number AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv WHERE inv.dc_number IN (SELECT dc_number FROM delivery_challans WHERE po_number = new.po_number) AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_po_ad
+AFTER DELETE ON purchase_orders
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(old.po_date, 1, 10) WHERE old.po_date IS NOT NULL ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(dc.dc_date, 1, 10) FROM delivery_challans dc WHERE dc.po_number = old.po_number AND dc.dc_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.srv_number IN (SELECT srv_number FROM srv_items WHERE po_number = old.po_number) AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.po_number = old.po_number AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv WHERE inv.dc_number IN (SELECT dc_number FROM delivery_challans WHERE po_number = old.po_number) AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+
+-- PO items (category and rate of the DC / SRV / invoice lines referencing them)
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_poi_ai
+AFTER INSERT ON purchase_order_items
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(po.po_date, 1, 10) FROM purchase_orders po WHERE po.po_number = new.po_number AND po.po_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(dc.dc_date, 1, 10) FROM delivery_challans dc WHERE dc.dc_number IN (SELECT dc_number FROM delivery_challan_items WHERE po_item_id = new.id) AND dc.dc_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.srv_number IN (SELECT srv_number FROM srv_items WHERE po_number = new.po_number AND po_item_no = new.po_item_no) AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv JOIN gst_invoice_items gii ON gii.invoice_number = inv.invoice_number AND gii.financial_year IS inv.financial_year WHERE gii.po_item_id = new.id AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_poi_au
+AFTER UPDATE OF po_number, po_item_no, mtrl_cat, po_rate, ord_qty ON purchase_order_items
+WHEN old.po_number IS NOT new.po_number OR old.po_item_no IS NOT new.po_item_no OR old.mtrl_cat IS NOT new.mtrl_cat
+    OR old.po_rate IS NOT new.po_rate OR old.ord_qty IS NOT new.ord_qty
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(po.po_date, 1, 10) FROM purchase_orders po WHERE po.po_number = old.po_number AND po.po_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(dc.dc_date, 1, 10) FROM delivery_challans dc WHERE dc.dc_number IN (SELECT dc_number FROM delivery_challan_items WHERE po_item_id = old.id) AND dc.dc_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.srv_number IN (SELECT srv_number FROM srv_items WHERE po_number = old.po_number AND po_item_no = old.po_item_no) AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv JOIN gst_invoice_items gii ON gii.invoice_number = inv.invoice_number AND gii.financial_year IS inv.financial_year WHERE gii.po_item_id = old.id AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(po.po_date, 1, 10) FROM purchase_orders po WHERE po.po_number = new.po_number AND po.po_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(dc.dc_date, 1, 10) FROM delivery_challans dc WHERE dc.dc_number IN (SELECT dc_number FROM delivery_challan_items WHERE po_item_id = new.id) AND dc.dc_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.srv_number IN (SELECT srv_number FROM srv_items WHERE po_number = new.po_number AND po_item_no = new.po_item_no) AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv JOIN gst_invoice_items gii ON gii.invoice_number = inv.invoice_number AND gii.financial_year IS inv.financial_year WHERE gii.po_item_id = new.id AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_poi_ad
+AFTER DELETE ON purchase_order_items
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(po.po_date, 1, 10) FROM purchase_orders po WHERE po.po_number = old.po_number AND po.po_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(dc.dc_date, 1, 10) FROM delivery_challans dc WHERE dc.dc_number IN (SELECT dc_number FROM delivery_challan_items WHERE po_item_id = old.id) AND dc.dc_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.srv_number IN (SELECT srv_number FROM srv_items WHERE po_number = old.po_number AND po_item_no = old.po_item_no) AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv JOIN gst_invoice_items gii ON gii.invoice_number = inv.invoice_number AND gii.financial_year IS inv.financial_year WHERE gii.po_item_id = old.id AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+
+-- Delivery challans
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_dc_ai
+AFTER INSERT ON delivery_challans
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(new.dc_date, 1, 10) WHERE new.dc_date IS NOT NULL ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_dc_au
+AFTER UPDATE OF dc_date, po_number ON delivery_challans
+WHEN old.dc_date IS NOT new.dc_date OR old.po_number IS NOT new.po_number
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(old.dc_date, 1, 10) WHERE old.dc_date IS NOT NULL ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day) SELECT substr(new.dc_date, 1, 10) WHERE new.dc_date IS NOT NULL ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv WHERE inv.dc_number = new.dc_number AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_dc_ad
+AFTER DELETE ON delivery_challans
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(old.dc_date, 1, 10) WHERE old.dc_date IS NOT NULL ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv WHERE inv.dc_number = old.dc_number AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_dci_ai
+AFTER INSERT ON delivery_challan_items
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(dc.dc_date, 1, 10) FROM delivery_challans dc WHERE dc.dc_number = new.dc_number AND dc.dc_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_dci_au
+AFTER UPDATE OF dc_number, po_item_id, dispatch_qty ON delivery_challan_items
+WHEN old.dc_number IS NOT new.dc_number OR old.po_item_id IS NOT new.po_item_id OR old.dispatch_qty IS NOT new.dispatch_qty
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(dc.dc_date, 1, 10) FROM delivery_challans dc WHERE dc.dc_number = old.dc_number AND dc.dc_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(dc.dc_date, 1, 10) FROM delivery_challans dc WHERE dc.dc_number = new.dc_number AND dc.dc_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_dci_ad
+AFTER DELETE ON delivery_challan_items
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(dc.dc_date, 1, 10) FROM delivery_challans dc WHERE dc.dc_number = old.dc_number AND dc.dc_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+
+-- GST invoices
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_inv_ai
+AFTER INSERT ON gst_invoices
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(new.invoice_date, 1, 10) WHERE new.invoice_date IS NOT NULL ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_inv_au
+AFTER UPDATE OF invoice_date, dc_number ON gst_invoices
+WHEN old.invoice_date IS NOT new.invoice_date OR old.dc_number IS NOT new.dc_number
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(old.invoice_date, 1, 10) WHERE old.invoice_date IS NOT NULL ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day) SELECT substr(new.invoice_date, 1, 10) WHERE new.invoice_date IS NOT NULL ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_inv_ad
+AFTER DELETE ON gst_invoices
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(old.invoice_date, 1, 10) WHERE old.invoice_date IS NOT NULL ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_invi_ai
+AFTER INSERT ON gst_invoice_items
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv WHERE inv.invoice_number = new.invoice_number AND inv.financial_year IS new.financial_year AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_invi_au
+AFTER UPDATE OF invoice_number, financial_year, po_item_id, quantity, taxable_value, total_amount ON gst_invoice_items
+WHEN old.invoice_number IS NOT new.invoice_number OR old.financial_year IS NOT new.financial_year
+    OR old.po_item_id IS NOT new.po_item_id OR old.quantity IS NOT new.quantity
+    OR old.taxable_value IS NOT new.taxable_value OR old.total_amount IS NOT new.total_amount
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv WHERE inv.invoice_number = old.invoice_number AND inv.financial_year IS old.financial_year AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv WHERE inv.invoice_number = new.invoice_number AND inv.financial_year IS new.financial_year AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_invi_ad
+AFTER DELETE ON gst_invoice_items
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(inv.invoice_date, 1, 10) FROM gst_invoices inv WHERE inv.invoice_number = old.invoice_number AND inv.financial_year IS old.financial_year AND inv.invoice_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+
+-- SRVs
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_srv_ai
+AFTER INSERT ON srvs
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(new.srv_date, 1, 10) WHERE new.srv_date IS NOT NULL ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_srv_au
+AFTER UPDATE OF srv_date, is_active ON srvs
+WHEN old.srv_date IS NOT new.srv_date OR old.is_active IS NOT new.is_active
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(old.srv_date, 1, 10) WHERE old.srv_date IS NOT NULL ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day) SELECT substr(new.srv_date, 1, 10) WHERE new.srv_date IS NOT NULL ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_srv_ad
+AFTER DELETE ON srvs
+BEGIN
+    INSERT INTO fact_dirty_days (day) SELECT substr(old.srv_date, 1, 10) WHERE old.srv_date IS NOT NULL ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_srvi_ai
+AFTER INSERT ON srv_items
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.srv_number = new.srv_number AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_srvi_au
+AFTER UPDATE OF srv_number, po_number, po_item_no, received_qty, accepted_qty, rejected_qty ON srv_items
+WHEN old.srv_number IS NOT new.srv_number OR old.po_number IS NOT new.po_number OR old.po_item_no IS NOT new.po_item_no
+    OR old.received_qty IS NOT new.received_qty OR old.accepted_qty IS NOT new.accepted_qty
+    OR old.rejected_qty IS NOT new.rejected_qty
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.srv_number = old.srv_number AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.srv_number = new.srv_number AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_fact_srvi_ad
+AFTER DELETE ON srv_items
+BEGIN
+    INSERT INTO fact_dirty_days (day)
+    SELECT DISTINCT substr(s.srv_date, 1, 10) FROM srvs s WHERE s.srv_number = old.srv_number AND s.srv_date IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+
+
+-- Databases that predate the fact tables: every document day starts dirty (built on first use)
+INSERT INTO fact_dirty_days (day)
+SELECT day FROM (
+    SELECT substr(po_date, 1, 10) AS day FROM purchase_orders
+    UNION SELECT substr(dc_date, 1, 10) FROM delivery_challans
+    UNION SELECT substr(invoice_date, 1, 10) FROM gst_invoices
+    UNION SELECT substr(srv_date, 1, 10) FROM srvs
+)
+WHERE day IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM fact_daily)
+  AND NOT EXISTS (SELECT 1 FROM fact_dirty_days)
+ON CONFLICT DO NOTHING;
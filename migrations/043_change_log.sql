@@ -0,0 +1,26 @@
+-- Migration 043: Change Log
+-- Append-only outbox of document mutations, written by the service write paths in the same
+-- transaction as the change (services/change_log.py) and read by GET /api/changes?since=<seq>.
+-- version counts the changes of one document (counter: migration 046). Rows older than the retention window are
+-- compacted to the latest change per document; compacted deletions advance purged_through,
+-- and clients whose cursor is behind it must resynchronise.
+
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,  -- cursor (never reused after compaction)
+    entity TEXT NOT NULL CHECK (entity IN ('po', 'dc', 'invoice', 'srv', 'po_note')),
+    entity_id TEXT NOT NULL,
+    scope TEXT NOT NULL DEFAULT '',        -- financial_year for invoices
+    op TEXT NOT NULL CHECK (op IN ('create', 'update', 'delete')),
+    version INTEGER NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_change_log_entity ON change_log(entity, entity_id, scope, seq);
+
+CREATE TABLE IF NOT EXISTS change_log_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    purged_through INTEGER NOT NULL DEFAULT 0,  -- highest seq of a compacted-away deletion
+    compacted_at TEXT
+);
+
+INSERT INTO change_log_meta (id) VALUES (1) ON CONFLICT DO NOTHING;
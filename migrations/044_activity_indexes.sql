@@ -0,0 +1,17 @@
+-- Migration 044: Activity Feed Indexes
+-- Each document type is read newest first by its activity sort key (created_at, falling back
+-- to the document date); /api/dashboard/activity merges the three index scans and stops at
+-- the page size (services/activity_feed.py uses the identical expressions).
+
+CREATE INDEX IF NOT EXISTS idx_po_activity
+ON purchase_orders(COALESCE(NULLIF(created_at, ''), po_date, ''), po_number);
+
+CREATE INDEX IF NOT EXISTS idx_dc_activity
+ON delivery_challans(COALESCE(NULLIF(created_at, ''), dc_date, ''), dc_number);
+
+CREATE INDEX IF NOT EXISTS idx_invoice_activity
+ON gst_invoices(COALESCE(NULLIF(created_at, ''), invoice_date, ''), invoice_number, financial_year);
+
+-- Status rollups of the page rows (dropped by earlier table rebuilds, restored here)
+CREATE INDEX IF NOT EXISTS idx_pod_po_item ON purchase_order_deliveries(po_item_id, lot_no);
+CREATE INDEX IF NOT EXISTS idx_srv_items_srv_number ON srv_items(srv_number);
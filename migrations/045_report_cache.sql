@@ -0,0 +1,26 @@
+-- Migration 045: Report Cache
+-- Results of /api/reports endpoints keyed by endpoint + normalized parameters + format
+-- (services/report_cache.py). An entry is current while data_versions (migration 041) still
+-- match `versions`; invoice register entries covering closed financial years only are pinned
+-- and served regardless, until invalidated explicitly. Excel artifacts live in
+-- db/report_cache/<file_name>.
+
+CREATE TABLE IF NOT EXISTS report_cache (
+    cache_key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    params TEXT NOT NULL,
+    format TEXT NOT NULL CHECK (format IN ('json', 'xlsx')),
+    start_date TEXT,
+    end_date TEXT,
+    versions TEXT NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    file_name TEXT,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_report_cache_endpoint ON report_cache(endpoint);
+CREATE INDEX IF NOT EXISTS idx_report_cache_period ON report_cache(start_date, end_date);
@@ -0,0 +1,18 @@
+-- Migration 046: Change Log Versions
+-- Latest change_log.version per document. Compaction drops old rows (deletions included) from
+-- change_log but never touches this table, so a document recreated after its history was
+-- compacted continues from its last version instead of starting again at 1.
+
+CREATE TABLE IF NOT EXISTS change_log_versions (
+    entity TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    scope TEXT NOT NULL DEFAULT '',
+    version INTEGER NOT NULL,
+    PRIMARY KEY (entity, entity_id, scope)
+) WITHOUT ROWID;
+
+-- Seed from the log written before this table existed (no-op afterwards)
+INSERT INTO change_log_versions (entity, entity_id, scope, version)
+SELECT entity, entity_id, scope, MAX(version) FROM change_log
+GROUP BY entity, entity_id, scope
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,157 @@
+"""
+Excel Export Benchmark
+Peak memory and time of a large register export: the previous DataFrame path
+(pd.read_sql_query + pd.ExcelWriter into BytesIO, widths over every cell) against the
+streaming engine (cursor -> xlsxwriter constant_memory -> spooled temp file, see
+backend/services/excel_export.py).
+
+Each mode runs in its own process on a generated invoice-register table, so the reported
+peak RSS (ru_maxrss) belongs to that export alone.
+
+Usage:
+    python scripts/benchmark_excel_export.py [--rows 500000] [--mode both|dataframe|stream]
+"""
+
+import argparse
+import io
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+REGISTER_QUERY = """
+    SELECT invoice_number, invoice_date, dc_number, po_numbers, buyer_gstin,
+           taxable_value, cgst, sgst, igst, total_invoice_value
+    FROM register
+    ORDER BY invoice_date DESC
+"""
+
+
+def build_database(path: Path, rows: int):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE register (
+            invoice_number TEXT, invoice_date TEXT, dc_number TEXT, po_numbers TEXT, buyer_gstin TEXT,
+            taxable_value REAL, cgst REAL, sgst REAL, igst REAL, total_invoice_value REAL
+        )
+        """
+    )
+    conn.executemany(
+        "INSERT INTO register VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (
+                f"INV/{i:07d}",
+                f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                f"DC{i:07d}",
+                f"{1100000 + i % 5000}, {1200000 + i % 700}",
+                f"23AAACB{i % 10000:04d}M1Z{i % 10}",
+                1000 + i % 9973 * 1.5,
+                90 + i % 97 * 0.5,
+                90 + i % 97 * 0.5,
+                None if i % 3 else 180.0,
+                1180 + i % 9973 * 1.77,
+            )
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def export_dataframe(db: sqlite3.Connection) -> int:
+    import pandas as pd
+
+    df = pd.read_sql_query(REGISTER_QUERY, db)
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name="Report")
+        worksheet = writer.sheets["Report"]
+        for i, col in enumerate(df.columns):
+            # str() per cell: astype(str).map(len) fails on NULLs in numeric columns with pandas 2.x
+            width = max(df[col].map(lambda v: len(str(v))).max(), len(col)) + 4
+            worksheet.set_column(i, i, width)
+    return len(output.getvalue())
+
+
+def export_stream(db: sqlite3.Connection) -> int:
+    import asyncio
+
+    from backend.services.excel_export import query_xlsx_response
+
+    response = query_xlsx_response(db, REGISTER_QUERY, (), "register.xlsx")
+
+    async def consume() -> int:
+        # Read the body the way the server sends it
+        return sum([len(chunk) async for chunk in response.body_iterator])
+
+    return asyncio.run(consume())
+
+
+def run_mode(db_path: Path, mode: str):
+    import pandas  # noqa: F401  (imported up front so both modes start from the same baseline)
+    import xlsxwriter  # noqa: F401
+
+    from backend.services import excel_export  # noqa: F401
+
+    baseline = _peak_rss_mb()
+    db = sqlite3.connect(db_path)
+    started = time.perf_counter()
+    size = export_dataframe(db) if mode == "dataframe" else export_stream(db)
+    elapsed = time.perf_counter() - started
+    db.close()
+    peak = _peak_rss_mb()
+    print(f"{mode}\t{elapsed:.2f}\t{peak:.1f}\t{peak - baseline:.1f}\t{size}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--mode", choices=["both", "dataframe", "stream"], default="both")
+    parser.add_argument("--db", type=Path, help=argparse.SUPPRESS)  # child process: existing register db
+    args = parser.parse_args()
+
+    if args.db:
+        run_mode(args.db, args.mode)
+        return
+
+    modes = ["dataframe", "stream"] if args.mode == "both" else [args.mode]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "register.db"
+        print(f"🔧 Generating {args.rows:,} register rows...", flush=True)
+        build_database(db_path, args.rows)
+
+        results = {}
+        for mode in modes:
+            out = subprocess.run(
+                [sys.executable, __file__, "--db", str(db_path), "--mode", mode],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip().splitlines()[-1]
+            _, elapsed, peak, growth, size = out.split("\t")
+            results[mode] = float(growth)
+            print(
+                f"   {mode:<10} {float(elapsed):7.2f} s   peak RSS {float(peak):8.1f} MB "
+                f"(+{float(growth):.1f} MB over baseline)   {int(size) / 1024 / 1024:.1f} MB xlsx",
+                flush=True,
+            )
+
+    if len(results) == 2:
+        ratio = results["dataframe"] / max(results["stream"], 0.1)
+        print(f"✅ Streaming export used {ratio:.0f}x less additional memory for {args.rows:,} rows")
+
+
+if __name__ == "__main__":
+    main()
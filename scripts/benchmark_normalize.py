@@ -0,0 +1,289 @@
+"""
+Normalization Equivalence Check + Micro-benchmark
+Compares every backend.core.normalize function with the implementation it replaced
+(po_scraper, srv_scraper, number_utils and date_utils helpers, copied below as LEGACY_*)
+on fixed edge cases plus random cells, then times both on a realistic column of cells.
+
+Usage:
+    python scripts/benchmark_normalize.py [--cases 50000] [--cells 20000] [--repeat 5]
+"""
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backend.core import normalize  # noqa: E402
+
+
+# --------------------------------------------------
+# Legacy implementations (reference behaviour)
+# --------------------------------------------------
+def legacy_clean(text):
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def legacy_po_int(val):
+    try:
+        v = re.sub(r"[^\d]", "", str(val))
+        return int(v) if v else None
+    except Exception:
+        return None
+
+
+def legacy_po_float(val):
+    try:
+        v = re.sub(r"[^\d.\-]", "", str(val))
+        return float(v) if v else None
+    except Exception:
+        return None
+
+
+def legacy_po_date(val):
+    if not val:
+        return ""
+    s = str(val).strip().upper()
+    m = re.search(r"(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{2,4})", s)
+    if m:
+        d, mth, y = m.groups()
+        if len(y) == 2:
+            y = "20" + y
+        return f"{int(d):02d}/{int(mth):02d}/{int(y)}"
+    m = re.search(r"(\d{1,2})[\/\-]([A-Z]{3})[\/\-](\d{2,4})", s)
+    if m:
+        d, mon, y = m.groups()
+        if len(y) == 2:
+            y = "20" + y
+        try:
+            return datetime.strptime(f"{d}-{mon}-{y}", "%d-%b-%Y").strftime("%d/%m/%Y")
+        except Exception:
+            return ""
+    return ""
+
+
+def legacy_srv_date(date_str):
+    if not date_str or date_str == "-" or date_str == "":
+        return None
+    date_str = date_str.strip()
+    for fmt in ["%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d.%m.%Y", "%d %m %Y", "%d/%m/%y", "%d-%m-%y", "%d.%m.%y"]:
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return date_str
+
+
+def legacy_srv_int(value_str):
+    if value_str is None or value_str == "-" or value_str.strip() == "":
+        return None
+    try:
+        return int(value_str.strip())
+    except ValueError:
+        return None
+
+
+def legacy_srv_decimal(value_str):
+    if not value_str or value_str == "-" or value_str == "":
+        return 0.0
+    try:
+        return float(value_str.replace(",", "").strip())
+    except ValueError:
+        return 0.0
+
+
+def legacy_to_int(value):
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        value = value.replace(",", "").replace(" ", "")
+        try:
+            return int(float(value))
+        except (ValueError, TypeError):
+            return None
+    return None
+
+
+def legacy_to_float(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        value = value.replace(",", "").replace(" ", "")
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return None
+    return None
+
+
+def legacy_to_qty(value):
+    val = legacy_to_float(value)
+    return None if val is None else round(val, 3)
+
+
+def legacy_iso_date(val):
+    if not val:
+        return ""
+    s = str(val).strip().upper()
+    if re.match(r"^\d{4}-\d{2}-\d{2}$", s):
+        return s
+    m = re.search(r"(\d{1,2})[\/\-\.\s](\d{1,2})[\/\-\.\s](\d{2,4})", s)
+    if m:
+        d, mth, y = m.groups()
+        if len(y) == 2:
+            y = "20" + y
+        return f"{int(y)}-{int(mth):02d}-{int(d):02d}"
+    m = re.search(r"(\d{1,2})[\/\-\.\s]([A-Z]{3})[\/\-\.\s](\d{2,4})", s)
+    if m:
+        d, mon, y = m.groups()
+        if len(y) == 2:
+            y = "20" + y
+        try:
+            return datetime.strptime(f"{d}-{mon}-{y}", "%d-%b-%Y").strftime("%Y-%m-%d")
+        except ValueError:
+            return ""
+    return ""
+
+
+# (name, legacy, new, accepts non-str input)
+PAIRS = [
+    ("clean", legacy_clean, normalize.clean, False),
+    ("po_int", legacy_po_int, normalize.po_int, True),
+    ("po_float", legacy_po_float, normalize.po_float, True),
+    ("po_date", legacy_po_date, normalize.po_date, True),
+    ("srv_int", legacy_srv_int, normalize.srv_int, False),
+    ("srv_decimal", legacy_srv_decimal, normalize.srv_decimal, False),
+    ("srv_date", legacy_srv_date, normalize.srv_date, False),
+    ("to_int", legacy_to_int, normalize.to_int, True),
+    ("to_float", legacy_to_float, normalize.to_float, True),
+    ("to_qty", legacy_to_qty, normalize.to_qty, True),
+    ("iso_date", legacy_iso_date, normalize.iso_date, True),
+]
+
+EDGE_CASES = [
+    None, "", " ", "-", " - ", "0", "00", "12", " 12 ", "-5", "+5", "1,234", "1,234.50", "1 000", "1_000",
+    "12abc", "Rs. 10", "1e5", "inf", "-inf", "nan", "1e400", "٣", "²", "\xa012\xa0", " ", "\x1c1\x1f",
+    "10/01/2022", "1/2/2025", "05-01-22", "27.09.25", "27 09 2025", "2022-01-06", "2022-1-6", "31/02/2024",
+    "1-JAN-24", "01-jan-2024", "1.JAN.2024", "1 JAN 2024", "32-JAN-24", "PO DATE 03/04/2023", "x 03/04/2023",
+    "99999999999999999999", "12.5.", "..", "--", "\n\t", "a  b\t\nc", 0, 1, 2.5, -3.7, True, False,
+]
+ALPHABET = "0123456789,.-/ :+eEJANFBMRPYULGSOCTVDjan\t\xa0٣"
+DATE_POOL = ["10/01/2022", "05-01-22", "1-JAN-24", "2022-01-06", "27.09.25", "27 09 2025"]
+
+
+def outcome(fn, value):
+    try:
+        result = fn(value)
+    except Exception as e:
+        return "error", type(e).__name__
+    return type(result).__name__, repr(result)
+
+
+def random_cell(rng):
+    roll = rng.random()
+    if roll < 0.3:
+        return rng.choice(DATE_POOL)
+    if roll < 0.35:
+        return rng.choice([None, 0, 1.5, -2, True])
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 12)))
+
+
+def check_equivalence(cases: int, seed: int = 7) -> int:
+    rng = random.Random(seed)
+    values = EDGE_CASES + [random_cell(rng) for _ in range(cases)]
+    failures = 0
+    for name, legacy, new, any_type in PAIRS:
+        inputs = values if any_type else [v for v in values if v is None or isinstance(v, str)]
+        mismatches = [(v, outcome(legacy, v), outcome(new, v)) for v in inputs if outcome(legacy, v) != outcome(new, v)]
+        column = normalize.normalize_column(inputs, lambda v, new=new: outcome(new, v))
+        if column != [outcome(new, v) for v in inputs]:
+            mismatches.append(("<normalize_column>", "", ""))
+        status = "ok" if not mismatches else f"{len(mismatches)} MISMATCHES"
+        print(f"  {name:12} {len(inputs):>7} inputs  {status}")
+        for value, expected, actual in mismatches[:5]:
+            print(f"      {value!r}: legacy={expected} new={actual}")
+        failures += len(mismatches)
+    return failures
+
+
+def realistic_column(cells: int, seed: int = 11):
+    """Cells as they come out of a PO/SRV export: few distinct dates, many quantities"""
+    rng = random.Random(seed)
+    dates = [f"{d:02d}/{m:02d}/2024" for d, m in zip(rng.sample(range(1, 29), 12), rng.choices(range(1, 13), k=12), strict=True)]
+    return {
+        "date": [rng.choice(dates) for _ in range(cells)],
+        "qty": [f"{rng.randint(1, 5000):,}.{rng.randint(0, 999):03d}" for _ in range(cells)],
+        "int": [str(rng.randint(1, 60)) for _ in range(cells)],
+        "text": [f"  {rng.choice(['NOS', 'KG', 'SET'])}\n\t " for _ in range(cells)],
+    }
+
+
+def benchmark(cells: int, repeat: int):
+    cols = realistic_column(cells)
+    runs = [
+        ("clean", legacy_clean, normalize.clean, "text"),
+        ("po_int", legacy_po_int, normalize.po_int, "int"),
+        ("po_float", legacy_po_float, normalize.po_float, "qty"),
+        ("po_date", legacy_po_date, normalize.po_date, "date"),
+        ("srv_int", legacy_srv_int, normalize.srv_int, "int"),
+        ("srv_decimal", legacy_srv_decimal, normalize.srv_decimal, "qty"),
+        ("srv_date", legacy_srv_date, normalize.srv_date, "date"),
+        ("to_int", legacy_to_int, normalize.to_int, "int"),
+        ("to_qty", legacy_to_qty, normalize.to_qty, "qty"),
+        ("iso_date", legacy_iso_date, normalize.iso_date, "date"),
+    ]
+    print(f"\n  {'function':12} {'legacy':>10} {'new':>10} {'column':>10}  (ms per {cells} cells, best of {repeat})")
+    for name, legacy, new, kind in runs:
+        values = cols[kind]
+        # Loop variables bound as defaults: each timed closure uses this iteration's functions
+        t_legacy = min(
+            timeit.repeat(lambda legacy=legacy, values=values: [legacy(v) for v in values], number=1, repeat=repeat)
+        )
+        t_new = min(timeit.repeat(lambda new=new, values=values: [new(v) for v in values], number=1, repeat=repeat))
+        t_column = min(
+            timeit.repeat(
+                lambda new=new, values=values: normalize.normalize_column(values, new), number=1, repeat=repeat
+            )
+        )
+        print(
+            f"  {name:12} {t_legacy * 1000:>10.2f} {t_new * 1000:>10.2f} {t_column * 1000:>10.2f}"
+            f"  x{t_legacy / min(t_new, t_column):.1f}"
+        )
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cases", type=int, default=50000, help="random cells for the equivalence check")
+    ap.add_argument("--cells", type=int, default=20000, help="column length for the micro-benchmark")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print("Equivalence (legacy vs backend.core.normalize):")
+    failures = check_equivalence(args.cases)
+    benchmark(args.cells, args.repeat)
+
+    if failures:
+        print(f"\n❌ {failures} mismatches")
+        sys.exit(1)
+    print("\n✅ All normalizers match their legacy implementations")
+
+
+if __name__ == "__main__":
+    main()
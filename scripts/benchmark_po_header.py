@@ -0,0 +1,77 @@
+"""
+PO Header Extraction Benchmark
+Compares the single-pass HeaderCellGrid against the original per-label table scan
+on a corpus of real PO HTML files, and fails if any header differs.
+
+Usage:
+    python scripts/benchmark_po_header.py <po_html_dir> [--repeat 5]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from backend.services.po_scraper import extract_po_header  # noqa: E402
+
+
+def load_corpus(corpus_dir: Path):
+    files = sorted(p for p in corpus_dir.rglob("*") if p.suffix.lower() in (".html", ".htm"))
+    return [(p.name, p.read_bytes()) for p in files]
+
+
+def time_extract(soups, use_grid: bool, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for soup in soups:
+            extract_po_header(soup, use_grid=use_grid)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=Path, help="Directory containing PO HTML files")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best run is reported)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print(f"❌ No .html files found under {args.corpus}")
+        sys.exit(1)
+
+    soups = [BeautifulSoup(content, "lxml") for _, content in corpus]
+
+    # Parity: grid output must match the reference scan field-for-field
+    mismatches = 0
+    for (name, _), soup in zip(corpus, soups, strict=True):
+        expected = extract_po_header(soup, use_grid=False)
+        actual = extract_po_header(soup, use_grid=True)
+        if expected != actual:
+            mismatches += 1
+            diff = {k: (expected.get(k), actual.get(k)) for k in expected.keys() | actual.keys() if expected.get(k) != actual.get(k)}
+            print(f"❌ {name}: {diff}")
+
+    scan_time = time_extract(soups, use_grid=False, repeat=args.repeat)
+    grid_time = time_extract(soups, use_grid=True, repeat=args.repeat)
+
+    n = len(soups)
+    print(f"Corpus: {n} files")
+    print(f"Per-label scan : {scan_time:.4f}s ({scan_time / n * 1000:.2f} ms/file)")
+    print(f"Cell grid      : {grid_time:.4f}s ({grid_time / n * 1000:.2f} ms/file)")
+    print(f"Speedup        : {scan_time / grid_time:.1f}x")
+
+    if mismatches:
+        print(f"❌ {mismatches} file(s) differ")
+        sys.exit(1)
+    print("✅ Header output identical on all files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+PO Ingestion Benchmark
+Compares the write paths of POIngestionService.ingest_po on synthetic large POs:
+  row-wise - original per-row statements, full TOT sync on re-upload
+  bulk     - prefetch + executemany rewrite of all items/lots, full TOT sync on re-upload
+  diff     - amendment engine: writes only changed rows, reconciles only items whose quantities changed
+Fails if bulk and row-wise leave different rows behind, or if diff leaves different source
+columns (derived delivered/received quantities of untouched items are kept as stored by design).
+
+Scenarios per path, each on an empty database with the schema of db/database:
+  new      - first upload of the PO
+  reupload - same PO uploaded again (existing items, delivery tracking carried over, TOT sync)
+  amend    - amendment dropping 10% of the items and rescheduling the lots of every 5th item
+
+Usage:
+    python scripts/benchmark_po_ingest.py [--items 1000] [--lots 2] [--repeat 3]
+"""
+
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backend.db.session import DATABASE_PATH, MIGRATIONS_DIR, RUNTIME_MIGRATIONS  # noqa: E402
+from backend.services.ingest_po import POIngestionService  # noqa: E402
+from backend.services.reconciliation_service import ReconciliationService  # noqa: E402
+
+PO_NUMBER = "9900001"
+
+
+class CountingConnection(sqlite3.Connection):
+    """Counts execute()/executemany() calls made by the ingestion code"""
+
+    calls = 0
+
+    def execute(self, *args, **kwargs):
+        self.calls += 1
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.calls += 1
+        return super().executemany(*args, **kwargs)
+
+
+def synthetic_po(items: int, lots: int, drop_every: int = 0):
+    header = {
+        "PURCHASE ORDER": PO_NUMBER,
+        "PO DATE": "01/04/2025",
+        "SUPP NAME M/S": "Benchmark Supplier",
+        "SUPP CODE": "S001",
+        "DVN": "10",
+        "PO-VALUE": str(items * 100),
+        "NET PO VAL": str(items * 100),
+        "AMEND NO": "1" if drop_every else "0",
+    }
+    reschedule = "31/07/2025" if drop_every else "30/06/2025"
+    po_items = []
+    for n in range(1, items + 1):
+        if drop_every and n % drop_every == 0:
+            continue
+        po_items.append(
+            {
+                "PO ITM": n,
+                "MATERIAL CODE": f"M{n:06d}",
+                "DESCRIPTION": f"Material {n}",
+                "UNIT": "NOS",
+                "PO RATE": 100.0,
+                "ORD QTY": 10.0 * lots,
+                "deliveries": [
+                    {
+                        "LOT NO": lot,
+                        "DELY QTY": 10.0,
+                        "DELY DATE": reschedule if n % 5 == 0 else "30/06/2025",
+                        "RCD QTY": float(lot % 2),
+                    }
+                    for lot in range(1, lots + 1)
+                ],
+            }
+        )
+    return header, po_items
+
+
+def clone_schema(source: Path, conn: sqlite3.Connection):
+    """Create the tables, indexes, views and triggers of the app database plus runtime migrations (no data)"""
+    # Read the schema from a copy: even a read-only open of a WAL database creates its
+    # -wal/-shm files next to it (i.e. in the repository's db/ folder)
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / "schema_source"
+        shutil.copyfile(source, copy)
+        src = sqlite3.connect(str(copy))
+        try:
+            # FTS5 shadow tables (<fts>_data, _idx, ...) are created by their virtual table
+            shadow = {row[1] for row in src.execute("PRAGMA table_list") if row[2] == "shadow"}
+            ddl = src.execute(
+                """
+                SELECT name, sql FROM sqlite_master
+                WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+                ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 WHEN 'view' THEN 2 ELSE 3 END
+                """
+            ).fetchall()
+        finally:
+            src.close()
+    for name, sql in ddl:
+        if name not in shadow:
+            conn.execute(sql)
+    # Tables the app creates at startup (absent from databases that never ran it)
+    for filename in RUNTIME_MIGRATIONS:
+        conn.executescript((MIGRATIONS_DIR / filename).read_text(encoding="utf-8"))
+    conn.commit()
+
+
+def fresh_database(path: Path, source: Path) -> CountingConnection:
+    conn = sqlite3.connect(str(path), factory=CountingConnection)
+    clone_schema(source, conn)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.commit()
+    return conn
+
+
+class SyncMeter:
+    """Measures ReconciliationService sync calls inside ingest_po (full or per-item) so they can be reported apart"""
+
+    METHODS = ("sync_po", "sync_po_items")
+
+    def __init__(self, conn: CountingConnection, executed: list):
+        self.conn, self.executed = conn, executed
+        self.originals = {name: getattr(ReconciliationService, name) for name in self.METHODS}
+        self.reset()
+
+    def install(self):
+        for name, original in self.originals.items():
+            setattr(ReconciliationService, name, self.wrap(original))
+
+    def uninstall(self):
+        for name, original in self.originals.items():
+            setattr(ReconciliationService, name, original)
+
+    def reset(self):
+        self.calls = self.sql = 0
+        self.seconds = 0.0
+
+    def wrap(self, original):
+        def metered(db, *args):
+            return self.measure(original, db, *args)
+
+        return metered
+
+    def measure(self, original, db, *args):
+        calls, sql, start = self.conn.calls, len(self.executed), time.perf_counter()
+        try:
+            return original(db, *args)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.calls += self.conn.calls - calls
+            self.sql += len(self.executed) - sql
+
+
+PATHS = {
+    "row-wise": {"bulk": False, "amend": False},
+    "bulk": {"bulk": True, "amend": False},
+    "diff": {"bulk": True, "amend": True},
+}
+
+
+def run_scenarios(conn: CountingConnection, path: str, items: int, lots: int):
+    """
+    Run new -> reupload -> amend.
+    Returns {scenario: (calls, sql_executions, seconds, sync_seconds)}, counts and time excluding sync_po.
+    """
+    service = POIngestionService()
+    executed = []
+    conn.set_trace_callback(lambda sql: executed.append(sql) if not sql.startswith("--") else None)
+    meter = SyncMeter(conn, executed)
+    meter.install()
+
+    scenarios = {
+        "new": synthetic_po(items, lots),
+        "reupload": synthetic_po(items, lots),
+        "amend": synthetic_po(items, lots, drop_every=10),
+    }
+    results = {}
+    try:
+        for name, (header, po_items) in scenarios.items():
+            conn.calls = 0
+            executed.clear()
+            meter.reset()
+            start = time.perf_counter()
+            service.ingest_po(conn, dict(header), po_items, **PATHS[path])
+            conn.commit()
+            elapsed = time.perf_counter() - start
+            results[name] = (conn.calls - meter.calls, len(executed) - meter.sql, elapsed - meter.seconds, meter.seconds)
+    finally:
+        meter.uninstall()
+        conn.set_trace_callback(None)
+    return results
+
+
+def snapshot(conn: sqlite3.Connection, derived: bool = True):
+    """PO rows without generated ids/timestamps, for parity between paths (derived=False: source columns only)"""
+    item_derived = ", rcd_qty, delivered_qty, pending_qty" if derived else ""
+    lot_derived = ", d.delivered_qty, d.received_qty" if derived else ""
+    header = conn.execute(
+        "SELECT po_date, amend_no, po_value, net_po_value FROM purchase_orders WHERE po_number = ?", (PO_NUMBER,)
+    ).fetchall()
+    items = conn.execute(
+        f"""
+        SELECT po_item_no, status, material_code, material_description, unit, po_rate, ord_qty{item_derived}
+        FROM purchase_order_items WHERE po_number = ? ORDER BY po_item_no
+        """,
+        (PO_NUMBER,),
+    ).fetchall()
+    deliveries = conn.execute(
+        f"""
+        SELECT i.po_item_no, d.lot_no, d.dely_qty, d.dely_date, d.entry_allow_date, d.dest_code,
+               d.manual_override_qty{lot_derived}
+        FROM purchase_order_deliveries d JOIN purchase_order_items i ON i.id = d.po_item_id
+        WHERE i.po_number = ? ORDER BY i.po_item_no, d.lot_no
+        """,
+        (PO_NUMBER,),
+    ).fetchall()
+    return [tuple(r) for r in header], [tuple(r) for r in items], [tuple(r) for r in deliveries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000, help="Items per PO")
+    parser.add_argument("--lots", type=int, default=2, help="Delivery lots per item")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best run is reported)")
+    parser.add_argument("--schema-db", type=Path, default=DATABASE_PATH, help="Database to copy the schema from")
+    args = parser.parse_args()
+
+    best = {}
+    snapshots = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in PATHS:
+            for run in range(args.repeat):
+                db_path = Path(tmp) / f"bench_{path}_{run}.db"
+                conn = fresh_database(db_path, args.schema_db)
+                try:
+                    results = run_scenarios(conn, path, args.items, args.lots)
+                    snapshots[path] = (snapshot(conn), snapshot(conn, derived=False))
+                finally:
+                    conn.close()
+                for name, result in results.items():
+                    prev = best.get((path, name))
+                    if prev is None or result[2] + result[3] < prev[2] + prev[3]:
+                        best[(path, name)] = result
+
+    if snapshots["row-wise"][0] != snapshots["bulk"][0]:
+        print("❌ Bulk and row-wise ingestion produced different PO rows")
+        sys.exit(1)
+    if snapshots["row-wise"][1] != snapshots["diff"][1]:
+        print("❌ Diff and row-wise ingestion produced different PO source columns")
+        sys.exit(1)
+
+    print(f"PO with {args.items} items x {args.lots} lots (best of {args.repeat}); TOT sync reported separately")
+    print(f"{'scenario':<10} {'path':<9} {'calls':>8} {'sql execs':>10} {'ingest ms':>10} {'sync ms':>10} {'total ms':>10}")
+    for name in ("new", "reupload", "amend"):
+        for path in PATHS:
+            calls, executed, seconds, sync_seconds = best[(path, name)]
+            print(
+                f"{name:<10} {path:<9} {calls:>8} {executed:>10} "
+                f"{seconds * 1000:>10.1f} {sync_seconds * 1000:>10.1f} {(seconds + sync_seconds) * 1000:>10.1f}"
+            )
+        baseline = sum(best[("row-wise", name)][2:])
+        for path in ("bulk", "diff"):
+            speedup = baseline / sum(best[(path, name)][2:])
+            print(f"{'':<10} {path + ' x':<9} {'':>8} {'':>10} {'':>10} {'':>10} {speedup:>9.1f}x")
+    print("✅ Row-wise and bulk paths produced identical items and deliveries")
+    print("✅ Diff path produced identical source columns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Scraper Engine Throughput Benchmark
+Measures end-to-end parse + extraction throughput (files/sec, MB/sec) of the
+BeautifulSoup ("bs4") and lxml engines on a corpus of PO and/or SRV HTML files.
+
+Usage:
+    python scripts/benchmark_scrapers.py --po-dir <po_html_dir> --srv-dir <srv_html_dir> [--repeat 3]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backend.services.po_scraper import parse_po_html  # noqa: E402
+from backend.services.srv_scraper import scrape_srv_html  # noqa: E402
+
+ENGINES = ("bs4", "lxml")
+
+
+def load(corpus_dir: Path):
+    return [p.read_bytes() for p in sorted(corpus_dir.rglob("*")) if p.suffix.lower() in (".html", ".htm")]
+
+
+def throughput(contents, run, engine: str, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for content in contents:
+            run(content, engine)
+        best = min(best, time.perf_counter() - start)
+    total_mb = sum(len(c) for c in contents) / (1024 * 1024)
+    return len(contents) / best, total_mb / best, best
+
+
+def report(label: str, contents, run, repeat: int):
+    if not contents:
+        print(f"{label}: no files")
+        return
+    size_mb = sum(len(c) for c in contents) / (1024 * 1024)
+    print(f"{label}: {len(contents)} files, {size_mb:.2f} MB")
+    results = {}
+    for engine in ENGINES:
+        files_per_sec, mb_per_sec, elapsed = throughput(contents, run, engine, repeat)
+        results[engine] = elapsed
+        print(f"  {engine:<5} {files_per_sec:8.1f} files/sec  {mb_per_sec:7.2f} MB/sec  ({elapsed:.3f}s)")
+    print(f"  lxml speedup: {results['bs4'] / results['lxml']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--po-dir", type=Path, help="Directory of PO HTML files")
+    parser.add_argument("--srv-dir", type=Path, help="Directory of SRV HTML files")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best run is reported)")
+    args = parser.parse_args()
+
+    if not args.po_dir and not args.srv_dir:
+        parser.error("pass --po-dir and/or --srv-dir")
+
+    if args.po_dir:
+        report("PO", load(args.po_dir), lambda content, engine: parse_po_html(content, engine=engine), args.repeat)
+    if args.srv_dir:
+        report(
+            "SRV",
+            load(args.srv_dir),
+            lambda content, engine: scrape_srv_html(content.decode("utf-8", errors="replace"), engine=engine),
+            args.repeat,
+        )
+
+
+if __name__ == "__main__":
+    main()
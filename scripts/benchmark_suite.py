@@ -0,0 +1,307 @@
+"""
+Scraper + Ingestion Benchmark Suite
+Times the parsing stages and end-to-end ingestion on a synthetic BHEL corpus
+(scripts/generate_bhel_html.py) and compares the results against a stored JSON baseline.
+
+Stages:
+    po.extract_po_header      BeautifulSoup header extraction (soup built beforehand)
+    po.extract_items          BeautifulSoup item/lot extraction (soup built beforehand)
+    po.parse_po_html[engine]  full PO parse per engine
+    srv.scrape_srv_html[engine], srv.iter_srv_html (streaming)
+    ingest.po                 parse + POIngestionService.ingest_po into a fresh database
+    ingest.srv                process_srv_file for the matching SRV files (after ingest.po)
+
+Each stage records its best-of-N time, a throughput rate and a digest of its output, so a
+comparison flags both throughput regressions and changed parser/ingestion output. Rates are
+compared after scaling by a CPU calibration workload; on shared machines raise --repeat.
+
+Usage:
+    python scripts/benchmark_suite.py [--pos 5] [--items 200] [--lots 3] [--srvs 40] [--srv-items 15]
+        [--repeat 3] [--save baseline.json]
+    python scripts/benchmark_suite.py --compare baseline.json [--threshold 0.15]
+        (sizes are taken from the baseline)
+"""
+
+import argparse
+import hashlib
+import json
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import BytesIO, StringIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmark_po_ingest import clone_schema  # noqa: E402
+from generate_bhel_html import FIRST_PO_NUMBER, FIRST_SRV_NUMBER, generate_po, generate_srv  # noqa: E402
+
+from backend.db.session import DATABASE_PATH  # noqa: E402
+from backend.services.ingest_po import POIngestionService  # noqa: E402
+from backend.services.po_scraper import extract_items, extract_po_header, parse_po_html  # noqa: E402
+from backend.services.srv_ingestion import process_srv_file  # noqa: E402
+from backend.services.srv_scraper import iter_srv_html, scrape_srv_html  # noqa: E402
+
+ENGINES = ("bs4", "lxml")
+DEFAULTS = {"pos": 5, "items": 200, "lots": 3, "srvs": 40, "srv_items": 15, "seed": 7}
+
+
+def digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _calibration_workload():
+    text = "<tr><td>1,234.500</td><td>27/09/2025</td><td>BEARING HOUSING</td></tr>" * 200
+    total = 0
+    for _ in range(200):
+        for cell in text.split("<td>"):
+            total += len(cell.strip().upper().replace(",", ""))
+    return total
+
+
+class Calibration:
+    """
+    Best time of a fixed CPU workload, sampled next to every timed run. Rates are scaled by it
+    when comparing, so a slower machine (or a busy moment on a shared one) is not reported as
+    a regression. Like the stage timings it keeps the best sample.
+    """
+
+    best = float("inf")
+
+    @classmethod
+    def sample(cls):
+        start = time.perf_counter()
+        _calibration_workload()
+        cls.best = min(cls.best, time.perf_counter() - start)
+
+
+def best_of(repeat: int, run):
+    """Best wall time of run() over `repeat` runs, plus the last result"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        Calibration.sample()
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def build_corpus(config):
+    pos, srvs = [], []
+    for i in range(config["pos"]):
+        po_number = FIRST_PO_NUMBER + i
+        pos.append(generate_po(po_number, config["items"], config["lots"], config["seed"]))
+        first_srv = FIRST_SRV_NUMBER + i * config["srvs"]
+        srvs.append(
+            generate_srv(
+                po_number, config["srvs"], config["srv_items"], config["items"], config["lots"], first_srv, config["seed"]
+            )
+        )
+    return pos, srvs
+
+
+# --------------------------------------------------
+# Stages
+# --------------------------------------------------
+def scraper_stages(pos, srvs, config, repeat):
+    from bs4 import BeautifulSoup
+
+    lot_rows = config["pos"] * config["items"] * config["lots"]
+    srv_rows = config["pos"] * config["srvs"] * config["srv_items"]
+    results = {}
+
+    def record(name, seconds, output, count, unit):
+        results[name] = {"seconds": round(seconds, 6), "rate": round(count / seconds, 2), "unit": unit}
+        results[name]["digest"] = digest(output)
+
+    soups = [BeautifulSoup(content, "lxml") for content in pos]
+    seconds, output = best_of(repeat, lambda: [extract_po_header(soup) for soup in soups])
+    record("po.extract_po_header", seconds, output, len(pos), "files/s")
+    seconds, output = best_of(repeat, lambda: [extract_items(soup) for soup in soups])
+    record("po.extract_items", seconds, output, lot_rows, "lot rows/s")
+
+    for engine in ENGINES:
+        seconds, output = best_of(
+            repeat, lambda engine=engine: [parse_po_html(content, engine=engine) for content in pos]
+        )
+        record(f"po.parse_po_html[{engine}]", seconds, output, lot_rows, "lot rows/s")
+
+    texts = [content.decode("utf-8") for content in srvs]
+    for engine in ENGINES:
+        seconds, output = best_of(
+            repeat, lambda engine=engine: [scrape_srv_html(text, engine=engine) for text in texts]
+        )
+        record(f"srv.scrape_srv_html[{engine}]", seconds, output, srv_rows, "rows/s")
+    seconds, output = best_of(repeat, lambda: [list(iter_srv_html(BytesIO(content))) for content in srvs])
+    record("srv.iter_srv_html", seconds, output, srv_rows, "rows/s")
+    return results
+
+
+def fresh_database(path: Path) -> sqlite3.Connection:
+    if path.exists():
+        path.unlink()
+    conn = sqlite3.connect(str(path))
+    clone_schema(DATABASE_PATH, conn)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.commit()
+    return conn
+
+
+def database_state(conn: sqlite3.Connection):
+    return [
+        tuple(conn.execute("SELECT COUNT(*), SUM(ord_qty), SUM(rcd_qty) FROM purchase_order_items").fetchone()),
+        tuple(conn.execute("SELECT COUNT(*), SUM(dely_qty) FROM purchase_order_deliveries").fetchone()),
+        tuple(conn.execute("SELECT COUNT(*), SUM(received_qty), SUM(accepted_qty) FROM srv_items").fetchone()),
+    ]
+
+
+def ingestion_stages(pos, srvs, config, repeat, workdir: Path):
+    service = POIngestionService()
+    lot_rows = config["pos"] * config["items"] * config["lots"]
+    srv_rows = config["pos"] * config["srvs"] * config["srv_items"]
+    results = {}
+    po_seconds = srv_seconds = float("inf")
+
+    for _ in range(repeat):
+        Calibration.sample()
+        conn = fresh_database(workdir / "bench.db")
+        try:
+            # Ingestion progress prints are captured so they do not swamp the report
+            with redirect_stdout(StringIO()):
+                start = time.perf_counter()
+                for content in pos:
+                    header, items = parse_po_html(content)
+                    success, warnings = service.ingest_po(conn, header, items)
+                    if not success:
+                        raise RuntimeError(f"PO ingestion failed: {warnings}")
+                po_seconds = min(po_seconds, time.perf_counter() - start)
+                po_state = database_state(conn)
+
+                start = time.perf_counter()
+                for i, content in enumerate(srvs):
+                    success, messages, _, failed = process_srv_file(content, f"{FIRST_PO_NUMBER + i}.html", conn)
+                    if not success or failed:
+                        raise RuntimeError(f"SRV ingestion failed: {messages[:3]}")
+                srv_seconds = min(srv_seconds, time.perf_counter() - start)
+                srv_state = database_state(conn)
+        finally:
+            conn.close()
+
+    results["ingest.po"] = {
+        "seconds": round(po_seconds, 6),
+        "rate": round(lot_rows / po_seconds, 2),
+        "unit": "lot rows/s",
+        "digest": digest(po_state),
+    }
+    results["ingest.srv"] = {
+        "seconds": round(srv_seconds, 6),
+        "rate": round(srv_rows / srv_seconds, 2),
+        "unit": "rows/s",
+        "digest": digest(srv_state),
+    }
+    return results
+
+
+# --------------------------------------------------
+# Baselines
+# --------------------------------------------------
+def compare(baseline, results, calibration: float, threshold: float) -> int:
+    """
+    Print current vs baseline rates; returns the number of regressions.
+    Baseline rates are scaled by the calibration ratio, so a uniformly slower machine
+    (or a slow moment on a shared one) is not reported as a regression.
+    """
+    scale = baseline["calibration"] / calibration
+    failures = 0
+    print(f"\n  machine speed vs baseline: {scale:.2f}x")
+    print(f"  {'stage':28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, base in baseline["results"].items():
+        current = results.get(name)
+        if current is None:
+            print(f"  {name:28} {base['rate']:>12,.1f} {'not run':>12}")
+            continue
+        change = current["rate"] / (base["rate"] * scale) - 1
+        flags = []
+        if change < -threshold:
+            flags.append("REGRESSION")
+        if current["digest"] != base["digest"]:
+            flags.append("OUTPUT CHANGED")
+        failures += bool(flags)
+        print(f"  {name:28} {base['rate']:>12,.1f} {current['rate']:>12,.1f} {change:>+7.1%}  {' '.join(flags)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pos", type=int, help=f"PO/SRV file pairs (default {DEFAULTS['pos']})")
+    parser.add_argument("--items", type=int, help=f"Items per PO (default {DEFAULTS['items']})")
+    parser.add_argument("--lots", type=int, help=f"Delivery lots per item (default {DEFAULTS['lots']})")
+    parser.add_argument("--srvs", type=int, help=f"SRVs per SRV file (default {DEFAULTS['srvs']})")
+    parser.add_argument("--srv-items", type=int, help=f"Rows per SRV (default {DEFAULTS['srv_items']})")
+    parser.add_argument("--seed", type=int, help=f"Generator seed (default {DEFAULTS['seed']})")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best run is kept)")
+    parser.add_argument("--skip-ingest", action="store_true", help="Only time the scrapers")
+    parser.add_argument("--save", type=Path, help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed throughput drop (fraction)")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    config = dict(baseline["config"]) if baseline else dict(DEFAULTS)
+    for key in DEFAULTS:
+        if getattr(args, key) is not None:
+            config[key] = getattr(args, key)
+    if baseline and config != baseline["config"]:
+        print(f"⚠️  Corpus differs from the baseline ({baseline['config']}); rates are not comparable", flush=True)
+
+    if config["srvs"] * config["srv_items"] > config["items"] * config["lots"] * 10:
+        parser.error("srvs * srv-items must not exceed items * lots * 10 (the generated lot quantity)")
+
+    print(f"Generating corpus: {config}", flush=True)
+    pos, srvs = build_corpus(config)
+    size_mb = sum(len(c) for c in pos + srvs) / (1024 * 1024)
+    print(f"  {len(pos)} PO files + {len(srvs)} SRV files, {size_mb:.2f} MB", flush=True)
+
+    results = scraper_stages(pos, srvs, config, args.repeat)
+    if not args.skip_ingest:
+        with tempfile.TemporaryDirectory() as tmp:
+            results.update(ingestion_stages(pos, srvs, config, args.repeat, Path(tmp)))
+
+    print(f"\n  {'stage':28} {'seconds':>10} {'rate':>14}  (best of {args.repeat})")
+    for name, r in results.items():
+        print(f"  {name:28} {r['seconds']:>10.4f} {r['rate']:>14,.1f} {r['unit']}")
+
+    if args.save:
+        args.save.write_text(
+            json.dumps(
+                {
+                    "created": datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "machine": platform.platform(),
+                    "config": config,
+                    "repeat": args.repeat,
+                    "calibration": round(Calibration.best, 6),
+                    "results": results,
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        print(f"\n💾 Baseline written to {args.save}")
+
+    if baseline:
+        failures = compare(baseline, results, Calibration.best, args.threshold)
+        if failures:
+            print(f"\n❌ {failures} stage(s) regressed or changed output (threshold {args.threshold:.0%})")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.compare} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
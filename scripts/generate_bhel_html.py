@@ -0,0 +1,214 @@
+"""
+Synthetic BHEL PO / SRV HTML Generator
+Builds PO and SRV exports shaped like the BHEL portal pages the scrapers read, at any size.
+Output is deterministic for a given seed, so a generated corpus doubles as a regression corpus
+(scripts/scraper_parity.py, scripts/benchmark_scrapers.py, scripts/benchmark_suite.py).
+
+PO:  contact/TIN table, header label tables (label row above value row), supplier and
+     inspection block, then the MATERIAL CODE item table: one 13-column row per delivery lot
+     followed by a description row [description, "", item no].
+SRV: the SRV listing table (22 columns), one row per SRV item, rows grouped by SRV number.
+     SRV rows reference the PO items/lots of the PO with the same number.
+
+Usage:
+    python scripts/generate_bhel_html.py <out_dir> [--pos 10] [--items 60] [--lots 2]
+        [--srvs 20] [--srv-items 10] [--seed 7]
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+from html import escape
+from pathlib import Path
+
+FIRST_PO_NUMBER = 9800001
+FIRST_SRV_NUMBER = 70000001
+
+SRV_COLUMNS = [
+    "DIV", "PO NO", "PO ITM", "SUB ITM", "SRV NO", "SRV ITM", "REV NO", "SRV DATE", "CHALLAN NO",
+    "CHALLAN DATE", "TAX INV", "TAX INV DT", "UNIT", "ORDER QTY", "CHALLAN QTY", "RECVD QTY",
+    "ACCEPTED QTY", "REJ QTY", "PMIR NO", "FINANCE DT", "CNOTE NO", "CNOTE DATE",
+]
+
+MATERIALS = [
+    ("BEARING HOUSING", "BRG", 3),
+    ("GASKET SPIRAL WOUND", "GSK", 5),
+    ("STUD M24X150 ASTM A193 B7", "STD", 5),
+    ("COUPLING HALF MACHINED", "CPL", 3),
+    ("VALVE BODY CASTING", "VLV", 2),
+    ("SHAFT SLEEVE SS410", "SLV", 3),
+    ("TERMINAL BOX ASSEMBLY", "TBX", 7),
+    ("IMPELLER 3 STAGE", "IMP", 2),
+]
+UNITS = ["NOS", "SET", "KG", "MTR"]
+
+
+def _cells(values, tag="td"):
+    return "".join(f"<{tag}>{escape(str(v))}</{tag}>" for v in values)
+
+
+def _dmy(d: date) -> str:
+    return d.strftime("%d/%m/%Y")
+
+
+def _po_dates(po_number: int):
+    po_date = date(2024, 1, 1) + timedelta(days=po_number % 365)
+    return po_date, po_date + timedelta(days=90)
+
+
+def generate_po(po_number: int, items: int = 60, lots: int = 2, seed: int = 7) -> bytes:
+    """PO export with `items` items of `lots` delivery lots each (lot quantity: 10 per lot number)"""
+    rng = random.Random(f"po-{seed}-{po_number}")
+    po_date, dely_date = _po_dates(po_number)
+    po_value = sum(10 * lots * (100 + n) for n in range(1, items + 1))
+
+    header_rows = [
+        [
+            ("PURCHASE ORDER", po_number),
+            ("PO DATE", _dmy(po_date)),
+            ("ENQUIRY", f"ENQ/{po_number % 10000}"),
+            ("ENQ DATE", _dmy(po_date - timedelta(days=30))),
+            ("QUOTATION", f"Q-{rng.randint(100, 999)}"),
+            ("QUOT-DATE", _dmy(po_date - timedelta(days=20))),
+        ],
+        [
+            ("SUPP CODE", "S09876"),
+            ("ORD-TYPE", "ZPO"),
+            ("DVN", rng.choice(["10", "21", "34"])),
+            ("PO STATUS", "OPEN"),
+            ("AMEND NO", "0"),
+            ("RC NO", ""),
+        ],
+        [
+            ("PO-VALUE", f"{po_value:,.2f}"),
+            ("NET PO VAL", f"{po_value:,.2f}"),
+            ("FOB VALUE", "0.00"),
+            ("EX RATE", "1"),
+            ("CURRENCY", "INR"),
+            ("TOTAL VALUE", f"{po_value:,.2f}"),
+        ],
+    ]
+
+    out = ["<html><head><title>Purchase Order</title></head><body>"]
+    out.append(
+        "<table><tr><td>TIN NO: 23456789012</td><td>ECC NO: AAACB4146PXM001</td><td>MPCT NO: 0941</td></tr>"
+        "<tr><td>PHONE: 0755-2506000</td><td>FAX: 0755-2540425</td><td>EMAIL: purchase@bhel.in</td>"
+        "<td>WEBSITE www.bhel.com</td></tr></table>"
+    )
+    for pairs in header_rows:
+        labels, values = zip(*pairs, strict=True)
+        out.append(f"<table border=1><tr>{_cells(labels, 'th')}</tr><tr>{_cells(values)}</tr></table>")
+    out.append(
+        "<table><tr><td>SUPP NAME M/S</td></tr><tr><td>SENSTO ENGINEERING WORKS, BHOPAL</td></tr></table>"
+        "<table><tr><td>Inspection By</td><td>BHEL QA</td></tr>"
+        "<tr><td>NAME</td><td>SHRI A K SHARMA</td><td>DESIGNATION</td><td>SR ENGINEER</td></tr>"
+        "<tr><td>PHONE NO</td><td>0755-2506123</td></tr></table>"
+    )
+
+    out.append(
+        "<table border=1><tr>"
+        + _cells(
+            [
+                "PO ITM", "MATERIAL CODE", "MTRL CAT", "UNIT", "PO RATE", "ORD QTY", "RCD QTY", "ITEM VALUE",
+                "LOT NO", "DELY QTY", "DELY DATE", "ENTRY ALLOW DATE", "DEST CODE",
+            ],
+            "th",
+        )
+        + "</tr>"
+    )
+    for n in range(1, items + 1):
+        name, drg, cat = MATERIALS[n % len(MATERIALS)]
+        unit = UNITS[n % len(UNITS)]
+        rate = 100 + n
+        ord_qty = 10 * lots
+        for lot in range(1, lots + 1):
+            out.append(
+                "<tr>"
+                + _cells(
+                    [
+                        n, f"{rng.randint(1000, 9999)}{n:06d}", cat, unit, f"{rate:.2f}", f"{ord_qty:.3f}",
+                        "0.000", f"{rate * ord_qty:,.2f}", lot, "10.000",
+                        _dmy(dely_date + timedelta(days=30 * (lot - 1))), _dmy(dely_date + timedelta(days=15)),
+                        rng.choice(["12", "14", "31"]),
+                    ]
+                )
+                + "</tr>"
+            )
+        out.append(f"<tr>{_cells([f'{name} DRG NO {drg}-{n:04d} REV 0{n % 3}', '', n])}</tr>")
+    out.append("</table></body></html>")
+    return "".join(out).encode("utf-8")
+
+
+def generate_srv(
+    po_number: int,
+    srvs: int = 20,
+    items_per_srv: int = 10,
+    po_items: int = 60,
+    lots: int = 2,
+    first_srv: int = FIRST_SRV_NUMBER,
+    seed: int = 7,
+) -> bytes:
+    """
+    SRV export for `po_number` with `srvs` SRVs of `items_per_srv` rows each.
+    Rows cycle through the PO's (item, lot) pairs and receive 1 unit each, so quantities stay
+    within the lots of the matching generate_po() output.
+    """
+    rng = random.Random(f"srv-{seed}-{po_number}-{first_srv}")
+    po_date, _ = _po_dates(po_number)
+    pairs = [(item, lot) for lot in range(1, lots + 1) for item in range(1, po_items + 1)]
+
+    out = [f"<html><body><table border=1><tr>{_cells(SRV_COLUMNS, 'th')}</tr>"]
+    row = 0
+    for s in range(srvs):
+        srv_number = first_srv + s
+        srv_date = po_date + timedelta(days=100 + s)
+        invoice = f"SE/{srv_number % 100000}/24-25"
+        for srv_item in range(1, items_per_srv + 1):
+            item, lot = pairs[row % len(pairs)]
+            row += 1
+            rejected = "0.000" if rng.random() > 0.1 else "0.500"
+            accepted = "1.000" if rejected == "0.000" else "0.500"
+            out.append(
+                "<tr>"
+                + _cells(
+                    [
+                        "BHP", po_number, item, lot, srv_number, srv_item, "0", _dmy(srv_date),
+                        f"{srv_number % 1000}", srv_date.strftime("%d-%m-%y"), invoice, srv_date.isoformat(),
+                        UNITS[item % len(UNITS)], f"{10 * lots:,.3f}", "1.000", "1.000", accepted, rejected,
+                        f"PM{srv_number}", "", "", "",
+                    ]
+                )
+                + "</tr>"
+            )
+    out.append("</table></body></html>")
+    return "".join(out).encode("utf-8")
+
+
+def write_corpus(out_dir: Path, pos: int, items: int, lots: int, srvs: int, srv_items: int, seed: int):
+    (out_dir / "po").mkdir(parents=True, exist_ok=True)
+    (out_dir / "srv").mkdir(parents=True, exist_ok=True)
+    for i in range(pos):
+        po_number = FIRST_PO_NUMBER + i
+        (out_dir / "po" / f"{po_number}.html").write_bytes(generate_po(po_number, items, lots, seed))
+        srv = generate_srv(po_number, srvs, srv_items, items, lots, FIRST_SRV_NUMBER + i * srvs, seed)
+        (out_dir / "srv" / f"{po_number}.html").write_bytes(srv)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir", type=Path, help="Corpus directory (po/ and srv/ are created inside)")
+    parser.add_argument("--pos", type=int, default=10, help="PO files (one SRV file per PO)")
+    parser.add_argument("--items", type=int, default=60, help="Items per PO")
+    parser.add_argument("--lots", type=int, default=2, help="Delivery lots per item")
+    parser.add_argument("--srvs", type=int, default=20, help="SRVs per SRV file")
+    parser.add_argument("--srv-items", type=int, default=10, help="Rows per SRV")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    write_corpus(args.out_dir, args.pos, args.items, args.lots, args.srvs, args.srv_items, args.seed)
+    size_mb = sum(p.stat().st_size for p in args.out_dir.rglob("*.html")) / (1024 * 1024)
+    print(f"✅ Wrote {args.pos} PO + {args.pos} SRV files ({size_mb:.2f} MB) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
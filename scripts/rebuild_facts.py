@@ -0,0 +1,82 @@
+"""
+Rebuild Fact Tables
+Recomputes fact_daily / fact_monthly (migration 042) from the document tables.
+
+The API keeps the facts current on its own (triggers mark the written days, readers refresh
+them); a rebuild is only needed after bulk edits with triggers disabled, a restore from an
+older backup or a change to the fact definitions. --check compares the incrementally
+maintained facts against a full rebuild first and reports any drift.
+
+Usage:
+    python scripts/rebuild_facts.py [--db path/to/database] [--check]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backend.db import session  # noqa: E402
+from backend.services.fact_tables import rebuild_facts, refresh_facts  # noqa: E402
+
+
+def _snapshot(db) -> dict:
+    return {
+        table: {tuple(row[:3]): tuple(row[3:]) for row in db.execute(f"SELECT * FROM {table}")}
+        for table in ("fact_daily", "fact_monthly")
+    }
+
+
+def _drift(before: dict, after: dict) -> int:
+    drift = 0
+    for table in before:
+        old, new = before[table], after[table]
+        for key in sorted(set(old) | set(new)):
+            a, b = old.get(key), new.get(key)
+            if a is None or b is None or any(abs((x or 0) - (y or 0)) > 1e-6 for x, y in zip(a, b, strict=True)):
+                drift += 1
+                print(f"   {table} {key}: {a} -> {b}")
+    return drift
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=Path, default=session.DATABASE_PATH, help="Database file")
+    parser.add_argument("--check", action="store_true", help="Report drift of the maintained facts first")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"❌ Database not found: {args.db}")
+        return 1
+    session.DATABASE_PATH = args.db
+    session.ensure_schema()
+
+    db = session.get_connection()
+    try:
+        before = None
+        if args.check:
+            pending = refresh_facts(db)
+            print(f"🔄 Refreshed {pending} pending day(s)")
+            before = _snapshot(db)
+
+        stats = rebuild_facts(db)
+        print(
+            f"✅ Rebuilt {stats['days']} day(s): {stats['daily_rows']} daily / "
+            f"{stats['monthly_rows']} monthly rows in {stats['elapsed_ms']} ms"
+        )
+
+        if before is not None:
+            drift = _drift(before, _snapshot(db))
+            if drift:
+                print(f"❌ {drift} fact row(s) differed from the rebuild (now corrected)")
+                return 1
+            print("✅ Maintained facts matched the rebuild")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
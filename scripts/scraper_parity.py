@@ -0,0 +1,122 @@
+"""
+Scraper Engine Parity Check
+Runs the BeautifulSoup ("bs4") and lxml engines over a fixture corpus of PO and/or SRV
+HTML files and reports every file whose extracted data differs. SRV files are also parsed
+with the streaming path (iter_srv_html) and compared with the buffered scraper; files with
+nested tables are never streamed (srv_streamable) and only checked for that.
+
+Usage:
+    python scripts/scraper_parity.py --po-dir <po_html_dir> --srv-dir <srv_html_dir>
+"""
+
+import argparse
+import io
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from backend.services.po_scraper import parse_po_html  # noqa: E402
+from backend.services.srv_scraper import has_nested_tables, iter_srv_html, scrape_srv_html  # noqa: E402
+
+
+def html_files(corpus_dir: Path):
+    return sorted(p for p in corpus_dir.rglob("*") if p.suffix.lower() in (".html", ".htm"))
+
+
+def first_difference(expected, actual, path="$"):
+    """Path and values of the first differing node between two nested structures"""
+    if type(expected) is not type(actual):
+        return path, expected, actual
+    if isinstance(expected, dict):
+        for key in sorted(expected.keys() | actual.keys(), key=str):
+            if key not in expected or key not in actual:
+                return f"{path}.{key}", expected.get(key, "<missing>"), actual.get(key, "<missing>")
+            diff = first_difference(expected[key], actual[key], f"{path}.{key}")
+            if diff:
+                return diff
+        return None
+    if isinstance(expected, (list, tuple)):
+        if len(expected) != len(actual):
+            return f"{path}.length", len(expected), len(actual)
+        for idx, (e, a) in enumerate(zip(expected, actual, strict=True)):
+            diff = first_difference(e, a, f"{path}[{idx}]")
+            if diff:
+                return diff
+        return None
+    return None if expected == actual else (path, expected, actual)
+
+
+def scrape_srv(content: bytes, engine: str):
+    # SRV ingestion decodes uploads as UTF-8 before scraping
+    if engine != "stream":
+        return scrape_srv_html(content.decode("utf-8", errors="replace"), engine=engine)
+
+    # Streamed SRVs reappearing later in the file are merged back, as process_srv_file ingests them
+    groups = {}
+    for group in iter_srv_html(io.BytesIO(content)):
+        group["header"].pop("continuation", None)
+        srv_number = group["header"]["srv_number"]
+        if srv_number in groups:
+            groups[srv_number]["items"].extend(group["items"])
+        else:
+            groups[srv_number] = group
+    return list(groups.values())
+
+
+def check(files, run, engines=("bs4", "lxml")):
+    failures = 0
+    for path in files:
+        content = path.read_bytes()
+        results = []
+        for engine in engines:
+            try:
+                results.append(run(content, engine))
+            except Exception as e:
+                results.append(f"error: {type(e).__name__}")
+
+        diff = first_difference(*results)
+        if diff:
+            failures += 1
+            where, e, a = diff
+            print(f"❌ {path.name}: {where}: {engines[0]}={e!r} {engines[1]}={a!r}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--po-dir", type=Path, help="Directory of PO HTML fixtures")
+    parser.add_argument("--srv-dir", type=Path, help="Directory of SRV HTML fixtures")
+    args = parser.parse_args()
+
+    if not args.po_dir and not args.srv_dir:
+        parser.error("pass --po-dir and/or --srv-dir")
+
+    failures = 0
+    total = 0
+    if args.po_dir:
+        files = html_files(args.po_dir)
+        total += len(files)
+        failures += check(files, lambda content, engine: parse_po_html(content, engine=engine))
+        print(f"PO : {len(files)} files checked")
+
+    if args.srv_dir:
+        files = html_files(args.srv_dir)
+        total += len(files)
+        failures += check(files, scrape_srv)
+        print(f"SRV: {len(files)} files checked")
+
+        nested = [path for path in files if has_nested_tables(path.read_bytes())]
+        streamed = [path for path in files if path not in nested]
+        failures += check(streamed, scrape_srv, engines=("lxml", "stream"))
+        print(f"SRV stream: {len(streamed)} files checked, {len(nested)} with nested tables kept buffered")
+
+    if failures:
+        print(f"❌ {failures}/{total} file(s) differ between engines")
+        sys.exit(1)
+    print(f"✅ bs4 and lxml engines agree on all {total} files")
+
+
+if __name__ == "__main__":
+    main()